@@ -1,10 +1,11 @@
 from flask import Flask
 from flask_cors import CORS
+from .config import MODEL_WARMUP
 from .routes.stats import stats_bp
 from .routes.rules import rules_bp
 from .routes.alerts import alerts_bp
 
-def create_app():
+def create_app(warmup=None):
     app = Flask(__name__)
     CORS(app)
 
@@ -16,8 +17,23 @@ def create_app():
     app.register_blueprint(stats_bp, url_prefix='/api/stats')
     app.register_blueprint(alerts_bp, url_prefix='/api')
 
+    # TensorFlow et le modèle sont chargés en arrière-plan, pas à l'import
+    if MODEL_WARMUP if warmup is None else warmup:
+        from .model.ai_model import start_model_warmup
+        start_model_warmup()
+
+    # Détection et chargement à chaud des nouvelles versions de data/models
+    from .model.registry import get_model_registry
+    get_model_registry().start_watching()
+
     @app.route('/health')
     def health_check():
         return {'status': 'ok'}
 
+    @app.route('/health/ready')
+    def readiness_check():
+        """Prêt quand le modèle est chargé et préchauffé (503 tant que le préchauffage n'est pas fini)."""
+        from .model.ai_model import WARMUP_STATE
+        return dict(WARMUP_STATE), 200 if WARMUP_STATE['status'] == 'ready' else 503
+
     return app
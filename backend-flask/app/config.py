@@ -4,4 +4,105 @@ DATA_DIR = Path(__file__).parent / 'data'
 DATA_FILE = DATA_DIR / 'network_data.json'
 METRICS_FILE = DATA_DIR / 'model_metrics.json'
 HISTORY_FILE = DATA_DIR / 'training_history.json'
-TEST_LOGS_FILE = DATA_DIR / 'test_logs.json' 
\ No newline at end of file
+TEST_LOGS_FILE = DATA_DIR / 'test_logs.json' 
+DB_FILE = DATA_DIR / 'ids.db'
+SETTINGS_FILE = DATA_DIR / 'settings.json'
+
+# Puits d'alertes asynchrone (app/utils/alert_sink.py)
+ALERT_QUEUE_MAX = 10000            # taille maximale de la file en mémoire
+ALERT_FLUSH_INTERVAL_MS = 200      # écriture au plus tard toutes les N ms...
+ALERT_FLUSH_MAX_BATCH = 500        # ...ou dès que M alertes sont en attente
+ALERT_BACKPRESSURE = 'drop_oldest' # 'drop_oldest', 'block' ou 'sample'
+ALERT_SAMPLE_RATE = 0.1            # fraction conservée en mode 'sample' quand la file sature
+
+# Agrégateur de statistiques en mémoire (app/utils/stats_aggregator.py)
+STATS_SNAPSHOT_FILE = DATA_DIR / 'stats_snapshot.json'
+STATS_SNAPSHOT_INTERVAL = 30       # secondes entre deux snapshots disque
+STATS_ROLLING_WINDOW = 300         # fenêtre (s) du taux de détection glissant
+
+# Flux temps réel /api/alerts/stream (app/utils/alert_bus.py)
+STREAM_CLIENT_QUEUE = 1000         # événements en attente par client avant resynchronisation
+STREAM_HEARTBEAT_INTERVAL = 15     # secondes entre deux commentaires keep-alive
+STREAM_REPLAY_BATCH = 500          # alertes relues par requête lors d'une reprise
+
+# Préchauffage du modèle au démarrage (thread d'arrière-plan, voir /health/ready)
+MODEL_WARMUP = True
+
+# Modèles entraînés (data/models/ids_model_*) et moteur d'inférence
+MODELS_DIR = Path(__file__).parent.parent.parent / 'data' / 'models'
+INFERENCE_BACKEND = 'keras'        # 'keras', 'tflite' ou 'onnx' (exporter avec app/model/export_model.py)
+INFERENCE_THREADS = 0              # threads CPU des runtimes TFLite/ONNX (0 = choix du runtime)
+
+# IDSModel.predict : en dessous de ce nombre de lignes, appel direct du graphe tf.function
+# (évite le pipeline tf.data de Keras predict() pour les petits lots)
+PREDICT_FAST_PATH_MAX_BATCH = 256
+
+# Registre des modèles (app/model/registry.py) : détection et chargement à chaud des nouvelles versions
+MODEL_WATCH_INTERVAL = 30          # secondes entre deux scans de MODELS_DIR (0 = désactivé)
+MODEL_STABLE_SECONDS = 10          # une version modifiée plus récemment est considérée en cours de copie
+
+# Capture de paquets (external_dos_detector.py, app/utils/packet_ring.py)
+CAPTURE_BACKEND = 'auto'           # 'ring' (AF_PACKET TPACKET_V3), 'recvfrom' (socket raw) ou 'auto'
+CAPTURE_INTERFACE = None           # None = toutes les interfaces
+CAPTURE_RING_BLOCK_SIZE = 1 << 20  # 1 Mo par bloc
+CAPTURE_RING_BLOCKS = 64           # 64 Mo d'anneau au total
+CAPTURE_RING_BLOCK_TIMEOUT_MS = 10 # le noyau rend un bloc partiel au bout de N ms
+CAPTURE_WORKERS = 1                # > 1 : processus de capture en PACKET_FANOUT (app/utils/capture_workers.py)
+CAPTURE_FILTER = True              # filtre BPF noyau dérivé des modules de settings.json (app/utils/bpf_filter.py)
+CAPTURE_FILTER_REFRESH = 2         # secondes entre deux vérifications de settings.json
+
+# Pipeline de détection (app/utils/detector_pipeline.py) : une capture, un décodage, des plugins
+DETECTOR_PLUGINS = ['syn_flood', 'port_flood', 'datagram_flood', 'port_scan', 'flow_scoring']
+FLOOD_WINDOW = 10                  # secondes couvertes par les compteurs de flood
+SYN_FLOOD_THRESHOLD = 20           # SYN par (source, destination, port) sur la fenêtre
+PORT_FLOOD_THRESHOLD = 20          # paquets TCP d'une source vers un port surveillé
+PORT_FLOOD_PORTS = [80]            # ports surveillés par le plugin port_flood
+UDP_FLOOD_THRESHOLD = 200          # UDP / ICMP : trafic légitime plus dense que les SYN
+ICMP_FLOOD_THRESHOLD = 100
+ALERT_COOLDOWN = 30                # secondes entre deux alertes d'un même type pour une source
+
+# État des détecteurs par clé (app/utils/state_table.py) : borné contre les floods à sources usurpées
+DETECTOR_STATE_MAX_KEYS = 100000   # clés par table au-delà desquelles la moins récemment utilisée est évincée
+DETECTOR_STATE_TTL = 300           # secondes d'inactivité avant suppression d'une clé
+
+# Détection de flood SYN en mémoire fixe (app/utils/sketches.py) : Count-Min + top-k Space-Saving par source
+SYN_SKETCH = True                  # active le détecteur par sketch du plugin syn_flood
+SYN_SKETCH_THRESHOLD = 50          # SYN garantis par source sur la fenêtre avant alerte "DoS (SYN flood)"
+SYN_SKETCH_WINDOW = 10             # secondes
+SYN_SKETCH_WIDTH = 1 << 14         # compteurs par ligne (puissance de 2) : erreur ~ e * paquets / largeur
+SYN_SKETCH_DEPTH = 4               # lignes (fonctions de hachage)
+SYN_SKETCH_TOP_K = 64              # sources suivies par Space-Saving
+
+# Cardinalités par clé (HyperLogLog, app/utils/sketches.py et app/utils/scan_tracker.py) : scans et DDoS
+CARDINALITY_PRECISION = 8          # 2^p registres d'un octet par estimateur (erreur ~1.04/sqrt(2^p), 6.5 %)
+CARDINALITY_WINDOW = 60            # secondes couvertes par les estimations
+PORT_SCAN_DISTINCT_PORTS = 20      # ports distincts visés par une source avant alerte "Port Scan"
+HOST_SCAN_DISTINCT_HOSTS = 20      # hôtes distincts visés par une source avant alerte "Port Scan" (balayage)
+DDOS_DISTINCT_SOURCES = 100        # sources distinctes vers une destination avant alerte "DDoS"
+
+# Table de flux (app/utils/flow_table.py) : connexions reconstruites depuis les paquets capturés,
+# classées par le modèle dans le plugin flow_scoring
+FLOW_TABLE_CAPACITY = 1000000      # flux simultanés au plus (éviction des SYN sans réponse d'abord)
+FLOW_EMBRYONIC_TIMEOUT = 5         # secondes : SYN sans SYN-ACK émis comme S0 / REJ
+FLOW_TCP_TIMEOUT = 60              # secondes d'inactivité d'une connexion TCP établie
+FLOW_UDP_TIMEOUT = 10              # secondes d'inactivité d'un flux UDP / ICMP
+FLOW_PAIR_WINDOW = 60              # secondes : flux terminés agrégés par paire (source, destination) pour NetworkScanner
+FLOW_SCORE_BATCH = 256             # flux terminés classés en un seul appel au modèle
+FLOW_SCORE_MAX_RATE = 2000         # flux classés par seconde au plus (au-delà : features de trafic seulement)
+FLOW_SCORE_QUEUE_MAX = 20000       # flux en attente de classement (thread de app/utils/flow_scorer.py)
+FLOW_SCORE_FLUSH_INTERVAL = 1.0    # secondes au plus avant de classer un lot incomplet
+
+# Features de trafic NSL-KDD (app/utils/traffic_features.py) calculées sur les flux terminés
+TRAFFIC_TIME_WINDOW = 2            # secondes : count, srv_count et taux associés
+TRAFFIC_HOST_WINDOW = 100          # dernières connexions : features dst_host_*
+
+# Instantané des sockets TCP/UDP (app/utils/sock_diag.py) pour le NetworkScanner, le fallback psutil et /api/stats/system
+SOCKET_SNAPSHOT_BACKEND = 'auto'   # 'netlink' (NETLINK_SOCK_DIAG, Linux), 'psutil' ou 'auto'
+
+# Ordonnanceur adaptatif des scans de connexions (app/utils/adaptive_scheduler.py)
+SCAN_BASE_INTERVAL = 3             # secondes entre deux cycles au démarrage (ancien intervalle fixe)
+SCAN_MIN_INTERVAL = 0.5            # intervalle le plus court, sous attaque
+SCAN_MAX_INTERVAL = 15             # intervalle le plus long, au repos
+SCAN_BUSY_CHURN = 100              # sockets ajoutées/retirées/changées par cycle au-delà desquelles l'intervalle est divisé par 2
+SCAN_BACKOFF = 1.5                 # allongement de l'intervalle par cycle sans changement
+SCAN_CPU_BUDGET = 0.05             # part d'un cœur au plus consacrée aux cycles (5 %)
@@ -1,14 +1,32 @@
 import random
-from typing import Tuple, Dict, Any, List
+import threading
+import time
+from typing import Tuple, Dict, Any, List, Optional, TYPE_CHECKING
 import numpy as np
 import os
 import json
-from .tf_model import IDSModel, ATTACK_TYPES
-from ..utils.preprocessing import extract_features, normalize_features
+from .labels import ATTACK_TYPES
+from .inference_backend import InferenceBackend, KerasBackend
+from .registry import get_model_registry
+from ..config import MODELS_DIR
+from ..utils.preprocessing import extract_features
+from ..utils.feature_engine import build_feature_row, build_feature_matrix, NUM_FEATURES
+
+if TYPE_CHECKING:
+    # TensorFlow n'est importé qu'au premier chargement du modèle (voir registry.py)
+    from .tf_model import IDSModel
 
 # Chemins des fichiers du modèle
-MODEL_DIR = os.path.join(os.path.dirname(__file__), "../../../data/models")
-LATEST_MODEL = None  # Sera chargé à la première utilisation
+MODEL_DIR = str(MODELS_DIR)
+
+# État du préchauffage en arrière-plan (exposé par /health/ready)
+WARMUP_STATE = {
+    'status': 'idle',  # idle, loading, ready, failed
+    'started_at': None,
+    'ready_at': None,
+    'duration': None,
+    'error': None
+}
 
 # SEUILS CORRIGÉS - Plus bas pour détecter plus d'attaques
 DETECTION_THRESHOLDS = {
@@ -67,14 +85,18 @@ def detect_probe_with_rules(data: Dict[str, Any]) -> Tuple[bool, float]:
     
     return False, 0.0
 
-def load_latest_model() -> IDSModel:
+def latest_model_dir() -> str:
+    """Nom du dernier dossier ids_model_* complet, selon le registre des modèles."""
+    latest = get_model_registry().latest()
+    if latest is None:
+        raise FileNotFoundError("Aucun modèle trouvé. Veuillez entraîner le modèle d'abord.")
+    return latest.name
+
+def load_latest_model() -> 'IDSModel':
     """Charge le dernier modèle entraîné."""
+    from .tf_model import IDSModel
     try:
-        model_dirs = [d for d in os.listdir(MODEL_DIR) if d.startswith("ids_model_")]
-        if not model_dirs:
-            raise FileNotFoundError("Aucun modèle trouvé. Veuillez entraîner le modèle d'abord.")
-        
-        latest_dir = sorted(model_dirs)[-1]
+        latest_dir = latest_model_dir()
         model_path = os.path.join(MODEL_DIR, latest_dir, "model")
         scaler_path = os.path.join(MODEL_DIR, latest_dir, "scaler.npy")
         encoder_path = os.path.join(MODEL_DIR, latest_dir, "label_encoder.json")
@@ -83,15 +105,35 @@ def load_latest_model() -> IDSModel:
         print(f"Erreur lors du chargement du modèle: {e}")
         return IDSModel(input_shape=(145, 1), num_classes=len(ATTACK_TYPES))
 
-def get_model() -> IDSModel:
-    """Retourne l'instance du modèle, la charge si nécessaire."""
-    global LATEST_MODEL
-    if LATEST_MODEL is None:
-        try:
-            LATEST_MODEL = load_latest_model()
-        except Exception:
-            LATEST_MODEL = IDSModel(input_shape=(145, 1), num_classes=len(ATTACK_TYPES))
-    return LATEST_MODEL
+def get_model() -> 'IDSModel':
+    """Retourne le modèle Keras de la version active (chargé depuis le disque si le moteur actif n'est pas Keras)."""
+    predictor = get_predictor()
+    if isinstance(predictor, KerasBackend):
+        return predictor.model
+    return load_latest_model()
+
+def get_predictor() -> InferenceBackend:
+    """Retourne le moteur d'inférence du modèle actif (chargé au premier appel, remplacé à chaud par le registre)."""
+    return get_model_registry().get_predictor()
+
+def warm_up_model():
+    """Charge le modèle et exécute un lot factice pour que la première requête ne paie pas ce coût."""
+    WARMUP_STATE.update(status='loading', started_at=time.time(), error=None)
+    start = time.perf_counter()
+    try:
+        get_predictor().predict(np.zeros((1, NUM_FEATURES, 1), dtype=np.float32))
+        WARMUP_STATE.update(status='ready', ready_at=time.time(),
+                            duration=round(time.perf_counter() - start, 3))
+        print(f"✅ Modèle préchauffé en {WARMUP_STATE['duration']}s")
+    except Exception as e:
+        WARMUP_STATE.update(status='failed', error=str(e), duration=round(time.perf_counter() - start, 3))
+        print(f"❌ Échec du préchauffage du modèle: {e}")
+
+def start_model_warmup() -> threading.Thread:
+    """Lance warm_up_model() dans un thread d'arrière-plan."""
+    thread = threading.Thread(target=warm_up_model, name='model-warmup', daemon=True)
+    thread.start()
+    return thread
 
 def debug_prediction(data, features_normalized, predictions):
     import numpy as np
@@ -109,135 +151,147 @@ def debug_prediction(data, features_normalized, predictions):
     else:
         print(f"❌ Classe prédite inconnue (index={pred_idx}) ! ATTACK_TYPES keys: {list(ATTACK_TYPES.keys())}")
 
-def predict_intrusion(data: Dict[str, Any]) -> Tuple[bool, str, float]:
-    """VERSION COMPLÈTEMENT CORRIGÉE de predict_intrusion"""
-    try:
-        # Vérifier d'abord avec les règles de détection DoS
-        is_dos, dos_confidence = detect_dos_with_rules(data)
-        if is_dos:
-            print(f"✅ DoS détecté par règles avec confiance {dos_confidence}")
-            return True, "DoS", dos_confidence
-        
-        # Vérifier avec les règles de détection Probe
-        is_probe, probe_confidence = detect_probe_with_rules(data)
-        if is_probe:
-            print(f"✅ Probe détecté par règles avec confiance {probe_confidence}")
-            return True, "Probe", probe_confidence
-        
-        # Extraction et normalisation des features
-        features = extract_features(data)
-        
-        if len(features) != 145:
-            if len(features) < 145:
-                features.extend([0.0] * (145 - len(features)))
-            else:
-                features = features[:145]
-        
-        features_normalized = normalize_features(features)
-        
-        if len(features_normalized) != 145:
-            print(f"❌ ERREUR: Taille après normalisation: {len(features_normalized)}")
-            # Fallback simple
-            connections_count = data.get('connections_count', 0)
-            if connections_count > 100:
-                return True, "DoS", 0.7
-            elif connections_count > 10:
-                return True, "Probe", 0.6
-            return False, "Normal", 0.5
-        
-        # Reshape pour le modèle
-        X = np.array(features_normalized, dtype=np.float32).reshape(1, 145, 1)
+def predict_with_rules(data: Dict[str, Any]) -> Optional[Tuple[bool, str, float]]:
+    """Applique les règles DoS puis Probe, retourne None si l'IA doit décider."""
+    # Vérifier d'abord avec les règles de détection DoS
+    is_dos, dos_confidence = detect_dos_with_rules(data)
+    if is_dos:
+        print(f"✅ DoS détecté par règles avec confiance {dos_confidence}")
+        return True, "DoS", dos_confidence
+    
+    # Vérifier avec les règles de détection Probe
+    is_probe, probe_confidence = detect_probe_with_rules(data)
+    if is_probe:
+        print(f"✅ Probe détecté par règles avec confiance {probe_confidence}")
+        return True, "Probe", probe_confidence
+    
+    return None
 
-        # Prédiction IA
-        model = get_model()
-        predictions = model.predict(X)
-        predicted_class = np.argmax(predictions[0])
-        confidence = float(np.max(predictions[0]))
-        
-        # Afficher le debug
-        debug_prediction(data, features_normalized, predictions)
+def fallback_prediction(data: Dict[str, Any]) -> Tuple[bool, str, float]:
+    """Fallback simple basé sur le nombre de connexions (erreur ou features invalides)."""
+    connections_count = data.get('connections_count', 0)
+    if connections_count > 100:
+        return True, "DoS", 0.7
+    elif connections_count > 10:
+        return True, "Probe", 0.6
+    return False, "Normal", 0.5
+
+def interpret_prediction(data: Dict[str, Any], prediction: np.ndarray) -> Tuple[bool, str, float]:
+    """Convertit la sortie softmax d'un flux en résultat (renforcement, seuils, fallback)."""
+    predicted_class = int(np.argmax(prediction))
+    confidence = float(np.max(prediction))
+    
+    # Conversion en résultat
+    if predicted_class < len(ATTACK_TYPES):
+        attack_type = ATTACK_TYPES[predicted_class]
+    else:
+        attack_type = "Normal"
+    
+    # NOUVELLE LOGIQUE : Renforcer les prédictions évidentes
+    connections_count = data.get('connections_count', 0)
+    dest_port = data.get('dest_port', 0)
+    
+    # Renforcer DoS si évident
+    if attack_type == "DoS" and connections_count > 80:
+        confidence = min(confidence + 0.2, 0.95)
+        print(f"🔥 Confiance DoS renforcée: {confidence}")
+    
+    # Renforcer Probe si évident  
+    elif attack_type == "Probe" and 10 <= connections_count <= 60:
+        confidence = min(confidence + 0.15, 0.90)
+        print(f"🔍 Confiance Probe renforcée: {confidence}")
+    
+    # Correction basée sur les patterns évidents
+    elif attack_type == "Normal":
+        if connections_count > 100:
+            attack_type = "DoS"
+            confidence = 0.8
+            print(f"🔄 Correction: Normal -> DoS (connexions: {connections_count})")
+        elif 15 <= connections_count <= 50:
+            attack_type = "Probe" 
+            confidence = 0.7
+            print(f"🔄 Correction: Normal -> Probe (connexions: {connections_count})")
+    
+    # Appliquer les seuils de détection
+    threshold = DETECTION_THRESHOLDS.get(attack_type, 0.5)
+    print(f"🎯 Seuil pour {attack_type}: {threshold}, Confiance: {confidence}")
+    
+    # Si confiance insuffisante, utiliser les règles de fallback
+    if confidence < threshold:
+        print(f"⚠️ Confiance {confidence} < seuil {threshold}")
         
-        # Conversion en résultat
-        if predicted_class < len(ATTACK_TYPES):
-            attack_type = ATTACK_TYPES[predicted_class]
+        # Règles de fallback intelligentes
+        if connections_count > 100:
+            attack_type = "DoS"
+            confidence = 0.7
+            print(f"🔄 Fallback -> DoS")
+        elif 10 <= connections_count <= 60:
+            attack_type = "Probe"
+            confidence = 0.6
+            print(f"🔄 Fallback -> Probe")
         else:
             attack_type = "Normal"
-        
-        # NOUVELLE LOGIQUE : Renforcer les prédictions évidentes
-        connections_count = data.get('connections_count', 0)
-        dest_port = data.get('dest_port', 0)
-        
-        # Renforcer DoS si évident
-        if attack_type == "DoS" and connections_count > 80:
-            confidence = min(confidence + 0.2, 0.95)
-            print(f"🔥 Confiance DoS renforcée: {confidence}")
-        
-        # Renforcer Probe si évident  
-        elif attack_type == "Probe" and 10 <= connections_count <= 60:
-            confidence = min(confidence + 0.15, 0.90)
-            print(f"🔍 Confiance Probe renforcée: {confidence}")
-        
-        # Correction basée sur les patterns évidents
-        elif attack_type == "Normal":
-            if connections_count > 100:
-                attack_type = "DoS"
-                confidence = 0.8
-                print(f"🔄 Correction: Normal -> DoS (connexions: {connections_count})")
-            elif 15 <= connections_count <= 50:
-                attack_type = "Probe" 
-                confidence = 0.7
-                print(f"🔄 Correction: Normal -> Probe (connexions: {connections_count})")
-        
-        # Appliquer les seuils de détection
-        threshold = DETECTION_THRESHOLDS.get(attack_type, 0.5)
-        print(f"🎯 Seuil pour {attack_type}: {threshold}, Confiance: {confidence}")
-        
-        # Si confiance insuffisante, utiliser les règles de fallback
-        if confidence < threshold:
-            print(f"⚠️ Confiance {confidence} < seuil {threshold}")
+            confidence = 0.5
+            print(f"🔄 Fallback -> Normal")
+    
+    is_intrusion = attack_type != "Normal"
+    print(f"🎯 RÉSULTAT FINAL: {attack_type}, Intrusion: {is_intrusion}, Confiance: {confidence}")
+    return is_intrusion, attack_type, confidence
+
+def predict_intrusion_batch(flows: List[Dict[str, Any]]) -> List[Tuple[bool, str, float]]:
+    """
+    Classifie une liste de flux en un seul appel au modèle.
+    Les règles sont appliquées flux par flux, puis les features de tous les flux
+    restants sont extraites en une matrice (N, 145, 1) pour une seule passe forward.
+    Les résultats sont retournés dans l'ordre des flux en entrée.
+    """
+    results: List[Optional[Tuple[bool, str, float]]] = [None] * len(flows)
+    pending_indices = []
+    
+    for i, data in enumerate(flows):
+        try:
+            rule_result = predict_with_rules(data)
+            if rule_result is not None:
+                results[i] = rule_result
+                continue
+            pending_indices.append(i)
+        except Exception as e:
+            print(f"❌ Erreur lors de l'application des règles au flux {i} : {str(e)}")
+            results[i] = fallback_prediction(data)
+    
+    if pending_indices:
+        try:
+            # Extraction vectorisée puis une seule prédiction IA pour tout le lot
+            features_normalized = build_feature_matrix([flows[i] for i in pending_indices])
+            X = features_normalized.reshape(len(pending_indices), 145, 1)
+            predictions = get_predictor().predict(X)
+            
+            # Le debug détaillé n'est affiché que pour les prédictions unitaires
+            if len(pending_indices) == 1:
+                debug_prediction(flows[pending_indices[0]], features_normalized[0].tolist(), predictions)
             
-            # Règles de fallback intelligentes
-            if connections_count > 100:
-                attack_type = "DoS"
-                confidence = 0.7
-                print(f"🔄 Fallback -> DoS")
-            elif 10 <= connections_count <= 60:
-                attack_type = "Probe"
-                confidence = 0.6
-                print(f"🔄 Fallback -> Probe")
-            else:
-                attack_type = "Normal"
-                confidence = 0.5
-                print(f"🔄 Fallback -> Normal")
+            for row, i in enumerate(pending_indices):
+                results[i] = interpret_prediction(flows[i], predictions[row])
         
-        is_intrusion = attack_type != "Normal"
-        print(f"🎯 RÉSULTAT FINAL: {attack_type}, Intrusion: {is_intrusion}, Confiance: {confidence}")
-        return is_intrusion, attack_type, confidence
+        except Exception as e:
+            print(f"❌ Erreur lors de la prédiction : {str(e)}")
+            import traceback
+            print(f"Traceback: {traceback.format_exc()}")
+            
+            # Fallback simple en cas d'erreur
+            for i in pending_indices:
+                results[i] = fallback_prediction(flows[i])
+    
+    return results
 
-    except Exception as e:
-        print(f"❌ Erreur lors de la prédiction : {str(e)}")
-        import traceback
-        print(f"Traceback: {traceback.format_exc()}")
-        
-        # Fallback simple en cas d'erreur
-        connections_count = data.get('connections_count', 0)
-        if connections_count > 100:
-            return True, "DoS", 0.7
-        elif connections_count > 10:
-            return True, "Probe", 0.6
-        return False, "Normal", 0.5
+def predict_intrusion(data: Dict[str, Any]) -> Tuple[bool, str, float]:
+    """VERSION COMPLÈTEMENT CORRIGÉE de predict_intrusion"""
+    return predict_intrusion_batch([data])[0]
 
 def preprocess_data(data: Dict[str, Any]) -> Dict[str, Any]:
     """Prétraite les données pour le modèle : extrait et normalise les features."""
     try:
-        features = extract_features(data)
-        if len(features) != 145:
-            if len(features) < 145:
-                features.extend([0.0] * (145 - len(features)))
-            else:
-                features = features[:145]
-        
-        features_normalized = normalize_features(features)
+        features_normalized = build_feature_row(data)
         data['features'] = features_normalized
         data['features_count'] = len(features_normalized)
         return data
@@ -278,6 +332,7 @@ def load_model(model_path=None, scaler_path=None, encoder_path=None):
     """Charge le modèle ML depuis le fichier."""
     if model_path is None:
         return load_latest_model()
+    from .tf_model import IDSModel
     return IDSModel.load(model_path, scaler_path, encoder_path)
 
 def save_model(model, model_path, scaler_path=None, encoder_path=None):
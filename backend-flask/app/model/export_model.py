@@ -0,0 +1,81 @@
+"""
+Exporte un modèle Keras data/models/ids_model_*/model vers TFLite ou ONNX,
+puis vérifie que le modèle exporté donne les mêmes sorties que Keras.
+
+Usage (depuis backend-flask) :
+    python -m app.model.export_model --format tflite
+    python -m app.model.export_model --format onnx --model ids_model_20250728_060424
+"""
+
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+
+from .ai_model import MODEL_DIR, latest_model_dir
+from .inference_backend import EXPORT_FILES, check_parity, export_path, load_backend, parity_inputs
+from ..utils.feature_engine import NUM_FEATURES
+
+
+def export_tflite(keras_model, path: str, allow_tf_ops: bool = False):
+    import tensorflow as tf
+    converter = tf.lite.TFLiteConverter.from_keras_model(keras_model)
+    if allow_tf_ops:
+        # Repli si certaines couches n'ont pas d'équivalent TFLite natif (nécessite le runtime TF complet)
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS, tf.lite.OpsSet.SELECT_TF_OPS]
+    with open(path, 'wb') as f:
+        f.write(converter.convert())
+
+
+def export_onnx(keras_model, path: str, opset: int = 13):
+    import tensorflow as tf
+    import tf2onnx
+    signature = [tf.TensorSpec((None, NUM_FEATURES, 1), tf.float32, name='input')]
+    tf2onnx.convert.from_keras(keras_model, input_signature=signature, opset=opset, output_path=path)
+
+
+def export_model(model_name: str, fmt: str, allow_tf_ops: bool = False, parity_samples: int = 512) -> dict:
+    """Exporte le modèle et retourne le rapport de parité (enregistré à côté du fichier exporté)."""
+    model_dir = os.path.join(MODEL_DIR, model_name)
+    keras_backend = load_backend('keras', model_dir)
+    path = export_path(model_dir, fmt)
+
+    print(f"📦 Export de {model_name} au format {fmt}...")
+    if fmt == 'tflite':
+        export_tflite(keras_backend.model.model, path, allow_tf_ops)
+    else:
+        export_onnx(keras_backend.model.model, path)
+    print(f"✅ {path} ({os.path.getsize(path) / 1024:.0f} Ko)")
+
+    parity = check_parity(keras_backend, load_backend(fmt, model_dir), parity_inputs(parity_samples))
+    report = {
+        'model': model_name,
+        'format': fmt,
+        'path': path,
+        'exported_at': datetime.now().isoformat(),
+        'parity': parity
+    }
+    with open(os.path.join(model_dir, f'export_{fmt}.json'), 'w') as f:
+        json.dump(report, f, indent=2)
+
+    status = '✅' if parity['ok'] else '❌'
+    print(f"{status} Parité Keras/{fmt} sur {parity['samples']} entrées : écart max {parity['max_abs_diff']:.2e}, "
+          f"classes identiques {parity['argmax_agreement'] * 100:.1f}%")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--format', choices=sorted(EXPORT_FILES), required=True)
+    parser.add_argument('--model', help='Dossier ids_model_* à exporter (par défaut le plus récent)')
+    parser.add_argument('--allow-tf-ops', action='store_true', help='TFLite : autoriser les opérations TF (SELECT_TF_OPS)')
+    parser.add_argument('--parity-samples', type=int, default=512)
+    args = parser.parse_args()
+
+    report = export_model(args.model or latest_model_dir(), args.format, args.allow_tf_ops, args.parity_samples)
+    return 0 if report['parity']['ok'] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
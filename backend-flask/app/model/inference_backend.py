@@ -0,0 +1,164 @@
+"""
+Moteurs d'inférence interchangeables pour le modèle CNN-LSTM.
+
+- keras  : IDSModel.predict (TensorFlow complet)
+- tflite : modèle exporté model.tflite, via tflite_runtime (ou tf.lite à défaut)
+- onnx   : modèle exporté model.onnx, via onnxruntime
+
+Les fichiers .tflite / .onnx sont produits par app/model/export_model.py dans le
+dossier data/models/ids_model_*/ du modèle exporté.
+"""
+
+import os
+import threading
+from typing import Any, Dict, Optional, TYPE_CHECKING
+
+import numpy as np
+
+from ..config import INFERENCE_THREADS
+
+if TYPE_CHECKING:
+    from .tf_model import IDSModel
+
+# Fichier exporté attendu dans data/models/ids_model_*/ pour chaque moteur
+EXPORT_FILES = {
+    'tflite': 'model.tflite',
+    'onnx': 'model.onnx'
+}
+
+
+class InferenceBackend:
+    """Interface commune : predict(X) avec X de forme (N, 145, 1) -> probabilités (N, classes)."""
+
+    name = 'base'
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+    def describe(self) -> Dict[str, Any]:
+        return {'backend': self.name}
+
+
+class KerasBackend(InferenceBackend):
+    """Inférence par le modèle Keras d'origine."""
+
+    name = 'keras'
+
+    def __init__(self, model: 'IDSModel'):
+        self.model = model
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return np.asarray(self.model.predict(X))
+
+
+class TFLiteBackend(InferenceBackend):
+    """Inférence TFLite ; l'interpréteur n'étant pas thread-safe, les appels sont sérialisés."""
+
+    name = 'tflite'
+
+    def __init__(self, path: str, num_threads: int = INFERENCE_THREADS):
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            from tensorflow.lite import Interpreter
+        self.path = path
+        self.interpreter = Interpreter(model_path=path, num_threads=num_threads or None)
+        self.interpreter.allocate_tensors()
+        self.input_index = self.interpreter.get_input_details()[0]['index']
+        self.output_index = self.interpreter.get_output_details()[0]['index']
+        self._batch_size = int(self.interpreter.get_input_details()[0]['shape'][0])
+        self._lock = threading.Lock()
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        with self._lock:
+            # Le modèle est exporté avec un batch de 1 : on redimensionne à la volée
+            if X.shape[0] != self._batch_size:
+                self.interpreter.resize_tensor_input(self.input_index, X.shape)
+                self.interpreter.allocate_tensors()
+                self._batch_size = X.shape[0]
+            self.interpreter.set_tensor(self.input_index, X)
+            self.interpreter.invoke()
+            return self.interpreter.get_tensor(self.output_index).copy()
+
+    def describe(self) -> Dict[str, Any]:
+        return {'backend': self.name, 'path': self.path}
+
+
+class ONNXBackend(InferenceBackend):
+    """Inférence ONNX Runtime sur CPU (session thread-safe)."""
+
+    name = 'onnx'
+
+    def __init__(self, path: str, num_threads: int = INFERENCE_THREADS):
+        import onnxruntime as ort
+        options = ort.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.path = path
+        self.session = ort.InferenceSession(path, sess_options=options, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return self.session.run(None, {self.input_name: np.asarray(X, dtype=np.float32)})[0]
+
+    def describe(self) -> Dict[str, Any]:
+        return {'backend': self.name, 'path': self.path}
+
+
+def export_path(model_dir: str, backend: str) -> str:
+    return os.path.join(model_dir, EXPORT_FILES[backend])
+
+
+def load_backend(backend: str, model_dir: str, keras_model: Optional['IDSModel'] = None) -> InferenceBackend:
+    """
+    Charge le moteur demandé pour le dossier ids_model_* donné.
+    Lève une exception si le fichier exporté ou le runtime est absent.
+    """
+    if backend == 'keras':
+        if keras_model is None:
+            from .tf_model import IDSModel
+            keras_model = IDSModel.load(os.path.join(model_dir, 'model'),
+                                        os.path.join(model_dir, 'scaler.npy'),
+                                        os.path.join(model_dir, 'label_encoder.json'))
+        return KerasBackend(keras_model)
+    if backend not in EXPORT_FILES:
+        raise ValueError(f"Moteur d'inférence inconnu: {backend} (attendu: keras, {', '.join(EXPORT_FILES)})")
+    path = export_path(model_dir, backend)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"{path} introuvable, lancez: python -m app.model.export_model --format {backend}")
+    return TFLiteBackend(path) if backend == 'tflite' else ONNXBackend(path)
+
+
+def check_parity(reference: InferenceBackend, candidate: InferenceBackend, X: np.ndarray,
+                 atol: float = 1e-4) -> Dict[str, Any]:
+    """Compare les probabilités de deux moteurs sur les mêmes entrées."""
+    expected = reference.predict(X)
+    actual = candidate.predict(X)
+    diff = np.abs(expected - actual)
+    agreement = float(np.mean(np.argmax(expected, axis=1) == np.argmax(actual, axis=1)))
+    return {
+        'samples': int(X.shape[0]),
+        'max_abs_diff': float(diff.max()) if diff.size else 0.0,
+        'mean_abs_diff': float(diff.mean()) if diff.size else 0.0,
+        'argmax_agreement': agreement,
+        'ok': bool(diff.size == 0 or diff.max() <= atol) and agreement == 1.0
+    }
+
+
+def parity_inputs(n: int = 512, seed: int = 0) -> np.ndarray:
+    """Entrées de test : flux synthétiques passés par le moteur de features + bruit uniforme."""
+    from ..utils.feature_engine import build_feature_matrix, NUM_FEATURES
+    rng = np.random.default_rng(seed)
+    half = n // 2
+    flows = {
+        'connections_count': rng.integers(0, 400, half),
+        'dest_port': rng.choice([22, 53, 80, 443, 3389, 8080], half),
+        'port_count': rng.integers(1, 30, half),
+        'flag': rng.choice(np.array(['SF', 'S0', 'REJ', 'RSTO'], dtype=object), half),
+        'duration': rng.integers(0, 120, half),
+        'bytes_sent': rng.integers(0, 100000, half),
+    }
+    realistic = build_feature_matrix(flows)
+    noise = rng.random((n - half, NUM_FEATURES), dtype=np.float32)
+    return np.concatenate([realistic, noise]).reshape(n, NUM_FEATURES, 1)
@@ -0,0 +1,17 @@
+"""
+Classes prédites par le modèle, sans dépendance à TensorFlow
+(importable au démarrage de Flask sans charger tf_model).
+"""
+
+# Mapping des types d'attaques
+ATTACK_TYPES = {
+    0: 'Normal',
+    1: 'DoS',
+    2: 'Probe',
+    3: 'R2L',
+    4: 'U2R',
+    5: 'SQL Injection',
+    6: 'XSS',
+    7: 'Port Scan',
+    8: 'Brute Force'
+}
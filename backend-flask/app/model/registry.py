@@ -0,0 +1,287 @@
+"""
+Registre des modèles entraînés data/models/ids_model_*.
+
+Indexe les versions disponibles (horodatées par leur nom), surveille l'arrivée
+de nouvelles versions et les charge en arrière-plan. Le modèle actif est
+remplacé par une simple affectation de référence : les prédictions en cours
+terminent sur l'ancien modèle, qui est libéré dès qu'elles n'y font plus référence.
+"""
+
+import gc
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from ..config import MODELS_DIR, INFERENCE_BACKEND, MODEL_WATCH_INTERVAL, MODEL_STABLE_SECONDS
+from ..utils.feature_engine import NUM_FEATURES
+from .inference_backend import EXPORT_FILES, InferenceBackend, KerasBackend, load_backend
+from .labels import ATTACK_TYPES
+
+logger = logging.getLogger(__name__)
+
+MODEL_PREFIX = 'ids_model_'
+# Fichiers sans lesquels un SavedModel n'est pas chargeable (copie en cours...)
+REQUIRED_FILES = (os.path.join('model', 'saved_model.pb'), os.path.join('model', 'variables', 'variables.index'))
+
+
+class ModelVersion:
+    """Un dossier ids_model_AAAAMMJJ_HHMMSS et ses métadonnées."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.name = self.path.name
+        try:
+            self.created_at = datetime.strptime(self.name[len(MODEL_PREFIX):], '%Y%m%d_%H%M%S')
+        except ValueError:
+            self.created_at = datetime.fromtimestamp(self.path.stat().st_mtime)
+
+    def is_complete(self) -> bool:
+        return all((self.path / f).exists() for f in REQUIRED_FILES)
+
+    def last_modified(self) -> float:
+        latest = self.path.stat().st_mtime
+        for root, _, files in os.walk(self.path):
+            for f in files:
+                latest = max(latest, os.path.getmtime(os.path.join(root, f)))
+        return latest
+
+    def exports(self) -> List[str]:
+        return [fmt for fmt, filename in EXPORT_FILES.items() if (self.path / filename).exists()]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'path': str(self.path),
+            'created_at': self.created_at.isoformat(),
+            'exports': self.exports()
+        }
+
+
+class ActiveModel:
+    """Version chargée et son moteur d'inférence (remplacée d'un bloc lors d'un swap)."""
+
+    __slots__ = ('version', 'predictor', 'loaded_at', 'load_time')
+
+    def __init__(self, version: Optional[ModelVersion], predictor: InferenceBackend, load_time: float):
+        self.version = version
+        self.predictor = predictor
+        self.loaded_at = datetime.now()
+        self.load_time = load_time
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'name': self.version.name if self.version else None,
+            'backend': self.predictor.name,
+            'loaded_at': self.loaded_at.isoformat(),
+            'load_time': round(self.load_time, 3)
+        }
+
+
+class ModelRegistry:
+    """Index des versions, modèle actif et thread de surveillance des nouvelles versions."""
+
+    def __init__(self, models_dir: Path = MODELS_DIR, backend: str = INFERENCE_BACKEND,
+                 watch_interval: float = MODEL_WATCH_INTERVAL, stable_seconds: float = MODEL_STABLE_SECONDS):
+        self.models_dir = Path(models_dir)
+        self.backend = backend
+        self.watch_interval = watch_interval
+        self.stable_seconds = stable_seconds
+
+        self._active: Optional[ActiveModel] = None
+        self._load_lock = threading.Lock()
+        self._first_load_lock = threading.Lock()
+        self._update_lock = threading.Lock()
+        # Échec du premier chargement : on ne réessaie pas à chaque prédiction
+        self._load_error: Optional[Exception] = None
+        self._retry_at = 0.0
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+        self.failed: Dict[str, str] = {}
+        # Version choisie manuellement : la surveillance ne la remplace pas
+        self.pinned: Optional[str] = None
+        self.swaps = 0
+        self.last_check: Optional[datetime] = None
+
+    # === INDEX DES VERSIONS ===
+
+    def scan(self) -> List[ModelVersion]:
+        """Versions complètes et stables (non modifiées depuis stable_seconds), de la plus ancienne à la plus récente."""
+        if not self.models_dir.exists():
+            return []
+        now = time.time()
+        versions = []
+        for entry in sorted(self.models_dir.iterdir()):
+            if not entry.is_dir() or not entry.name.startswith(MODEL_PREFIX):
+                continue
+            version = ModelVersion(entry)
+            if version.is_complete() and now - version.last_modified() >= self.stable_seconds:
+                versions.append(version)
+        return versions
+
+    def latest(self) -> Optional[ModelVersion]:
+        versions = self.scan()
+        return versions[-1] if versions else None
+
+    def get_version(self, name: str) -> Optional[ModelVersion]:
+        """Version par nom de répertoire ; None hors de models_dir (nom venant de l'API)."""
+        if not name.startswith(MODEL_PREFIX) or '/' in name or '\\' in name or '..' in name:
+            return None
+        path = self.models_dir / name
+        if not path.is_dir() or path.resolve().parent != self.models_dir.resolve():
+            return None
+        return ModelVersion(path)
+
+    # === CHARGEMENT ET SWAP ===
+
+    def load_version(self, version: Optional[ModelVersion]) -> ActiveModel:
+        """Charge une version (sans toucher au modèle actif) et la préchauffe avec un lot factice."""
+        start = time.perf_counter()
+        predictor = None
+        if version is None:
+            # Aucun modèle entraîné : modèle non entraîné, comme auparavant
+            from .tf_model import IDSModel
+            predictor = KerasBackend(IDSModel(input_shape=(NUM_FEATURES, 1), num_classes=len(ATTACK_TYPES)))
+        elif self.backend != 'keras':
+            try:
+                predictor = load_backend(self.backend, str(version.path))
+            except Exception as e:
+                logger.warning(f"⚠️ Moteur {self.backend} indisponible pour {version.name} ({e}), repli sur Keras")
+        if predictor is None:
+            predictor = load_backend('keras', str(version.path))
+        predictor.predict(np.zeros((1, NUM_FEATURES, 1), dtype=np.float32))
+        return ActiveModel(version, predictor, time.perf_counter() - start)
+
+    def activate(self, version: Optional[ModelVersion]) -> ActiveModel:
+        """Charge une version puis la rend active de façon atomique."""
+        loaded = self.load_version(version)
+        with self._load_lock:
+            previous, self._active = self._active, loaded
+            self.swaps += previous is not None
+        name = version.name if version else 'modèle non entraîné'
+        logger.info(f"✅ Modèle actif: {name} ({loaded.predictor.name}, chargé en {loaded.load_time:.2f}s)")
+        if previous is not None:
+            # Les prédictions en cours gardent leur propre référence ; on libère le reste
+            del previous
+            gc.collect()
+        return loaded
+
+    def pin(self, version: ModelVersion) -> ActiveModel:
+        """Active une version précise (retour arrière) et suspend les mises à jour automatiques."""
+        self.pinned = version.name
+        return self.activate(version)
+
+    def unpin(self):
+        self.pinned = None
+
+    def _load_initial(self) -> ActiveModel:
+        """Premier chargement : la version la plus récente qui se charge, sinon le modèle non entraîné."""
+        for version in reversed(self.scan()):
+            if version.name in self.failed:
+                continue
+            try:
+                return self.activate(version)
+            except Exception as e:
+                self.failed[version.name] = str(e)
+                logger.error(f"❌ Chargement de {version.name} impossible: {e}")
+        return self.activate(None)
+
+    def get_active(self) -> ActiveModel:
+        active = self._active
+        if active is None:
+            with self._first_load_lock:
+                active = self._active
+                if active is None:
+                    if self._load_error is not None and time.monotonic() < self._retry_at:
+                        raise self._load_error
+                    try:
+                        active = self._load_initial()
+                        self._load_error = None
+                    except Exception as e:
+                        self._load_error = e
+                        self._retry_at = time.monotonic() + (self.watch_interval or 30)
+                        raise
+        return active
+
+    def get_predictor(self) -> InferenceBackend:
+        return self.get_active().predictor
+
+    def check_for_update(self) -> bool:
+        """Charge et active la version la plus récente si elle est plus récente que la version active."""
+        if not self._update_lock.acquire(blocking=False):
+            return False  # un chargement est déjà en cours
+        try:
+            self.last_check = datetime.now()
+            active = self._active
+            if active is None or self.pinned:
+                return False
+            latest = self.latest()
+            if latest is None or latest.name in self.failed:
+                return False
+            if active.version is not None and latest.name <= active.version.name:
+                return False
+            try:
+                self.activate(latest)
+                return True
+            except Exception as e:
+                self.failed[latest.name] = str(e)
+                logger.error(f"❌ Nouvelle version {latest.name} non chargée, la version active est conservée: {e}")
+                return False
+        finally:
+            self._update_lock.release()
+
+    # === SURVEILLANCE ===
+
+    def start_watching(self):
+        if self._watcher is not None or self.watch_interval <= 0:
+            return
+        self._stop.clear()
+        self._watcher = threading.Thread(target=self._watch, name='model-registry-watch', daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self):
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=5)
+            self._watcher = None
+
+    def _watch(self):
+        while not self._stop.wait(self.watch_interval):
+            try:
+                self.check_for_update()
+            except Exception as e:
+                logger.error(f"Erreur surveillance des modèles: {e}")
+
+    def status(self) -> Dict[str, Any]:
+        active = self._active
+        active_name = active.version.name if active and active.version else None
+        return {
+            'active': active.to_dict() if active else None,
+            'backend': self.backend,
+            'versions': [dict(v.to_dict(), active=v.name == active_name) for v in self.scan()],
+            'failed': dict(self.failed),
+            'swaps': self.swaps,
+            'pinned': self.pinned,
+            'watching': self._watcher is not None,
+            'watch_interval': self.watch_interval,
+            'last_check': self.last_check.isoformat() if self.last_check else None
+        }
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_model_registry() -> ModelRegistry:
+    """Retourne le registre partagé du processus."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ModelRegistry()
+    return _registry
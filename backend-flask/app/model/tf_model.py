@@ -8,6 +8,9 @@ import os
 import json
 import pandas as pd
 
+from .labels import ATTACK_TYPES
+from ..config import PREDICT_FAST_PATH_MAX_BATCH
+
 class IDSModel:
     def __init__(self, input_shape: Tuple[int, ...], num_classes: int):
         self.input_shape = input_shape
@@ -15,6 +18,9 @@ class IDSModel:
         self.model = self._build_model()
         self.label_encoder = None
         self.feature_scaler = None
+        self.fast_path_max_batch = PREDICT_FAST_PATH_MAX_BATCH
+        self._serve = None
+        self._serve_model = None
         
     def _build_model(self) -> tf.keras.Model:
         """
@@ -100,8 +106,27 @@ class IDSModel:
     def predict(self, X: np.ndarray) -> np.ndarray:
         """
         Fait des prédictions sur les données d'entrée.
+        Les petits lots passent par le graphe compilé (serving_fn), les gros par Keras predict().
+        """
+        X = np.asarray(X, dtype=np.float32)
+        if len(X) <= self.fast_path_max_batch:
+            return self.serving_fn()(X).numpy()
+        return self.model.predict(X, verbose=0)
+    
+    def serving_fn(self):
         """
-        return self.model.predict(X)
+        Inférence compilée en tf.function avec une signature fixe (None, 145, 1) :
+        un seul traçage, quelle que soit la taille du lot, sans pipeline tf.data ni barre de progression.
+        """
+        if self._serve is None or self._serve_model is not self.model:
+            model = self.model
+            
+            @tf.function(input_signature=[tf.TensorSpec((None, *self.input_shape), tf.float32)])
+            def serve(x):
+                return model(x, training=False)
+            
+            self._serve, self._serve_model = serve, model
+        return self._serve
     
     def save(self, model_path: str, scaler_path: str = None, encoder_path: str = None):
         """
@@ -143,18 +168,6 @@ class IDSModel:
         
         return instance
 
-# Mapping des types d'attaques
-ATTACK_TYPES = {
-    0: 'Normal',
-    1: 'DoS',
-    2: 'Probe',
-    3: 'R2L',
-    4: 'U2R',
-    5: 'SQL Injection',
-    6: 'XSS',
-    7: 'Port Scan',
-    8: 'Brute Force'
-}
 
 def load_data(data_path):
     # Charger les données
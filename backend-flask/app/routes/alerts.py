@@ -1,10 +1,12 @@
-from flask import Blueprint, jsonify, request
-from ..model.ai_model import predict_intrusion
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from ..model.ai_model import predict_intrusion_batch
 from datetime import datetime
-import uuid
 import json
-from app.utils.network_data import get_network_data
-from app.config import DATA_FILE
+import uuid
+from app.config import STREAM_HEARTBEAT_INTERVAL, STREAM_REPLAY_BATCH
+from app.utils.alert_store import get_alert_store
+from app.utils.alert_bus import get_alert_bus
+from app.utils.stats_aggregator import get_stats_aggregator
 
 alerts_bp = Blueprint('alerts', __name__)
 
@@ -17,48 +19,145 @@ def get_alerts():
 
 @alerts_bp.route('/alerts/<int:alert_id>', methods=['DELETE'])
 def delete_alert(alert_id):
-    data = get_network_data()
-    if data is None:
+    try:
+        deleted = get_alert_store().delete_alert(alert_id)
+        if deleted:
+            get_stats_aggregator().rebuild()
+    except Exception:
         return jsonify({'error': 'Erreur lors de la récupération des données'}), 500
-    original_len = len(data['alerts'])
-    data['alerts'] = [a for a in data['alerts'] if a['id'] != alert_id]
-    with open(DATA_FILE, 'w') as f:
-        json.dump(data, f, indent=2)
-    return jsonify({'deleted': original_len - len(data['alerts'])})
+    return jsonify({'deleted': deleted})
+
+# Délai de reconnexion conseillé au client EventSource
+STREAM_RETRY_MS = 3000
+
+def parse_stream_filter(name):
+    """Filtre ?name=a,b (ou répété) -> liste de valeurs, None si absent."""
+    values = [v.strip() for raw in request.args.getlist(name) for v in raw.split(',') if v.strip()]
+    return values or None
+
+def format_sse(event, data, event_id=None):
+    message = f'id: {event_id}\n' if event_id is not None else ''
+    return message + f'event: {event}\ndata: {json.dumps(data, default=str)}\n\n'
+
+@alerts_bp.route('/alerts/stream', methods=['GET'])
+def stream_alerts():
+    """
+    Flux Server-Sent Events des nouvelles alertes (événement 'alert', id = id SQLite)
+    et des deltas de statistiques (événement 'stats').
+    Reprise via l'en-tête Last-Event-ID ou ?last_id= ; filtres ?attack_type= et ?severity=.
+    Les alertes écrites par d'autres processus sont relues depuis la base quand le flux est inactif.
+    """
+    last_id = request.headers.get('Last-Event-ID') or request.args.get('last_id')
+    try:
+        last_id = int(last_id) if last_id else None
+    except ValueError:
+        return jsonify({'error': 'last_id invalide'}), 400
+    
+    store = get_alert_store()
+    if last_id is None:
+        last_id = store.last_alert_id()
+    # S'abonner avant de relire la base : aucune alerte ne peut tomber entre les deux
+    subscription = get_alert_bus().subscribe(attack_types=parse_stream_filter('attack_type'),
+                                             severities=parse_stream_filter('severity'))
+    
+    def replay(since_id):
+        """Relit depuis la base les alertes d'id > since_id, par pages."""
+        while True:
+            batch = store.get_alerts(since_id=since_id, limit=STREAM_REPLAY_BATCH)
+            for alert in batch:
+                yield alert
+            if len(batch) < STREAM_REPLAY_BATCH:
+                return
+            since_id = batch[-1]['id']
+    
+    def events():
+        cursor = last_id
+        try:
+            yield f'retry: {STREAM_RETRY_MS}\n\n'
+            yield format_sse('stats', {'stats': get_stats_aggregator().get_stats(), 'last_alert_id': cursor})
+            while True:
+                if subscription.overflowed or store.last_alert_id() > cursor:
+                    # Reprise, client trop lent ou alertes d'un autre processus : relecture depuis la base
+                    subscription.clear()
+                    for alert in replay(cursor):
+                        cursor = alert['id']
+                        if subscription.matches(alert):
+                            yield format_sse('alert', alert, alert['id'])
+                
+                event = subscription.get(timeout=STREAM_HEARTBEAT_INTERVAL)
+                while event is not None and not subscription.overflowed:
+                    kind, data = event
+                    if kind == 'alert':
+                        if data['id'] > cursor:
+                            cursor = data['id']
+                            yield format_sse('alert', data, data['id'])
+                    else:
+                        yield format_sse('stats', data)
+                    event = subscription.get(timeout=STREAM_HEARTBEAT_INTERVAL)
+                if event is None:
+                    yield ': keep-alive\n\n'
+        finally:
+            subscription.close()
+    
+    return Response(stream_with_context(events()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+REQUIRED_DETECT_FIELDS = ['source_ip', 'destination_ip', 'protocol', 'source_port', 'dest_port']
+
+def is_local_traffic(data):
+    """Trafic local (loopback des deux côtés) : pas d'alerte."""
+    return (data.get('source_ip') in ['127.0.0.1', 'localhost'] and
+            data.get('destination_ip') in ['127.0.0.1', 'localhost'])
+
+def build_alert(data, attack_type, confidence):
+    return {
+        'id': str(uuid.uuid4()),
+        'sourceIp': data.get('source_ip', 'unknown'),
+        'destinationIp': data.get('destination_ip', 'unknown'),
+        'protocol': data.get('protocol', 'unknown'),
+        'timestamp': datetime.now().isoformat(),
+        'attackType': attack_type,
+        'severity': 'high' if attack_type in ['SQL Injection', 'Remote Code Execution'] else 'medium',
+        'confidence': confidence
+    }
 
 @alerts_bp.route('/detect', methods=['POST'])
 def detect_intrusion():
+    """Analyse un flux (objet JSON) ou un lot de flux (liste JSON) en une seule passe du modèle."""
     data = request.get_json()
     
-    required_fields = ['source_ip', 'destination_ip', 'protocol', 'source_port', 'dest_port']
-    if not data or not all(field in data for field in required_fields):
+    is_batch = isinstance(data, list)
+    flows = data if is_batch else [data]
+    if not flows or not all(isinstance(flow, dict) and all(field in flow for field in REQUIRED_DETECT_FIELDS) for flow in flows):
         return jsonify({'error': 'Champs requis manquants'}), 400
     
-    # Prédiction avec le modèle
-    is_intrusion, attack_type, confidence = predict_intrusion(data)
-
-    # Bloquer les alertes pour trafic local
-    if (data.get('source_ip') in ['127.0.0.1', 'localhost'] and data.get('destination_ip') in ['127.0.0.1', 'localhost']):
-        return jsonify({'message': 'Trafic local ignoré', 'timestamp': datetime.now().isoformat()}), 200
+    # Prédiction avec le modèle (un seul appel pour tout le lot)
+    predictions = predict_intrusion_batch(flows)
+    
+    responses = []
+    for flow, (is_intrusion, attack_type, confidence) in zip(flows, predictions):
+        # Bloquer les alertes pour trafic local
+        if is_local_traffic(flow):
+            responses.append(({'message': 'Trafic local ignoré', 'timestamp': datetime.now().isoformat()}, 200))
+            continue
+        
+        if is_intrusion:
+            alert = build_alert(flow, attack_type, confidence)
+            alerts.append(alert)
+            # Garder seulement les 1000 dernières alertes
+            if len(alerts) > 1000:
+                alerts.pop(0)
+            responses.append((alert, 201))
+            continue
+        
+        responses.append(({
+            'message': 'No intrusion detected',
+            'timestamp': datetime.now().isoformat()
+        }, 200))
     
-    if is_intrusion:
-        alert = {
-            'id': str(uuid.uuid4()),
-            'sourceIp': data.get('source_ip', 'unknown'),
-            'destinationIp': data.get('destination_ip', 'unknown'),
-            'protocol': data.get('protocol', 'unknown'),
-            'timestamp': datetime.now().isoformat(),
-            'attackType': attack_type,
-            'severity': 'high' if attack_type in ['SQL Injection', 'Remote Code Execution'] else 'medium',
-            'confidence': confidence
-        }
-        alerts.append(alert)
-        # Garder seulement les 1000 dernières alertes
-        if len(alerts) > 1000:
-            alerts.pop(0)
-        return jsonify(alert), 201
+    if not is_batch:
+        body, status = responses[0]
+        return jsonify(body), status
     
-    return jsonify({
-        'message': 'No intrusion detected',
-        'timestamp': datetime.now().isoformat()
-    }) 
\ No newline at end of file
+    status = 201 if any(status == 201 for _, status in responses) else 200
+    return jsonify([body for body, _ in responses]), status
@@ -1,23 +1,20 @@
 from flask import Blueprint, jsonify
-from ..model.tf_model import IDSModel
 import psutil
 import os
 import json
+import numpy as np
 from datetime import datetime, timedelta
+from ..model.registry import get_model_registry
+from ..utils.sock_diag import socket_snapshot, state_names
 
 model_stats = Blueprint('model_stats', __name__)
 
 def get_latest_model_path():
-    models_dir = os.path.join(os.path.dirname(__file__), '../../../data/models')
-    if not os.path.exists(models_dir):
-        return None
-    
-    model_dirs = [d for d in os.listdir(models_dir) if os.path.isdir(os.path.join(models_dir, d))]
-    if not model_dirs:
-        return None
-    
-    latest_dir = max(model_dirs, key=lambda x: os.path.getctime(os.path.join(models_dir, x)))
-    return os.path.join(models_dir, latest_dir)
+    """Dossier de la version active (ou, si aucune n'est chargée, de la plus récente) selon le registre."""
+    registry = get_model_registry()
+    active = registry.status()['active']
+    version = registry.get_version(active['name']) if active and active['name'] else registry.latest()
+    return str(version.path) if version else None
 
 @model_stats.route('/api/stats/model', methods=['GET'])
 def get_model_stats():
@@ -55,6 +52,8 @@ def get_system_stats():
     
     # Statistiques réseau
     net_io = psutil.net_io_counters()
+    sockets = socket_snapshot()
+    states, counts = np.unique(state_names(sockets).astype(str), return_counts=True)
     
     # Uptime du processus
     process = psutil.Process(os.getpid())
@@ -70,5 +69,6 @@ def get_system_stats():
             'packets_recv': net_io.packets_recv
         },
         'uptime': str(uptime),
-        'active_connections': len(psutil.net_connections())
+        'active_connections': len(sockets),
+        'connection_states': dict(zip(states.tolist(), counts.tolist()))
     }) 
\ No newline at end of file
@@ -1,12 +1,10 @@
 from flask import Blueprint, jsonify, request
 import os
 import json
-from pathlib import Path
+from ..config import SETTINGS_FILE
 
 settings_bp = Blueprint('settings', __name__)
 
-SETTINGS_FILE = Path(__file__).parent.parent / 'data' / 'settings.json'
-
 DEFAULT_SETTINGS = {
     "thresholds": {
         "bruteForce": 10,
@@ -5,37 +5,36 @@ import os
 import json
 from pathlib import Path
 import logging
-from app.utils.network_data import get_network_data
+from app.utils.alert_store import get_alert_store
+from app.utils.alert_sink import get_alert_sink
+from app.utils.alert_bus import get_alert_bus
+from app.utils.stats_aggregator import get_stats_aggregator
+from app.utils.state_table import state_tables_metrics
+from app.utils.adaptive_scheduler import schedulers_metrics
+from app.model.registry import get_model_registry
+import threading
 
 stats_bp = Blueprint('stats', __name__)
 logger = logging.getLogger(__name__)
 
 # Chemin vers le dossier de stockage des données
 DATA_DIR = Path(__file__).parent.parent / 'data'
-DATA_FILE = DATA_DIR / 'network_data.json'
 METRICS_FILE = DATA_DIR / 'model_metrics.json'
 HISTORY_FILE = DATA_DIR / 'training_history.json'
 TEST_LOGS_FILE = DATA_DIR / 'test_logs.json'
 
-def get_network_data():
-    """Récupère les données réseau depuis le fichier JSON"""
+# Nombre d'alertes retournées par défaut (l'historique complet reste en base)
+DEFAULT_ALERT_LIMIT = 100
+
+def get_alert_limit():
+    """Lit le paramètre ?limit= (0 = tout l'historique)."""
+    limit = request.args.get('limit', DEFAULT_ALERT_LIMIT, type=int)
+    return None if limit is not None and limit <= 0 else limit
+
+def get_network_data(alert_limit=None):
+    """Récupère les données réseau depuis le stockage SQLite"""
     try:
-        if not DATA_FILE.exists():
-            return {
-                'connections': [],
-                'alerts': [],
-                'stats': {
-                    'total_connections': 0,
-                    'total_packets': 0,
-                    'total_alerts': 0,
-                    'active_threats': 0,
-                    'blocked_attempts': 0,
-                    'system_health': 100
-                }
-            }
-        
-        with open(DATA_FILE, 'r') as f:
-            return json.load(f)
+        return get_alert_store().get_network_data(alert_limit=alert_limit, connection_limit=alert_limit)
     except Exception as e:
         logger.error(f"Erreur lors de la lecture des données: {e}")
         return None
@@ -43,7 +42,7 @@ def get_network_data():
 @stats_bp.route('/traffic', methods=['GET'])
 def get_traffic():
     """Route pour récupérer les données de trafic"""
-    data = get_network_data()
+    data = get_network_data(get_alert_limit())
     if data is None:
         return jsonify({'error': 'Erreur lors de la récupération des données'}), 500
     return jsonify(data)
@@ -51,72 +50,99 @@ def get_traffic():
 @stats_bp.route('/alerts', methods=['GET'])
 def get_alerts():
     """Route pour récupérer les alertes"""
-    data = get_network_data()
-    if data is None:
+    try:
+        stored_alerts = get_alert_store().get_alerts(
+            limit=get_alert_limit(),
+            attack_type=request.args.get('attack_type'),
+            severity=request.args.get('severity')
+        )
+    except Exception as e:
+        logger.error(f"Erreur lors de la lecture des alertes: {e}")
         return jsonify({'error': 'Erreur lors de la récupération des données'}), 500
-    # Correction : synchroniser active_threats avec le nombre réel d'alertes
-    data['stats']['active_threats'] = len(data['alerts'])
-    with open(DATA_FILE, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2)
     # Correction : inverser les ports source/destination si présents
     alerts = []
-    for alert in data['alerts']:
-        alert_copy = alert.copy()
-        if 'sourcePort' in alert_copy and 'destPort' in alert_copy:
-            alert_copy['sourcePort'], alert_copy['destPort'] = alert_copy['destPort'], alert_copy['sourcePort']
-        alerts.append(alert_copy)
+    for alert in stored_alerts:
+        if 'sourcePort' in alert and 'destPort' in alert:
+            alert['sourcePort'], alert['destPort'] = alert['destPort'], alert['sourcePort']
+        alerts.append(alert)
     return jsonify(alerts)
 
 @stats_bp.route('/alerts/<int:alert_id>', methods=['DELETE'])
 def delete_alert(alert_id):
-    data = get_network_data()
-    if data is None:
+    try:
+        deleted = get_alert_store().delete_alert(alert_id)
+        if deleted:
+            get_stats_aggregator().rebuild()
+    except Exception as e:
+        logger.error(f"Erreur lors de la suppression de l'alerte {alert_id}: {e}")
         return jsonify({'error': 'Erreur lors de la récupération des données'}), 500
-    original_len = len(data['alerts'])
-    data['alerts'] = [a for a in data['alerts'] if a['id'] != alert_id]
-    # Correction : synchroniser active_threats après suppression
-    data['stats']['active_threats'] = len(data['alerts'])
-    with open(DATA_FILE, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2)
-    return jsonify({'deleted': original_len - len(data['alerts'])})
+    return jsonify({'deleted': deleted})
+
+@stats_bp.route('/alert-sink', methods=['GET'])
+def get_alert_sink_metrics():
+    """Profondeur de la file d'alertes et compteurs de pertes du puits asynchrone"""
+    return jsonify({**get_alert_sink().metrics(), 'stream': get_alert_bus().metrics()})
+
+@stats_bp.route('/detector-state', methods=['GET'])
+def get_detector_state():
+    """Taille, évictions et mémoire estimée des tables d'état des détecteurs de ce processus"""
+    return jsonify(state_tables_metrics())
+
+@stats_bp.route('/schedulers', methods=['GET'])
+def get_schedulers():
+    """Intervalle courant, durée, retard et part CPU des boucles de scan adaptatives"""
+    return jsonify(schedulers_metrics())
+
+@stats_bp.route('/models', methods=['GET'])
+def get_models():
+    """Versions de modèles disponibles, version active et historique des rechargements"""
+    return jsonify(get_model_registry().status())
+
+@stats_bp.route('/models/reload', methods=['POST'])
+def reload_model():
+    """Charge en arrière-plan la version la plus récente, ou celle demandée ({"name": "ids_model_..."})"""
+    registry = get_model_registry()
+    name = (request.get_json(silent=True) or {}).get('name')
+    if name:
+        version = registry.get_version(name)
+        if version is None or not version.is_complete():
+            return jsonify({'error': f'Modèle {name} introuvable ou incomplet'}), 404
+        target = lambda: registry.pin(version)
+    else:
+        registry.unpin()
+        target = registry.check_for_update
+    threading.Thread(target=target, name='model-reload', daemon=True).start()
+    return jsonify({'status': 'loading', 'name': name}), 202
 
 @stats_bp.route('/model-stats', methods=['GET'])
 def get_model_stats():
-    """Route pour récupérer les statistiques du modèle d'IA"""
-    data = get_network_data()
-    if data is None:
+    """Route pour récupérer les statistiques du modèle d'IA (compteurs en mémoire, sans accès disque)"""
+    try:
+        snapshot = get_stats_aggregator().snapshot()
+    except Exception as e:
+        logger.error(f"Erreur lors de la lecture des statistiques: {e}")
         return jsonify({'error': 'Erreur lors de la récupération des données'}), 500
     
-    # S'assurer que toutes les clés stats existent avec des valeurs par défaut
-    if 'stats' not in data:
-        data['stats'] = {}
-    
-    stats = data['stats']
+    stats = snapshot['stats']
     total_connections = stats.get('total_connections', 0)
     total_alerts = stats.get('total_alerts', 0)
     active_threats = stats.get('active_threats', 0)
     system_health = stats.get('system_health', 100)  # Valeur par défaut 100%
     
-    # Calculer le taux de détection
-    detection_rate = (total_alerts / total_connections * 100) if total_connections > 0 else 0
-    
-    # Analyser les types d'attaques détectées
-    attack_types = {}
-    for alert in data.get('alerts', []):
-        attack_type = alert.get('attackType', 'Unknown')
-        attack_types[attack_type] = attack_types.get(attack_type, 0) + 1
-    
     # Préparer les statistiques
     model_stats = {
         'performance': {
             'total_connections': total_connections,
             'total_alerts': total_alerts,
             'active_threats': active_threats,
-            'detection_rate': round(detection_rate, 2),
+            'detection_rate': stats['detection_rate'],
+            'rolling_detection_rate': snapshot['rolling_detection_rate'],
             'system_health': system_health
         },
-        'attack_distribution': attack_types,
-        'recent_alerts': data.get('alerts', [])[-5:],  # 5 dernières alertes
+        'attack_distribution': snapshot['attack_distribution'],
+        'severity_distribution': snapshot['severity_distribution'],
+        'top_sources': snapshot['top_sources'],
+        'recent_alerts': snapshot['recent_alerts'],  # 5 dernières alertes
         'model_status': 'active' if (total_connections > 0 or total_alerts > 0) else 'inactive'
     }
     
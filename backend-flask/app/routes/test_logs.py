@@ -1,5 +1,4 @@
 from flask import Blueprint, jsonify, request
-from ..model.tf_model import IDSModel
 import os
 import json
 from datetime import datetime
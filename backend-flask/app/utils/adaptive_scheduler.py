@@ -0,0 +1,160 @@
+"""
+Ordonnanceur adaptatif des boucles de scan (NetworkScanner, scanner_loop de run.py / run_complete.py).
+
+L'intervalle entre deux cycles n'est plus fixe : il est divisé par deux dès
+qu'un cycle lève des alertes ou voit au moins SCAN_BUSY_CHURN sockets
+ajoutées, retirées ou changées d'état, et allongé de SCAN_BACKOFF par cycle
+sans aucun changement, entre SCAN_MIN_INTERVAL et SCAN_MAX_INTERVAL.
+Un plafond CPU s'applique par-dessus : le temps CPU d'un cycle, rapporté à
+sa période (écart entre deux débuts), ne dépasse pas SCAN_CPU_BUDGET d'un cœur.
+Les cycles suivent un échéancier (échéance précédente + intervalle) : le
+retard (lag) d'un cycle mesure son début par rapport à son échéance, un cycle
+trop long ou une pause trop tardive y apparaissent.
+Durée, retard et part CPU des cycles : /api/stats/schedulers.
+"""
+
+import logging
+import threading
+import time
+import weakref
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from ..config import (SCAN_BACKOFF, SCAN_BASE_INTERVAL, SCAN_BUSY_CHURN, SCAN_CPU_BUDGET, SCAN_MAX_INTERVAL,
+                      SCAN_MIN_INTERVAL)
+
+logger = logging.getLogger(__name__)
+
+# Poids de la dernière mesure dans les moyennes glissantes (durée, part CPU)
+EWMA_ALPHA = 0.2
+
+_schedulers: 'weakref.WeakValueDictionary[str, AdaptiveScheduler]' = weakref.WeakValueDictionary()
+_schedulers_lock = threading.Lock()
+
+
+class AdaptiveScheduler:
+    """Exécute un cycle en boucle avec un intervalle adapté à l'activité et borné par un budget CPU."""
+
+    def __init__(self, name: str, min_interval: float = SCAN_MIN_INTERVAL, max_interval: float = SCAN_MAX_INTERVAL,
+                 base_interval: float = SCAN_BASE_INTERVAL, busy_churn: int = SCAN_BUSY_CHURN,
+                 backoff: float = SCAN_BACKOFF, cpu_budget: float = SCAN_CPU_BUDGET,
+                 clock: Callable[[], float] = time.monotonic, cpu_clock: Callable[[], float] = time.thread_time):
+        self.name = name
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.busy_churn = busy_churn
+        self.backoff = backoff
+        self.cpu_budget = cpu_budget
+        self.clock = clock
+        self.cpu_clock = cpu_clock
+        self.interval = base_interval     # intervalle voulu par l'activité
+        self.next_interval = base_interval  # intervalle appliqué (plafond CPU compris)
+        self._stop = threading.Event()
+
+        self.cycles = 0
+        self.errors = 0
+        self.budget_limited = 0
+        self.last_duration = 0.0
+        self.avg_duration = 0.0
+        self.max_duration = 0.0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.cpu_fraction = 0.0
+        self.last_churn = 0
+        self.last_alerts = 0
+        register_scheduler(self)
+
+    def record(self, duration: float, cpu_seconds: float, lag: float = 0.0, churn: int = 0, alerts: int = 0) -> float:
+        """Enregistre un cycle terminé et retourne l'intervalle entre son début et celui du suivant."""
+        if alerts or churn >= self.busy_churn:
+            self.interval = max(self.min_interval, self.interval / 2)
+        elif not churn:
+            self.interval = min(self.max_interval, self.interval * self.backoff)
+
+        # Plafond CPU : cpu / période <= budget
+        interval = self.interval
+        floor = cpu_seconds / self.cpu_budget if self.cpu_budget > 0 else 0.0
+        if floor > interval:
+            interval = floor
+            self.budget_limited += 1
+
+        first = not self.cycles
+        self.cycles += 1
+        self.last_duration = duration
+        self.max_duration = max(self.max_duration, duration)
+        self.last_lag = lag
+        self.max_lag = max(self.max_lag, lag)
+        self.last_churn = churn
+        self.last_alerts = alerts
+        period = max(duration, interval)
+        fraction = cpu_seconds / period if period > 0 else 0.0
+        if first:
+            self.avg_duration, self.cpu_fraction = duration, fraction
+        else:
+            self.avg_duration += EWMA_ALPHA * (duration - self.avg_duration)
+            self.cpu_fraction += EWMA_ALPHA * (fraction - self.cpu_fraction)
+        self.next_interval = interval
+        return interval
+
+    def run(self, cycle: Callable[[], Optional[Tuple[int, int]]]):
+        """
+        Appelle cycle() jusqu'à stop(). cycle retourne (sockets changées, alertes
+        levées) du cycle, ou None si l'activité n'est pas connue.
+        """
+        self._stop.clear()
+        due = self.clock()
+        while not self._stop.is_set():
+            start = self.clock()
+            lag = max(0.0, start - due)
+            cpu_start = self.cpu_clock()
+            try:
+                churn, alerts = cycle() or (0, 0)
+            except Exception as e:
+                logger.error(f"❌ Erreur cycle {self.name}: {e}")
+                self.errors += 1
+                churn, alerts = 0, 0
+            duration = self.clock() - start
+            interval = self.record(duration, self.cpu_clock() - cpu_start, lag, churn, alerts)
+            # Échéancier : un cycle en retard décale les suivants (pas de rafale de rattrapage)
+            due = (start if lag else due) + interval
+            self._stop.wait(max(0.0, due - self.clock()))
+
+    def stop(self):
+        self._stop.set()
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'cycles': self.cycles,
+            'errors': self.errors,
+            'interval': round(self.next_interval, 3),
+            'activity_interval': round(self.interval, 3),
+            'min_interval': self.min_interval,
+            'max_interval': self.max_interval,
+            'last_duration': round(self.last_duration, 4),
+            'avg_duration': round(self.avg_duration, 4),
+            'max_duration': round(self.max_duration, 4),
+            'last_lag': round(self.last_lag, 4),
+            'max_lag': round(self.max_lag, 4),
+            'cpu_fraction': round(self.cpu_fraction, 4),
+            'cpu_budget': self.cpu_budget,
+            'budget_limited': self.budget_limited,
+            'last_churn': self.last_churn,
+            'last_alerts': self.last_alerts
+        }
+
+
+def register_scheduler(scheduler: AdaptiveScheduler):
+    """Enregistre l'ordonnanceur (référence faible) ; un nom déjà pris reçoit un suffixe #n."""
+    with _schedulers_lock:
+        name, n = scheduler.name, 1
+        while name in _schedulers:
+            n += 1
+            name = f"{scheduler.name}#{n}"
+        scheduler.name = name
+        _schedulers[name] = scheduler
+
+
+def schedulers_metrics() -> Dict[str, Any]:
+    with _schedulers_lock:
+        schedulers = list(_schedulers.values())
+    return {'schedulers': [scheduler.metrics() for scheduler in schedulers]}
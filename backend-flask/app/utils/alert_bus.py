@@ -0,0 +1,126 @@
+"""
+Bus de publication en mémoire des alertes enregistrées, pour le flux
+/api/alerts/stream : chaque client abonné reçoit les nouvelles alertes qui
+passent ses filtres et les deltas de statistiques, sans relire la base.
+"""
+
+import queue
+import threading
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.config import STREAM_CLIENT_QUEUE
+from app.utils.stats_aggregator import get_stats_aggregator
+
+Event = Tuple[str, Dict[str, Any]]
+
+
+class Subscription:
+    """File d'événements d'un client, filtrée par type d'attaque et sévérité."""
+
+    def __init__(self, bus: 'AlertBus', max_pending: int = STREAM_CLIENT_QUEUE,
+                 attack_types: Optional[Iterable[str]] = None, severities: Optional[Iterable[str]] = None):
+        self.bus = bus
+        self.events: queue.Queue = queue.Queue(maxsize=max_pending)
+        self.attack_types = set(attack_types) if attack_types else None
+        self.severities = set(severities) if severities else None
+        # Positionné quand la file du client déborde : il doit se resynchroniser depuis la base
+        self.overflowed = False
+        self.dropped = 0
+
+    def matches(self, alert: Dict[str, Any]) -> bool:
+        if self.attack_types is not None and alert.get('attackType') not in self.attack_types:
+            return False
+        if self.severities is not None and alert.get('severity') not in self.severities:
+            return False
+        return True
+
+    def push(self, event: Event):
+        try:
+            self.events.put_nowait(event)
+        except queue.Full:
+            self.overflowed = True
+            self.dropped += 1
+
+    def get(self, timeout: float) -> Optional[Event]:
+        try:
+            return self.events.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def clear(self):
+        """Vide la file après un débordement (les alertes seront relues depuis la base)."""
+        self.overflowed = False
+        while True:
+            try:
+                self.events.get_nowait()
+            except queue.Empty:
+                return
+
+    def close(self):
+        self.bus.unsubscribe(self)
+
+
+class AlertBus:
+    """Diffuse les lots d'alertes écrits par le puits à tous les clients abonnés."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: List[Subscription] = []
+        self.published = 0
+
+    def subscribe(self, **kwargs) -> Subscription:
+        subscription = Subscription(self, **kwargs)
+        with self._lock:
+            self._subscribers.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+
+    def publish_alerts(self, alerts: List[Dict[str, Any]], connections_count: int = 0):
+        """Abonné du puits d'alertes : un événement par alerte + un delta de statistiques."""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        self.published += len(alerts)
+        if not subscribers:
+            return
+        delta = {
+            'new_alerts': len(alerts),
+            'new_connections': connections_count,
+            'by_attack_type': dict(Counter(a.get('attackType') or 'Unknown' for a in alerts)),
+            'by_severity': dict(Counter(a.get('severity') or 'Unknown' for a in alerts)),
+            'last_alert_id': alerts[-1].get('id'),
+            'stats': get_stats_aggregator().get_stats()
+        }
+        for subscription in subscribers:
+            for alert in alerts:
+                if subscription.matches(alert):
+                    subscription.push(('alert', alert))
+            subscription.push(('stats', delta))
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            subscribers = list(self._subscribers)
+        return {
+            'subscribers': len(subscribers),
+            'published': self.published,
+            'pending': sum(s.events.qsize() for s in subscribers),
+            'dropped': sum(s.dropped for s in subscribers)
+        }
+
+
+_bus = None
+_bus_lock = threading.Lock()
+
+
+def get_alert_bus() -> AlertBus:
+    """Retourne le bus partagé du processus."""
+    global _bus
+    if _bus is None:
+        with _bus_lock:
+            if _bus is None:
+                _bus = AlertBus()
+    return _bus
@@ -0,0 +1,240 @@
+"""
+Puits d'alertes asynchrone : les détecteurs déposent leurs alertes dans une file
+bornée en mémoire et un thread d'écriture les enregistre par lots (group commit)
+dans le stockage SQLite, hors du chemin de capture des paquets.
+"""
+
+import atexit
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.config import (
+    ALERT_QUEUE_MAX, ALERT_FLUSH_INTERVAL_MS, ALERT_FLUSH_MAX_BATCH,
+    ALERT_BACKPRESSURE, ALERT_SAMPLE_RATE
+)
+from app.utils.alert_store import AlertStore, get_alert_store
+from app.utils.stats_aggregator import get_stats_aggregator
+from app.utils.alert_bus import get_alert_bus
+
+logger = logging.getLogger(__name__)
+
+# Politiques quand la file est pleine
+DROP_OLDEST = 'drop_oldest'  # on écarte l'alerte la plus ancienne
+BLOCK = 'block'              # le détecteur attend qu'il y ait de la place
+SAMPLE = 'sample'            # au-delà du seuil haut, on ne garde qu'une alerte sur N
+POLICIES = (DROP_OLDEST, BLOCK, SAMPLE)
+
+# Remplissage à partir duquel la politique 'sample' commence à échantillonner
+SAMPLE_HIGH_WATERMARK = 0.8
+
+# Appelé après chaque lot écrit : (alertes avec leur id, connexions du lot)
+AlertListener = Callable[[List[Dict[str, Any]], int], None]
+
+
+class AlertSink:
+    """File bornée d'alertes vidée par un thread d'écriture."""
+
+    def __init__(self, store: Optional[AlertStore] = None, max_queue: int = ALERT_QUEUE_MAX,
+                 flush_interval_ms: int = ALERT_FLUSH_INTERVAL_MS, max_batch: int = ALERT_FLUSH_MAX_BATCH,
+                 policy: str = ALERT_BACKPRESSURE, sample_rate: float = ALERT_SAMPLE_RATE,
+                 block_timeout: Optional[float] = None):
+        if policy not in POLICIES:
+            raise ValueError(f"Politique inconnue: {policy} (attendu: {', '.join(POLICIES)})")
+        self.store = store
+        self.max_queue = max_queue
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.max_batch = max_batch
+        self.policy = policy
+        self.sample_every = max(1, round(1 / sample_rate)) if sample_rate > 0 else 0
+        self.block_timeout = block_timeout
+
+        self._queue: deque = deque()
+        self._cond = threading.Condition()
+        self._writer: Optional[threading.Thread] = None
+        self._running = False
+        self._in_flight = 0
+        self._sample_counter = 0
+        self._listeners: List[AlertListener] = []
+
+        # Compteurs exposés par metrics()
+        self.enqueued = 0
+        self.written = 0
+        self.dropped_oldest = 0
+        self.dropped_full = 0
+        self.sampled_out = 0
+        self.write_errors = 0
+        self.batches = 0
+        self.last_batch_size = 0
+        self.last_flush_ms = 0.0
+
+    def add_listener(self, listener: AlertListener):
+        """Abonne une fonction aux lots d'alertes une fois enregistrés."""
+        self._listeners.append(listener)
+
+    # === CÔTÉ DÉTECTEURS ===
+
+    def submit(self, alert: Dict[str, Any], connections_count: int = 0) -> bool:
+        """Dépose une alerte dans la file ; retourne False si elle a été écartée."""
+        with self._cond:
+            if not self._admit():
+                return False
+            self._queue.append((alert, connections_count))
+            self.enqueued += 1
+            if len(self._queue) >= self.max_batch:
+                self._cond.notify_all()
+        if self._writer is None:
+            self.start()
+        return True
+
+    def _admit(self) -> bool:
+        """Applique la politique de contre-pression (appelé sous verrou)."""
+        if self.policy == SAMPLE and len(self._queue) >= self.max_queue * SAMPLE_HIGH_WATERMARK:
+            self._sample_counter += 1
+            if not self.sample_every or self._sample_counter % self.sample_every:
+                self.sampled_out += 1
+                return False
+
+        if len(self._queue) < self.max_queue:
+            return True
+
+        if self.policy == DROP_OLDEST:
+            self._queue.popleft()
+            self.dropped_oldest += 1
+            return True
+
+        if self.policy == BLOCK and self._running:
+            deadline = None if self.block_timeout is None else time.monotonic() + self.block_timeout
+            while len(self._queue) >= self.max_queue and self._running:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            if len(self._queue) < self.max_queue:
+                return True
+
+        self.dropped_full += 1
+        return False
+
+    # === THREAD D'ÉCRITURE ===
+
+    def start(self):
+        with self._cond:
+            if self._writer is not None:
+                return
+            self._running = True
+            self._writer = threading.Thread(target=self._run, name='alert-sink-writer', daemon=True)
+            self._writer.start()
+
+    def stop(self, flush: bool = True, timeout: float = 10.0):
+        """Arrête le thread d'écriture, après avoir vidé la file si flush=True."""
+        if flush:
+            self.flush(timeout)
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._writer is not None:
+            self._writer.join(timeout)
+            self._writer = None
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Attend que toutes les alertes en file soient écrites."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self._cond.notify_all()
+            while (self._queue or self._in_flight) and self._writer is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(min(remaining, self.flush_interval))
+        return True
+
+    def _next_batch(self) -> List[Tuple[Dict[str, Any], int]]:
+        with self._cond:
+            if len(self._queue) < self.max_batch and self._running:
+                self._cond.wait(self.flush_interval)
+            batch = [self._queue.popleft() for _ in range(min(self.max_batch, len(self._queue)))]
+            self._in_flight = len(batch)
+            # Libère les détecteurs bloqués par la politique 'block'
+            self._cond.notify_all()
+            return batch
+
+    def _run(self):
+        store = self.store or get_alert_store()
+        while True:
+            batch = self._next_batch()
+            if batch:
+                self._write(store, batch)
+            with self._cond:
+                self._in_flight = 0
+                self._cond.notify_all()
+                if not self._running and not self._queue:
+                    break
+
+    def _write(self, store: AlertStore, batch: List[Tuple[Dict[str, Any], int]]):
+        start = time.perf_counter()
+        connections_count = sum(count for _, count in batch)
+        try:
+            stored = store.add_alerts([alert for alert, _ in batch], connections_count=connections_count)
+            self.written += len(batch)
+        except Exception as e:
+            self.write_errors += len(batch)
+            logger.error(f"Erreur écriture du lot de {len(batch)} alertes: {e}")
+            stored = None
+        self.batches += 1
+        self.last_batch_size = len(batch)
+        self.last_flush_ms = round((time.perf_counter() - start) * 1000, 3)
+        if stored:
+            for listener in self._listeners:
+                try:
+                    listener(stored, connections_count)
+                except Exception as e:
+                    logger.error(f"Erreur abonné du puits d'alertes: {e}")
+
+    # === MÉTRIQUES ===
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._cond:
+            depth = len(self._queue)
+        return {
+            'policy': self.policy,
+            'queue_depth': depth,
+            'max_queue': self.max_queue,
+            'enqueued': self.enqueued,
+            'written': self.written,
+            'dropped': self.dropped_oldest + self.dropped_full + self.sampled_out,
+            'dropped_oldest': self.dropped_oldest,
+            'dropped_full': self.dropped_full,
+            'sampled_out': self.sampled_out,
+            'write_errors': self.write_errors,
+            'batches': self.batches,
+            'last_batch_size': self.last_batch_size,
+            'last_flush_ms': self.last_flush_ms,
+            'writer_running': self._writer is not None and self._writer.is_alive()
+        }
+
+
+_sink = None
+_sink_lock = threading.Lock()
+
+
+def get_alert_sink() -> AlertSink:
+    """Retourne le puits d'alertes partagé du processus (démarré au premier appel)."""
+    global _sink
+    if _sink is None:
+        with _sink_lock:
+            if _sink is None:
+                _sink = AlertSink()
+                _sink.add_listener(get_stats_aggregator().record_alerts)
+                _sink.add_listener(get_alert_bus().publish_alerts)
+                _sink.start()
+                # Ne pas perdre les alertes en file à la sortie du processus
+                atexit.register(_sink.stop)
+    return _sink
+
+
+def emit_alert(alert: Dict[str, Any], connections_count: int = 0) -> bool:
+    """Raccourci pour les détecteurs : dépose une alerte dans le puits partagé."""
+    return get_alert_sink().submit(alert, connections_count=connections_count)
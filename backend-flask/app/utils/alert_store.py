@@ -0,0 +1,371 @@
+"""
+Stockage embarqué SQLite (mode WAL) des alertes, connexions et statistiques.
+
+Remplace la relecture/réécriture complète de network_data.json à chaque alerte :
+chaque écriture est une insertion indexée, et plusieurs détecteurs (threads ou
+processus) peuvent écrire en parallèle sans perdre de données.
+"""
+
+import json
+import sqlite3
+import threading
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.config import DATA_FILE, DB_FILE
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STATS = {
+    'total_connections': 0,
+    'total_packets': 0,
+    'total_alerts': 0,
+    'active_threats': 0,
+    'blocked_attempts': 0,
+    'system_health': 100
+}
+
+# Clés internes de la table stats, non exposées par get_stats()
+INTERNAL_STATS = {'legacy_imported'}
+
+# Colonnes indexées utilisables dans count_alerts_by()
+GROUPABLE_COLUMNS = ('attack_type', 'severity', 'source_ip')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS alerts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT NOT NULL,
+    source_ip TEXT,
+    destination_ip TEXT,
+    attack_type TEXT,
+    severity TEXT,
+    confidence REAL,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_alerts_timestamp ON alerts(timestamp);
+CREATE INDEX IF NOT EXISTS idx_alerts_attack_type ON alerts(attack_type);
+CREATE INDEX IF NOT EXISTS idx_alerts_source_ip ON alerts(source_ip);
+CREATE INDEX IF NOT EXISTS idx_alerts_severity ON alerts(severity);
+
+CREATE TABLE IF NOT EXISTS connections (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT NOT NULL,
+    source_ip TEXT,
+    destination_ip TEXT,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_connections_timestamp ON connections(timestamp);
+
+CREATE TABLE IF NOT EXISTS stats (
+    key TEXT PRIMARY KEY,
+    value
+);
+"""
+
+
+class AlertStore:
+    """Accès thread-safe à la base SQLite (une connexion par thread)."""
+
+    def __init__(self, db_path: Path = DB_FILE, legacy_file: Optional[Path] = DATA_FILE):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._connection().executescript(SCHEMA)
+        if legacy_file is not None:
+            self._import_legacy_json(Path(legacy_file))
+
+    # === CONNEXIONS ===
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA busy_timeout=30000')
+            self._local.conn = conn
+        return conn
+
+    def _transaction(self):
+        return _Transaction(self._connection())
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # === ALERTES ===
+
+    @staticmethod
+    def _alert_row(alert: Dict[str, Any]):
+        payload = {k: v for k, v in alert.items() if k != 'id'}
+        payload.setdefault('timestamp', datetime.now().isoformat())
+        return (
+            payload['timestamp'],
+            payload.get('sourceIp'),
+            payload.get('destinationIp'),
+            payload.get('attackType'),
+            payload.get('severity'),
+            payload.get('confidence'),
+            json.dumps(payload, default=str),
+        ), payload
+
+    @staticmethod
+    def _row_to_alert(row: sqlite3.Row) -> Dict[str, Any]:
+        alert = {'id': row['id']}
+        alert.update(json.loads(row['payload']))
+        return alert
+
+    def add_alerts(self, alerts: Iterable[Dict[str, Any]], connections_count: int = 0) -> List[Dict[str, Any]]:
+        """
+        Insère un lot d'alertes dans une seule transaction et met à jour les compteurs.
+        Retourne les alertes avec leur identifiant SQLite (croissant).
+        """
+        with self._transaction() as conn:
+            return self._insert_alerts(conn, alerts, connections_count)
+
+    def _insert_alerts(self, conn: sqlite3.Connection, alerts: Iterable[Dict[str, Any]],
+                       connections_count: int = 0) -> List[Dict[str, Any]]:
+        stored = []
+        high = 0
+        for alert in alerts:
+            row, payload = self._alert_row(alert)
+            cursor = conn.execute(
+                'INSERT INTO alerts (timestamp, source_ip, destination_ip, attack_type, severity, confidence, payload) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)', row)
+            stored.append({'id': cursor.lastrowid, **payload})
+            if payload.get('severity') == 'high':
+                high += 1
+        if stored:
+            self._increment(conn, total_alerts=len(stored), active_threats=high,
+                            total_connections=connections_count)
+            self._set(conn, last_update=datetime.now().isoformat())
+        return stored
+
+    def add_alert(self, alert: Dict[str, Any], connections_count: int = 0) -> Dict[str, Any]:
+        """Insère une alerte ; connections_count s'ajoute à total_connections."""
+        return self.add_alerts([alert], connections_count=connections_count)[0]
+
+    def get_alerts(self, limit: Optional[int] = None, since_id: Optional[int] = None,
+                   attack_type: Optional[str] = None, severity: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Retourne les alertes de la plus ancienne à la plus récente.
+        Avec limit, ce sont les `limit` plus récentes ; avec since_id, celles d'id > since_id.
+        """
+        clauses, params = [], []
+        if since_id is not None:
+            clauses.append('id > ?')
+            params.append(since_id)
+        if attack_type:
+            clauses.append('attack_type = ?')
+            params.append(attack_type)
+        if severity:
+            clauses.append('severity = ?')
+            params.append(severity)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        if limit is not None and since_id is None:
+            query = f'SELECT * FROM (SELECT id, payload FROM alerts {where} ORDER BY id DESC LIMIT ?) ORDER BY id'
+            params.append(limit)
+        else:
+            query = f'SELECT id, payload FROM alerts {where} ORDER BY id'
+            if limit is not None:
+                query += ' LIMIT ?'
+                params.append(limit)
+        rows = self._connection().execute(query, params).fetchall()
+        return [self._row_to_alert(row) for row in rows]
+
+    def delete_alerts(self, alert_ids: Iterable[int]) -> int:
+        """Supprime des alertes par id, retourne le nombre supprimé."""
+        alert_ids = list(alert_ids)
+        if not alert_ids:
+            return 0
+        placeholders = ','.join('?' * len(alert_ids))
+        with self._transaction() as conn:
+            high = conn.execute(
+                f"SELECT COUNT(*) FROM alerts WHERE severity = 'high' AND id IN ({placeholders})",
+                alert_ids).fetchone()[0]
+            deleted = conn.execute(f'DELETE FROM alerts WHERE id IN ({placeholders})', alert_ids).rowcount
+            if deleted:
+                self._increment(conn, total_alerts=-deleted, active_threats=-high)
+        return deleted
+
+    def delete_alert(self, alert_id: int) -> int:
+        return self.delete_alerts([alert_id])
+
+    def count_alerts_by(self, column: str) -> Dict[str, int]:
+        """Nombre d'alertes par valeur d'une colonne indexée (attack_type, severity, source_ip)."""
+        if column not in GROUPABLE_COLUMNS:
+            raise ValueError(f"Colonne non groupable: {column}")
+        rows = self._connection().execute(
+            f'SELECT {column} AS value, COUNT(*) AS n FROM alerts GROUP BY {column}').fetchall()
+        return {(row['value'] or 'Unknown'): row['n'] for row in rows}
+
+    def count_alerts_by_attack_type(self) -> Dict[str, int]:
+        return self.count_alerts_by('attack_type')
+
+    def count_alerts(self) -> int:
+        return self._connection().execute('SELECT COUNT(*) FROM alerts').fetchone()[0]
+
+    def last_alert_id(self) -> int:
+        row = self._connection().execute('SELECT MAX(id) FROM alerts').fetchone()
+        return row[0] or 0
+
+    # === CONNEXIONS ===
+
+    def add_connections(self, connections: Iterable[Dict[str, Any]]) -> int:
+        with self._transaction() as conn:
+            return self._insert_connections(conn, connections)
+
+    @staticmethod
+    def _insert_connections(conn: sqlite3.Connection, connections: Iterable[Dict[str, Any]]) -> int:
+        rows = []
+        for connection in connections:
+            rows.append((
+                connection.get('timestamp') or datetime.now().isoformat(),
+                connection.get('source_ip'),
+                connection.get('dest_ip', connection.get('destination_ip')),
+                json.dumps(connection, default=str),
+            ))
+        if rows:
+            conn.executemany(
+                'INSERT INTO connections (timestamp, source_ip, destination_ip, payload) VALUES (?, ?, ?, ?)', rows)
+        return len(rows)
+
+    def get_connections(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        if limit is None:
+            rows = self._connection().execute('SELECT payload FROM connections ORDER BY id').fetchall()
+        else:
+            rows = self._connection().execute(
+                'SELECT payload FROM (SELECT id, payload FROM connections ORDER BY id DESC LIMIT ?) ORDER BY id',
+                (limit,)).fetchall()
+        return [json.loads(row['payload']) for row in rows]
+
+    def count_connections(self) -> int:
+        return self._connection().execute('SELECT COUNT(*) FROM connections').fetchone()[0]
+
+    # === STATISTIQUES ===
+
+    @staticmethod
+    def _increment(conn: sqlite3.Connection, **deltas):
+        conn.executemany(
+            'INSERT INTO stats (key, value) VALUES (?, ?) '
+            'ON CONFLICT(key) DO UPDATE SET value = COALESCE(value, 0) + excluded.value',
+            [(key, delta) for key, delta in deltas.items() if delta])
+
+    @staticmethod
+    def _set(conn: sqlite3.Connection, **values):
+        conn.executemany(
+            'INSERT INTO stats (key, value) VALUES (?, ?) '
+            'ON CONFLICT(key) DO UPDATE SET value = excluded.value',
+            list(values.items()))
+
+    def increment_stats(self, **deltas):
+        with self._transaction() as conn:
+            self._increment(conn, **deltas)
+
+    def update_stats(self, **values):
+        with self._transaction() as conn:
+            self._set(conn, **values)
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(DEFAULT_STATS)
+        for row in self._connection().execute('SELECT key, value FROM stats'):
+            if row['key'] not in INTERNAL_STATS:
+                stats[row['key']] = row['value']
+        total_connections = stats.get('total_connections') or 0
+        stats['detection_rate'] = (
+            round(stats['total_alerts'] / total_connections * 100, 2) if total_connections > 0 else 0.0
+        )
+        return stats
+
+    # === VUE COMPATIBLE network_data.json ===
+
+    def get_network_data(self, alert_limit: Optional[int] = None,
+                         connection_limit: Optional[int] = None) -> Dict[str, Any]:
+        """Reconstitue le dictionnaire {connections, alerts, stats} de l'ancien fichier JSON."""
+        return {
+            'connections': self.get_connections(connection_limit),
+            'alerts': self.get_alerts(alert_limit),
+            'stats': self.get_stats()
+        }
+
+    def reset(self):
+        """Vide alertes, connexions et statistiques."""
+        with self._transaction() as conn:
+            conn.execute('DELETE FROM alerts')
+            conn.execute('DELETE FROM connections')
+            conn.execute('DELETE FROM stats')
+            self._set(conn, legacy_imported=1, last_update=datetime.now().isoformat())
+
+    def _import_legacy_json(self, legacy_file: Path):
+        """
+        Importe une seule fois le contenu de l'ancien network_data.json. Le marqueur
+        legacy_imported est posé dans la transaction des lignes importées : un import
+        interrompu ou en échec est retenté au démarrage suivant.
+        """
+        if self._connection().execute("SELECT 1 FROM stats WHERE key = 'legacy_imported'").fetchone():
+            return
+        data = {}
+        if legacy_file.exists():
+            try:
+                with open(legacy_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except Exception as e:
+                logger.error(f"Import de {legacy_file} impossible: {e}")
+                return
+        with self._transaction() as conn:
+            # Un autre processus a pu importer entre-temps
+            if conn.execute("SELECT 1 FROM stats WHERE key = 'legacy_imported'").fetchone():
+                return
+            self._insert_connections(conn, data.get('connections', []))
+            self._insert_alerts(conn, data.get('alerts', []))
+            legacy_stats = {}
+            for key, value in data.get('stats', {}).items():
+                if key in ('total_alerts', 'active_threats', 'detection_rate'):
+                    continue
+                if not isinstance(value, (str, int, float, type(None))):
+                    # SQLite ne stocke que des scalaires : listes et dictionnaires sont conservés en JSON
+                    logger.warning(f"⚠️ Statistique {key} non scalaire importée en JSON")
+                    value = json.dumps(value, default=str)
+                legacy_stats[key] = value
+            if legacy_stats:
+                self._set(conn, **legacy_stats)
+            self._set(conn, legacy_imported=1)
+        if data:
+            logger.info(f"📦 Import de {legacy_file.name}: {len(data.get('alerts', []))} alertes")
+
+
+class _Transaction:
+    """Transaction explicite BEGIN IMMEDIATE / COMMIT (connexion en autocommit)."""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.conn.execute('BEGIN IMMEDIATE')
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.conn.execute('COMMIT')
+        else:
+            self.conn.execute('ROLLBACK')
+        return False
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_alert_store() -> AlertStore:
+    """Retourne l'instance partagée du stockage (créée au premier appel)."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = AlertStore()
+    return _store
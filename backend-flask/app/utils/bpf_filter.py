@@ -0,0 +1,327 @@
+"""
+Filtre BPF classique attaché aux sockets de capture (SO_ATTACH_FILTER).
+
+Les modules activés dans settings.json déterminent les paquets utiles aux
+détecteurs (segments TCP SYN/RST, ports de destination surveillés, UDP/ICMP
+pour la détection de flood), en IPv4 comme en IPv6 ; le noyau
+écarte tout le reste avant la copie vers l'espace utilisateur. Le même filtre
+est exprimé en syntaxe tcpdump pour scapy sniff(filter=...).
+"""
+
+import ctypes
+import json
+import logging
+import os
+import socket
+import struct
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ..config import CAPTURE_FILTER_REFRESH, SETTINGS_FILE
+
+logger = logging.getLogger(__name__)
+
+# Drapeaux TCP
+TCP_SYN = 0x02
+TCP_RST = 0x04
+
+IPPROTO_ICMP = 1
+IPPROTO_TCP = 6
+IPPROTO_UDP = 17
+IPPROTO_ICMPV6 = 58
+
+# Paquets utiles à chaque module de settings.json ('modules') ; 'protocols' : protocoles acceptés en entier
+MODULE_RULES: Dict[str, Dict] = {
+    'dos': {'flags': TCP_SYN, 'ports': (80,), 'protocols': ('udp', 'icmp')},
+    'port_scan': {'flags': TCP_SYN | TCP_RST, 'ports': ()},
+    'probe': {'flags': TCP_SYN | TCP_RST, 'ports': (), 'protocols': ('icmp',)},
+    'bruteforce': {'flags': 0, 'ports': (21, 22, 23, 3389)},
+    'sql_injection': {'flags': 0, 'ports': (80, 8080)},
+    'xss': {'flags': 0, 'ports': (80, 8080)},
+}
+
+# Constantes <linux/filter.h>
+SO_ATTACH_FILTER = 26
+SO_DETACH_FILTER = 27
+SKF_NET_OFF = -0x100000  # offsets relatifs à l'en-tête réseau (valable pour AF_INET et AF_PACKET)
+
+BPF_LD_ABS = 0x20    # A = u32 [k]
+BPF_LDH_ABS = 0x28   # A = u16 [k]
+BPF_LDB_ABS = 0x30   # A = u8 [k]
+BPF_LDXB_MSH = 0xb1  # X = 4 * ([k] & 0xf)
+BPF_LDH_IND = 0x48   # A = u16 [X + k]
+BPF_LDB_IND = 0x50   # A = u8 [X + k]
+BPF_AND_K = 0x54     # A &= k
+BPF_XOR_X = 0xac     # A ^= X
+BPF_MOD_K = 0x94     # A %= k
+BPF_TAX = 0x07       # X = A
+BPF_JEQ_K = 0x15
+BPF_JSET_K = 0x45
+BPF_RET_K = 0x06
+BPF_RET_A = 0x16
+
+ACCEPT_SNAPLEN = 0x40000
+Instruction = Tuple[int, int, int, int]
+
+
+class FilterSpec:
+    """
+    Paquets à laisser passer : TCP avec un des drapeaux ou vers un port surveillé,
+    protocoles entiers ; all_tcp : tous les segments TCP (reconstruction des flux).
+    """
+
+    def __init__(self, tcp_flags: int = 0, dst_ports: Iterable[int] = (), protocols: Iterable[str] = (),
+                 all_tcp: bool = False):
+        self.tcp_flags = tcp_flags
+        self.dst_ports = tuple(sorted(set(dst_ports)))
+        self.protocols = tuple(sorted(set(protocols)))
+        self.all_tcp = all_tcp
+
+    def has_tcp(self) -> bool:
+        return bool(self.all_tcp or self.tcp_flags or self.dst_ports)
+
+    def is_empty(self) -> bool:
+        return not self.has_tcp() and not self.protocols
+
+    def __eq__(self, other):
+        return isinstance(other, FilterSpec) and self.to_dict() == other.to_dict()
+
+    def to_dict(self) -> Dict:
+        return {'tcp_flags': self.tcp_flags, 'dst_ports': list(self.dst_ports), 'protocols': list(self.protocols),
+                'all_tcp': self.all_tcp}
+
+
+def spec_from_settings(settings: Dict, all_tcp: bool = False) -> FilterSpec:
+    flags, ports, protocols = 0, set(), set()
+    for module, enabled in settings.get('modules', {}).items():
+        rule = MODULE_RULES.get(module)
+        if enabled and rule:
+            flags |= rule['flags']
+            ports.update(rule['ports'])
+            protocols.update(rule.get('protocols', ()))
+    return FilterSpec(flags, ports, protocols, all_tcp)
+
+
+def _assemble(body: List[Tuple]) -> List[Instruction]:
+    """Résout les étiquettes ('label', nom) des sauts ('jeq'|'jset', k, vrai, faux) en offsets relatifs."""
+    labels, position = {}, 0
+    for entry in body:
+        if entry[0] == 'label':
+            labels[entry[1]] = position
+        else:
+            position += 1
+    program = []
+    for entry in body:
+        kind = entry[0]
+        if kind == 'label':
+            continue
+        if kind == 'ld':
+            program.append((entry[1], 0, 0, entry[2]))
+        elif kind == 'ret':
+            program.append((BPF_RET_K, 0, 0, entry[1]))
+        else:
+            here = len(program) + 1
+            jt = labels[entry[2]] - here if entry[2] else 0
+            jf = labels[entry[3]] - here if entry[3] else 0
+            program.append((BPF_JEQ_K if kind == 'jeq' else BPF_JSET_K, jt, jf, entry[1]))
+    return program
+
+
+def _transport(spec: FilterSpec, l4_ind: bool, l4: int) -> List[Tuple]:
+    """Tests TCP (drapeaux puis ports) ; l4_ind : offset relatif à X (longueur d'en-tête IPv4)."""
+    if spec.all_tcp:
+        return [('ret', ACCEPT_SNAPLEN)]
+    byte, half = (BPF_LDB_IND, BPF_LDH_IND) if l4_ind else (BPF_LDB_ABS, BPF_LDH_ABS)
+    body = []
+    if spec.tcp_flags:
+        body += [('ld', byte, l4 + 13), ('jset', spec.tcp_flags, 'accept', None)]
+    if spec.dst_ports:
+        body.append(('ld', half, l4 + 2))
+        body += [('jeq', port, 'accept', None) for port in spec.dst_ports]
+    return body + [('ret', 0)]
+
+
+def compile_filter(spec: FilterSpec) -> List[Instruction]:
+    """Programme BPF classique (code, jt, jf, k) correspondant à spec."""
+    if spec.is_empty():
+        return [(BPF_RET_K, 0, 0, 0)]
+    udp, icmp = 'udp' in spec.protocols, 'icmp' in spec.protocols
+    # Offsets relatifs à l'en-tête réseau (SKF_NET_OFF) : valables quel que soit le type de lien
+    body = [
+        ('ld', BPF_LDB_ABS, SKF_NET_OFF),           # version IP
+        ('ld', BPF_AND_K, 0xf0),
+        ('jeq', 0x40, None, 'ipv6'),
+        # IPv4
+        ('ld', BPF_LDB_ABS, SKF_NET_OFF + 9),       # protocole
+    ]
+    if udp:
+        body.append(('jeq', IPPROTO_UDP, 'accept', None))
+    if icmp:
+        body.append(('jeq', IPPROTO_ICMP, 'accept', None))
+    if spec.has_tcp():
+        body += [
+            ('jeq', IPPROTO_TCP, None, 'reject'),
+            ('ld', BPF_LDH_ABS, SKF_NET_OFF + 6),   # fragments : pas d'en-tête TCP
+            ('jset', 0x1fff, 'reject', None),
+            ('ld', BPF_LDXB_MSH, SKF_NET_OFF),      # X = longueur de l'en-tête IP (options comprises)
+        ] + _transport(spec, True, SKF_NET_OFF)
+    else:
+        body.append(('ret', 0))
+    # IPv6 (en-têtes d'extension non suivis)
+    body += [
+        ('label', 'ipv6'),
+        ('jeq', 0x60, None, 'reject'),
+        ('ld', BPF_LDB_ABS, SKF_NET_OFF + 6),       # next header
+    ]
+    if udp:
+        body.append(('jeq', IPPROTO_UDP, 'accept', None))
+    if icmp:
+        body.append(('jeq', IPPROTO_ICMPV6, 'accept', None))
+    if spec.has_tcp():
+        body += [('jeq', IPPROTO_TCP, None, 'reject')] + _transport(spec, False, SKF_NET_OFF + 40)
+    body += [
+        ('label', 'reject'),
+        ('ret', 0),
+        ('label', 'accept'),
+        ('ret', ACCEPT_SNAPLEN),
+    ]
+    return _assemble(body)
+
+
+def tcpdump_expression(spec: FilterSpec, tcp_only: bool = False) -> str:
+    """Même filtre en syntaxe tcpdump (scapy sniff, tcpdump -d pour vérifier) ; tcp_only : sans UDP/ICMP."""
+    clauses = []
+    if spec.all_tcp:
+        clauses.append('(ip and tcp and ip[6:2] & 0x1fff == 0) or (ip6 and ip6[6] == 6)')
+    elif spec.has_tcp():
+        tcp4, tcp6 = [], []
+        if spec.tcp_flags:
+            names = [name for flag, name in ((TCP_SYN, 'tcp-syn'), (TCP_RST, 'tcp-rst')) if spec.tcp_flags & flag]
+            tcp4.append(f"tcp[tcpflags] & ({'|'.join(names)}) != 0")
+            tcp6.append(f"ip6[53] & {spec.tcp_flags} != 0")
+        tcp4 += [f"dst port {port}" for port in spec.dst_ports]
+        tcp6 += [f"ip6[42:2] == {port}" for port in spec.dst_ports]
+        clauses.append(f"(ip and tcp and ip[6:2] & 0x1fff == 0 and ({' or '.join(tcp4)}))")
+        clauses.append(f"(ip6 and ip6[6] == 6 and ({' or '.join(tcp6)}))")
+    if not tcp_only:
+        if 'udp' in spec.protocols:
+            clauses.append('(ip and ip[9] == 17) or (ip6 and ip6[6] == 17)')
+        if 'icmp' in spec.protocols:
+            clauses.append('(ip and ip[9] == 1) or (ip6 and ip6[6] == 58)')
+    return ' or '.join(clauses) if clauses else 'tcp and not tcp'
+
+
+def fanout_program(workers: int) -> List[Instruction]:
+    """
+    Répartition PACKET_FANOUT_CBPF : index du worker = (IP source ^ IP destination) % workers.
+    Symétrique et indépendant des ports : tout le trafic d'une paire d'adresses va au même worker.
+    En IPv6, XOR des huit mots de 32 bits des deux adresses (octets 8 à 39).
+    """
+    ipv4 = [
+        (BPF_LD_ABS, 0, 0, SKF_NET_OFF + 12),
+        (BPF_TAX, 0, 0, 0),
+        (BPF_LD_ABS, 0, 0, SKF_NET_OFF + 16),
+        (BPF_XOR_X, 0, 0, 0),
+        (BPF_MOD_K, 0, 0, workers),
+        (BPF_RET_A, 0, 0, 0),
+    ]
+    ipv6 = [(BPF_LD_ABS, 0, 0, SKF_NET_OFF + 8)]
+    for offset in range(12, 40, 4):
+        ipv6 += [(BPF_TAX, 0, 0, 0), (BPF_LD_ABS, 0, 0, SKF_NET_OFF + offset), (BPF_XOR_X, 0, 0, 0)]
+    ipv6 += [(BPF_MOD_K, 0, 0, workers), (BPF_RET_A, 0, 0, 0)]
+    return [
+        (BPF_LDB_ABS, 0, 0, SKF_NET_OFF),   # version IP
+        (BPF_AND_K, 0, 0, 0xf0),
+        (BPF_JEQ_K, len(ipv4), 0, 0x60),
+    ] + ipv4 + ipv6
+
+
+def sock_fprog(program: List[Instruction]) -> Tuple[bytes, ctypes.Array]:
+    """struct sock_fprog { unsigned short len; struct sock_filter *filter; } et le tampon pointé (à garder vivant)."""
+    raw = b''.join(struct.pack('=HBBi', code, jt, jf, k) for code, jt, jf, k in program)
+    buffer = ctypes.create_string_buffer(raw, len(raw))
+    return struct.pack('@HP', len(program), ctypes.addressof(buffer)), buffer
+
+
+def attach_filter(sock, program: List[Instruction]):
+    """Attache (ou remplace atomiquement) le programme sur le socket."""
+    fprog, _buffer = sock_fprog(program)
+    sock.setsockopt(socket.SOL_SOCKET, SO_ATTACH_FILTER, fprog)
+
+
+def detach_filter(sock):
+    sock.setsockopt(socket.SOL_SOCKET, SO_DETACH_FILTER, 0)
+
+
+class CaptureFilter:
+    """Filtre dérivé de settings.json, recompilé et réattaché quand le fichier change."""
+
+    def __init__(self, settings_file=SETTINGS_FILE, refresh_interval: float = CAPTURE_FILTER_REFRESH,
+                 all_tcp: bool = False):
+        self.settings_file = settings_file
+        self.refresh_interval = refresh_interval
+        self.all_tcp = all_tcp  # exigence des plugins (flow_scoring), indépendante de settings.json
+        self._sockets = []
+        self._lock = threading.Lock()
+        self._mtime: Optional[float] = None
+        self._next_check = 0.0
+        self.rebuilds = 0
+        self.spec = self._load()
+        self.program = compile_filter(self.spec)
+
+    def _stat(self) -> Optional[float]:
+        try:
+            return os.stat(self.settings_file).st_mtime
+        except OSError:
+            return None
+
+    def _load(self) -> FilterSpec:
+        from ..routes.settings import DEFAULT_SETTINGS
+        self._mtime = self._stat()
+        try:
+            with open(self.settings_file, 'r') as f:
+                settings = json.load(f)
+        except (OSError, ValueError):
+            settings = DEFAULT_SETTINGS
+        return spec_from_settings(settings, self.all_tcp)
+
+    def attach(self, sock):
+        attach_filter(sock, self.program)
+        with self._lock:
+            self._sockets.append(sock)
+        logger.debug(f"Filtre BPF attaché ({len(self.program)} instructions): {self.expression()}")
+
+    def release(self, sock):
+        with self._lock:
+            if sock in self._sockets:
+                self._sockets.remove(sock)
+
+    def expression(self, tcp_only: bool = False) -> str:
+        return tcpdump_expression(self.spec, tcp_only)
+
+    def changed(self) -> bool:
+        return self._stat() != self._mtime
+
+    def refresh(self, force: bool = False) -> bool:
+        """Recompile si settings.json a changé (au plus toutes les refresh_interval s) ; True si le filtre a changé."""
+        now = time.monotonic()
+        if not force and now < self._next_check:
+            return False
+        self._next_check = now + self.refresh_interval
+        if not force and not self.changed():
+            return False
+        spec = self._load()
+        if spec == self.spec:
+            return False
+        self.spec, self.program = spec, compile_filter(spec)
+        self.rebuilds += 1
+        with self._lock:
+            sockets = list(self._sockets)
+        for sock in sockets:
+            try:
+                attach_filter(sock, self.program)
+            except OSError as e:
+                logger.error(f"Erreur réattachement du filtre BPF: {e}")
+        logger.debug(f"Filtre BPF recompilé après modification des paramètres: {self.expression()}")
+        return True
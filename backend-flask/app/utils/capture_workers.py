@@ -0,0 +1,224 @@
+"""
+Capture répartie sur plusieurs processus (Linux, PACKET_FANOUT).
+
+Chaque worker ouvre son propre anneau AF_PACKET dans un même groupe de fanout :
+le noyau envoie tout le trafic d'une paire d'adresses IP au même worker, dont
+l'état de détection (historiques, cooldowns) reste donc cohérent. Les alertes
+des workers remontent par une file multiprocessing vers le processus parent,
+qui les dépose dans le puits commun (un seul écrivain SQLite). Les flux terminés
+(plugin flow_scoring) suivent la même file : seul le parent charge le modèle.
+
+Les workers sont lancés par un serveur forkserver : ils ne sont pas des copies
+d'un parent qui a déjà des threads (puits d'alertes, agrégateur, registre).
+"""
+
+import logging
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from ..config import (ALERT_QUEUE_MAX, CAPTURE_RING_BLOCK_SIZE, CAPTURE_RING_BLOCKS,
+                      CAPTURE_RING_BLOCK_TIMEOUT_MS)
+from .flow_table import get_pair_flows
+from .packet_ring import PacketRing
+
+logger = logging.getLogger(__name__)
+
+# Compteurs par worker dans le tableau partagé
+COUNTERS = ('packets', 'blocks', 'kernel_drops', 'alerts', 'alerts_dropped', 'errors')
+
+
+class QueueSink:
+    """
+    Puits côté worker vers la file du parent : même interface submit() que AlertSink,
+    submit_flows() que FlowScorer (flux classés par le parent).
+    """
+
+    policy = 'queue'
+
+    def __init__(self, alert_queue):
+        self.queue = alert_queue
+        self.submitted = 0
+        self.dropped = 0
+        self.flows_forwarded = 0
+        self.flows_dropped = 0
+
+    def submit(self, alert: Dict[str, Any], connections_count: int = 0) -> bool:
+        try:
+            self.queue.put_nowait(('alert', alert, connections_count))
+            self.submitted += 1
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def submit_flows(self, flows: List[Dict[str, Any]]) -> int:
+        try:
+            self.queue.put_nowait(('flows', flows, 0))
+            self.flows_forwarded += len(flows)
+            return 0
+        except queue.Full:
+            self.flows_dropped += len(flows)
+            return len(flows)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {'forwarded': self.flows_forwarded, 'dropped': self.flows_dropped}
+
+
+def _worker_main(index: int, analyzer_factory: Callable, interface: Optional[str], group_id: int,
+                 workers: int, alert_queue, stop, counters):
+    """Boucle d'un worker : anneau en fanout, analyse par lots, compteurs partagés."""
+    sink = QueueSink(alert_queue)
+    try:
+        analyzer = analyzer_factory(sink=sink)
+        ring = PacketRing(interface, block_size=CAPTURE_RING_BLOCK_SIZE, block_count=CAPTURE_RING_BLOCKS,
+                          block_timeout_ms=CAPTURE_RING_BLOCK_TIMEOUT_MS,
+                          fanout_group=group_id, fanout_workers=workers)
+        if hasattr(analyzer, 'attach_filter'):
+            analyzer.attach_filter(ring.sock)
+    except Exception:
+        logger.exception(f"❌ Démarrage du worker de capture {index} impossible")
+        raise
+    base = index * len(COUNTERS)
+    errors = 0
+    try:
+        while not stop.is_set():
+            # Une erreur d'analyse ne tue pas le worker : journalisée et comptée
+            try:
+                ring.process(analyzer.analyze_batch)
+                if hasattr(analyzer, 'tick'):
+                    analyzer.tick()
+                if hasattr(analyzer, 'refresh_filter'):
+                    analyzer.refresh_filter()
+            except Exception as e:
+                errors += 1
+                logger.error(f"❌ Worker de capture {index}: {e}")
+            stats = ring.stats()
+            counters[base:base + len(COUNTERS)] = [stats['packets'], stats['blocks'], stats['kernel_drops'],
+                                                   sink.submitted, sink.dropped, errors]
+    except KeyboardInterrupt:
+        pass
+    except Exception:
+        logger.exception(f"❌ Worker de capture {index} arrêté")
+        raise
+    finally:
+        ring.close()
+
+
+class CaptureWorkerPool:
+    """N processus de capture sur une interface, alertes fusionnées dans le puits du parent."""
+
+    def __init__(self, analyzer_factory: Callable, workers: int, interface: Optional[str] = None,
+                 sink=None, group_id: Optional[int] = None, flow_scorer=None):
+        """
+        analyzer_factory(sink=...) est appelé dans chaque worker (il doit être picklable :
+        fonction ou classe de module, éventuellement via functools.partial) et doit retourner
+        un objet exposant analyze_batch(frames) (et éventuellement tick/attach_filter/refresh_filter).
+        flow_scorer : FlowScorer du parent recevant les flux terminés des workers.
+        """
+        self.analyzer_factory = analyzer_factory
+        self.workers = workers
+        self.interface = interface
+        self.group_id = group_id if group_id is not None else os.getpid() & 0xffff
+        self._sink = sink
+        self.flow_scorer = flow_scorer
+        # forkserver : enfants issus d'un processus sans threads ; l'anneau et l'analyseur sont créés dans l'enfant
+        self._ctx = mp.get_context('forkserver')
+        self._processes: List[mp.Process] = []
+        self._queue = None
+        self._stop = None
+        self._counters = None
+        self._drain_thread: Optional[threading.Thread] = None
+        self._draining = threading.Event()
+        self.merged = 0
+        self.flows_merged = 0
+        self.flows_unscored = 0
+
+    @property
+    def sink(self):
+        if self._sink is None:
+            from .alert_sink import get_alert_sink
+            self._sink = get_alert_sink()
+        return self._sink
+
+    def start(self):
+        self._queue = self._ctx.Queue(maxsize=ALERT_QUEUE_MAX)
+        self._stop = self._ctx.Event()
+        self._counters = self._ctx.Array('q', self.workers * len(COUNTERS), lock=False)
+        self.sink  # puits du parent, alimenté par le thread de fusion
+        self._draining.set()
+        self._drain_thread = threading.Thread(target=self._drain, name='capture-alert-merge', daemon=True)
+        self._drain_thread.start()
+        for index in range(self.workers):
+            process = self._ctx.Process(target=_worker_main, name=f'capture-worker-{index}', daemon=True,
+                                        args=(index, self.analyzer_factory, self.interface, self.group_id,
+                                              self.workers, self._queue, self._stop, self._counters))
+            process.start()
+            self._processes.append(process)
+        logger.info(f"🚀 {self.workers} workers de capture démarrés (fanout groupe {self.group_id})")
+
+    def _drain(self):
+        """Fusionne les alertes des workers dans le puits commun et leurs flux dans le classement du parent."""
+        while self._draining.is_set() or not self._queue.empty():
+            try:
+                kind, payload, connections_count = self._queue.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                break
+            if kind == 'flows':
+                get_pair_flows().record(payload)
+                if self.flow_scorer is not None:
+                    self.flow_scorer.submit_flows(payload)
+                    self.flows_merged += len(payload)
+                else:
+                    self.flows_unscored += len(payload)
+                continue
+            self.sink.submit(payload, connections_count=connections_count)
+            self.merged += 1
+
+    def alive(self) -> int:
+        return sum(p.is_alive() for p in self._processes)
+
+    def stop(self, timeout: float = 5.0):
+        if self._stop is None:
+            return
+        self._stop.set()
+        deadline = time.monotonic() + timeout
+        for process in self._processes:
+            process.join(max(0.1, deadline - time.monotonic()))
+            if process.is_alive():
+                process.terminate()
+        self._draining.clear()
+        if self._drain_thread is not None:
+            self._drain_thread.join(timeout=timeout)
+        self._processes = []
+
+    def metrics(self) -> Dict[str, Any]:
+        per_worker = []
+        if self._counters is not None:
+            for index in range(self.workers):
+                values = self._counters[index * len(COUNTERS):(index + 1) * len(COUNTERS)]
+                worker = dict(zip(COUNTERS, values))
+                if index < len(self._processes):
+                    process = self._processes[index]
+                    worker['alive'] = process.is_alive()
+                    worker['exitcode'] = process.exitcode
+                per_worker.append(worker)
+        return {
+            'workers': self.workers,
+            'alive': self.alive(),
+            # Workers arrêtés alors que la capture tourne encore (exception, signal)
+            'dead': [index for index, worker in enumerate(per_worker) if worker.get('alive') is False],
+            'group_id': self.group_id,
+            'packets': sum(w['packets'] for w in per_worker),
+            'kernel_drops': sum(w['kernel_drops'] for w in per_worker),
+            'errors': sum(w['errors'] for w in per_worker),
+            'alerts_merged': self.merged,
+            'flows_merged': self.flows_merged,
+            'flows_unscored': self.flows_unscored,
+            'per_worker': per_worker
+        }
@@ -0,0 +1,418 @@
+"""
+Pipeline de détection sur une seule capture.
+
+La source de capture (anneau AF_PACKET, socket raw ou scapy) remet des lots de
+paquets bruts (FrameBatch) : ils sont décodés une seule fois en tableau
+PACKET_DTYPE, puis chaque plugin enregistré reçoit le même tableau. Ajouter un
+détecteur ne coûte donc ni une capture ni un décodage de plus.
+
+Les plugins partagent les seuils de config.py, le cooldown des alertes et le
+puits d'alertes asynchrone. Un plugin s'enregistre avec @register_plugin(nom)
+et est activé par DETECTOR_PLUGINS.
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from ..config import (ALERT_COOLDOWN, CARDINALITY_WINDOW, DETECTOR_PLUGINS, FLOOD_WINDOW, FLOW_SCORE_BATCH, FLOW_SCORE_MAX_RATE,
+                      ICMP_FLOOD_THRESHOLD, PORT_FLOOD_PORTS, PORT_FLOOD_THRESHOLD, SYN_FLOOD_THRESHOLD, SYN_SKETCH,
+                      SYN_SKETCH_DEPTH, SYN_SKETCH_THRESHOLD, SYN_SKETCH_TOP_K, SYN_SKETCH_WIDTH, SYN_SKETCH_WINDOW,
+                      UDP_FLOOD_THRESHOLD)
+from .flow_scorer import FlowScorer
+from .flow_table import FlowTable, get_pair_flows
+from .packet_decoder import (IPPROTO_ICMP, IPPROTO_ICMPV6, IPPROTO_TCP, IPPROTO_UDP, TCP_ACK, TCP_SYN,
+                             PacketDecoder, count_by, format_ip)
+from .packet_ring import FrameBatch
+from .scan_tracker import ScanTracker
+from .sketches import SketchFloodDetector, key64
+from .sliding_window import SlidingWindowCounter
+from .state_table import StateTable
+from .traffic_features import TrafficFeatureEngine
+
+logger = logging.getLogger(__name__)
+
+PLUGINS: Dict[str, Callable[..., 'DetectorPlugin']] = {}
+
+
+def register_plugin(name: str):
+    """Décorateur : rend un plugin disponible sous ce nom pour DETECTOR_PLUGINS."""
+    def decorator(cls):
+        cls.name = name
+        PLUGINS[name] = cls
+        return cls
+    return decorator
+
+
+class DetectorPlugin:
+    """Détecteur alimenté par les lots décodés ; alerte via self.pipeline.alert()."""
+
+    name = 'plugin'
+    # Besoins de capture : tous les segments TCP (filtre BPF élargi), trafic dans les deux sens
+    needs_all_tcp = False
+    needs_both_directions = False
+
+    def bind(self, pipeline: 'DetectorPipeline'):
+        self.pipeline = pipeline
+
+    def process(self, records: np.ndarray):
+        """Analyse un lot PACKET_DTYPE (vue valide jusqu'au lot suivant)."""
+        raise NotImplementedError
+
+    def tick(self):
+        """Appelé quand la capture est inactive (expirations, traitements différés)."""
+
+    def metrics(self) -> Dict:
+        return {}
+
+
+class DetectorPipeline:
+    """Décode chaque lot une fois et le distribue aux plugins enregistrés."""
+
+    def __init__(self, sink=None, cooldown: float = ALERT_COOLDOWN, name: str = 'pipeline'):
+        if sink is None:
+            from .alert_sink import get_alert_sink
+            sink = get_alert_sink()
+        self.sink = sink
+        self.cooldown = cooldown
+        self.decoder = PacketDecoder()
+        self.plugins: List[DetectorPlugin] = []
+        # Une alerte par (source, type) et par période de cooldown, tous plugins confondus
+        self.alert_cooldown = StateTable(f'{name}.alert_cooldown', ttl=cooldown)
+        # alert() est aussi appelé par le thread de classement des flux (FlowScorer)
+        self._alert_lock = threading.Lock()
+        self.batches = 0
+        self.packets = 0
+        self.alerts = 0
+        self.alerts_dropped = 0
+        self.errors: Dict[str, int] = {}
+        self.seconds: Dict[str, float] = {}
+
+    def register(self, plugin: DetectorPlugin) -> DetectorPlugin:
+        plugin.bind(self)
+        self.plugins.append(plugin)
+        self.errors[plugin.name] = 0
+        self.seconds[plugin.name] = 0.0
+        return plugin
+
+    def plugin(self, name: str) -> Optional[DetectorPlugin]:
+        return next((plugin for plugin in self.plugins if plugin.name == name), None)
+
+    def unregister(self, name: str) -> Optional[DetectorPlugin]:
+        plugin = self.plugin(name)
+        if plugin:
+            self.plugins.remove(plugin)
+        return plugin
+
+    @property
+    def needs_all_tcp(self) -> bool:
+        return any(plugin.needs_all_tcp for plugin in self.plugins)
+
+    def process_batch(self, batch: FrameBatch):
+        """Point d'entrée des sources de capture (même signature que analyze_batch)."""
+        self.process(self.decoder.decode(batch))
+
+    def process(self, records: np.ndarray):
+        self.batches += 1
+        self.packets += len(records)
+        for plugin in self.plugins:
+            start = time.perf_counter()
+            try:
+                plugin.process(records)
+            except Exception as e:
+                # Un plugin défaillant ne prive pas les autres du lot
+                self.errors[plugin.name] += 1
+                logger.error(f"❌ Plugin {plugin.name}: {e}")
+            self.seconds[plugin.name] += time.perf_counter() - start
+
+    def tick(self):
+        for plugin in self.plugins:
+            try:
+                plugin.tick()
+            except Exception as e:
+                self.errors[plugin.name] += 1
+                logger.error(f"❌ Plugin {plugin.name}: {e}")
+
+    def alert(self, source_ip: str, dest_ip: str, attack_type: str, packet_count: int, protocol: str = 'tcp',
+              confidence: Optional[float] = None) -> bool:
+        """
+        Crée une alerte (sauf cooldown en cours) et la dépose dans le puits. Le cooldown
+        porte sur la source, ou sur la destination quand les sources sont multiples.
+        """
+        alert_key = f"{source_ip if source_ip != 'multiple' else dest_ip}:{attack_type}"
+        now = time.time()
+        with self._alert_lock:
+            last_alert = self.alert_cooldown.get(alert_key)
+            if last_alert is not None and now - last_alert < self.cooldown:
+                return False
+            self.alert_cooldown.set(alert_key, now)
+
+        alert = {
+            'sourceIp': source_ip,
+            'destinationIp': dest_ip,
+            'protocol': protocol,
+            'timestamp': datetime.now().isoformat(),
+            'attackType': attack_type,
+            'severity': 'high',
+            'confidence': confidence if confidence is not None else min(packet_count / 100.0, 0.95),
+            'packetCount': packet_count
+        }
+        try:
+            if not self.sink.submit(alert):
+                self.alerts_dropped += 1
+                print(f"⚠️ Alerte écartée (file pleine, politique {self.sink.policy})")
+                return False
+        except Exception as e:
+            print(f"Erreur lors de la sauvegarde de l'alerte: {e}")
+            return False
+        self.alerts += 1
+        print(f"🚨 ALERTE {attack_type}: {source_ip} -> {dest_ip} ({packet_count} paquets)")
+        return True
+
+    def metrics(self) -> Dict:
+        return {
+            'batches': self.batches,
+            'packets': self.packets,
+            'decoded': self.decoder.decoded,
+            'alerts': self.alerts,
+            'alerts_dropped': self.alerts_dropped,
+            'plugins': {
+                plugin.name: dict(plugin.metrics(), errors=self.errors[plugin.name],
+                                  seconds=round(self.seconds[plugin.name], 3))
+                for plugin in self.plugins
+            },
+        }
+
+
+class FloodPlugin(DetectorPlugin):
+    """Compteurs glissants par clé entière (adresses hi/lo, port) sur FLOOD_WINDOW secondes."""
+
+    def __init__(self, window: float = FLOOD_WINDOW):
+        self.flood_windows = SlidingWindowCounter(window=window, name=f'{self.name}.flood_windows')
+
+    def check(self, history_key, count, threshold, src, dst, attack_type, protocol='tcp'):
+        """Ajoute count paquets au compteur de la clé et alerte au-delà du seuil"""
+        recent = self.flood_windows.add(history_key, count)
+        if recent > threshold:
+            self.pipeline.alert(format_ip(*src), format_ip(*dst), attack_type, recent, protocol)
+
+    def metrics(self) -> Dict:
+        return self.flood_windows.metrics()
+
+
+@register_plugin('syn_flood')
+class SynFloodPlugin(FloodPlugin):
+    """SYN par (source, destination, port) et, en mémoire fixe, SYN par source (sketch)."""
+
+    def __init__(self, threshold: int = SYN_FLOOD_THRESHOLD, sketch: bool = SYN_SKETCH):
+        super().__init__()
+        self.threshold = threshold
+        # Sources SYN les plus actives, quel que soit le nombre de sources usurpées
+        self.syn_sketch = SketchFloodDetector(SYN_SKETCH_THRESHOLD, window=SYN_SKETCH_WINDOW, width=SYN_SKETCH_WIDTH,
+                                              depth=SYN_SKETCH_DEPTH, k=SYN_SKETCH_TOP_K) if sketch else None
+
+    def process(self, records: np.ndarray):
+        syn = records[(records['proto'] == IPPROTO_TCP) & (records['tcp_flags'] & TCP_SYN != 0)]
+        if len(syn) == 0:
+            return
+        # Comptage par clé entière : les chaînes ne sont créées qu'à l'alerte
+        for key, count in count_by(syn, ('src', 'dst', 'dport')):
+            self.check(('SYN',) + key, count, self.threshold, key[0:2], key[2:4], 'SYN Flood')
+        if self.syn_sketch is not None:
+            for (src_hi, src_lo), count in self.syn_sketch.update(syn['src_hi'], syn['src_lo']):
+                self.pipeline.alert(format_ip(src_hi, src_lo), 'Votre machine', 'DoS (SYN flood)', count)
+
+    def metrics(self) -> Dict:
+        metrics = super().metrics()
+        if self.syn_sketch is not None:
+            metrics['sketch'] = self.syn_sketch.metrics()
+        return metrics
+
+
+@register_plugin('port_flood')
+class PortFloodPlugin(FloodPlugin):
+    """Paquets TCP d'une source vers un port surveillé (PORT_FLOOD_PORTS)."""
+
+    def __init__(self, threshold: int = PORT_FLOOD_THRESHOLD, ports: Sequence[int] = PORT_FLOOD_PORTS):
+        super().__init__()
+        self.threshold = threshold
+        self.ports = np.array(ports, dtype=np.uint16)
+
+    def process(self, records: np.ndarray):
+        watched = records[(records['proto'] == IPPROTO_TCP) & np.isin(records['dport'], self.ports)]
+        for key, count in count_by(watched, ('src', 'dst', 'dport')):
+            self.check(('PORT', key[0], key[1], key[4]), count, self.threshold, key[0:2], key[2:4], 'Port Flood')
+
+
+@register_plugin('datagram_flood')
+class DatagramFloodPlugin(FloodPlugin):
+    """Floods UDP et ICMP / ICMPv6 par couple source/destination."""
+
+    def __init__(self, udp_threshold: int = UDP_FLOOD_THRESHOLD, icmp_threshold: int = ICMP_FLOOD_THRESHOLD):
+        super().__init__()
+        self.udp_threshold = udp_threshold
+        self.icmp_threshold = icmp_threshold
+
+    def process(self, records: np.ndarray):
+        proto = records['proto']
+        for key, count in count_by(records[proto == IPPROTO_UDP], ('src', 'dst')):
+            self.check(('UDP',) + key, count, self.udp_threshold, key[0:2], key[2:4], 'UDP Flood', 'udp')
+        for key, count in count_by(records[(proto == IPPROTO_ICMP) | (proto == IPPROTO_ICMPV6)], ('src', 'dst')):
+            self.check(('ICMP',) + key, count, self.icmp_threshold, key[0:2], key[2:4], 'ICMP Flood', 'icmp')
+
+
+@register_plugin('port_scan')
+class PortScanPlugin(DetectorPlugin):
+    """
+    Ports et hôtes distincts visés par source, sources distinctes par destination
+    (HyperLogLog, ScanTracker). Une source n'a ses propres estimateurs qu'à partir
+    de sa deuxième cible (hôte, port) : les sources usurpées d'un flood SYN, qui
+    n'en visent qu'une, ne coûtent qu'une entrée de first_target.
+    """
+
+    def __init__(self, window: float = CARDINALITY_WINDOW):
+        self.scan_tracker = ScanTracker('port_scan')
+        # Source (hi, lo) -> première cible (dst_hi, dst_lo, port), ou True une fois la source suivie
+        self.first_target = StateTable('port_scan.first_target', ttl=window)
+
+    def process(self, records: np.ndarray):
+        # SYN sans ACK : ouvertures de connexion (les SYN-ACK des serveurs contactés ne comptent pas)
+        syn = records[(records['proto'] == IPPROTO_TCP) & (records['tcp_flags'] & (TCP_SYN | TCP_ACK) == TCP_SYN)]
+        if len(syn) == 0:
+            return
+        findings = []
+
+        # DDoS : sources distinctes par destination, un ajout vectorisé par destination
+        destinations, inverse = np.unique(np.stack([syn['dst_hi'], syn['dst_lo']], axis=1), axis=0,
+                                          return_inverse=True)
+        inverse = inverse.ravel()
+        order = np.argsort(inverse, kind='stable')
+        source_keys = key64(syn['src_hi'], syn['src_lo'])[order]
+        splits = np.cumsum(np.bincount(inverse, minlength=len(destinations)))[:-1]
+        for (dst_hi, dst_lo), keys in zip(destinations.tolist(), np.split(source_keys, splits)):
+            findings.append(self.scan_tracker.observe_sources((dst_hi, dst_lo), keys))
+
+        # Scans : seules les sources ayant visé au moins deux cibles sont suivies
+        connections = []
+        first_target = self.first_target
+        for (src_hi, src_lo, dst_hi, dst_lo, dport), _ in count_by(syn, ('src', 'dst', 'dport')):
+            source = (src_hi, src_lo)
+            target = (dst_hi, dst_lo, dport)
+            first = first_target.get(source)
+            if first is None:
+                first_target.set(source, target)
+                continue
+            if first is not True:
+                if first == target:
+                    continue
+                first_target.set(source, True)
+                connections.append((source, first[:2], first[2]))
+            connections.append((source, target[:2], dport))
+        if connections:
+            findings += self.scan_tracker.observe(connections)
+
+        for finding in findings:
+            if finding is None:
+                continue
+            source = finding['sourceIp']
+            dest = finding['destinationIp']
+            source_ip = format_ip(*source) if isinstance(source, tuple) else source
+            dest_ip = format_ip(*dest) if isinstance(dest, tuple) else dest
+            self.pipeline.alert(source_ip, dest_ip, finding['attackType'], finding['distinct'],
+                                confidence=min(0.6 + finding['distinct'] / 100.0, 0.95))
+
+    def metrics(self) -> Dict:
+        return {'first_target': self.first_target.metrics(), 'ports': self.scan_tracker.ports.metrics(),
+                'sources': self.scan_tracker.sources.metrics()}
+
+
+@register_plugin('flow_scoring')
+class FlowScoringPlugin(DetectorPlugin):
+    """
+    Connexions reconstruites (FlowTable), features de trafic réelles
+    (TrafficFeatureEngine) et classement des flux terminés par lots avec le modèle,
+    dans le thread de FlowScorer (jamais dans le callback de capture).
+    Les drapeaux, octets et états ne sont justes que si tous les segments TCP
+    des deux sens sont capturés.
+    """
+
+    needs_all_tcp = True
+    needs_both_directions = True
+
+    def __init__(self, batch_size: int = FLOW_SCORE_BATCH, max_rate: int = FLOW_SCORE_MAX_RATE,
+                 scorer: Optional[FlowScorer] = None):
+        self.scorer = scorer
+        self.flow_table = FlowTable()
+        self.traffic_features = TrafficFeatureEngine()
+        self.batch_size = batch_size
+        self.max_rate = max_rate
+        self.pending_flows: List[Dict] = []
+        self.last_handoff = time.monotonic()
+        self.second = int(self.last_handoff)
+        self.queued = 0
+        self.skipped = 0
+        self.pair_flows = None
+
+    def bind(self, pipeline: 'DetectorPipeline'):
+        super().bind(pipeline)
+        if self.scorer is None:
+            if hasattr(pipeline.sink, 'submit_flows'):
+                # Worker de capture (QueueSink) : flux classés par le processus parent, seul à charger le modèle
+                self.scorer = pipeline.sink
+            else:
+                self.scorer = FlowScorer(pipeline.alert, batch_size=self.batch_size)
+        if not hasattr(pipeline.sink, 'submit_flows'):
+            # Agrégats par paire lus par NetworkScanner (même processus) ; dans un worker, c'est le parent qui les tient
+            self.pair_flows = get_pair_flows()
+
+    def process(self, records: np.ndarray):
+        self.queue_flows(self.flow_table.update(records))
+
+    def tick(self):
+        self.queue_flows(self.flow_table.expire())
+
+    def queue_flows(self, flows):
+        """Met en attente de classement les flux terminés (features réelles : durée, octets, flag...)"""
+        now = time.monotonic()
+        if int(now) != self.second:
+            self.second = int(now)
+            self.queued = 0
+        # Les Flow sont recyclés par la table : conversion immédiate en dictionnaires.
+        # Les fenêtres de trafic et les agrégats par paire voient tous les flux, même au-delà du débit de classement
+        annotated = [self.traffic_features.annotate(flow.to_features()) for flow in flows]
+        if self.pair_flows is not None and annotated:
+            self.pair_flows.record(annotated)
+        for features in annotated:
+            if self.queued < self.max_rate:
+                self.pending_flows.append(features)
+                self.queued += 1
+            else:
+                self.skipped += 1
+        if len(self.pending_flows) >= self.batch_size or now - self.last_handoff >= 1:
+            self.hand_off()
+
+    def hand_off(self):
+        """Remet les flux en attente au thread de classement (file bornée, sans attente)."""
+        flows, self.pending_flows = self.pending_flows, []
+        self.last_handoff = time.monotonic()
+        if flows:
+            self.scorer.submit_flows(flows)
+
+    def metrics(self) -> Dict:
+        scorer = self.scorer.metrics() if hasattr(self.scorer, 'metrics') else {}
+        return dict(self.flow_table.metrics(), pending=len(self.pending_flows), skipped=self.skipped,
+                    scorer=scorer, traffic=self.traffic_features.metrics())
+
+
+def build_pipeline(plugins: Sequence[str] = DETECTOR_PLUGINS, sink=None, **kwargs) -> DetectorPipeline:
+    """Pipeline avec les plugins nommés, dans l'ordre donné."""
+    pipeline = DetectorPipeline(sink=sink, **kwargs)
+    for name in plugins:
+        if name not in PLUGINS:
+            raise ValueError(f"Plugin de détection inconnu: {name} (disponibles: {', '.join(PLUGINS)})")
+        pipeline.register(PLUGINS[name]())
+    return pipeline
@@ -0,0 +1,249 @@
+"""
+Moteur vectorisé d'extraction et de normalisation des features NSL-KDD.
+
+Produit directement une matrice (N, 145) float32 à partir de N flux, avec
+exactement les mêmes valeurs que extract_features() + normalize_features()
+appliquées flux par flux, mais sans boucle Python sur les 145 colonnes.
+"""
+
+from typing import Any, Dict, List, Mapping, Sequence, Union
+import numpy as np
+
+from .preprocessing import (
+    SERVICE_COLUMNS, FLAG_COLUMNS, CRITICAL_PORTS, SUSPECT_FLAGS, PORT_SERVICES
+)
+
+NUM_FEATURES = 145
+
+# Colonnes d'entrée et valeurs par défaut (identiques à extract_features)
+COLUMN_DEFAULTS = {
+    'connections_count': 0,
+    'dest_port': 80,
+    'source_ip': '0.0.0.0',
+    'destination_ip': '0.0.0.0',
+    'protocol': 'tcp',
+    'flag': 'SF',
+    'port_count': 1,
+    'duration': 0,
+    'bytes_sent': 0,
+    'bytes_received': 0,
+    'wrong_fragment': 0,
+    'urgent': 0,
+}
+
+# Features de trafic réelles (19-37, TrafficFeatureEngine) : NaN quand absentes
+TRAFFIC_COLUMNS = slice(19, 38)
+NUM_TRAFFIC = TRAFFIC_COLUMNS.stop - TRAFFIC_COLUMNS.start
+
+FlowColumns = Mapping[str, Sequence[Any]]
+FlowInput = Union[Sequence[Dict[str, Any]], FlowColumns]
+
+# Valeurs des rates (colonnes 21-26) pour chaque pattern, dans l'ordre de priorité
+# de extract_features : DoS pur, port scan pur, probe stealth, probe lent, normal
+_PATTERN_RATES = np.array([
+    [0.95, 0.95, 0.05, 0.05, 0.98, 0.02],
+    [0.70, 0.30, 0.60, 0.60, 0.15, 0.85],
+    [0.50, 0.40, 0.45, 0.40, 0.30, 0.70],
+    [0.35, 0.30, 0.40, 0.35, 0.40, 0.60],
+    [0.0, 0.0, 0.0, 0.0, 1.0, 0.0],
+])
+
+# Table port -> colonne service (41-49), les ports hors table sont 'other'
+_SERVICE_LOOKUP = np.full(65536, SERVICE_COLUMNS['other'], dtype=np.int64)
+for _port, _service in PORT_SERVICES.items():
+    _SERVICE_LOOKUP[_port] = SERVICE_COLUMNS.get(_service, SERVICE_COLUMNS['other'])
+
+_PROTOCOL_COLUMNS = {'icmp': 38, 'tcp': 39, 'udp': 40}
+
+# === MASQUES DE NORMALISATION PRÉCALCULÉS (équivalents à normalize_features) ===
+_columns = np.arange(NUM_FEATURES)
+# Diviseur par colonne : /1000 pour 0-18, /511 pour count et srv_count
+NORM_SCALE = np.ones(NUM_FEATURES, dtype=np.float32)
+NORM_SCALE[:19] = 1000.0
+NORM_SCALE[19:21] = 511.0
+# Colonnes mises à 0 si la valeur brute n'est pas strictement positive
+POSITIVE_MASK = _columns < 19
+# Colonnes plafonnées à 1 après division (0-20)
+UPPER_CLIP_MASK = _columns < 21
+# Colonnes de taux bornées à [0, 1]
+RATE_MASK = ((_columns >= 21) & (_columns < 38)) | (_columns == 62) | (_columns == 64)
+# Colonnes binaires (one-hot et indicateurs) : 1 si > 0.5
+BINARY_MASK = ~(UPPER_CLIP_MASK | RATE_MASK)
+
+
+def _mask_to_slices(mask: np.ndarray) -> List[slice]:
+    """Découpe un masque de colonnes en tranches contiguës (accès mémoire sans copie)."""
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], mask.astype(np.int8), [0]))))
+    return [slice(int(start), int(stop)) for start, stop in zip(edges[::2], edges[1::2])]
+
+
+_POSITIVE_SLICES = _mask_to_slices(POSITIVE_MASK)
+_UPPER_CLIP_SLICES = _mask_to_slices(UPPER_CLIP_MASK)
+_RATE_SLICES = _mask_to_slices(RATE_MASK)
+_BINARY_SLICES = _mask_to_slices(BINARY_MASK)
+
+
+def flows_to_columns(flows: Sequence[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """Convertit une liste de flux (dicts) en colonnes NumPy."""
+    columns = {}
+    for name, default in COLUMN_DEFAULTS.items():
+        values = [flow.get(name, default) for flow in flows]
+        if isinstance(default, str):
+            columns[name] = np.array(values, dtype=object)
+        else:
+            columns[name] = np.array(values)
+    traffic = [flow.get('traffic_features') for flow in flows]
+    if any(values is not None for values in traffic):
+        columns['traffic_features'] = np.full((len(flows), NUM_TRAFFIC), np.nan)
+        for i, values in enumerate(traffic):
+            if values is not None:
+                columns['traffic_features'][i] = values
+    return columns
+
+
+def _as_columns(flows: FlowInput) -> Dict[str, np.ndarray]:
+    if isinstance(flows, Mapping):
+        size = len(next(iter(flows.values()))) if flows else 0
+        columns = {}
+        for name, default in COLUMN_DEFAULTS.items():
+            if name in flows:
+                dtype = object if isinstance(default, str) else None
+                columns[name] = np.asarray(flows[name], dtype=dtype)
+            else:
+                columns[name] = np.full(size, default, dtype=object if isinstance(default, str) else None)
+        if flows.get('traffic_features') is not None:
+            columns['traffic_features'] = np.asarray(flows['traffic_features'], dtype=np.float64)
+        return columns
+    return flows_to_columns(flows)
+
+
+def _encode(values: np.ndarray, mapping: Dict[str, int], default: int, lower: bool = False) -> np.ndarray:
+    """Encode une colonne de chaînes via ses valeurs distinctes (peu nombreuses)."""
+    items = values.tolist()
+    codes = {
+        value: mapping.get(value.lower() if lower and isinstance(value, str) else value, default)
+        for value in set(items)
+    }
+    return np.fromiter(map(codes.__getitem__, items), dtype=np.int64, count=len(items))
+
+
+def extract_features_matrix(flows: FlowInput) -> np.ndarray:
+    """
+    Version vectorisée de extract_features pour N flux.
+    Retourne la matrice brute (N, 145) en float32 (avant normalisation).
+    """
+    columns = _as_columns(flows)
+    count = columns['connections_count']
+    port_count = columns['port_count']
+    dest_port = columns['dest_port']
+    duration = columns['duration']
+    flag = columns['flag']
+    n = len(count)
+
+    features = np.zeros((n, NUM_FEATURES), dtype=np.float32)
+    if n == 0:
+        return features
+
+    # === FEATURES NUMÉRIQUES DE BASE (positions 0-18) ===
+    features[:, 0] = duration
+    features[:, 1] = columns['bytes_sent']
+    features[:, 2] = columns['bytes_received']
+    features[:, 3] = columns['source_ip'] == columns['destination_ip']
+    features[:, 4] = columns['wrong_fragment']
+    features[:, 5] = columns['urgent']
+
+    # === FEATURES DE TRAFIC (positions 19-37) ===
+    features[:, 19] = np.minimum(count, 511)
+    features[:, 20] = features[:, 19]
+
+    dos = (count > 100) & (port_count <= 3)
+    scan = (port_count > 10) & (count > 10)
+    stealth = (count >= 10) & (count <= 50) & (port_count >= 5) & (port_count <= 15)
+    slow = (count >= 5) & (count <= 20) & (port_count >= 2) & (port_count <= 8)
+    pattern = np.select([dos, scan, stealth, slow], [0, 1, 2, 3], default=4)
+    features[:, 21:27] = _PATTERN_RATES[pattern]
+
+    features[:, 28] = np.minimum(count * 2, 255)
+    features[:, 29] = np.minimum(count, 255)
+    features[:, 30] = features[:, 25]
+    features[:, 31] = features[:, 26]
+    features[:, 32] = np.select([port_count > 10, count > 100], [0.1, 0.8], default=0.5)
+    features[:, 34:38] = features[:, 21:25]
+
+    traffic = columns.get('traffic_features')
+    if traffic is not None:
+        real = ~np.isnan(traffic[:, 0])
+        features[real, TRAFFIC_COLUMNS] = traffic[real]
+
+    # === ONE-HOT : PROTOCOL (38-40), SERVICE (41-49), FLAG (50-56) ===
+    rows = np.arange(n)
+    protocol_cols = _encode(columns['protocol'], _PROTOCOL_COLUMNS, -1, lower=True)
+    known_protocol = protocol_cols >= 0
+    features[rows[known_protocol], protocol_cols[known_protocol]] = 1.0
+
+    in_range = (dest_port >= 0) & (dest_port < 65536)
+    service_cols = np.full(n, SERVICE_COLUMNS['other'], dtype=np.int64)
+    service_cols[in_range] = _SERVICE_LOOKUP[dest_port[in_range].astype(np.int64)]
+    features[rows, service_cols] = 1.0
+
+    flag_cols = _encode(flag, FLAG_COLUMNS, FLAG_COLUMNS['OTH'])
+    features[rows, flag_cols] = 1.0
+
+    # === FEATURES SPÉCIALISÉES (57-65) ===
+    features[:, 57] = count > 200
+    features[:, 58] = (count >= 100) & (count <= 200) & (port_count <= 3)
+    features[:, 59] = (count >= 50) & (count <= 150) & (port_count > 10)
+    features[:, 60] = stealth
+    features[:, 61] = slow
+    features[:, 62] = np.minimum(port_count / np.maximum(count, 1), 1.0)
+    features[:, 63] = np.isin(dest_port, CRITICAL_PORTS)
+    conn_per_sec = count / np.maximum(duration, 1)
+    features[:, 64] = np.where(count > 0, np.minimum(conn_per_sec / 100.0, 1.0), 0.0)
+    features[:, 65] = np.isin(flag_cols, [FLAG_COLUMNS[f] for f in SUSPECT_FLAGS])
+
+    return features
+
+
+def normalize_features_matrix(features: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+    """
+    Version vectorisée de normalize_features sur une matrice (N, 145) float32,
+    à partir des masques de colonnes précalculés.
+    """
+    features = np.asarray(features, dtype=np.float32)
+    if out is None:
+        out = np.empty_like(features)
+
+    one = np.float32(1.0)
+    zero = np.float32(0.0)
+    for cols in _UPPER_CLIP_SLICES:
+        np.minimum(np.divide(features[:, cols], NORM_SCALE[cols]), one, out=out[:, cols])
+    for cols in _POSITIVE_SLICES:
+        out[:, cols][~(features[:, cols] > 0)] = zero
+    for cols in _RATE_SLICES:
+        np.minimum(np.maximum(features[:, cols], zero), one, out=out[:, cols])
+    for cols in _BINARY_SLICES:
+        np.greater(features[:, cols], 0.5, out=out[:, cols], casting='unsafe')
+
+    # Remplacer les valeurs problématiques (seules les colonnes non binaires peuvent en contenir)
+    for cols in _UPPER_CLIP_SLICES + _RATE_SLICES:
+        out[:, cols] = np.nan_to_num(out[:, cols], nan=0.0, posinf=1.0, neginf=0.0)
+    return out
+
+
+def build_feature_matrix(flows: FlowInput, chunk_size: int = 65536) -> np.ndarray:
+    """
+    Extrait et normalise les features de N flux en une matrice (N, 145) float32.
+    Le traitement se fait par blocs pour borner la mémoire intermédiaire.
+    """
+    columns = _as_columns(flows)
+    n = len(columns['connections_count'])
+    out = np.empty((n, NUM_FEATURES), dtype=np.float32)
+    for start in range(0, n, chunk_size):
+        chunk = {name: values[start:start + chunk_size] for name, values in columns.items()}
+        normalize_features_matrix(extract_features_matrix(chunk), out=out[start:start + chunk_size])
+    return out
+
+
+def build_feature_row(flow: Dict[str, Any]) -> List[float]:
+    """Features normalisées d'un seul flux (même résultat que normalize_features(extract_features(flow)))."""
+    return build_feature_matrix([flow])[0].tolist()
@@ -0,0 +1,170 @@
+"""
+Classement asynchrone des flux terminés (plugin flow_scoring).
+
+Le plugin dépose les flux terminés (features au format extract_features) dans
+une file bornée ; un thread les classe par lots avec predict_intrusion_batch,
+hors du callback de capture : une inférence lente ne bloque ni l'anneau ni
+recvfrom. Quand la file est pleine, les flux les plus anciens sont écartés.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+from ..config import FLOW_SCORE_BATCH, FLOW_SCORE_FLUSH_INTERVAL, FLOW_SCORE_QUEUE_MAX
+
+logger = logging.getLogger(__name__)
+
+# alert(source_ip, dest_ip, attack_type, packet_count, protocol, confidence) -> bool
+AlertFunction = Callable[..., bool]
+
+
+class FlowScorer:
+    """File bornée de flux vidée par un thread de classement."""
+
+    def __init__(self, alert: AlertFunction, max_queue: int = FLOW_SCORE_QUEUE_MAX,
+                 batch_size: int = FLOW_SCORE_BATCH, flush_interval: float = FLOW_SCORE_FLUSH_INTERVAL,
+                 predict: Optional[Callable[[List[Dict]], List]] = None):
+        self.alert = alert
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.predict = predict
+
+        self._queue: deque = deque()
+        self._cond = threading.Condition()
+        self._worker: Optional[threading.Thread] = None
+        self._running = False
+        self._in_flight = 0
+
+        self.submitted = 0
+        self.dropped = 0
+        self.scored = 0
+        self.intrusions = 0
+        self.errors = 0
+        self.batches = 0
+        self.last_batch_ms = 0.0
+
+    # === CÔTÉ CAPTURE ===
+
+    def submit_flows(self, flows: List[Dict]) -> int:
+        """Dépose des flux à classer ; retourne le nombre de flux écartés (file pleine)."""
+        dropped = 0
+        with self._cond:
+            for flow in flows:
+                if len(self._queue) >= self.max_queue:
+                    self._queue.popleft()
+                    dropped += 1
+                self._queue.append(flow)
+            self.submitted += len(flows)
+            self.dropped += dropped
+            if len(self._queue) >= self.batch_size:
+                self._cond.notify_all()
+        if self._worker is None:
+            self.start()
+        return dropped
+
+    # === THREAD DE CLASSEMENT ===
+
+    def start(self):
+        with self._cond:
+            if self._worker is not None:
+                return
+            self._running = True
+            self._worker = threading.Thread(target=self._run, name='flow-scorer', daemon=True)
+            self._worker.start()
+
+    def stop(self, flush: bool = True, timeout: float = 10.0):
+        """Arrête le thread, après avoir classé les flux en file si flush=True."""
+        if flush:
+            self.flush(timeout)
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._worker is not None:
+            self._worker.join(timeout)
+            self._worker = None
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Attend que tous les flux en file soient classés."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self._cond.notify_all()
+            while (self._queue or self._in_flight) and self._worker is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(min(remaining, self.flush_interval))
+        return True
+
+    def _next_batch(self) -> List[Dict]:
+        with self._cond:
+            if len(self._queue) < self.batch_size and self._running:
+                self._cond.wait(self.flush_interval)
+            batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+            self._in_flight = len(batch)
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch:
+                try:
+                    self.score(batch)
+                except Exception as e:
+                    self.errors += len(batch)
+                    logger.error(f"❌ Classement de {len(batch)} flux impossible: {e}")
+            with self._cond:
+                self._in_flight = 0
+                self._cond.notify_all()
+                if not self._running and not self._queue:
+                    break
+
+    def score(self, flows: List[Dict]):
+        """
+        Classe les flux en un seul appel au modèle. Les intrusions sont regroupées
+        par (destination, type) : une alerte par cible, source 'multiple' si
+        plusieurs sources (flood à sources usurpées).
+        """
+        start = time.perf_counter()
+        predict = self.predict
+        if predict is None:
+            # Import différé : le modèle n'est chargé que si des flux sont à classer
+            from ..model.ai_model import predict_intrusion_batch
+            predict = predict_intrusion_batch
+        predictions = predict(flows)
+        self.scored += len(flows)
+        self.batches += 1
+        targets = {}
+        for flow, (is_intrusion, attack_type, confidence) in zip(flows, predictions):
+            if is_intrusion:
+                self.intrusions += 1
+                sources, packets, best, protocol = targets.get((flow['destination_ip'], attack_type),
+                                                               (set(), 0, 0.0, flow['protocol']))
+                sources.add(flow['source_ip'])
+                targets[(flow['destination_ip'], attack_type)] = (sources, packets + flow['packets'],
+                                                                  max(best, confidence), protocol)
+        for (dest_ip, attack_type), (sources, packets, confidence, protocol) in targets.items():
+            source_ip = next(iter(sources)) if len(sources) == 1 else 'multiple'
+            self.alert(source_ip, dest_ip, attack_type, packets, protocol, confidence)
+        self.last_batch_ms = round((time.perf_counter() - start) * 1000, 3)
+
+    # === MÉTRIQUES ===
+
+    def metrics(self) -> Dict:
+        with self._cond:
+            depth = len(self._queue)
+        return {
+            'queue_depth': depth,
+            'max_queue': self.max_queue,
+            'submitted': self.submitted,
+            'dropped': self.dropped,
+            'scored': self.scored,
+            'intrusions': self.intrusions,
+            'errors': self.errors,
+            'batches': self.batches,
+            'last_batch_ms': self.last_batch_ms,
+            'running': self._worker is not None and self._worker.is_alive()
+        }
@@ -0,0 +1,364 @@
+"""
+Table de flux bidirectionnelle : reconstruit les connexions à partir des paquets
+décodés (packet_decoder) et produit les features de base NSL-KDD (duration,
+src_bytes, dst_bytes, flag, land, wrong_fragment, urgent).
+
+Un flux est identifié par son 5-tuple (adresses hi/lo, ports, protocole) dans le
+sens de l'initiateur ; les paquets de réponse sont rattachés par la clé inverse.
+Une machine à états TCP dérive le flag NSL-KDD (SF, S0, REJ, RSTO, RSTR, SH,
+S1...). Les flux sont émis à la fermeture (FIN des deux côtés, RST), à
+expiration (délais distincts pour les connexions TCP non établies, établies et
+UDP/ICMP) ou par éviction quand la table est pleine.
+
+Les enregistrements Flow ont des __slots__ et sont recyclés d'un flux à l'autre ;
+trois files ordonnées par dernière activité rendent l'expiration O(1) par flux.
+
+Les flux terminés sont aussi agrégés par paire (source, destination) dans
+PairFlows, que NetworkScanner consulte pour ses features de niveau flux.
+"""
+
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from ..config import (FLOW_EMBRYONIC_TIMEOUT, FLOW_PAIR_WINDOW, FLOW_TABLE_CAPACITY, FLOW_TCP_TIMEOUT,
+                      FLOW_UDP_TIMEOUT)
+from .packet_decoder import (IPPROTO_ICMP, IPPROTO_ICMPV6, IPPROTO_TCP, IPPROTO_UDP, TCP_ACK, TCP_FIN, TCP_RST,
+                             TCP_SYN, TCP_URG, format_ip)
+from .state_table import StateTable
+
+# Historique TCP (bits)
+ORIG_SYN = 0x01
+RESP_SYNACK = 0x02
+ORIG_FIN = 0x04
+RESP_FIN = 0x08
+ORIG_RST = 0x10
+RESP_RST = 0x20
+
+PROTOCOL_NAMES = {IPPROTO_TCP: 'tcp', IPPROTO_UDP: 'udp', IPPROTO_ICMP: 'icmp', IPPROTO_ICMPV6: 'icmp'}
+
+KEY_FIELDS = ['src_hi', 'src_lo', 'dst_hi', 'dst_lo', 'sport', 'dport', 'proto']
+REVERSE_FIELDS = ['dst_hi', 'dst_lo', 'src_hi', 'src_lo', 'dport', 'sport', 'proto']
+
+
+def tcp_flag(history: int) -> str:
+    """Flag NSL-KDD (états de connexion Bro/Zeek) à partir de l'historique TCP."""
+    if not history & ORIG_SYN:
+        return 'OTH'  # connexion prise en cours de route
+    if not history & RESP_SYNACK:
+        if history & RESP_RST:
+            return 'REJ'
+        if history & ORIG_FIN:
+            return 'SH'
+        if history & ORIG_RST:
+            return 'RSTOS0'
+        return 'S0'
+    if history & ORIG_RST:
+        return 'RSTO'
+    if history & RESP_RST:
+        return 'RSTR'
+    if history & ORIG_FIN and history & RESP_FIN:
+        return 'SF'
+    if history & ORIG_FIN:
+        return 'S2'
+    if history & RESP_FIN:
+        return 'S3'
+    return 'S1'
+
+
+class Flow:
+    """Connexion en cours ; orig = initiateur (source), resp = destination."""
+
+    __slots__ = ('key', 'proto', 'start', 'last', 'src_bytes', 'dst_bytes', 'src_packets', 'dst_packets',
+                 'history', 'wrong_fragment', 'urgent', 'queue', 'closed')
+
+    def reset(self, key: tuple, proto: int, now: float, queue: dict):
+        self.key = key
+        self.proto = proto
+        self.start = now
+        self.last = now
+        self.src_bytes = 0
+        self.dst_bytes = 0
+        self.src_packets = 0
+        self.dst_packets = 0
+        self.history = 0
+        self.wrong_fragment = 0
+        self.urgent = 0
+        self.queue = queue
+        self.closed = False
+
+    @property
+    def flag(self) -> str:
+        return tcp_flag(self.history) if self.proto == IPPROTO_TCP else 'SF'
+
+    def to_features(self) -> Dict:
+        """Dictionnaire au format attendu par extract_features / build_feature_matrix."""
+        src_hi, src_lo, dst_hi, dst_lo, sport, dport, proto = self.key
+        source_ip, dest_ip = format_ip(src_hi, src_lo), format_ip(dst_hi, dst_lo)
+        return {
+            'source_ip': source_ip,
+            'destination_ip': dest_ip,
+            'source_port': sport,
+            'dest_port': dport,
+            'protocol': PROTOCOL_NAMES.get(proto, 'other'),
+            'flag': self.flag,
+            'duration': round(self.last - self.start, 3),
+            'bytes_sent': self.src_bytes,
+            'bytes_received': self.dst_bytes,
+            'wrong_fragment': self.wrong_fragment,
+            'urgent': self.urgent,
+            'packets': self.src_packets + self.dst_packets,
+            'connections_count': 1,
+            'port_count': 1,
+        }
+
+
+class FlowTable:
+    """Flux actifs par 5-tuple, au plus capacity flux (éviction des plus anciens, non établis d'abord)."""
+
+    def __init__(self, capacity: int = FLOW_TABLE_CAPACITY, embryonic_timeout: float = FLOW_EMBRYONIC_TIMEOUT,
+                 tcp_timeout: float = FLOW_TCP_TIMEOUT, udp_timeout: float = FLOW_UDP_TIMEOUT,
+                 clock: Callable[[], float] = time.monotonic):
+        self.capacity = capacity
+        self.clock = clock
+        self._flows: Dict[tuple, Flow] = {}
+        # Files clé -> None ordonnées par dernière activité (ordre d'insertion des dict)
+        self._embryonic: Dict[tuple, None] = {}
+        self._established: Dict[tuple, None] = {}
+        self._datagram: Dict[tuple, None] = {}
+        # Ordre d'éviction quand la table est pleine : SYN sans réponse d'abord
+        self._queues = [(self._embryonic, embryonic_timeout), (self._datagram, udp_timeout),
+                        (self._established, tcp_timeout)]
+        self._free: List[Flow] = []
+        self._pending_free: List[Flow] = []
+        self.opened = 0
+        self.emitted = 0
+        self.evicted = 0
+        self.ignored = 0
+        self.peak = 0
+
+    def __len__(self) -> int:
+        return len(self._flows)
+
+    def update(self, records: np.ndarray, now: Optional[float] = None) -> List[Flow]:
+        """
+        Rattache un lot de paquets décodés (PACKET_DTYPE) à leurs flux et retourne les
+        flux terminés (fermés, expirés ou évincés). Les Flow retournés restent valides
+        jusqu'au prochain appel à update/expire.
+        """
+        now = self.clock() if now is None else now
+        self._recycle()
+        done: List[Flow] = []
+        self._expire(now, done)
+        # Fragments non initiaux (sans ports) et paquets non IP ignorés
+        records = records[(records['version'] != 0) & ~records['fragment']]
+        if len(records) == 0:
+            return done
+
+        keys = records[KEY_FIELDS].tolist()
+        reverse = records[REVERSE_FIELDS].tolist()
+        flags = records['tcp_flags'].tolist()
+        payload = records['payload'].tolist()
+        # Premier fragment mal formé (wrong_fragment)
+        wrong = records['bad_fragment'].tolist()
+
+        flows = self._flows
+        for i, key in enumerate(keys):
+            flow = flows.get(key)
+            orig = True
+            if flow is None:
+                flow = flows.get(reverse[i])
+                orig = False
+                if flow is None:
+                    proto = key[6]
+                    # Paquet TCP sans SYN ni données : ACK/FIN/RST d'une connexion déjà émise
+                    if proto == IPPROTO_TCP and not flags[i] & TCP_SYN and not payload[i]:
+                        self.ignored += 1
+                        continue
+                    flow = self._open(key, proto, now, done)
+                    orig = True
+            if flow.closed:
+                continue
+
+            if orig:
+                flow.src_packets += 1
+                flow.src_bytes += payload[i]
+            else:
+                flow.dst_packets += 1
+                flow.dst_bytes += payload[i]
+            flow.last = now
+            if wrong[i]:
+                flow.wrong_fragment += 1
+
+            if flow.proto == IPPROTO_TCP:
+                f = flags[i]
+                if f & TCP_URG:
+                    flow.urgent += 1
+                history = flow.history
+                if orig:
+                    if f & TCP_SYN and not f & TCP_ACK:
+                        history |= ORIG_SYN
+                    if f & TCP_FIN:
+                        history |= ORIG_FIN
+                    if f & TCP_RST:
+                        history |= ORIG_RST
+                else:
+                    if f & TCP_SYN and f & TCP_ACK:
+                        history |= RESP_SYNACK
+                    if f & TCP_FIN:
+                        history |= RESP_FIN
+                    if f & TCP_RST:
+                        history |= RESP_RST
+                if history != flow.history:
+                    established = history & RESP_SYNACK and not flow.history & RESP_SYNACK
+                    flow.history = history
+                    if history & (ORIG_RST | RESP_RST) or (history & ORIG_FIN and history & RESP_FIN):
+                        self._close(flow, done)
+                        continue
+                    if established:
+                        del flow.queue[flow.key]
+                        flow.queue = self._established
+                        flow.queue[flow.key] = None
+                        continue
+            # Fin de la file = activité la plus récente
+            queue = flow.queue
+            del queue[flow.key]
+            queue[flow.key] = None
+        return done
+
+    def _open(self, key: tuple, proto: int, now: float, done: List[Flow]) -> Flow:
+        if len(self._flows) >= self.capacity:
+            for queue, _ in self._queues:
+                if queue:
+                    self._close(self._flows[next(iter(queue))], done)
+                    self.evicted += 1
+                    break
+        flow = self._free.pop() if self._free else Flow()
+        queue = self._embryonic if proto == IPPROTO_TCP else self._datagram
+        flow.reset(key, proto, now, queue)
+        self._flows[key] = flow
+        queue[key] = None
+        self.opened += 1
+        if len(self._flows) > self.peak:
+            self.peak = len(self._flows)
+        return flow
+
+    def _close(self, flow: Flow, done: List[Flow]):
+        del self._flows[flow.key]
+        del flow.queue[flow.key]
+        flow.closed = True
+        done.append(flow)
+        self._pending_free.append(flow)
+        self.emitted += 1
+
+    def _expire(self, now: float, done: List[Flow]):
+        for queue, timeout in self._queues:
+            while queue:
+                flow = self._flows[next(iter(queue))]
+                if now - flow.last < timeout:
+                    break
+                self._close(flow, done)
+
+    def _recycle(self):
+        """Les flux émis au dernier appel redeviennent réutilisables."""
+        if self._pending_free:
+            self._free.extend(self._pending_free)
+            self._pending_free = []
+
+    def expire(self, now: Optional[float] = None) -> List[Flow]:
+        """Flux inactifs depuis leur délai d'expiration (à appeler quand aucun paquet n'arrive)."""
+        self._recycle()
+        done: List[Flow] = []
+        self._expire(self.clock() if now is None else now, done)
+        return done
+
+    def flush(self) -> List[Flow]:
+        """Émet tous les flux en cours (arrêt de la capture)."""
+        self._recycle()
+        done: List[Flow] = []
+        for flow in list(self._flows.values()):
+            self._close(flow, done)
+        return done
+
+    def metrics(self) -> Dict:
+        return {
+            'flows': len(self._flows),
+            'embryonic': len(self._embryonic),
+            'established': len(self._established),
+            'datagram': len(self._datagram),
+            'capacity': self.capacity,
+            'peak': self.peak,
+            'opened': self.opened,
+            'emitted': self.emitted,
+            'evicted': self.evicted,
+            'ignored': self.ignored,
+        }
+
+
+class PairFlows:
+    """
+    Flux terminés agrégés par paire (source, destination) sur les window dernières
+    secondes : écrits par la capture, lus par d'autres threads (NetworkScanner).
+    """
+
+    def __init__(self, window: float = FLOW_PAIR_WINDOW, clock: Callable[[], float] = time.monotonic):
+        self.window = window
+        self.clock = clock
+        self._pairs = StateTable('flow_table.pairs', ttl=window, clock=clock)
+        self._lock = threading.Lock()
+
+    def record(self, flows: Iterable[Dict]):
+        """Ajoute des flux au format to_features() ; l'agrégat d'une paire repart de zéro après window s sans flux."""
+        now = self.clock()
+        with self._lock:
+            for flow in flows:
+                key = (flow['source_ip'], flow['destination_ip'])
+                pair = self._pairs.get(key, now=now)
+                if pair is None or now - pair['start'] >= self.window:
+                    pair = {'start': now, 'flows': 0, 'bytes_sent': 0, 'bytes_received': 0, 'packets': 0,
+                            'duration': 0.0, 'flags': Counter()}
+                    self._pairs.set(key, pair, now=now)
+                pair['flows'] += 1
+                pair['bytes_sent'] += flow['bytes_sent']
+                pair['bytes_received'] += flow['bytes_received']
+                pair['packets'] += flow['packets']
+                pair['duration'] += flow['duration']
+                pair['flags'][flow['flag']] += 1
+
+    def lookup(self, source_ip: str, dest_ip: str) -> Optional[Dict]:
+        """Totaux de la paire (octets, paquets), durée moyenne, flag le plus fréquent ; None sans flux récent."""
+        with self._lock:
+            pair = self._pairs.get((source_ip, dest_ip))
+            if pair is None or self.clock() - pair['start'] >= self.window:
+                return None
+            flags = dict(pair['flags'])
+            return {
+                'flows': pair['flows'],
+                'bytes_sent': pair['bytes_sent'],
+                'bytes_received': pair['bytes_received'],
+                'packets': pair['packets'],
+                'duration': round(pair['duration'] / pair['flows'], 3),
+                'flag': pair['flags'].most_common(1)[0][0],
+                'flags': flags,
+            }
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._pairs)
+
+
+_pair_flows = None
+_pair_flows_lock = threading.Lock()
+
+
+def get_pair_flows() -> PairFlows:
+    """Agrégats par paire partagés du processus (plugin flow_scoring, workers de capture, NetworkScanner)."""
+    global _pair_flows
+    if _pair_flows is None:
+        with _pair_flows_lock:
+            if _pair_flows is None:
+                _pair_flows = PairFlows()
+    return _pair_flows
@@ -1,28 +1,12 @@
-import json
-from pathlib import Path
+from app.utils.alert_store import get_alert_store
 
-DATA_FILE = Path(__file__).parent.parent / 'data' / 'network_data.json'
-
-def get_network_data():
+def get_network_data(alert_limit=None, connection_limit=None):
+    """Données réseau {connections, alerts, stats} lues depuis le stockage SQLite."""
     try:
-        if not DATA_FILE.exists():
-            return {
-                'connections': [],
-                'alerts': [],
-                'stats': {
-                    'total_connections': 0,
-                    'total_packets': 0,
-                    'total_alerts': 0,
-                    'active_threats': 0,
-                    'blocked_attempts': 0,
-                    'system_health': 100
-                }
-            }
-        with open(DATA_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return get_alert_store().get_network_data(alert_limit, connection_limit)
     except Exception:
         return {
             'connections': [],
             'alerts': [],
             'stats': {}
-        } 
\ No newline at end of file
+        }
@@ -3,14 +3,12 @@
 Scanner réseau amélioré avec détection IA corrigée pour DoS/Probe
 """
 
-import json
+import itertools
 import time
-import psutil
 import socket
 import threading
 import logging
 from datetime import datetime
-from pathlib import Path
 import sys
 import os
 
@@ -21,78 +19,44 @@ logger = logging.getLogger(__name__)
 # Ajouter le chemin du module app
 sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
 
-from app.model.ai_model import predict_intrusion
+from app.model.ai_model import predict_intrusion, predict_intrusion_batch
 from app.utils.preprocessing import preprocess_data, create_dos_test_data, create_probe_test_data
+from app.utils.adaptive_scheduler import AdaptiveScheduler
+from app.utils.alert_sink import get_alert_sink
+from app.utils.flow_table import get_pair_flows
+from app.utils.scan_tracker import ScanTracker
+from app.utils.sock_diag import SnapshotDiff, connected, iter_connections, socket_snapshot, state_names, without_addresses
+
+def _decrement(counts, key):
+    """Retire une occurrence d'un compteur {clé: nombre}, la clé disparaît à zéro"""
+    remaining = counts.get(key, 0) - 1
+    if remaining > 0:
+        counts[key] = remaining
+    else:
+        counts.pop(key, None)
 
 class NetworkScanner:
     def __init__(self, interface=None):
         self.interface = interface
         if self.interface:
             logger.info(f"[NetworkScanner] Interface réseau sélectionnée : {self.interface}")
-        self.data_file = Path(__file__).parent.parent / 'data' / 'network_data.json'
-        self._initialize_data()
+        self.sink = get_alert_sink()
         self.no_connection_cycles = 0
         self.max_no_connection_cycles = 5
         self.dos_threshold = 50  # Seuil réduit pour détecter plus tôt
         self.probe_threshold = 10  # Seuil pour port scan
         self.running = False
-        self.connection_history = {}  # Historique pour analyse temporelle
+        # Ports/hôtes distincts par source, sources distinctes par destination (HyperLogLog, mémoire fixe)
+        self.scan_tracker = ScanTracker('network_scanner')
+        self.scan_findings = []
+        # Dernier instantané des sockets et agrégats par paire (source, destination) tenus à jour par différence
+        self.snapshot_diff = SnapshotDiff()
+        self.pairs = {}
+        self.last_churn = 0
+        self.alerts_submitted = 0
+        # Intervalle entre deux scans adapté au renouvellement des connexions et aux alertes (budget CPU)
+        self.scheduler = AdaptiveScheduler('network_scanner')
         
-    def _initialize_data(self):
-        """Initialise le fichier de données s'il n'existe pas"""
-        if not self.data_file.exists():
-            data = {
-                'connections': [],
-                'alerts': [],
-                'stats': {
-                    'total_connections': 0,
-                    'total_packets': 0,
-                    'total_alerts': 0,
-                    'active_threats': 0,
-                    'blocked_attempts': 0,
-                    'system_health': 100
-                }
-            }
-            self._save_data(data)
-    
-    def _save_data(self, data):
-        """Sauvegarde les données dans le fichier JSON"""
-        try:
-            with open(self.data_file, 'w') as f:
-                json.dump(data, f, indent=2)
-        except Exception as e:
-            logger.error(f"Erreur lors de la sauvegarde des données: {e}")
-    
-    def _load_data(self):
-        """Charge les données depuis le fichier JSON"""
-        try:
-            if self.data_file.exists():
-                with open(self.data_file, 'r') as f:
-                    return json.load(f)
-            else:
-                return {
-                    'connections': [],
-                    'alerts': [],
-                    'stats': {
-                        'total_connections': 0,
-                        'total_alerts': 0,
-                        'active_threats': 0,
-                        'last_update': datetime.now().isoformat()
-                    }
-                }
-        except Exception as e:
-            logger.error(f"Erreur lors du chargement des données: {e}")
-            return {
-                'connections': [],
-                'alerts': [],
-                'stats': {
-                    'total_connections': 0,
-                    'total_alerts': 0,
-                    'active_threats': 0,
-                    'last_update': datetime.now().isoformat()
-                }
-            }
-    
     def test_ai_model(self):
         """NOUVEAU - Teste le modèle IA avec des données connues"""
         logger.info("🧪 Test du modèle IA...")
@@ -111,53 +75,79 @@ class NetworkScanner:
         is_intrusion, attack_type, confidence = predict_intrusion(processed_probe)
         logger.info(f"Résultat Probe: intrusion={is_intrusion}, type={attack_type}, conf={confidence}")
     
-    def analyze_connection_patterns(self, connections):
+    def analyze_connection_patterns(self, changes):
         """
-        NOUVEAU - Analyse intelligente des patterns de connexion
+        Met à jour les agrégats par paire d'IP avec les sockets ajoutées, retirées
+        et changées d'état depuis le cycle précédent (SnapshotChanges) ; retourne
+        les paires dont les agrégats ont changé, seules à reclasser.
         """
-        # Grouper les connexions par IP source
-        ip_analysis = {}
-        port_analysis = {}
-        
+        changed_pairs = set()
+        observed = []
         current_time = time.time()
         
-        for conn in connections:
-            if not (conn.laddr and conn.raddr):
+        for source_ip, dest_ip, dest_port, _, status in iter_connections(changes.added):
+            logger.debug("+ Connexion: %s -> %s:%s (status=%s)", source_ip, dest_ip, dest_port, status)
+            key = (source_ip, dest_ip)
+            analysis = self.pairs.get(key)
+            if analysis is None:
+                analysis = self.pairs[key] = {
+                    'source_ip': source_ip,
+                    'dest_ip': dest_ip,
+                    'connections': 0,
+                    'port_count': 0,
+                    'distinct_ports_60s': 0,
+                    'first_port': None,
+                    'sample_ports': [],
+                    'ports': {},
+                    'status_counts': {},
+                    'first_seen': current_time
+                }
+            analysis['connections'] += 1
+            analysis['ports'][dest_port] = analysis['ports'].get(dest_port, 0) + 1
+            analysis['status_counts'][status] = analysis['status_counts'].get(status, 0) + 1
+            observed.append((source_ip, dest_ip, dest_port))
+            changed_pairs.add(key)
+        
+        for source_ip, dest_ip, dest_port, _, status in iter_connections(changes.removed):
+            logger.debug("- Connexion: %s -> %s:%s (status=%s)", source_ip, dest_ip, dest_port, status)
+            key = (source_ip, dest_ip)
+            analysis = self.pairs.get(key)
+            if analysis is None:
                 continue
-                
-            try:
-                source_ip = conn.raddr.ip
-                dest_ip = conn.laddr.ip
-                dest_port = conn.laddr.port
-                
-                # Ignorer les connexions locales/internes
-                if (source_ip in ['127.0.0.1', '0.0.0.0', '::1'] or
-                    dest_ip in ['127.0.0.1', '0.0.0.0', '::1']):
-                    continue
-                
-                # Analyser par IP source
-                key = f"{source_ip}->{dest_ip}"
-                if key not in ip_analysis:
-                    ip_analysis[key] = {
-                        'source_ip': source_ip,
-                        'dest_ip': dest_ip,
-                        'connections': 0,
-                        'ports': set(),
-                        'status_counts': {},
-                        'first_seen': current_time
-                    }
-                
-                ip_analysis[key]['connections'] += 1
-                ip_analysis[key]['ports'].add(dest_port)
-                
-                # Compter les statuts
-                status = getattr(conn, 'status', 'UNKNOWN')
-                if status not in ip_analysis[key]['status_counts']:
-                    ip_analysis[key]['status_counts'][status] = 0
-                ip_analysis[key]['status_counts'][status] += 1
-                
-            except (AttributeError, ValueError) as e:
+            analysis['connections'] -= 1
+            if not analysis['connections']:
+                del self.pairs[key]
+                changed_pairs.discard(key)
+                continue
+            _decrement(analysis['ports'], dest_port)
+            _decrement(analysis['status_counts'], status)
+            changed_pairs.add(key)
+        
+        previous = changes.changed.copy()
+        previous['state'] = changes.previous_state
+        for (source_ip, dest_ip, dest_port, _, status), old_status in zip(iter_connections(changes.changed),
+                                                                          state_names(previous).tolist()):
+            logger.debug("~ Connexion: %s -> %s:%s (%s -> %s)", source_ip, dest_ip, dest_port, old_status, status)
+            key = (source_ip, dest_ip)
+            analysis = self.pairs.get(key)
+            if analysis is None:
                 continue
+            _decrement(analysis['status_counts'], old_status)
+            analysis['status_counts'][status] = analysis['status_counts'].get(status, 0) + 1
+            changed_pairs.add(key)
+        
+        # Ports/hôtes distincts par source sur la fenêtre (HyperLogLog), alimentés par les nouvelles connexions
+        self.scan_findings = self.scan_tracker.observe(observed)
+        ip_analysis = {}
+        for key in changed_pairs:
+            analysis = self.pairs[key]
+            analysis['first_port'] = min(analysis['ports'])
+            analysis['sample_ports'] = list(itertools.islice(analysis['ports'], 10))  # Max 10 ports pour éviter overflow
+            # Ports ouverts de la paire, exacts d'après l'instantané (connexions durables comprises)
+            analysis['port_count'] = len(analysis['ports'])
+            # Estimation HyperLogLog des ports visés par la source sur la fenêtre, nouvelles connexions seules
+            analysis['distinct_ports_60s'] = self.scan_tracker.port_count(analysis['source_ip'])
+            ip_analysis[key] = analysis
         
         return ip_analysis
     
@@ -166,34 +156,48 @@ class NetworkScanner:
         NOUVEAU - Crée des données structurées pour l'analyse IA
         """
         connections_count = analysis['connections']
-        ports = analysis['ports']
+        port_count = analysis['port_count']
         status_counts = analysis['status_counts']
         
         # Déterminer le port principal et le flag principal
-        if ports:
-            dest_port = min(ports)  # Port le plus bas (souvent le premier ciblé)
+        if analysis['first_port'] is not None:
+            dest_port = analysis['first_port']  # Port le plus bas (souvent le premier ciblé)
         else:
             dest_port = 80
         
         # Déterminer le flag basé sur les statuts et le pattern
         if 'ESTABLISHED' in status_counts:
             flag = 'SF'  # Connexion réussie
-        elif (status_counts.get('SYN_SENT', 0) > 10 and len(ports) == 1):
+        elif (status_counts.get('SYN_SENT', 0) > 10 and port_count == 1):
             flag = 'S0'  # SYN flood (DoS) sur un port unique
-        elif (len(ports) > 10 and status_counts.get('SYN_SENT', 0) > 5):
+        elif (port_count > 10 and status_counts.get('SYN_SENT', 0) > 5):
             flag = 'S1'  # Port scan (SYN sur beaucoup de ports)
         elif 'TIME_WAIT' in status_counts:
             flag = 'SF'  # Connexion fermée normalement
         else:
             flag = 'REJ'  # Probablement rejeté
         
-        # Estimer les bytes basés sur le nombre de connexions
-        bytes_sent = connections_count * 64  # Estimation conservative
-        
-        # Calculer les taux d'erreur basés sur les patterns
-        total_conns = sum(status_counts.values())
-        error_conns = status_counts.get('SYN_SENT', 0) + status_counts.get('TIME_WAIT', 0)
-        serror_rate = error_conns / total_conns if total_conns > 0 else 0.0
+        # Features réelles des flux terminés capturés pour cette paire (plugin flow_scoring)
+        flows = get_pair_flows().lookup(source_ip, dest_ip)
+        if flows is not None:
+            flag = flows['flag']
+            bytes_sent = flows['bytes_sent']
+            bytes_received = flows['bytes_received']
+            packets = flows['packets']
+            duration = flows['duration']
+            # Taux d'erreur SYN (S0-S3) et de rejet (REJ) sur les flux de la paire
+            serror_rate = sum(flows['flags'].get(f, 0) for f in ('S0', 'S1', 'S2', 'S3')) / flows['flows']
+            rerror_rate = flows['flags'].get('REJ', 0) / flows['flows']
+        else:
+            # Aucun flux capturé : estimations à partir des seuls états de sockets
+            bytes_sent = connections_count * 64  # Estimation conservative
+            bytes_received = 0
+            packets = connections_count
+            duration = 0
+            total_conns = sum(status_counts.values())
+            error_conns = status_counts.get('SYN_SENT', 0) + status_counts.get('TIME_WAIT', 0)
+            serror_rate = error_conns / total_conns if total_conns > 0 else 0.0
+            rerror_rate = 0.1
         
         return {
             'source_ip': source_ip,
@@ -203,51 +207,37 @@ class NetworkScanner:
             'protocol': 'tcp',
             'flag': flag,
             'bytes_sent': bytes_sent,
-            'bytes_received': 0,
-            'duration': 0,
+            'bytes_received': bytes_received,
+            'packets': packets,
+            'duration': duration,
             'serror_rate': min(serror_rate, 1.0),
             'srv_serror_rate': min(serror_rate, 1.0),
-            'rerror_rate': 0.1,
-            'srv_rerror_rate': 0.1,
-            'port_count': len(ports),
-            'status_pattern': dict(status_counts)
+            'rerror_rate': rerror_rate,
+            'srv_rerror_rate': rerror_rate,
+            'port_count': port_count,
+            'status_pattern': dict(status_counts),
+            'flow_features': flows is not None
         }
     
     def save_alert_with_ai_info(self, source_ip, dest_ip, attack_type, confidence, extra_info=None):
         """NOUVEAU - Sauvegarde une alerte avec informations IA"""
         try:
-            data = self._load_data()
-            
             alert = {
-                'id': int(time.time() * 1000),  # ID unique basé sur timestamp
                 'sourceIp': source_ip,
                 'destinationIp': dest_ip,
                 'protocol': 'tcp',
                 'timestamp': datetime.now().isoformat(),
                 'attackType': attack_type,
-                'severity': 'high' if attack_type == 'DoS' else 'medium',
+                'severity': 'high' if attack_type in ('DoS', 'DDoS') else 'medium',
                 'confidence': confidence,
                 'detectionMethod': 'AI + Rules',
                 'extraInfo': extra_info or {}
             }
             
-            data['alerts'].append(alert)
-            data['alerts'] = data['alerts'][-20:]  # Garder les 20 dernières
-            
-            # Mettre à jour les stats
-            if 'stats' not in data:
-                data['stats'] = {}
-            data['stats']['total_alerts'] = len(data['alerts'])
-            data['stats']['active_threats'] = len([a for a in data['alerts'] if a['severity'] == 'high'])
-            data['stats']['last_update'] = datetime.now().isoformat()
-            # Correction : incrémenter total_connections et calculer detection_rate
-            data['stats']['total_connections'] = data['stats'].get('total_connections', 0) + (extra_info.get('connections_count', 0) if extra_info else 0)
-            if data['stats']['total_connections'] > 0:
-                data['stats']['detection_rate'] = round(data['stats']['total_alerts'] / data['stats']['total_connections'] * 100, 2)
-            else:
-                data['stats']['detection_rate'] = 0.0
-            
-            self._save_data(data)
+            # Écriture groupée par le puits d'alertes (id attribué par le stockage)
+            connections_count = extra_info.get('connections_count', 0) if extra_info else 0
+            self.sink.submit(alert, connections_count=connections_count)
+            self.alerts_submitted += 1
             
             logger.info(f"🚨 ALERTE {attack_type}: {source_ip} -> {dest_ip} (confiance: {confidence:.2f})")
             
@@ -261,38 +251,38 @@ class NetworkScanner:
         try:
             logger.info("🔍 Début du scan réseau avec IA...")
             
-            # Obtenir les connexions réseau
-            connections = psutil.net_connections()
-
-            # DEBUG: Log toutes les connexions détectées
-            for conn in connections:
-                try:
-                    if conn.laddr and conn.raddr:
-                        logger.info(f"[DEBUG] Connexion: {conn.raddr.ip} -> {conn.laddr.ip}:{conn.laddr.port} (status={getattr(conn, 'status', 'UNKNOWN')})")
-                except Exception:
-                    pass
+            # Connexions externes (NETLINK_SOCK_DIAG, sans parcourir /proc) comparées au cycle précédent
+            connections = without_addresses(connected(socket_snapshot()))
+            changes = self.snapshot_diff.update(connections)
+            self.last_churn = changes.churn
             
-            if not connections:
-                logger.info("Aucune connexion détectée")
+            if not changes.churn:
+                logger.debug("Aucun changement depuis le dernier scan")
                 return
             
-            # Analyser les patterns de connexion
-            ip_analysis = self.analyze_connection_patterns(connections)
+            # Agrégats par paire mis à jour avec les seuls changements
+            ip_analysis = self.analyze_connection_patterns(changes)
             
-            if not ip_analysis:
-                logger.info("Aucune connexion externe détectée")
-                return
+            logger.info(f"📊 Analyse: {len(connections)} connexions (+{len(changes.added)} -{len(changes.removed)} "
+                        f"~{len(changes.changed)}), {len(ip_analysis)}/{len(self.pairs)} pairs IP modifiées")
             
-            logger.info(f"📊 Analyse: {len(ip_analysis)} pairs IP détectées")
+            # Scans (ports ou hôtes distincts) et DDoS (sources distinctes) sur la fenêtre
+            for finding in self.scan_findings:
+                self.save_alert_with_ai_info(
+                    finding['sourceIp'], finding['destinationIp'], finding['attackType'],
+                    min(finding['distinct'] / (1000.0 if finding['attackType'] == 'DDoS' else 100.0), 0.9),
+                    {'distinct_' + finding['kind']: finding['distinct'], 'detection': 'HyperLogLog'}
+                )
             
-            # Analyser chaque pair IP avec l'IA
+            # Préparer les pairs IP modifiées à analyser avec l'IA
+            candidates = []
             for key, analysis in ip_analysis.items():
                 source_ip = analysis['source_ip']
                 dest_ip = analysis['dest_ip']
                 connections_count = analysis['connections']
-                port_count = len(analysis['ports'])
+                port_count = analysis['port_count']
                 
-                logger.info(f"🔍 Analyse {source_ip} -> {dest_ip}: {connections_count} conn, {port_count} ports")
+                logger.debug(f"🔍 Analyse {source_ip} -> {dest_ip}: {connections_count} conn, {port_count} ports")
                 
                 # Filtrer les connexions trop faibles
                 if connections_count < 3:
@@ -300,43 +290,57 @@ class NetworkScanner:
                 
                 # Créer des données pour l'IA
                 attack_data = self.create_attack_data_for_ai(source_ip, dest_ip, analysis)
+                candidates.append((analysis, attack_data))
+            
+            if not candidates:
+                logger.info("✅ Scan terminé")
+                return
+            
+            # Analyser toutes les pairs en un seul lot (une seule passe du modèle)
+            try:
+                results = predict_intrusion_batch([attack_data for _, attack_data in candidates])
+            except Exception as e:
+                logger.error(f"❌ Erreur analyse IA du lot: {e}")
+                results = [None] * len(candidates)
+            
+            for (analysis, attack_data), result in zip(candidates, results):
+                source_ip = analysis['source_ip']
+                dest_ip = analysis['dest_ip']
+                connections_count = analysis['connections']
+                port_count = analysis['port_count']
                 
-                # Analyser avec l'IA
-                try:
-                    processed_data = preprocess_data(attack_data)
-                    is_intrusion, attack_type, confidence = predict_intrusion(processed_data)
-                    
-                    logger.info(f"🤖 IA Résultat: intrusion={is_intrusion}, type={attack_type}, conf={confidence:.3f}")
-                    
-                    # Sauvegarder l'alerte si intrusion détectée
-                    if is_intrusion and attack_type != "Normal":
-                        extra_info = {
-                            'connections_count': connections_count,
-                            'port_count': port_count,
-                            'ports': list(analysis['ports'])[:10],  # Max 10 ports pour éviter overflow
-                            'status_pattern': analysis['status_counts']
-                        }
-                        
-                        self.save_alert_with_ai_info(
-                            source_ip, dest_ip, attack_type, confidence, extra_info
-                        )
-                        
-                        # Log détaillé
-                        logger.info(f"🎯 DÉTECTION {attack_type}:")
-                        logger.info(f"   Source: {source_ip}")
-                        logger.info(f"   Destination: {dest_ip}")
-                        logger.info(f"   Connexions: {connections_count}")
-                        logger.info(f"   Ports: {port_count}")
-                        logger.info(f"   Confiance: {confidence:.3f}")
-                    
-                except Exception as e:
-                    logger.error(f"❌ Erreur analyse IA pour {source_ip}: {e}")
-                    
+                if result is None:
                     # Fallback sur règles simples
                     if connections_count > 100:
                         self.save_alert_with_ai_info(source_ip, dest_ip, "DoS", 0.7)
                     elif connections_count > 10 and port_count > 5:
                         self.save_alert_with_ai_info(source_ip, dest_ip, "Probe", 0.6)
+                    continue
+                
+                is_intrusion, attack_type, confidence = result
+                logger.info(f"🤖 IA Résultat {source_ip}: intrusion={is_intrusion}, type={attack_type}, conf={confidence:.3f}")
+                
+                # Sauvegarder l'alerte si intrusion détectée
+                if is_intrusion and attack_type != "Normal":
+                    extra_info = {
+                        'connections_count': connections_count,
+                        'port_count': port_count,
+                        'distinct_ports_60s': analysis['distinct_ports_60s'],
+                        'ports': analysis['sample_ports'],  # Max 10 ports pour éviter overflow
+                        'status_pattern': dict(analysis['status_counts'])
+                    }
+                    
+                    self.save_alert_with_ai_info(
+                        source_ip, dest_ip, attack_type, confidence, extra_info
+                    )
+                    
+                    # Log détaillé
+                    logger.info(f"🎯 DÉTECTION {attack_type}:")
+                    logger.info(f"   Source: {source_ip}")
+                    logger.info(f"   Destination: {dest_ip}")
+                    logger.info(f"   Connexions: {connections_count}")
+                    logger.info(f"   Ports: {port_count}")
+                    logger.info(f"   Confiance: {confidence:.3f}")
             
             logger.info("✅ Scan terminé")
             
@@ -356,13 +360,19 @@ class NetworkScanner:
         self.test_ai_model()
         
         self.running = True
-        while self.running:
-            self._run_scanner()
-            time.sleep(3)  # Scanner toutes les 3 secondes
+        self.scheduler.run(self.scan_cycle)  # Intervalle adaptatif (3 s au départ)
+    
+    def scan_cycle(self):
+        """Un scan ; retourne (sockets changées, alertes levées) pour l'ordonnanceur"""
+        alerts = self.alerts_submitted
+        self.last_churn = 0
+        self._run_scanner()
+        return self.last_churn, self.alerts_submitted - alerts
     
     def stop(self):
         """Arrête le scanner"""
         self.running = False
+        self.scheduler.stop()
         logger.info("🛑 Scanner arrêté")
 
 # Instance globale du scanner
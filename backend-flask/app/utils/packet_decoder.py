@@ -0,0 +1,182 @@
+"""
+Décodage vectorisé des en-têtes IPv4/IPv6, TCP, UDP et ICMP d'un lot de paquets.
+
+Le lot (FrameBatch) est lu en place avec NumPy : chaque champ est extrait pour
+tous les paquets à la fois par indexation sur les offsets, sans struct.unpack
+ni chaîne par paquet. Les résultats sont écrits dans un tableau structuré
+préalloué. Les adresses sont des entiers 128 bits répartis en (hi, lo) ; les
+IPv4 sont représentées comme des IPv6 mappées ::ffff:a.b.c.d, les IPv4 et les
+IPv6 ont donc le même format de clé.
+"""
+
+import socket
+import struct
+
+import numpy as np
+
+from .packet_ring import FrameBatch
+
+IPPROTO_ICMP = 1
+IPPROTO_TCP = 6
+IPPROTO_UDP = 17
+IPPROTO_ICMPV6 = 58
+
+TCP_FIN = 0x01
+TCP_SYN = 0x02
+TCP_RST = 0x04
+TCP_ACK = 0x10
+TCP_URG = 0x20
+
+IPV4_MAPPED = 0xffff << 32
+
+PACKET_DTYPE = np.dtype([
+    ('version', 'u1'),      # 4, 6 ou 0 si le paquet est tronqué / non IP
+    ('proto', 'u1'),        # protocole de couche 4 (next header pour IPv6)
+    ('ttl', 'u1'),          # TTL / hop limit
+    ('tcp_flags', 'u1'),
+    ('src_hi', 'u8'),
+    ('src_lo', 'u8'),
+    ('dst_hi', 'u8'),
+    ('dst_lo', 'u8'),
+    ('sport', 'u2'),        # ports TCP/UDP (0 sinon)
+    ('dport', 'u2'),
+    ('icmp_type', 'u1'),
+    ('icmp_code', 'u1'),
+    ('fragment', '?'),      # fragment IPv4 non initial : pas d'en-tête de couche 4
+    ('bad_fragment', '?'),  # fragment IPv4 mal formé (taille non multiple de 8, dépasse 65535 octets)
+    ('length', 'u4'),       # longueur IP annoncée (en-tête compris)
+    ('payload', 'u4'),      # octets de données après les en-têtes IP et de couche 4
+    ('caplen', 'u4'),       # octets capturés
+])
+
+# Lectures bornées à la fin du tampon : les très petits lots sont complétés par des zéros
+MIN_BUFFER = 64
+
+# Taille minimale de l'en-tête de couche 4 à lire
+L4_HEADER = {IPPROTO_TCP: 20, IPPROTO_UDP: 8, IPPROTO_ICMP: 4, IPPROTO_ICMPV6: 4}
+
+
+def _gather(buf: np.ndarray, idx: np.ndarray, size: int) -> np.ndarray:
+    """Entier big-endian de `size` octets à chaque position idx (positions hors tampon bornées)."""
+    idx = np.minimum(idx, len(buf) - size)
+    value = buf[idx].astype(np.uint64)
+    for k in range(1, size):
+        value = (value << np.uint64(8)) | buf[idx + k]
+    return value
+
+
+def format_ip(hi: int, lo: int) -> str:
+    """Adresse (hi, lo) en texte : a.b.c.d pour les IPv4 mappées, notation IPv6 sinon."""
+    hi, lo = int(hi), int(lo)
+    if hi == 0 and lo >> 32 == 0xffff:
+        return socket.inet_ntoa(struct.pack('!I', lo & 0xffffffff))
+    return socket.inet_ntop(socket.AF_INET6, struct.pack('!QQ', hi, lo))
+
+
+def parse_ip(address: str):
+    """Inverse de format_ip : texte -> (hi, lo)."""
+    if ':' in address:
+        return struct.unpack('!QQ', socket.inet_pton(socket.AF_INET6, address))
+    return 0, IPV4_MAPPED | struct.unpack('!I', socket.inet_aton(address))[0]
+
+
+class PacketDecoder:
+    """Décode des FrameBatch dans un tableau PACKET_DTYPE réutilisé d'un lot à l'autre."""
+
+    def __init__(self, capacity: int = 4096):
+        self.records = np.zeros(capacity, dtype=PACKET_DTYPE)
+        self.decoded = 0
+        self.invalid = 0
+
+    def decode(self, batch: FrameBatch) -> np.ndarray:
+        """Retourne une vue sur les len(batch) premières lignes (valide jusqu'au décodage suivant)."""
+        n = len(batch)
+        if n > len(self.records):
+            self.records = np.zeros(max(n, 2 * len(self.records)), dtype=PACKET_DTYPE)
+        out = self.records[:n]
+        if n == 0:
+            return out
+        # Vue NumPy sur le tampon du lot (bloc de l'anneau) : aucune copie des paquets
+        buf = np.frombuffer(batch.buffer, dtype=np.uint8)
+        if len(buf) < MIN_BUFFER:
+            buf = np.concatenate([buf, np.zeros(MIN_BUFFER, dtype=np.uint8)])
+        try:
+            self._decode(buf, batch.offsets, batch.lengths, out)
+        finally:
+            del buf
+        self.decoded += n
+        return out
+
+    def _decode(self, buf: np.ndarray, o: np.ndarray, caplen: np.ndarray, out: np.ndarray):
+        first = buf[np.minimum(o, len(buf) - 1)]
+        version = first >> 4
+        v4 = (version == 4) & (caplen >= 20)
+        v6 = (version == 6) & (caplen >= 40)
+
+        ihl = (first & 0x0f).astype(np.int64) * 4
+        v4 &= ihl >= 20
+        proto = np.where(v4, buf[np.minimum(o + 9, len(buf) - 1)], 0)
+        proto = np.where(v6, buf[np.minimum(o + 6, len(buf) - 1)], proto).astype(np.uint8)
+        ttl = np.where(v4, buf[np.minimum(o + 8, len(buf) - 1)], buf[np.minimum(o + 7, len(buf) - 1)])
+
+        frag_field = _gather(buf, o + 6, 2)
+        frag = frag_field & np.uint64(0x1fff)
+        fragment = v4 & (frag != 0)
+        more_fragments = frag_field & np.uint64(0x2000) != 0
+        length = np.where(v4, _gather(buf, o + 2, 2), _gather(buf, o + 4, 2) + np.uint64(40))
+        ip_data = length.astype(np.int64) - ihl
+        bad_fragment = v4 & ((more_fragments & (ip_data % 8 != 0)) | (frag.astype(np.int64) * 8 + ip_data > 65535))
+
+        # Adresses : IPv4 mappée dans lo, IPv6 sur 128 bits
+        src4 = _gather(buf, o + 12, 4) | np.uint64(IPV4_MAPPED)
+        dst4 = _gather(buf, o + 16, 4) | np.uint64(IPV4_MAPPED)
+        out['src_hi'] = np.where(v6, _gather(buf, o + 8, 8), 0)
+        out['src_lo'] = np.where(v6, _gather(buf, o + 16, 8), np.where(v4, src4, 0))
+        out['dst_hi'] = np.where(v6, _gather(buf, o + 24, 8), 0)
+        out['dst_lo'] = np.where(v6, _gather(buf, o + 32, 8), np.where(v4, dst4, 0))
+
+        # Couche 4 : après les options IPv4 (IHL), à 40 octets pour IPv6 (sans en-têtes d'extension)
+        l4 = o + np.where(v6, 40, ihl)
+        need = np.zeros(len(o), dtype=np.int64)
+        for number, size in L4_HEADER.items():
+            need[proto == number] = size
+        has_l4 = (v4 & ~fragment | v6) & (need > 0) & (caplen >= (l4 - o) + need)
+        ports = has_l4 & ((proto == IPPROTO_TCP) | (proto == IPPROTO_UDP))
+        tcp = has_l4 & (proto == IPPROTO_TCP)
+        icmp = has_l4 & ((proto == IPPROTO_ICMP) | (proto == IPPROTO_ICMPV6))
+
+        out['version'] = np.where(v4, 4, np.where(v6, 6, 0))
+        out['proto'] = proto
+        out['ttl'] = np.where(v4 | v6, ttl, 0)
+        out['fragment'] = fragment
+        out['bad_fragment'] = bad_fragment
+        out['length'] = np.where(v4 | v6, length, 0)
+        # Données : longueur IP - en-tête IP - en-tête de couche 4 (data offset TCP, 8 octets UDP/ICMP)
+        l4_len = np.where(tcp, (buf[np.minimum(l4 + 12, len(buf) - 1)] >> 4).astype(np.int64) * 4,
+                          np.where(has_l4, 8, 0))
+        headers = (l4 - o) + l4_len
+        out['payload'] = np.where(has_l4, np.maximum(length.astype(np.int64) - headers, 0), 0)
+        out['caplen'] = caplen
+        out['sport'] = np.where(ports, _gather(buf, l4, 2), 0)
+        out['dport'] = np.where(ports, _gather(buf, l4 + 2, 2), 0)
+        out['tcp_flags'] = np.where(tcp, buf[np.minimum(l4 + 13, len(buf) - 1)], 0)
+        out['icmp_type'] = np.where(icmp, buf[np.minimum(l4, len(buf) - 1)], 0)
+        out['icmp_code'] = np.where(icmp, buf[np.minimum(l4 + 1, len(buf) - 1)], 0)
+        self.invalid += int(np.count_nonzero(~(v4 | v6)))
+
+
+def count_by(records: np.ndarray, fields) -> list:
+    """
+    Nombre de paquets par clé : [(clé, nombre), ...] avec clé = tuple d'entiers.
+    'src' et 'dst' valent deux colonnes (hi, lo).
+    """
+    if len(records) == 0:
+        return []
+    columns = []
+    for field in fields:
+        if field in ('src', 'dst'):
+            columns += [records[f'{field}_hi'], records[f'{field}_lo']]
+        else:
+            columns.append(records[field].astype(np.uint64))
+    keys, counts = np.unique(np.stack(columns, axis=1), axis=0, return_counts=True)
+    return list(zip(map(tuple, keys.tolist()), counts.tolist()))
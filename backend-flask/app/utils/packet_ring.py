@@ -0,0 +1,217 @@
+"""
+Capture Linux AF_PACKET avec anneau mémoire partagé TPACKET_V3 (PACKET_RX_RING).
+
+Le noyau dépose les paquets par blocs dans un anneau mmap ; on parcourt chaque
+bloc prêt avec des memoryview (aucune copie ni appel système par paquet) et on
+remet le bloc au noyau une fois le lot traité.
+"""
+
+import mmap
+import select
+import socket
+import struct
+from typing import Callable, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+# Constantes <linux/if_packet.h> (absentes du module socket)
+SOL_PACKET = 263
+PACKET_RX_RING = 5
+PACKET_STATISTICS = 6
+PACKET_VERSION = 10
+PACKET_FANOUT = 18
+PACKET_FANOUT_DATA = 22
+PACKET_FANOUT_HASH = 0
+PACKET_FANOUT_CBPF = 6
+TPACKET_V3 = 2
+ETH_P_ALL = 0x0003
+
+TP_STATUS_KERNEL = 0
+TP_STATUS_USER = 1
+PACKET_OUTGOING = 4
+
+# struct tpacket_block_desc : version, offset_to_priv, puis tpacket_hdr_v1
+BLOCK_STATUS = struct.Struct('=I')        # à l'offset 8
+BLOCK_HEADER = struct.Struct('=III')      # block_status, num_pkts, offset_to_first_pkt (offset 8)
+# struct tpacket3_hdr : tp_next_offset, tp_sec, tp_nsec, tp_snaplen, tp_len, tp_status, tp_mac, tp_net
+FRAME_HEADER = struct.Struct('=IIIIIIHH')
+# struct sockaddr_ll placée après tpacket3_hdr (TPACKET_ALIGN(sizeof(tpacket3_hdr)) = 48)
+SLL_OFFSET = 48
+SLL_PKTTYPE_OFFSET = SLL_OFFSET + 10
+
+# Paquets lus d'un coup sur un socket raw (recv_batch)
+RECV_BATCH = 64
+
+
+class FrameBatch:
+    """
+    Lot de paquets dans un tampon partagé : offsets et longueurs de chaque paquet,
+    à partir de l'en-tête IP. Pour l'anneau, le tampon est le bloc mmap lui-même
+    (valide jusqu'à la remise du bloc au noyau).
+    """
+
+    __slots__ = ('buffer', 'offsets', 'lengths')
+
+    def __init__(self, buffer: memoryview, offsets: np.ndarray, lengths: np.ndarray):
+        self.buffer = buffer
+        self.offsets = offsets
+        self.lengths = lengths
+
+    @classmethod
+    def from_frames(cls, frames: Sequence[bytes]) -> 'FrameBatch':
+        """Lot à partir de paquets séparés (recvfrom) : une seule concaténation."""
+        lengths = np.fromiter(map(len, frames), dtype=np.int64, count=len(frames))
+        offsets = np.zeros(len(frames), dtype=np.int64)
+        np.cumsum(lengths[:-1], out=offsets[1:])
+        return cls(memoryview(b''.join(frames)), offsets, lengths)
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def __iter__(self) -> Iterator[memoryview]:
+        buffer = self.buffer
+        for offset, length in zip(self.offsets.tolist(), self.lengths.tolist()):
+            yield buffer[offset:offset + length]
+
+    def release(self):
+        self.buffer.release()
+
+
+class PacketRing:
+    """Socket AF_PACKET + anneau TPACKET_V3 ; les lots sont traités via process(callback)."""
+
+    def __init__(self, interface: Optional[str] = None, block_size: int = 1 << 20, block_count: int = 64,
+                 frame_size: int = 2048, block_timeout_ms: int = 10, protocol: int = ETH_P_ALL,
+                 include_outgoing: bool = False, fanout_group: Optional[int] = None, fanout_workers: int = 1):
+        self.interface = interface
+        self.block_size = block_size
+        self.block_count = block_count
+        self.include_outgoing = include_outgoing
+
+        self.sock = socket.socket(socket.AF_PACKET, socket.SOCK_RAW, socket.htons(protocol))
+        try:
+            self.sock.setsockopt(SOL_PACKET, PACKET_VERSION, TPACKET_V3)
+            # struct tpacket_req3
+            req = struct.pack('=7I', block_size, block_count, frame_size,
+                              (block_size // frame_size) * block_count, block_timeout_ms, 0, 0)
+            self.sock.setsockopt(SOL_PACKET, PACKET_RX_RING, req)
+            self.ring = mmap.mmap(self.sock.fileno(), block_size * block_count,
+                                  mmap.MAP_SHARED, mmap.PROT_READ | mmap.PROT_WRITE)
+            # Sans interface, le socket ETH_P_ALL non lié capture déjà toutes les interfaces (bind('') : ENODEV)
+            if interface:
+                self.sock.bind((interface, 0))
+            self.fanout_mode = None
+            if fanout_group is not None:
+                self.fanout_mode = join_fanout(self.sock, fanout_group, fanout_workers)
+        except Exception:
+            self.sock.close()
+            raise
+        self.view = memoryview(self.ring)
+        self._poll = select.poll()
+        self._poll.register(self.sock.fileno(), select.POLLIN | select.POLLERR)
+        self._block = 0
+        self.packets = 0
+        self.blocks = 0
+        self.kernel_packets = 0
+        self.kernel_drops = 0
+
+    def fileno(self) -> int:
+        return self.sock.fileno()
+
+    def _ready(self, index: int) -> bool:
+        return BLOCK_STATUS.unpack_from(self.view, index * self.block_size + 8)[0] & TP_STATUS_USER
+
+    def _frames(self, index: int) -> FrameBatch:
+        """Paquets du bloc : offsets relatifs au bloc, sans copie des données."""
+        base = index * self.block_size
+        view = self.view
+        _, num_pkts, offset = BLOCK_HEADER.unpack_from(view, base + 8)
+        offsets, lengths = [], []
+        offset += base
+        for _ in range(num_pkts):
+            next_offset, _, _, snaplen, _, _, mac, net = FRAME_HEADER.unpack_from(view, offset)
+            if self.include_outgoing or view[offset + SLL_PKTTYPE_OFFSET] != PACKET_OUTGOING:
+                offsets.append(offset - base + net)
+                lengths.append(snaplen - (net - mac))
+            offset += next_offset
+        return FrameBatch(view[base:base + self.block_size],
+                          np.array(offsets, dtype=np.int64), np.array(lengths, dtype=np.int64))
+
+    def _release(self, index: int):
+        BLOCK_STATUS.pack_into(self.view, index * self.block_size + 8, TP_STATUS_KERNEL)
+
+    def process(self, callback: Callable[[FrameBatch], None], timeout_ms: int = 100) -> int:
+        """
+        Attend au plus timeout_ms des blocs prêts et appelle callback(batch) pour chacun.
+        Le lot et ses memoryview ne doivent pas être conservés après le retour du callback.
+        Retourne le nombre de paquets traités.
+        """
+        if not self._ready(self._block):
+            self._poll.poll(timeout_ms)
+        count = 0
+        while self._ready(self._block):
+            batch = self._frames(self._block)
+            size = len(batch)
+            try:
+                if size:
+                    callback(batch)
+            finally:
+                # Même si le callback lève : bloc rendu au noyau et lecture au bloc suivant
+                self._release(self._block)
+                batch.release()
+                count += size
+                self.packets += size
+                self.blocks += 1
+                self._block = (self._block + 1) % self.block_count
+        return count
+
+    def stats(self) -> Dict[str, int]:
+        """Compteurs cumulés (le noyau remet tpacket_stats_v3 à zéro à chaque lecture)."""
+        packets, drops, _ = struct.unpack('=III', self.sock.getsockopt(SOL_PACKET, PACKET_STATISTICS, 12))
+        self.kernel_packets += packets
+        self.kernel_drops += drops
+        return {
+            'packets': self.packets,
+            'blocks': self.blocks,
+            'kernel_packets': self.kernel_packets,
+            'kernel_drops': self.kernel_drops
+        }
+
+    def close(self):
+        self._poll.unregister(self.sock.fileno())
+        self.view.release()
+        self.ring.close()
+        self.sock.close()
+
+
+def join_fanout(sock, group_id: int, workers: int) -> str:
+    """
+    Rejoint le groupe de fanout group_id : le noyau répartit les paquets entre les sockets du groupe.
+    Répartition par paire d'adresses IP (cBPF), sinon PACKET_FANOUT_HASH (noyaux < 4.3).
+    """
+    from .bpf_filter import fanout_program, sock_fprog
+    try:
+        sock.setsockopt(SOL_PACKET, PACKET_FANOUT, (group_id & 0xffff) | (PACKET_FANOUT_CBPF << 16))
+    except OSError:
+        sock.setsockopt(SOL_PACKET, PACKET_FANOUT, (group_id & 0xffff) | (PACKET_FANOUT_HASH << 16))
+        return 'hash'
+    fprog, _buffer = sock_fprog(fanout_program(workers))
+    sock.setsockopt(SOL_PACKET, PACKET_FANOUT_DATA, fprog)
+    return 'cbpf'
+
+
+def recv_batch(sock, max_packets: int = RECV_BATCH, timeout: float = 1.0) -> List[bytes]:
+    """Attend au plus timeout s puis lit les paquets déjà en file (socket non bloquant)."""
+    packets = []
+    if select.select([sock], [], [], timeout)[0]:
+        while len(packets) < max_packets:
+            try:
+                packets.append(sock.recv(65535))
+            except (BlockingIOError, InterruptedError):
+                break
+    return packets
+
+
+def ring_supported() -> bool:
+    """AF_PACKET disponible (Linux) ; les droits sont vérifiés à l'ouverture du socket."""
+    return hasattr(socket, 'AF_PACKET')
@@ -55,6 +55,17 @@ except FileNotFoundError:
     while len(NSLKDD_COLUMNS) < 145:
         NSLKDD_COLUMNS.append(f'feature_{len(NSLKDD_COLUMNS)}')
 
+# Positions one-hot des services (41-49) et des flags (50-56)
+SERVICE_COLUMNS = {
+    'http': 41, 'ftp': 42, 'ssh': 43, 'telnet': 44, 'smtp': 45,
+    'domain': 46, 'pop_3': 47, 'imap': 48, 'other': 49
+}
+FLAG_COLUMNS = {
+    'SF': 50, 'S0': 51, 'REJ': 52, 'RSTR': 53, 'RSTO': 54, 'SH': 55, 'OTH': 56
+}
+CRITICAL_PORTS = [21, 22, 23, 25, 53, 80, 110, 135, 139, 443, 445, 993, 995, 1433, 3389]
+SUSPECT_FLAGS = ['S0', 'REJ', 'RSTO', 'RSTR']
+
 def extract_features(log_data: Dict[str, Any]) -> List[float]:
     """
     VERSION CORRIGÉE SPÉCIALISÉE - Extraction optimisée pour distinguer DoS, Probe et Port Scan
@@ -79,8 +90,8 @@ def extract_features(log_data: Dict[str, Any]) -> List[float]:
     features[1] = log_data.get('bytes_sent', 0)  # src_bytes  
     features[2] = log_data.get('bytes_received', 0)  # dst_bytes
     features[3] = 1 if source_ip == dest_ip else 0  # land
-    features[4] = 0  # wrong_fragment
-    features[5] = 0  # urgent
+    features[4] = log_data.get('wrong_fragment', 0)  # wrong_fragment
+    features[5] = log_data.get('urgent', 0)  # urgent
     features[6] = 0  # hot
     features[7] = 0  # num_failed_logins
     features[8] = 0  # logged_in
@@ -177,6 +188,11 @@ def extract_features(log_data: Dict[str, Any]) -> List[float]:
     features[36] = features[23]  # dst_host_rerror_rate
     features[37] = features[24]  # dst_host_srv_rerror_rate
     
+    # Valeurs réelles des fenêtres de trafic quand le flux vient de la table de flux
+    traffic = log_data.get('traffic_features')
+    if traffic is not None:
+        features[19:38] = traffic
+    
     # === ONE-HOT ENCODING POUR PROTOCOL (positions 38-40) ===
     if protocol == 'icmp':
         features[38] = 1.0  # icmp
@@ -187,23 +203,15 @@ def extract_features(log_data: Dict[str, Any]) -> List[float]:
     
     # === ONE-HOT ENCODING POUR SERVICE (positions 41-49) ===
     service = port_to_service(dest_port)
-    service_mapping = {
-        'http': 41, 'ftp': 42, 'ssh': 43, 'telnet': 44, 'smtp': 45,
-        'domain': 46, 'pop_3': 47, 'imap': 48, 'other': 49
-    }
     
-    if service in service_mapping:
-        features[service_mapping[service]] = 1.0
+    if service in SERVICE_COLUMNS:
+        features[SERVICE_COLUMNS[service]] = 1.0
     else:
         features[49] = 1.0  # other
     
     # === ONE-HOT ENCODING POUR FLAG (positions 50-56) ===
-    flag_mapping = {
-        'SF': 50, 'S0': 51, 'REJ': 52, 'RSTR': 53, 'RSTO': 54, 'SH': 55, 'OTH': 56
-    }
-    
-    if flag in flag_mapping:
-        features[flag_mapping[flag]] = 1.0
+    if flag in FLAG_COLUMNS:
+        features[FLAG_COLUMNS[flag]] = 1.0
     else:
         features[56] = 1.0  # OTH
     
@@ -229,8 +237,7 @@ def extract_features(log_data: Dict[str, Any]) -> List[float]:
     features[62] = min(port_conn_ratio, 1.0)
     
     # Feature services critiques ciblés
-    critical_ports = [21, 22, 23, 25, 53, 80, 110, 135, 139, 443, 445, 993, 995, 1433, 3389]
-    features[63] = 1.0 if dest_port in critical_ports else 0.0
+    features[63] = 1.0 if dest_port in CRITICAL_PORTS else 0.0
     
     # Feature pattern temporal (basé sur la durée)
     duration = log_data.get('duration', 0)
@@ -241,8 +248,7 @@ def extract_features(log_data: Dict[str, Any]) -> List[float]:
         features[64] = 0.0
     
     # Feature flag suspect (indicateur de scan/dos)
-    suspect_flags = ['S0', 'REJ', 'RSTO', 'RSTR']
-    features[65] = 1.0 if flag in suspect_flags else 0.0
+    features[65] = 1.0 if flag in SUSPECT_FLAGS else 0.0
     
     # Compléter avec des zéros jusqu'à 145
     while len(features) < 145:
@@ -301,23 +307,24 @@ def normalize_features(features: List[float]) -> List[float]:
     print(f"✅ Normalisation: {len(normalized)} features normalisées")
     return normalized.tolist()
 
+PORT_SERVICES = {
+    # Services web
+    80: 'http', 443: 'http', 8080: 'http', 8443: 'http',
+    # Services de transfert  
+    21: 'ftp', 22: 'ssh', 23: 'telnet',
+    # Services mail
+    25: 'smtp', 110: 'pop_3', 143: 'imap', 993: 'imap', 995: 'pop_3',
+    # Services système
+    53: 'domain', 135: 'other', 139: 'other', 445: 'other',
+    # Bases de données
+    1433: 'other', 1521: 'other', 3306: 'other', 5432: 'other',
+    # Autres services critiques
+    3389: 'other', 5900: 'other', 161: 'other', 162: 'other'
+}
+
 def port_to_service(port: int) -> str:
     """Convertit un numéro de port en nom de service - VERSION ÉTENDUE"""
-    service_map = {
-        # Services web
-        80: 'http', 443: 'http', 8080: 'http', 8443: 'http',
-        # Services de transfert  
-        21: 'ftp', 22: 'ssh', 23: 'telnet',
-        # Services mail
-        25: 'smtp', 110: 'pop_3', 143: 'imap', 993: 'imap', 995: 'pop_3',
-        # Services système
-        53: 'domain', 135: 'other', 139: 'other', 445: 'other',
-        # Bases de données
-        1433: 'other', 1521: 'other', 3306: 'other', 5432: 'other',
-        # Autres services critiques
-        3389: 'other', 5900: 'other', 161: 'other', 162: 'other'
-    }
-    return service_map.get(port, 'other')
+    return PORT_SERVICES.get(port, 'other')
 
 def create_dos_test_data(connections_count: int = 250, dest_port: int = 80) -> Dict[str, Any]:
     """Crée des données de test pour DoS avec signatures distinctives"""
@@ -388,14 +395,10 @@ def preprocess_data(data: Dict[str, Any]) -> Dict[str, Any]:
     try:
         print(f"🔧 Préprocessing des données: {data}")
         
-        features = extract_features(data)
-        if len(features) != 145:
-            if len(features) < 145:
-                features.extend([0.0] * (145 - len(features)))
-            else:
-                features = features[:145]
+        # Import local : feature_engine dépend des constantes de ce module
+        from .feature_engine import build_feature_row
         
-        features_normalized = normalize_features(features)
+        features_normalized = build_feature_row(data)
         data['features'] = features_normalized
         data['features_count'] = len(features_normalized)
         
@@ -0,0 +1,125 @@
+"""
+Suivi des scans et des DDoS par cardinalité (HyperLogLog, app/utils/sketches.py).
+
+Par source : ports et hôtes de destination distincts ; par destination :
+sources distinctes (équivalent de la règle Snort sid 1000005). Chaque
+estimateur occupe 2 x 2^p octets quelle que soit la quantité de ports ou
+d'adresses vus, sur une fenêtre de CARDINALITY_WINDOW secondes.
+"""
+
+import time
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from ..config import (CARDINALITY_WINDOW, DDOS_DISTINCT_SOURCES, HOST_SCAN_DISTINCT_HOSTS,
+                      PORT_SCAN_DISTINCT_PORTS)
+from .packet_decoder import parse_ip
+from .sketches import CardinalityTable
+from .state_table import StateTable
+
+MASK64 = (1 << 64) - 1
+GOLDEN = 0x9E3779B97F4A7C15
+
+
+def ip_key(address) -> int:
+    """
+    Adresse IPv4/IPv6 (texte ou couple (hi, lo) de packet_decoder) en entier
+    64 bits (même réduction que sketches.key64).
+    """
+    if isinstance(address, tuple):
+        hi, lo = address
+        return ((hi * GOLDEN) & MASK64) ^ lo
+    try:
+        hi, lo = parse_ip(address)
+    except (OSError, ValueError):
+        # Adresse non standard (zone IPv6 %eth0...) : hachage du texte
+        return hash(address) & MASK64
+    return ((hi * GOLDEN) & MASK64) ^ lo
+
+
+class ScanTracker:
+    """Ports/hôtes distincts par source et sources distinctes par destination, avec alertes au-delà des seuils."""
+
+    def __init__(self, name: str, window: float = CARDINALITY_WINDOW, port_threshold: int = PORT_SCAN_DISTINCT_PORTS,
+                 host_threshold: int = HOST_SCAN_DISTINCT_HOSTS, ddos_threshold: int = DDOS_DISTINCT_SOURCES,
+                 clock: Callable[[], float] = time.monotonic):
+        self.port_threshold = port_threshold
+        self.host_threshold = host_threshold
+        self.ddos_threshold = ddos_threshold
+        self.clock = clock
+        self.window = window
+        self.ports = CardinalityTable(f'{name}.ports', window, clock=clock)
+        self.hosts = CardinalityTable(f'{name}.hosts', window, clock=clock)
+        self.sources = CardinalityTable(f'{name}.sources', window, clock=clock)
+        # Une alerte par (type, clé) et par fenêtre
+        self.reported = StateTable(f'{name}.reported', ttl=window, clock=clock)
+
+    def observe(self, connections: Iterable[Tuple[str, str, int]], now: Optional[float] = None) -> List[Dict]:
+        """
+        Ajoute des connexions (source_ip, dest_ip, dest_port) et retourne les nouveaux
+        dépassements de seuil parmi les sources et destinations vues.
+        """
+        now = self.clock() if now is None else now
+        ports_by_source = defaultdict(list)
+        hosts_by_source = defaultdict(set)
+        sources_by_dest = defaultdict(set)
+        last_dest = {}
+        for source_ip, dest_ip, dest_port in connections:
+            if dest_port:
+                ports_by_source[source_ip].append(dest_port)
+            hosts_by_source[source_ip].add(dest_ip)
+            sources_by_dest[dest_ip].add(source_ip)
+            last_dest[source_ip] = dest_ip
+
+        for source_ip, ports in ports_by_source.items():
+            self.ports.add(source_ip, np.array(ports, dtype=np.uint64), now)
+        for source_ip, hosts in hosts_by_source.items():
+            self.hosts.add(source_ip, np.array([ip_key(h) for h in hosts], dtype=np.uint64), now)
+        for dest_ip, sources in sources_by_dest.items():
+            self.sources.add(dest_ip, np.array([ip_key(s) for s in sources], dtype=np.uint64), now)
+
+        findings = []
+        for source_ip in hosts_by_source:
+            ports = self.ports.count(source_ip, now)
+            if ports > self.port_threshold:
+                findings.append(self._finding('Port Scan', 'ports', source_ip, last_dest[source_ip], ports, now))
+            hosts = self.hosts.count(source_ip, now)
+            if hosts > self.host_threshold:
+                findings.append(self._finding('Port Scan', 'hosts', source_ip, 'multiple', hosts, now))
+        for dest_ip in sources_by_dest:
+            sources = self.sources.count(dest_ip, now)
+            if sources > self.ddos_threshold:
+                findings.append(self._finding('DDoS', 'sources', 'multiple', dest_ip, sources, now))
+        return [finding for finding in findings if finding is not None]
+
+    def observe_sources(self, dest_ip, source_keys: np.ndarray, now: Optional[float] = None) -> Optional[Dict]:
+        """
+        Ajoute en une fois des sources (clés 64 bits, ip_key ou sketches.key64) vers
+        dest_ip et retourne le dépassement du seuil DDoS éventuel.
+        """
+        now = self.clock() if now is None else now
+        self.sources.add(dest_ip, source_keys, now)
+        sources = self.sources.count(dest_ip, now)
+        if sources > self.ddos_threshold:
+            return self._finding('DDoS', 'sources', 'multiple', dest_ip, sources, now)
+        return None
+
+    def _finding(self, attack_type: str, kind: str, source_ip: str, dest_ip: str, distinct: int, now: float):
+        key = (kind, source_ip if kind != 'sources' else dest_ip)
+        last = self.reported.get(key, now=now)
+        if last is not None and now - last < self.window:
+            return None
+        self.reported.set(key, now, now=now)
+        return {'attackType': attack_type, 'kind': kind, 'sourceIp': source_ip, 'destinationIp': dest_ip,
+                'distinct': distinct}
+
+    def port_count(self, source_ip: str, now: Optional[float] = None) -> int:
+        return self.ports.count(source_ip, now)
+
+    def host_count(self, source_ip: str, now: Optional[float] = None) -> int:
+        return self.hosts.count(source_ip, now)
+
+    def source_count(self, dest_ip: str, now: Optional[float] = None) -> int:
+        return self.sources.count(dest_ip, now)
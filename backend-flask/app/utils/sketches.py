@@ -0,0 +1,336 @@
+"""
+Structures probabilistes en mémoire fixe pour la détection de flood.
+
+- CountMinSketch : compteurs par clé sur `window` secondes (anneau de sketches
+  d'une seconde, comme SlidingWindowCounter), estimation majorée d'au plus
+  ~e·N/width avec une probabilité 1 - exp(-depth).
+- SpaceSaving : les k clés les plus fréquentes avec un compteur majoré et
+  l'erreur maximale de ce compteur.
+- SketchFloodDetector : les deux combinés pour trouver les sources SYN les plus
+  actives au milieu de millions de sources usurpées, sans état par source.
+- HyperLogLog / CardinalityTable : nombre de valeurs distinctes (ports, hôtes,
+  sources) par clé en 2^p octets, sur fenêtre glissante.
+
+Les clés sont des adresses (hi, lo) au format de packet_decoder, en tableaux
+NumPy : toutes les mises à jour d'un lot sont vectorisées.
+"""
+
+import math
+import time
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+from ..config import CARDINALITY_PRECISION, CARDINALITY_WINDOW
+from .state_table import StateTable
+
+# Constante de mélange (nombre d'or 64 bits) pour réduire une clé (hi, lo) à 64 bits
+GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+
+
+def key64(hi: np.ndarray, lo: np.ndarray) -> np.ndarray:
+    """Réduit des adresses 128 bits (hi, lo) à une clé 64 bits."""
+    hi = np.asarray(hi, dtype=np.uint64)
+    lo = np.asarray(lo, dtype=np.uint64)
+    return (hi * GOLDEN) ^ lo
+
+
+def hash64(values) -> np.ndarray:
+    """Hachage splitmix64 d'entiers 64 bits (valeurs bien réparties pour HyperLogLog)."""
+    z = np.asarray(values, dtype=np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+class CountMinSketch:
+    """Count-Min Sketch sur fenêtre glissante : depth lignes de width compteurs par seconde."""
+
+    def __init__(self, width: int = 1 << 14, depth: int = 4, window: float = 10, resolution: float = 1.0,
+                 seed: int = 0, clock: Callable[[], float] = time.monotonic):
+        if width & (width - 1):
+            raise ValueError("width doit être une puissance de 2")
+        self.width = width
+        self.depth = depth
+        self.window = window
+        self.resolution = resolution
+        self.size = max(1, math.ceil(window / resolution))
+        self.clock = clock
+        # Hachage multiply-shift : h(x) = (a·x + b mod 2^64) >> (64 - log2(width)), a impair
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 1 << 63, depth, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._b = rng.integers(0, 1 << 63, depth, dtype=np.uint64)
+        self._shift = np.uint64(64 - int(math.log2(width)))
+        self._rows = np.arange(depth)[:, None]
+        self.buckets = np.zeros((self.size, depth, width), dtype=np.uint32)
+        self.totals = np.zeros((depth, width), dtype=np.int64)
+        self.tick = None
+        self.count = 0  # événements dans la fenêtre
+
+    @property
+    def nbytes(self) -> int:
+        return self.buckets.nbytes + self.totals.nbytes
+
+    def _index(self, keys: np.ndarray) -> np.ndarray:
+        """Colonne de chaque clé pour chaque ligne : tableau (depth, len(keys))."""
+        return ((self._a[:, None] * keys[None, :] + self._b[:, None]) >> self._shift).astype(np.int64)
+
+    def advance(self, now: Optional[float] = None):
+        """Vide les seaux d'une seconde sortis de la fenêtre."""
+        tick = int((self.clock() if now is None else now) / self.resolution)
+        if self.tick is None:
+            self.tick = tick
+            return
+        gap = tick - self.tick
+        if gap <= 0:
+            return
+        for t in range(self.tick + 1, self.tick + 1 + min(gap, self.size)):
+            slot = self.buckets[t % self.size]
+            self.totals -= slot
+            self.count -= int(slot[0].sum())
+            slot[:] = 0
+        self.tick = tick
+
+    def add(self, keys: np.ndarray, counts: Optional[np.ndarray] = None, now: Optional[float] = None):
+        """Ajoute counts (1 par défaut) à chaque clé 64 bits de keys."""
+        self.advance(now)
+        if len(keys) == 0:
+            return
+        index = self._index(keys)
+        slot = self.buckets[self.tick % self.size]
+        weights = None if counts is None else np.asarray(counts, dtype=np.float64)
+        for row in range(self.depth):
+            # bincount additionne les doublons (un += indexé ne compterait qu'une fois chaque colonne)
+            hits = np.bincount(index[row], weights=weights, minlength=self.width).astype(np.int64)
+            slot[row] += hits.astype(np.uint32)
+            self.totals[row] += hits
+        self.count += int(len(keys) if counts is None else np.sum(counts))
+
+    def estimate(self, keys: np.ndarray) -> np.ndarray:
+        """Majorant du nombre d'événements de chaque clé sur la fenêtre."""
+        if len(keys) == 0:
+            return np.zeros(0, dtype=np.int64)
+        return self.totals[self._rows, self._index(keys)].min(axis=0)
+
+    def error_bound(self) -> float:
+        """Surestimation typique d'une clé : e·N/width."""
+        return math.e * self.count / self.width
+
+
+class SpaceSaving:
+    """Top-k Space-Saving : k compteurs ; une clé nouvelle remplace la moins fréquente et hérite de son compte."""
+
+    def __init__(self, k: int = 64):
+        self.k = k
+        self.counters: Dict[Hashable, List[int]] = {}  # clé -> [compte majoré, erreur maximale]
+
+    def offer(self, key: Hashable, count: int = 1, initial: Optional[int] = None):
+        """
+        Compte count occurrences de key. initial (optionnel) : compte de départ d'une
+        clé non suivie quand une estimation externe (Count-Min) est plus fine que le minimum.
+        """
+        entry = self.counters.get(key)
+        if entry is not None:
+            entry[0] += count
+            return
+        start = count if initial is None else max(initial, count)
+        if len(self.counters) < self.k:
+            self.counters[key] = [start, start - count]
+            return
+        victim = min(self.counters, key=lambda k: self.counters[k][0])
+        floor = self.counters.pop(victim)[0]
+        if initial is None:
+            self.counters[key] = [floor + count, floor]
+        else:
+            self.counters[key] = [start, start - count]
+
+    def min_count(self) -> int:
+        """Compte à dépasser pour entrer dans le top-k (0 tant qu'il reste de la place)."""
+        if len(self.counters) < self.k:
+            return 0
+        return min(entry[0] for entry in self.counters.values())
+
+    def decay(self, estimates: Callable[[List[Hashable]], np.ndarray]):
+        """Ramène chaque compte sous l'estimation de la fenêtre courante (fenêtre glissante) ; retire les clés à 0."""
+        if not self.counters:
+            return
+        keys = list(self.counters)
+        for key, bound in zip(keys, estimates(keys).tolist()):
+            entry = self.counters[key]
+            if bound <= 0:
+                del self.counters[key]
+            elif entry[0] > bound:
+                entry[0] = bound
+                entry[1] = min(entry[1], bound)
+
+    def top(self, n: Optional[int] = None) -> List[Tuple[Hashable, int, int]]:
+        """[(clé, compte, erreur)] par compte décroissant."""
+        ranked = sorted(((key, c, e) for key, (c, e) in self.counters.items()), key=lambda item: -item[1])
+        return ranked[:n] if n else ranked
+
+    @property
+    def nbytes(self) -> int:
+        # clé (tuple de 2 entiers) + liste [compte, erreur] + slot du dict, approximatif
+        return len(self.counters) * 250
+
+
+class SketchFloodDetector:
+    """
+    Sources les plus actives sur `window` secondes en mémoire fixe : le Count-Min
+    compte toutes les sources, seules celles dont l'estimation dépasse nettement
+    le bruit du sketch entrent dans le top-k Space-Saving. Le bruit (surestimation
+    due aux collisions) est mesuré sur des clés sondes jamais vues et retranché
+    des estimations ; une source est signalée au-delà de threshold.
+    """
+
+    def __init__(self, threshold: int, window: float = 10, width: int = 1 << 14, depth: int = 4, k: int = 64,
+                 probes: int = 256, clock: Callable[[], float] = time.monotonic):
+        self.threshold = threshold
+        self.clock = clock
+        self.sketch = CountMinSketch(width=width, depth=depth, window=window, clock=clock)
+        self.top_k = SpaceSaving(k)
+        # Clés hors de l'espace des adresses (hi sans préfixe IPv6 valide ni IPv4 mappée)
+        self._probes = key64(np.full(probes, 0xffffffffffffffff, dtype=np.uint64), np.arange(probes, dtype=np.uint64))
+        self.noise = 0
+        self._tick = None
+
+    def update(self, hi: np.ndarray, lo: np.ndarray, now: Optional[float] = None) -> List[Tuple[Tuple[int, int], int]]:
+        """Ajoute un événement par adresse (hi[i], lo[i]) ; retourne [((hi, lo), compte estimé)] au-delà du seuil."""
+        now = self.clock() if now is None else now
+        sketch = self.sketch
+        keys = key64(hi, lo)
+        sketch.add(keys, now=now)
+        self.noise = int(np.median(sketch.estimate(self._probes)))
+        if sketch.tick != self._tick:
+            self._tick = sketch.tick
+            self.top_k.decay(self.estimate_pairs)
+
+        if len(keys):
+            # Admission : au-delà de la moitié du seuil (bruit retranché) et du minimum du top-k
+            estimates = sketch.estimate(keys) - self.noise
+            candidates = estimates > max(self.threshold // 2, self.top_k.min_count())
+            if candidates.any():
+                pairs = np.stack([np.asarray(hi, dtype=np.uint64)[candidates],
+                                  np.asarray(lo, dtype=np.uint64)[candidates]], axis=1)
+                unique, counts = np.unique(pairs, axis=0, return_counts=True)
+                initial = self.estimate_pairs(unique)
+                for key, count, estimate in zip(map(tuple, unique.tolist()), counts.tolist(), initial.tolist()):
+                    self.top_k.offer(key, count, initial=estimate)
+
+        return [(key, count) for key, count, _ in self.top_k.top() if count > self.threshold]
+
+    def estimate_pairs(self, keys) -> np.ndarray:
+        """Estimations bruit retranché pour des clés (hi, lo)."""
+        pairs = np.asarray(keys, dtype=np.uint64).reshape(-1, 2)
+        return self.sketch.estimate(key64(pairs[:, 0], pairs[:, 1])) - self.noise
+
+    def estimate(self, hi: int, lo: int) -> int:
+        return int(self.estimate_pairs([(hi, lo)])[0])
+
+    def metrics(self) -> dict:
+        return {
+            'width': self.sketch.width,
+            'depth': self.sketch.depth,
+            'window': self.sketch.window,
+            'events': self.sketch.count,
+            'noise': self.noise,
+            'top_k': len(self.top_k.counters),
+            'bytes': self.sketch.nbytes + self.top_k.nbytes,
+        }
+
+
+class HyperLogLog:
+    """Estimateur du nombre de valeurs distinctes : 2^p registres d'un octet, erreur relative ~1.04/sqrt(2^p)."""
+
+    __slots__ = ('p', 'registers')
+
+    def __init__(self, p: int = CARDINALITY_PRECISION):
+        self.p = p
+        self.registers = np.zeros(1 << p, dtype=np.uint8)
+
+    def add_hashes(self, hashes: np.ndarray):
+        """Ajoute des valeurs déjà hachées sur 64 bits (hash64)."""
+        if len(hashes) == 0:
+            return
+        p = np.uint64(self.p)
+        index = (hashes >> np.uint64(64 - self.p)).astype(np.int64)
+        # Rang = position du premier bit à 1 dans les 32 bits suivant l'index (1 à 33)
+        rest = ((hashes << p) >> np.uint64(32)).astype(np.float64)
+        rank = (33 - np.frexp(rest)[1]).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def add(self, values):
+        """Ajoute des entiers (ports, adresses réduites par key64...)."""
+        self.add_hashes(hash64(np.atleast_1d(values)))
+
+    def merge(self, other: 'HyperLogLog') -> 'HyperLogLog':
+        merged = HyperLogLog(self.p)
+        np.maximum(self.registers, other.registers, out=merged.registers)
+        return merged
+
+    def count(self) -> int:
+        return _hll_estimate(self.registers)
+
+
+def _hll_estimate(registers: np.ndarray) -> int:
+    m = len(registers)
+    alpha = 0.7213 / (1 + 1.079 / m)
+    estimate = alpha * m * m / float(np.sum(np.ldexp(1.0, -registers.astype(np.int64))))
+    zeros = int(np.count_nonzero(registers == 0))
+    if estimate <= 2.5 * m and zeros:
+        # Petites cardinalités : comptage linéaire des registres vides
+        estimate = m * math.log(m / zeros)
+    return int(round(estimate))
+
+
+class CardinalityTable:
+    """
+    Valeurs distinctes par clé sur `window` secondes environ : deux HyperLogLog par
+    clé (demi-fenêtre courante et précédente), union à la lecture. Nombre de clés
+    borné par une StateTable.
+    """
+
+    def __init__(self, name: str, window: float = CARDINALITY_WINDOW, p: int = CARDINALITY_PRECISION,
+                 clock: Callable[[], float] = time.monotonic, **table_options):
+        self.window = window
+        self.p = p
+        self.clock = clock
+        self.half = window / 2
+        self._table = StateTable(name, ttl=window, clock=clock, **table_options)
+
+    def _entry(self, key: Hashable, now: float, create: bool):
+        epoch = int(now / self.half)
+        entry = self._table.get(key, now=now)
+        if entry is None:
+            if not create:
+                return None
+            entry = [epoch, HyperLogLog(self.p), HyperLogLog(self.p)]
+            self._table.set(key, entry, now=now)
+        gap = epoch - entry[0]
+        if gap == 1:
+            entry[1], entry[2] = HyperLogLog(self.p), entry[1]
+        elif gap > 1:
+            entry[1], entry[2] = HyperLogLog(self.p), HyperLogLog(self.p)
+        entry[0] = epoch
+        return entry
+
+    def add(self, key: Hashable, values, now: Optional[float] = None):
+        """Ajoute une ou plusieurs valeurs entières pour key."""
+        now = self.clock() if now is None else now
+        self._entry(key, now, create=True)[1].add(values)
+
+    def count(self, key: Hashable, now: Optional[float] = None) -> int:
+        now = self.clock() if now is None else now
+        entry = self._entry(key, now, create=False)
+        if entry is None:
+            return 0
+        return _hll_estimate(np.maximum(entry[1].registers, entry[2].registers))
+
+    def keys(self):
+        return [key for key, _ in self._table.items()]
+
+    def metrics(self) -> dict:
+        return self._table.metrics()
+
+    def __len__(self) -> int:
+        return len(self._table)
@@ -0,0 +1,91 @@
+"""
+Compteurs sur fenêtre glissante pour la détection de flood.
+
+Chaque clé possède un anneau de seaux d'une seconde (par défaut) et le total
+courant : ajouter ou lire un compteur ne fait qu'avancer l'anneau jusqu'à la
+seconde courante (au plus `window` seaux remis à zéro), sans horodatage ni
+objet par paquet. Les clés sont conservées dans une StateTable (nombre de clés
+borné, clés inactives pendant toute la fenêtre supprimées).
+"""
+
+import math
+import time
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from ..config import DETECTOR_STATE_MAX_KEYS
+from .state_table import StateTable
+
+
+class _Window:
+    __slots__ = ('buckets', 'tick', 'total')
+
+    def __init__(self, size: int, tick: int):
+        self.buckets = [0] * size
+        self.tick = tick
+        self.total = 0
+
+
+class SlidingWindowCounter:
+    """Nombre d'événements par clé sur les `window` dernières secondes, en O(1) par opération."""
+
+    def __init__(self, window: float = 10, resolution: float = 1.0, clock: Callable[[], float] = time.monotonic,
+                 max_keys: int = DETECTOR_STATE_MAX_KEYS, name: str = 'sliding_window'):
+        self.window = window
+        self.resolution = resolution
+        self.size = max(1, math.ceil(window / resolution))
+        self.clock = clock
+        self._windows = StateTable(name, max_keys=max_keys, ttl=self.size * resolution, clock=clock)
+
+    def _advance(self, w: _Window, tick: int):
+        """Vide les seaux écoulés depuis la dernière mise à jour de la clé."""
+        gap = tick - w.tick
+        if gap <= 0:
+            return
+        if gap >= self.size:
+            w.buckets = [0] * self.size
+            w.total = 0
+        else:
+            buckets, size = w.buckets, self.size
+            for t in range(w.tick + 1, tick + 1):
+                i = t % size
+                w.total -= buckets[i]
+                buckets[i] = 0
+        w.tick = tick
+
+    def add(self, key: Hashable, count: int = 1, now: Optional[float] = None) -> int:
+        """Ajoute count événements pour key et retourne le total sur la fenêtre."""
+        now = self.clock() if now is None else now
+        tick = int(now / self.resolution)
+        w = self._windows.get(key, now=now)
+        if w is None:
+            w = _Window(self.size, tick)
+            self._windows.set(key, w, now=now)
+        else:
+            self._advance(w, tick)
+        w.buckets[tick % self.size] += count
+        w.total += count
+        return w.total
+
+    def count(self, key: Hashable, now: Optional[float] = None) -> int:
+        now = self.clock() if now is None else now
+        w = self._windows.get(key, now=now)
+        if w is None:
+            return 0
+        self._advance(w, int(now / self.resolution))
+        return w.total
+
+    def discard(self, key: Hashable):
+        self._windows.pop(key)
+
+    def prune(self, now: Optional[float] = None) -> int:
+        """Supprime les clés sans événement dans la fenêtre."""
+        return self._windows.expire(now)
+
+    def metrics(self) -> Dict[str, Any]:
+        return self._windows.metrics()
+
+    def __len__(self) -> int:
+        return len(self._windows)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._windows
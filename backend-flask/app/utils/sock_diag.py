@@ -0,0 +1,376 @@
+"""
+Instantané des sockets TCP/UDP (IPv4 et IPv6) sans parcourir /proc.
+
+Sous Linux, les sockets sont demandées directement au noyau par
+NETLINK_SOCK_DIAG (requêtes inet_diag_req_v2, SOCK_DIAG_BY_FAMILY) avec un
+filtre d'états appliqué côté noyau (ex. seulement SYN_RECV et TIME_WAIT).
+Les réponses sont lues par blocs et converties d'un coup en tableau NumPy
+structuré (SOCKET_DTYPE) : adresses en (hi, lo) comme le décodeur de paquets
+(IPv4 mappées ::ffff:a.b.c.d), ports, état, uid et inode, sans namedtuple
+par socket. psutil.net_connections() parcourt au contraire les descripteurs
+de chaque processus ; il ne sert plus que de repli (autres OS, noyau sans
+sock_diag) et produit le même tableau.
+"""
+
+import itertools
+import logging
+import os
+import socket
+import struct
+import threading
+from typing import Iterable, Iterator, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from ..config import SOCKET_SNAPSHOT_BACKEND
+from .packet_decoder import IPPROTO_TCP, IPPROTO_UDP, IPV4_MAPPED, format_ip, parse_ip
+from .sketches import hash64, key64
+
+logger = logging.getLogger(__name__)
+
+# Constantes <linux/netlink.h>, <linux/sock_diag.h> et <linux/inet_diag.h>
+NETLINK_SOCK_DIAG = 4
+SOCK_DIAG_BY_FAMILY = 20
+NLMSG_ERROR = 2
+NLMSG_DONE = 3
+NLM_F_REQUEST = 0x01
+NLM_F_DUMP = 0x300
+
+# États TCP du noyau (include/net/tcp_states.h), noms de psutil
+TCP_STATES = {
+    1: 'ESTABLISHED', 2: 'SYN_SENT', 3: 'SYN_RECV', 4: 'FIN_WAIT1', 5: 'FIN_WAIT2', 6: 'TIME_WAIT',
+    7: 'CLOSE', 8: 'CLOSE_WAIT', 9: 'LAST_ACK', 10: 'LISTEN', 11: 'CLOSING',
+}
+STATE_CODES = {name: code for code, name in TCP_STATES.items()}
+TCP_NEW_SYN_RECV = 12  # demandes de connexion en attente, rendues par le noyau comme SYN_RECV
+ALL_STATES = 0xffffffff
+
+# Nom d'état par code (statut psutil) ; les sockets UDP n'ont que ESTABLISHED (connectée) ou CLOSE
+STATE_NAMES = np.array([TCP_STATES.get(code, 'NONE') for code in range(16)], dtype=object)
+
+PROTOCOLS = {'tcp': IPPROTO_TCP, 'udp': IPPROTO_UDP}
+
+SOCKET_DTYPE = np.dtype([
+    ('family', 'u1'),       # 4 ou 6
+    ('proto', 'u1'),        # IPPROTO_TCP / IPPROTO_UDP
+    ('state', 'u1'),        # code TCP_STATES
+    ('lport', 'u2'),        # port local
+    ('rport', 'u2'),        # port distant (0 si non connectée)
+    ('laddr_hi', 'u8'),
+    ('laddr_lo', 'u8'),
+    ('raddr_hi', 'u8'),
+    ('raddr_lo', 'u8'),
+    ('uid', 'u4'),
+    ('inode', 'u4'),
+])
+
+# struct nlmsghdr puis struct inet_diag_msg (champs de inet_diag_sockid en ordre réseau)
+NLMSG_HEADER = struct.Struct('=IHHII')
+DIAG_DTYPE = np.dtype([
+    ('nlmsg_len', '=u4'), ('nlmsg_type', '=u2'), ('nlmsg_flags', '=u2'), ('nlmsg_seq', '=u4'),
+    ('nlmsg_pid', '=u4'),
+    ('family', 'u1'), ('state', 'u1'), ('timer', 'u1'), ('retrans', 'u1'),
+    ('sport', '>u2'), ('dport', '>u2'), ('src', '>u8', (2,)), ('dst', '>u8', (2,)),
+    ('ifindex', '=u4'), ('cookie', '=u4', (2,)),
+    ('expires', '=u4'), ('rqueue', '=u4'), ('wqueue', '=u4'), ('uid', '=u4'), ('inode', '=u4'),
+])
+# struct inet_diag_req_v2 : famille, protocole, extensions, pad, masque d'états, inet_diag_sockid vide
+DIAG_REQUEST = struct.Struct('=IHHII' + 'BBBxI' + '48x')
+
+RECV_BUFFER = 1 << 16
+
+
+def state_mask(states: Optional[Iterable[str]] = None) -> int:
+    """Masque idiag_states pour des noms d'états psutil (None = tous les états)."""
+    if states is None:
+        return ALL_STATES
+    mask = 0
+    for name in states:
+        code = STATE_CODES[name]
+        mask |= 1 << code
+        if code == STATE_CODES['SYN_RECV']:
+            mask |= 1 << TCP_NEW_SYN_RECV
+    return mask
+
+
+def _offsets(chunk: bytes) -> np.ndarray:
+    """Positions des messages netlink d'un bloc reçu (pas constant vérifié d'un coup, sinon parcours)."""
+    size = NLMSG_HEADER.unpack_from(chunk, 0)[0]
+    if size and len(chunk) % size == 0:
+        offsets = np.arange(0, len(chunk), size)
+        lengths = np.ndarray(len(offsets), dtype='=u4', buffer=chunk, strides=(size,))
+        if np.all(lengths == size):
+            return offsets
+    offsets = []
+    position = 0
+    while position + NLMSG_HEADER.size <= len(chunk):
+        size = NLMSG_HEADER.unpack_from(chunk, position)[0]
+        if size < NLMSG_HEADER.size:
+            break
+        offsets.append(position)
+        position += (size + 3) & ~3
+    return np.array(offsets, dtype=np.int64)
+
+
+def _records(messages: np.ndarray) -> np.ndarray:
+    """Messages inet_diag_msg -> SOCKET_DTYPE (adresses en (hi, lo), IPv4 mappées)."""
+    records = np.empty(len(messages), dtype=SOCKET_DTYPE)
+    ipv4 = messages['family'] == socket.AF_INET
+    records['family'] = np.where(ipv4, 4, 6)
+    records['state'] = messages['state']
+    records['lport'] = messages['sport']
+    records['rport'] = messages['dport']
+    for side, column in (('laddr', 'src'), ('raddr', 'dst')):
+        address = messages[column]
+        records[side + '_hi'] = np.where(ipv4, 0, address[:, 0])
+        records[side + '_lo'] = np.where(ipv4, np.uint64(IPV4_MAPPED) | (address[:, 0] >> np.uint64(32)),
+                                         address[:, 1])
+    records['uid'] = messages['uid']
+    records['inode'] = messages['inode']
+    return records
+
+
+class SockDiag:
+    """Socket NETLINK_SOCK_DIAG réutilisée d'un instantané à l'autre (partageable entre threads)."""
+
+    def __init__(self):
+        self.sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW | socket.SOCK_CLOEXEC, NETLINK_SOCK_DIAG)
+        self.sock.bind((0, 0))
+        self._sequence = itertools.count(1)
+        self._buffer = bytearray(RECV_BUFFER)
+        self._lock = threading.Lock()
+
+    def dump(self, family: int, protocol: int, states: int = ALL_STATES) -> np.ndarray:
+        """Sockets d'une famille (AF_INET/AF_INET6) et d'un protocole dans les états du masque."""
+        # Une requête de dump à la fois : le noyau répond EBUSY à un second dump concurrent
+        with self._lock:
+            sequence = next(self._sequence)
+            self.sock.send(DIAG_REQUEST.pack(DIAG_REQUEST.size, SOCK_DIAG_BY_FAMILY, NLM_F_REQUEST | NLM_F_DUMP,
+                                             sequence, 0, family, protocol, 0, states))
+            batches = []
+            view = memoryview(self._buffer)
+            while True:
+                received = self.sock.recv_into(self._buffer)
+                chunk = bytes(view[:received])
+                offsets = _offsets(chunk)
+                if not len(offsets):
+                    continue
+                raw = np.frombuffer(chunk, dtype=np.uint8)
+                done = False
+                last_type = NLMSG_HEADER.unpack_from(chunk, int(offsets[-1]))[1]
+                if last_type in (NLMSG_DONE, NLMSG_ERROR):
+                    if last_type == NLMSG_ERROR:
+                        error = struct.unpack_from('=i', chunk, int(offsets[-1]) + NLMSG_HEADER.size)[0]
+                        if error:
+                            raise OSError(-error, os.strerror(-error))
+                    offsets = offsets[:-1]
+                    done = True
+                if len(offsets):
+                    rows = raw[offsets[:, None] + np.arange(DIAG_DTYPE.itemsize)]
+                    messages = rows.view(DIAG_DTYPE).ravel()
+                    messages = messages[(messages['nlmsg_type'] == SOCK_DIAG_BY_FAMILY)
+                                        & (messages['nlmsg_seq'] == sequence)]
+                    batches.append(messages)
+                if done:
+                    break
+            records = _records(np.concatenate(batches)) if batches else np.empty(0, dtype=SOCKET_DTYPE)
+            records['proto'] = protocol
+            return records
+
+    def snapshot(self, protocols: Iterable[str] = ('tcp', 'udp'), states: Optional[Iterable[str]] = None,
+                 families: Iterable[int] = (socket.AF_INET, socket.AF_INET6)) -> np.ndarray:
+        mask = state_mask(states)
+        parts = [self.dump(family, PROTOCOLS[protocol], mask) for protocol in protocols for family in families]
+        return np.concatenate(parts) if parts else np.empty(0, dtype=SOCKET_DTYPE)
+
+    def close(self):
+        self.sock.close()
+
+
+def psutil_snapshot(protocols: Iterable[str] = ('tcp', 'udp'), states: Optional[Iterable[str]] = None) -> np.ndarray:
+    """Repli : psutil.net_connections() converti en SOCKET_DTYPE (mêmes filtres)."""
+    import psutil
+
+    protocols = {PROTOCOLS[protocol] for protocol in protocols}
+    wanted = None if states is None else set(states)
+    rows = []
+    for conn in psutil.net_connections(kind='inet'):
+        proto = IPPROTO_TCP if conn.type == socket.SOCK_STREAM else IPPROTO_UDP
+        if proto not in protocols:
+            continue
+        if proto == IPPROTO_TCP:
+            state = STATE_CODES.get(conn.status, 0)
+        else:
+            state = STATE_CODES['ESTABLISHED'] if conn.raddr else STATE_CODES['CLOSE']
+        if wanted is not None and TCP_STATES.get(state) not in wanted:
+            continue
+        any_address = '0.0.0.0' if conn.family == socket.AF_INET else '::'
+        local = parse_ip(conn.laddr.ip if conn.laddr else any_address)
+        remote = parse_ip(conn.raddr.ip if conn.raddr else any_address)
+        rows.append((4 if conn.family == socket.AF_INET else 6, proto, state,
+                     conn.laddr.port if conn.laddr else 0, conn.raddr.port if conn.raddr else 0,
+                     local[0], local[1], remote[0], remote[1], 0, 0))
+    return np.array(rows, dtype=SOCKET_DTYPE)
+
+
+def sock_diag_supported() -> bool:
+    """True si le noyau répond aux requêtes NETLINK_SOCK_DIAG."""
+    try:
+        diag = SockDiag()
+        try:
+            diag.dump(socket.AF_INET, IPPROTO_TCP, state_mask(['LISTEN']))
+        finally:
+            diag.close()
+        return True
+    except (OSError, AttributeError):
+        return False
+
+
+_diag = None
+_backend = None
+_diag_lock = threading.Lock()
+
+
+def socket_snapshot(protocols: Iterable[str] = ('tcp', 'udp'), states: Optional[Iterable[str]] = None,
+                    backend: str = SOCKET_SNAPSHOT_BACKEND) -> np.ndarray:
+    """
+    Sockets TCP/UDP IPv4/IPv6 de l'hôte en tableau SOCKET_DTYPE, filtrées par
+    protocole et par état (noms psutil, ex. ['SYN_RECV', 'TIME_WAIT']).
+    backend : 'netlink', 'psutil' ou 'auto' (netlink si disponible).
+    """
+    global _diag, _backend
+    with _diag_lock:
+        if _backend is None or backend not in ('auto', _backend):
+            if backend == 'auto':
+                _backend = 'netlink' if sock_diag_supported() else 'psutil'
+            else:
+                _backend = backend
+            logger.info(f"🔌 Instantané des sockets : {_backend}")
+        if _backend == 'netlink' and _diag is None:
+            _diag = SockDiag()
+        diag = _diag if _backend == 'netlink' else None
+    if diag is not None:
+        return diag.snapshot(protocols, states)
+    return psutil_snapshot(protocols, states)
+
+
+def connected(records: np.ndarray) -> np.ndarray:
+    """Sockets ayant une extrémité distante (ni LISTEN ni UDP non connectée)."""
+    return records[records['rport'] != 0]
+
+
+def without_addresses(records: np.ndarray, addresses: Iterable[str] = ('127.0.0.1', '0.0.0.0', '::1')) -> np.ndarray:
+    """Sockets dont aucune extrémité n'est l'une des adresses données (boucle locale par défaut)."""
+    keep = np.ones(len(records), dtype=bool)
+    for hi, lo in map(parse_ip, addresses):
+        for side in ('laddr', 'raddr'):
+            keep &= (records[side + '_hi'] != hi) | (records[side + '_lo'] != lo)
+    return records[keep]
+
+
+def state_names(records: np.ndarray) -> np.ndarray:
+    """Statuts psutil ('ESTABLISHED', 'SYN_RECV'...) des sockets ; 'NONE' pour UDP comme psutil."""
+    names = STATE_NAMES[records['state']]
+    names[records['proto'] == IPPROTO_UDP] = 'NONE'
+    return names
+
+
+def iter_connections(records: np.ndarray) -> Iterator[tuple]:
+    """(ip distante, ip locale, port local, port distant, statut) par socket, pour les appelants non vectorisés."""
+    statuses = state_names(records)
+    for row, status in zip(records.tolist(), statuses.tolist()):
+        yield (format_ip(row[7], row[8]), format_ip(row[5], row[6]), row[3], row[4], status)
+
+
+PAIR_DTYPE = np.dtype([
+    ('raddr_hi', 'u8'),
+    ('raddr_lo', 'u8'),
+    ('laddr_hi', 'u8'),
+    ('laddr_lo', 'u8'),
+    ('connections', 'u4'),  # sockets de la paire
+    ('ports', 'u4'),        # ports locaux distincts
+    ('first_port', 'u2'),   # plus petit port local visé
+])
+
+
+def group_pairs(records: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Regroupe des sockets par paire (ip distante, ip locale) en un seul tri.
+    Retourne les paires (PAIR_DTYPE : connexions et ports locaux distincts) puis,
+    pour chaque couple (paire, port local) distinct, l'indice de sa paire et le port.
+    """
+    order = np.lexsort((records['lport'], records['laddr_lo'], records['laddr_hi'],
+                        records['raddr_lo'], records['raddr_hi']))
+    rows = records[order]
+    pair_start = np.zeros(len(rows), dtype=bool)
+    pair_start[:1] = True
+    for column in ('raddr_hi', 'raddr_lo', 'laddr_hi', 'laddr_lo'):
+        pair_start[1:] |= rows[column][1:] != rows[column][:-1]
+    port_start = pair_start.copy()
+    port_start[1:] |= rows['lport'][1:] != rows['lport'][:-1]
+    pair_index = np.cumsum(pair_start) - 1
+
+    first = rows[pair_start]
+    pairs = np.empty(len(first), dtype=PAIR_DTYPE)
+    for column in ('raddr_hi', 'raddr_lo', 'laddr_hi', 'laddr_lo'):
+        pairs[column] = first[column]
+    pairs['connections'] = np.bincount(pair_index, minlength=len(pairs))
+    pairs['ports'] = np.bincount(pair_index[port_start], minlength=len(pairs))
+    pairs['first_port'] = first['lport']  # ports triés dans chaque paire
+    return pairs, pair_index[port_start], rows['lport'][port_start]
+
+
+def socket_keys(records: np.ndarray) -> np.ndarray:
+    """Identité 64 bits de chaque socket : protocole, adresses et ports des deux extrémités."""
+    ports = ((records['proto'].astype(np.uint64) << np.uint64(32))
+             | (records['lport'].astype(np.uint64) << np.uint64(16)) | records['rport'])
+    remote = hash64(key64(records['raddr_hi'], records['raddr_lo']) ^ hash64(ports))
+    return hash64(key64(records['laddr_hi'], records['laddr_lo']) ^ remote)
+
+
+class SnapshotChanges(NamedTuple):
+    added: np.ndarray           # sockets apparues depuis l'instantané précédent
+    removed: np.ndarray         # sockets disparues (avec leur dernier état connu)
+    changed: np.ndarray         # sockets présentes dans les deux, état courant
+    previous_state: np.ndarray  # état précédent de chaque socket de changed
+
+    @property
+    def churn(self) -> int:
+        return len(self.added) + len(self.removed) + len(self.changed)
+
+
+class SnapshotDiff:
+    """
+    Garde le dernier instantané (trié par socket_keys) et retourne à chaque
+    update les sockets ajoutées, retirées et changées d'état, par recherche
+    dichotomique vectorisée. Prévu pour des sockets connectées (4-tuple unique).
+    """
+
+    def __init__(self):
+        self.keys = np.empty(0, dtype=np.uint64)
+        self.records = np.empty(0, dtype=SOCKET_DTYPE)
+
+    def update(self, records: np.ndarray) -> SnapshotChanges:
+        keys = socket_keys(records)
+        order = np.argsort(keys)
+        keys, records = keys[order], records[order]
+
+        previous = self.keys
+        if len(previous):
+            index = np.minimum(np.searchsorted(previous, keys), len(previous) - 1)
+            found = previous[index] == keys
+        else:
+            index = np.zeros(len(keys), dtype=np.int64)
+            found = np.zeros(len(keys), dtype=bool)
+        kept = np.zeros(len(previous), dtype=bool)
+        kept[index[found]] = True
+
+        old_state = self.records['state'][index[found]]
+        still = records[found]
+        moved = old_state != still['state']
+        changes = SnapshotChanges(records[~found], self.records[~kept], still[moved], old_state[moved])
+        self.keys, self.records = keys, records
+        return changes
+
+    def __len__(self) -> int:
+        return len(self.keys)
@@ -0,0 +1,184 @@
+"""
+Table d'état bornée pour les détecteurs (compteurs, cooldowns, historiques par clé).
+
+Nombre de clés plafonné (éviction LRU) et expiration des clés inactives
+(TTL) : un flood à sources usurpées ne fait plus croître la mémoire sans
+limite. Les tables s'enregistrent dans un registre commun pour exposer leurs
+métriques (taille, évictions, mémoire estimée) via /api/stats/detector-state.
+"""
+
+import sys
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterator, Optional, Tuple
+
+from ..config import DETECTOR_STATE_MAX_KEYS, DETECTOR_STATE_TTL
+
+# Une entrée sur SIZE_SAMPLE_EVERY est mesurée pour estimer la mémoire par entrée
+SIZE_SAMPLE_EVERY = 1024
+# Surcoût d'une entrée d'OrderedDict (nœud de liste chaînée + slot de table), en octets
+ENTRY_OVERHEAD = 100
+
+_tables: 'weakref.WeakValueDictionary[str, StateTable]' = weakref.WeakValueDictionary()
+_tables_lock = threading.Lock()
+
+
+def deep_sizeof(obj: Any, depth: int = 3) -> int:
+    """Taille approximative d'un objet et de son contenu (conteneurs usuels, profondeur bornée)."""
+    size = sys.getsizeof(obj)
+    if depth <= 0:
+        return size
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, depth - 1) + deep_sizeof(v, depth - 1) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, depth - 1) for item in obj)
+    elif hasattr(obj, '__slots__'):
+        size += sum(deep_sizeof(getattr(obj, slot), depth - 1) for slot in obj.__slots__ if hasattr(obj, slot))
+    elif hasattr(obj, '__dict__'):
+        size += deep_sizeof(vars(obj), depth - 1)
+    return size
+
+
+class StateTable:
+    """Dictionnaire borné : au plus max_keys clés (LRU), clés inactives depuis ttl secondes supprimées."""
+
+    def __init__(self, name: str, max_keys: int = DETECTOR_STATE_MAX_KEYS, ttl: Optional[float] = DETECTOR_STATE_TTL,
+                 clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.max_keys = max_keys
+        self.ttl = ttl
+        self.clock = clock
+        # clé -> (dernier accès, valeur), de la moins récemment utilisée à la plus récente
+        self._entries: 'OrderedDict[Hashable, list]' = OrderedDict()
+        self.inserts = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.peak_keys = 0
+        self._entry_bytes = 0.0
+        self._sampled = 0
+        register_table(self)
+
+    def _now(self, now: Optional[float]) -> float:
+        return self.clock() if now is None else now
+
+    def get(self, key: Hashable, default: Any = None, now: Optional[float] = None) -> Any:
+        """Valeur de la clé (marquée comme récemment utilisée), default si absente ou expirée."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        now = self._now(now)
+        if self.ttl is not None and now - entry[0] >= self.ttl:
+            del self._entries[key]
+            self.expirations += 1
+            return default
+        entry[0] = now
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any, now: Optional[float] = None):
+        now = self._now(now)
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry[0], entry[1] = now, value
+            self._entries.move_to_end(key)
+            return
+        self._insert(key, value, now)
+
+    def setdefault(self, key: Hashable, factory: Callable[[], Any], now: Optional[float] = None) -> Any:
+        """Valeur de la clé, créée par factory() si absente ou expirée."""
+        now = self._now(now)
+        value = self.get(key, _MISSING, now)
+        if value is _MISSING:
+            value = factory()
+            self._insert(key, value, now)
+        return value
+
+    def _insert(self, key: Hashable, value: Any, now: float):
+        self.expire(now)
+        while len(self._entries) >= self.max_keys:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        self._entries[key] = [now, value]
+        self.inserts += 1
+        self.peak_keys = max(self.peak_keys, len(self._entries))
+        if self.inserts % SIZE_SAMPLE_EVERY == 1:
+            self._sample_size(key, value)
+
+    def _sample_size(self, key: Hashable, value: Any):
+        size = deep_sizeof(key) + deep_sizeof(value) + ENTRY_OVERHEAD
+        self._sampled += 1
+        self._entry_bytes += (size - self._entry_bytes) / min(self._sampled, 32)
+
+    def expire(self, now: Optional[float] = None) -> int:
+        """Supprime les clés inactives depuis ttl secondes (en tête de l'ordre LRU)."""
+        if self.ttl is None:
+            return 0
+        now = self._now(now)
+        expired = 0
+        entries = self._entries
+        while entries:
+            key, entry = next(iter(entries.items()))
+            if now - entry[0] < self.ttl:
+                break
+            del entries[key]
+            expired += 1
+        self.expirations += expired
+        return expired
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._entries.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def clear(self):
+        self._entries.clear()
+
+    def items(self) -> Iterator[Tuple[Hashable, Any]]:
+        return ((key, entry[1]) for key, entry in self._entries.items())
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def metrics(self) -> Dict[str, Any]:
+        keys = len(self._entries)
+        return {
+            'name': self.name,
+            'keys': keys,
+            'max_keys': self.max_keys,
+            'peak_keys': self.peak_keys,
+            'ttl': self.ttl,
+            'inserts': self.inserts,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'entry_bytes': round(self._entry_bytes),
+            'approx_bytes': round(keys * self._entry_bytes)
+        }
+
+
+_MISSING = object()
+
+
+def register_table(table: StateTable):
+    """Enregistre la table (référence faible) ; un nom déjà pris reçoit un suffixe #n."""
+    with _tables_lock:
+        name, n = table.name, 1
+        while name in _tables:
+            n += 1
+            name = f"{table.name}#{n}"
+        table.name = name
+        _tables[name] = table
+
+
+def state_tables_metrics() -> Dict[str, Any]:
+    with _tables_lock:
+        tables = list(_tables.values())
+    metrics = [table.metrics() for table in tables]
+    return {
+        'tables': metrics,
+        'keys': sum(m['keys'] for m in metrics),
+        'approx_bytes': sum(m['approx_bytes'] for m in metrics)
+    }
@@ -0,0 +1,281 @@
+"""
+Agrégateur de statistiques en mémoire, mis à jour au fil des alertes émises.
+
+Les routes de statistiques lisent ces compteurs sans accès disque ; un thread
+les compare périodiquement au stockage SQLite (écritures d'autres processus,
+suppressions, remises à zéro) et en écrit un snapshot JSON pour redémarrer
+sans reparcourir tout l'historique.
+"""
+
+import atexit
+import heapq
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter, deque
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.config import STATS_SNAPSHOT_FILE, STATS_SNAPSHOT_INTERVAL, STATS_ROLLING_WINDOW
+from app.utils.alert_store import AlertStore, DEFAULT_STATS, get_alert_store
+
+logger = logging.getLogger(__name__)
+
+RECENT_ALERTS = 5
+TOP_SOURCES = 10
+# Au-delà, on ne garde que les IPs sources les plus fréquentes
+MAX_TRACKED_SOURCES = 10000
+SNAPSHOT_VERSION = 1
+
+
+class StatsAggregator:
+    """Compteurs par type d'attaque, IP source et sévérité + taux de détection glissant."""
+
+    def __init__(self, store: Optional[AlertStore] = None, snapshot_file: Optional[Path] = STATS_SNAPSHOT_FILE,
+                 snapshot_interval: float = STATS_SNAPSHOT_INTERVAL, rolling_window: int = STATS_ROLLING_WINDOW):
+        self.store = store
+        self.snapshot_file = Path(snapshot_file) if snapshot_file else None
+        self.snapshot_interval = snapshot_interval
+        self.rolling_window = rolling_window
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._dirty = False
+        self._top_sources: Optional[List[Dict[str, Any]]] = None
+
+        self.totals: Dict[str, Any] = dict(DEFAULT_STATS)
+        self.by_attack_type: Counter = Counter()
+        self.by_severity: Counter = Counter()
+        self.by_source_ip: Counter = Counter()
+        self.recent_alerts: deque = deque(maxlen=RECENT_ALERTS)
+        self.last_alert_id = 0
+        # Seaux d'une seconde : [seconde, alertes, connexions]
+        self._buckets: deque = deque()
+
+    def _store(self) -> AlertStore:
+        return self.store or get_alert_store()
+
+    # === INITIALISATION ===
+
+    def load(self):
+        """Charge le snapshot disque s'il est à jour, sinon recalcule depuis le stockage."""
+        if not self._load_snapshot():
+            self.rebuild()
+
+    def _load_snapshot(self) -> bool:
+        if not self.snapshot_file or not self.snapshot_file.exists():
+            return False
+        try:
+            with open(self.snapshot_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != SNAPSHOT_VERSION or not self._matches_store(
+                    data['totals'], data['last_alert_id']):
+                return False
+            with self._lock:
+                self.totals = dict(DEFAULT_STATS, **data['totals'])
+                self.by_attack_type = Counter(data['by_attack_type'])
+                self.by_severity = Counter(data['by_severity'])
+                self.by_source_ip = Counter(data['by_source_ip'])
+                self.recent_alerts = deque(data['recent_alerts'], maxlen=RECENT_ALERTS)
+                self.last_alert_id = data['last_alert_id']
+                self._top_sources = None
+            logger.info(f"📊 Statistiques rechargées depuis {self.snapshot_file.name}")
+            return True
+        except Exception as e:
+            logger.warning(f"Snapshot de statistiques ignoré: {e}")
+            return False
+
+    def rebuild(self):
+        """Recalcule tous les compteurs depuis le stockage SQLite."""
+        store = self._store()
+        stats = store.get_stats()
+        by_attack_type = store.count_alerts_by('attack_type')
+        by_severity = store.count_alerts_by('severity')
+        by_source_ip = Counter(store.count_alerts_by('source_ip'))
+        recent = store.get_alerts(limit=RECENT_ALERTS)
+        with self._lock:
+            self.totals = {k: v for k, v in stats.items() if k != 'detection_rate'}
+            self.by_attack_type = Counter(by_attack_type)
+            self.by_severity = Counter(by_severity)
+            self.by_source_ip = self._prune_sources(by_source_ip)
+            self.recent_alerts = deque(recent, maxlen=RECENT_ALERTS)
+            self.last_alert_id = recent[-1]['id'] if recent else 0
+            self._top_sources = None
+            self._dirty = True
+
+    # === MISES À JOUR (appelées après écriture des alertes) ===
+
+    def record_alerts(self, alerts: Iterable[Dict[str, Any]], connections_count: int = 0):
+        """Prend en compte un lot d'alertes enregistrées (avec leur id SQLite)."""
+        with self._lock:
+            # Un lot déjà vu par rebuild() n'est pas compté deux fois
+            new_alerts = [a for a in alerts if a.get('id', 0) > self.last_alert_id]
+            if not new_alerts:
+                return
+            for alert in new_alerts:
+                self.by_attack_type[alert.get('attackType') or 'Unknown'] += 1
+                self.by_severity[alert.get('severity') or 'Unknown'] += 1
+                self.by_source_ip[alert.get('sourceIp') or 'Unknown'] += 1
+                self.recent_alerts.append(alert)
+            high = sum(1 for a in new_alerts if a.get('severity') == 'high')
+            self.totals['total_alerts'] = self.totals.get('total_alerts', 0) + len(new_alerts)
+            self.totals['active_threats'] = self.totals.get('active_threats', 0) + high
+            self.totals['total_connections'] = self.totals.get('total_connections', 0) + connections_count
+            self.last_alert_id = max(self.last_alert_id, new_alerts[-1].get('id', 0))
+            self._add_to_window(len(new_alerts), connections_count)
+            if len(self.by_source_ip) > MAX_TRACKED_SOURCES:
+                self.by_source_ip = self._prune_sources(self.by_source_ip)
+            self._top_sources = None
+            self._dirty = True
+
+    def _add_to_window(self, alerts: int, connections: int):
+        now = int(time.time())
+        if self._buckets and self._buckets[-1][0] == now:
+            self._buckets[-1][1] += alerts
+            self._buckets[-1][2] += connections
+        else:
+            self._buckets.append([now, alerts, connections])
+        self._expire_window(now)
+
+    def _expire_window(self, now: int):
+        while self._buckets and self._buckets[0][0] <= now - self.rolling_window:
+            self._buckets.popleft()
+
+    @staticmethod
+    def _prune_sources(counter: Counter) -> Counter:
+        if len(counter) <= MAX_TRACKED_SOURCES:
+            return counter
+        return Counter(dict(counter.most_common(MAX_TRACKED_SOURCES // 2)))
+
+    # === LECTURE (routes) ===
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Équivalent en mémoire de AlertStore.get_stats()."""
+        with self._lock:
+            stats = dict(self.totals)
+        total_connections = stats.get('total_connections') or 0
+        stats['detection_rate'] = (
+            round(stats.get('total_alerts', 0) / total_connections * 100, 2) if total_connections > 0 else 0.0
+        )
+        return stats
+
+    def rolling_detection_rate(self) -> float:
+        with self._lock:
+            self._expire_window(int(time.time()))
+            alerts = sum(bucket[1] for bucket in self._buckets)
+            connections = sum(bucket[2] for bucket in self._buckets)
+        return round(alerts / connections * 100, 2) if connections > 0 else 0.0
+
+    def top_sources(self, n: int = TOP_SOURCES) -> List[Dict[str, Any]]:
+        with self._lock:
+            if self._top_sources is None or len(self._top_sources) < n:
+                top = heapq.nlargest(max(n, TOP_SOURCES), self.by_source_ip.items(), key=lambda item: item[1])
+                self._top_sources = [{'source_ip': ip, 'count': count} for ip, count in top]
+            return self._top_sources[:n]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Vue complète des compteurs (sans accès disque)."""
+        stats = self.get_stats()
+        with self._lock:
+            by_attack_type = dict(self.by_attack_type)
+            by_severity = dict(self.by_severity)
+            recent_alerts = list(self.recent_alerts)
+            last_alert_id = self.last_alert_id
+        return {
+            'stats': stats,
+            'attack_distribution': by_attack_type,
+            'severity_distribution': by_severity,
+            'top_sources': self.top_sources(),
+            'rolling_detection_rate': self.rolling_detection_rate(),
+            'rolling_window': self.rolling_window,
+            'recent_alerts': recent_alerts,
+            'last_alert_id': last_alert_id
+        }
+
+    # === SYNCHRONISATION ET SNAPSHOT DISQUE ===
+
+    def _matches_store(self, totals: Dict[str, Any], last_alert_id: int) -> bool:
+        stats = self._store().get_stats()
+        return (self._store().last_alert_id() == last_alert_id and
+                stats.get('total_alerts') == totals.get('total_alerts') and
+                stats.get('total_connections') == totals.get('total_connections'))
+
+    def reconcile(self) -> bool:
+        """Recalcule les compteurs si le stockage a été modifié hors de cet agrégateur."""
+        with self._lock:
+            totals = dict(self.totals)
+            last_alert_id = self.last_alert_id
+        if self._matches_store(totals, last_alert_id):
+            return False
+        self.rebuild()
+        return True
+
+    def save_snapshot(self):
+        if not self.snapshot_file:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {
+                'version': SNAPSHOT_VERSION,
+                'saved_at': time.time(),
+                'totals': self.totals,
+                'by_attack_type': self.by_attack_type,
+                'by_severity': self.by_severity,
+                'by_source_ip': self.by_source_ip,
+                'recent_alerts': list(self.recent_alerts),
+                'last_alert_id': self.last_alert_id
+            }
+            payload = json.dumps(data, default=str)
+            self._dirty = False
+        tmp = self.snapshot_file.with_suffix('.tmp')
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                f.write(payload)
+            os.replace(tmp, self.snapshot_file)
+        except Exception as e:
+            self._dirty = True
+            logger.error(f"Erreur écriture du snapshot de statistiques: {e}")
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='stats-snapshot', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.save_snapshot()
+
+    def _run(self):
+        while not self._stop.wait(self.snapshot_interval):
+            try:
+                self.reconcile()
+                self.save_snapshot()
+            except Exception as e:
+                logger.error(f"Erreur synchronisation des statistiques: {e}")
+
+
+_aggregator = None
+_aggregator_lock = threading.Lock()
+
+
+def get_stats_aggregator() -> StatsAggregator:
+    """Retourne l'agrégateur partagé du processus (chargé et démarré au premier appel)."""
+    global _aggregator
+    if _aggregator is None:
+        with _aggregator_lock:
+            if _aggregator is None:
+                aggregator = StatsAggregator()
+                aggregator.load()
+                aggregator.start()
+                atexit.register(aggregator.stop)
+                _aggregator = aggregator
+    return _aggregator
@@ -0,0 +1,186 @@
+"""
+Features de trafic NSL-KDD (positions 19-37) calculées de façon incrémentale.
+
+Fenêtre temporelle (TRAFFIC_TIME_WINDOW secondes, 2 s dans NSL-KDD) : count,
+srv_count et les taux serror/rerror/same_srv/diff_srv/srv_diff_host.
+Fenêtre d'hôte (les TRAFFIC_HOST_WINDOW dernières connexions, 100 dans
+NSL-KDD) : les features dst_host_*.
+
+Chaque connexion terminée entre dans les deux fenêtres et en sort une fois
+périmée ; des compteurs par hôte de destination, par service (protocole, port)
+et par couple hôte/service sont tenus à jour à l'entrée et à la sortie, d'où un
+coût O(1) amorti par connexion quel que soit le débit.
+"""
+
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+from ..config import TRAFFIC_HOST_WINDOW, TRAFFIC_TIME_WINDOW
+
+# Ordre des colonnes 19-37 de NSLKDD_COLUMNS
+TRAFFIC_FEATURES = [
+    'count', 'srv_count', 'serror_rate', 'srv_serror_rate', 'rerror_rate', 'srv_rerror_rate',
+    'same_srv_rate', 'diff_srv_rate', 'srv_diff_host_rate', 'dst_host_count', 'dst_host_srv_count',
+    'dst_host_same_srv_rate', 'dst_host_diff_srv_rate', 'dst_host_same_src_port_rate',
+    'dst_host_srv_diff_host_rate', 'dst_host_serror_rate', 'dst_host_srv_serror_rate',
+    'dst_host_rerror_rate', 'dst_host_srv_rerror_rate',
+]
+
+# Erreurs SYN (connexion jamais établie ou jamais terminée) et rejets
+SERROR_FLAGS = frozenset({'S0', 'S1', 'S2', 'S3'})
+RERROR_FLAGS = frozenset({'REJ'})
+
+
+class _Window:
+    """
+    Compteurs sur un ensemble glissant de connexions : [connexions, serror, rerror]
+    par hôte et par service, connexions par couple hôte/service et par couple
+    hôte/port source. Une clé disparaît quand son compteur retombe à zéro.
+    """
+
+    __slots__ = ('hosts', 'services', 'pairs', 'host_ports')
+
+    def __init__(self):
+        self.hosts: Dict = {}
+        self.services: Dict = {}
+        self.pairs: Dict = {}
+        self.host_ports: Dict = {}
+
+    def add(self, entry: tuple):
+        _, host, service, pair, host_port, serror, rerror = entry
+        counts = self.hosts.get(host)
+        if counts is None:
+            self.hosts[host] = [1, serror, rerror]
+        else:
+            counts[0] += 1
+            counts[1] += serror
+            counts[2] += rerror
+        counts = self.services.get(service)
+        if counts is None:
+            self.services[service] = [1, serror, rerror]
+        else:
+            counts[0] += 1
+            counts[1] += serror
+            counts[2] += rerror
+        self.pairs[pair] = self.pairs.get(pair, 0) + 1
+        self.host_ports[host_port] = self.host_ports.get(host_port, 0) + 1
+
+    def remove(self, entry: tuple):
+        _, host, service, pair, host_port, serror, rerror = entry
+        counts = self.hosts[host]
+        if counts[0] == 1:
+            del self.hosts[host]
+        else:
+            counts[0] -= 1
+            counts[1] -= serror
+            counts[2] -= rerror
+        counts = self.services[service]
+        if counts[0] == 1:
+            del self.services[service]
+        else:
+            counts[0] -= 1
+            counts[1] -= serror
+            counts[2] -= rerror
+        remaining = self.pairs[pair] - 1
+        if remaining:
+            self.pairs[pair] = remaining
+        else:
+            del self.pairs[pair]
+        remaining = self.host_ports[host_port] - 1
+        if remaining:
+            self.host_ports[host_port] = remaining
+        else:
+            del self.host_ports[host_port]
+
+    def __len__(self) -> int:
+        return len(self.hosts) + len(self.services) + len(self.pairs) + len(self.host_ports)
+
+
+class TrafficFeatureEngine:
+    """Features 19-37 de chaque connexion terminée, connexion courante comprise."""
+
+    def __init__(self, time_window: float = TRAFFIC_TIME_WINDOW, host_window: int = TRAFFIC_HOST_WINDOW,
+                 clock: Callable[[], float] = time.monotonic):
+        self.time_window = time_window
+        self.host_window = host_window
+        self.clock = clock
+        self._recent = deque()  # (instant, hôte, service, (hôte, service), (hôte, port source), serror, rerror)
+        self._last = deque()
+        self._by_time = _Window()
+        self._by_host = _Window()
+        self.connections = 0
+
+    def update(self, host, service, src_port: int, flag: str, now: Optional[float] = None) -> List[float]:
+        """
+        Ajoute une connexion terminée (hôte de destination, service, port source, flag)
+        et retourne ses 19 features de trafic dans l'ordre de TRAFFIC_FEATURES.
+        """
+        now = self.clock() if now is None else now
+        pair = (host, service)
+        entry = (now, host, service, pair, (host, src_port), flag in SERROR_FLAGS, flag in RERROR_FLAGS)
+
+        by_time = self._by_time
+        recent = self._recent
+        horizon = now - self.time_window
+        while recent and recent[0][0] <= horizon:
+            by_time.remove(recent.popleft())
+        recent.append(entry)
+        by_time.add(entry)
+
+        by_host = self._by_host
+        last = self._last
+        if len(last) >= self.host_window:
+            by_host.remove(last.popleft())
+        last.append(entry)
+        by_host.add(entry)
+        self.connections += 1
+
+        # Fenêtre temporelle (la connexion courante compte : aucun dénominateur nul)
+        count, serror, rerror = by_time.hosts[host]
+        srv_count, srv_serror, srv_rerror = by_time.services[service]
+        same_srv = by_time.pairs[pair]
+        # Fenêtre des dernières connexions
+        host_count, host_serror, host_rerror = by_host.hosts[host]
+        host_srv_count, host_srv_serror, host_srv_rerror = by_host.services[service]
+        host_same_srv = by_host.pairs[pair]
+        return [
+            count,
+            srv_count,
+            serror / count,
+            srv_serror / srv_count,
+            rerror / count,
+            srv_rerror / srv_count,
+            same_srv / count,
+            1.0 - same_srv / count,
+            (srv_count - same_srv) / srv_count,
+            host_count,
+            host_srv_count,
+            host_same_srv / host_count,
+            1.0 - host_same_srv / host_count,
+            by_host.host_ports[entry[4]] / host_count,
+            (host_srv_count - host_same_srv) / host_srv_count,
+            host_serror / host_count,
+            host_srv_serror / host_srv_count,
+            host_rerror / host_count,
+            host_srv_rerror / host_srv_count,
+        ]
+
+    def annotate(self, flow: Dict, now: Optional[float] = None) -> Dict:
+        """
+        Complète un flux au format extract_features (FlowTable.to_features) avec ses
+        features de trafic réelles et le nombre de connexions vers le même hôte.
+        """
+        values = self.update(flow.get('destination_ip'), (flow.get('protocol'), flow.get('dest_port')),
+                             flow.get('source_port', 0), flow.get('flag', 'SF'), now)
+        flow['traffic_features'] = values
+        flow['connections_count'] = values[0]
+        return flow
+
+    def metrics(self) -> Dict:
+        return {
+            'connections': self.connections,
+            'time_window': len(self._recent),
+            'host_window': len(self._last),
+            'counters': len(self._by_time) + len(self._by_host),
+        }
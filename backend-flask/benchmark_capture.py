@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la capture de paquets : anneau AF_PACKET TPACKET_V3 contre recvfrom
+sur socket raw. Des processus émetteurs rejouent des SYN TCP sur la boucle locale
+(ou une paire veth, voir --interface/--target) ; on mesure paquets/s reçus et pertes.
+« non reçus » inclut les paquets écartés par le filtre (--filter) ; « pertes noyau » :
+trames non copiées dans l'anneau faute de place (tp_drops, les deux sens sur lo).
+
+Linux uniquement, à lancer en root :
+    sudo python benchmark_capture.py --duration 5 --senders 2 --analyze
+    sudo python benchmark_capture.py --noise 0.9 --filter   # 90 % d'ACK écartés par le filtre BPF
+    sudo python benchmark_capture.py --backends ring,fanout2,fanout4 --analyze --senders 4
+fanoutN : N processus de capture en PACKET_FANOUT (app/utils/capture_workers.py).
+"""
+
+import argparse
+import multiprocessing as mp
+import os
+import random
+import socket
+import struct
+import sys
+import time
+from functools import partial
+
+sys.path.append(os.path.dirname(__file__))
+
+from app.utils.bpf_filter import CaptureFilter
+from app.utils.capture_workers import CaptureWorkerPool
+from app.utils.packet_ring import FrameBatch, PacketRing, recv_batch
+
+BACKENDS = ['recvfrom', 'ring', 'fanout2']
+
+
+def build_syn(src: str, dst: str, sport: int, dport: int, flags: int = 0x02) -> bytes:
+    """Paquet IPv4+TCP SYN (checksums IP et longueur complétés par le noyau avec IP_HDRINCL)."""
+    ip = struct.pack('!BBHHHBBH4s4s', 0x45, 0, 40, 0, 0, 64, socket.IPPROTO_TCP, 0,
+                     socket.inet_aton(src), socket.inet_aton(dst))
+    tcp = struct.pack('!HHLLBBHHH', sport, dport, random.getrandbits(32), 0, 5 << 4, flags, 64240, 0, 0)
+    return ip + tcp
+
+
+def sender(target: str, dport: int, noise: float, stop, sent, seed: int):
+    rng = random.Random(seed)
+    # Bruit : segments ACK que le filtre noyau doit écarter
+    packets = [build_syn(f"10.{seed}.{rng.randrange(256)}.{rng.randrange(1, 255)}", target,
+                         rng.randrange(1024, 65535), dport, 0x10 if rng.random() < noise else 0x02)
+               for _ in range(256)]
+    sock = socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_RAW)
+    sock.setsockopt(socket.IPPROTO_IP, socket.IP_HDRINCL, 1)
+    addr = (target, 0)
+    count = 0
+    while not stop.is_set():
+        for packet in packets:
+            try:
+                sock.sendto(packet, addr)
+                count += 1
+            except OSError:
+                pass  # ENOBUFS : file d'émission pleine
+    sent.value += count
+
+
+class CountOnly:
+    """Analyseur vide : mesure la capture seule."""
+
+    def __init__(self, sink=None):
+        self.capture_filter = None
+
+    def analyze_batch(self, frames):
+        pass
+
+
+def make_detector(sink=None, analyze=True, use_filter=False):
+    if analyze:
+        from external_dos_detector import ExternalDOSDetector
+        detector = ExternalDOSDetector(capture_backend='ring', workers=1, sink=sink or CountOnly())
+        # Pas d'écriture d'alertes pendant la mesure
+        detector.pipeline.alert = lambda *args, **kwargs: False
+    else:
+        detector = CountOnly()
+    detector.capture_filter = CaptureFilter() if use_filter else None
+    return detector
+
+
+def run_recvfrom(sock, stop_at: float, detector):
+    """Chemin recvfrom du détecteur : lots des paquets déjà en file (recv_batch)."""
+    received = 0
+    while time.time() < stop_at:
+        packets = recv_batch(sock, timeout=0.1)
+        received += len(packets)
+        if detector and packets:
+            detector.analyze_batch(FrameBatch.from_frames(packets))
+    sock.close()
+    return received, None
+
+
+def run_ring(ring, stop_at: float, detector):
+    received = 0
+    callback = detector.analyze_batch if detector else (lambda frames: None)
+    while time.time() < stop_at:
+        received += ring.process(callback, timeout_ms=100)
+    drops = ring.stats()['kernel_drops']
+    ring.close()
+    return received, drops
+
+
+def start_senders(args):
+    stop = mp.Event()
+    sent = mp.Value('q', 0)
+    procs = [mp.Process(target=sender, args=(args.target, args.dport, args.noise, stop, sent, i + 1))
+             for i in range(args.senders)]
+    procs.append(mp.Process(target=_stop_after, args=(stop, args.duration)))
+    for proc in procs:
+        proc.start()
+    return procs, sent
+
+
+def bench_fanout(workers: int, args):
+    factory = partial(make_detector, analyze=args.analyze, use_filter=args.filter)
+    pool = CaptureWorkerPool(factory, workers, args.interface, sink=CountOnly())
+    pool.start()
+    time.sleep(0.5)  # le temps que chaque worker rejoigne le groupe de fanout
+    procs, sent = start_senders(args)
+    time.sleep(args.duration + args.drain)
+    for proc in procs:
+        proc.join()
+    pool.stop()
+    metrics = pool.metrics()
+    per_worker = ', '.join(str(w['packets']) for w in metrics['per_worker'])
+    print(f"   fanout{workers}: paquets par worker {per_worker}")
+    return sent.value, metrics['packets'], metrics['kernel_drops']
+
+
+def bench(backend: str, args):
+    if backend.startswith('fanout'):
+        return bench_fanout(int(backend[len('fanout'):] or 2), args)
+    detector = make_detector(analyze=args.analyze) if args.analyze else None
+    # Le récepteur s'ouvre avant les émetteurs et draine encore `drain` secondes après leur arrêt
+    if backend == 'ring':
+        receiver = PacketRing(args.interface)
+    else:
+        receiver = socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_TCP)
+        receiver.setblocking(False)
+    if args.filter:
+        CaptureFilter().attach(receiver.sock if backend == 'ring' else receiver)
+
+    stop_at = time.time() + args.duration + args.drain
+    procs, sent = start_senders(args)
+    if backend == 'ring':
+        received, kernel_drops = run_ring(receiver, stop_at, detector)
+    else:
+        received, kernel_drops = run_recvfrom(receiver, stop_at, detector)
+    for proc in procs:
+        proc.join()
+    return sent.value, received, kernel_drops
+
+
+def _stop_after(stop, duration):
+    time.sleep(duration)
+    stop.set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--backends', default=','.join(BACKENDS))
+    parser.add_argument('--duration', type=float, default=5.0)
+    parser.add_argument('--drain', type=float, default=1.0)
+    parser.add_argument('--senders', type=int, default=2)
+    parser.add_argument('--interface', default='lo', help="Interface écoutée par l'anneau (ex. extrémité d'une paire veth)")
+    parser.add_argument('--target', default='127.0.0.1', help='Adresse de destination des SYN')
+    parser.add_argument('--dport', type=int, default=9000)
+    parser.add_argument('--analyze', action='store_true', help='Passe les paquets au détecteur (décodage NumPy + détection, analyze_batch)')
+    parser.add_argument('--noise', type=float, default=0.0, help='Fraction de segments ACK (hors SYN) dans le trafic rejoué')
+    parser.add_argument('--filter', action='store_true', help='Attache le filtre BPF dérivé de settings.json')
+    args = parser.parse_args()
+
+    if os.geteuid() != 0:
+        print("❌ Besoin de privilèges administrateur (sockets raw / AF_PACKET)")
+        return 1
+
+    mode = 'capture + analyse' if args.analyze else 'capture seule'
+    if args.filter:
+        mode += ', filtre BPF'
+    print(f"📊 Benchmark capture ({mode}) : {args.senders} émetteur(s), {args.duration}s sur {args.interface}")
+    print("=" * 84)
+    print(f"{'moteur':<10} | {'envoyés':>10} | {'reçus':>10} | {'paquets/s':>11} | {'non reçus':>10} | {'pertes noyau':>12}")
+    print("-" * 84)
+    for backend in args.backends.split(','):
+        sent, received, kernel_drops = bench(backend, args)
+        lost = max(0, sent - received)
+        print(f"{backend:<10} | {sent:>10} | {received:>10} | {received / args.duration:>11.0f} | "
+              f"{lost:>10} | {kernel_drops if kernel_drops is not None else '-':>12}")
+    print("-" * 84)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark : extraction de features vectorisée (feature_engine) vs
+extract_features/normalize_features appliquées flux par flux.
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(__file__))
+
+from app.utils.preprocessing import extract_features, normalize_features
+from app.utils.feature_engine import build_feature_matrix
+
+# Au-delà, la version flux par flux est extrapolée depuis un échantillon
+LEGACY_SAMPLE = 20000
+
+
+def generate_columns(n, seed=42):
+    """Génère n flux synthétiques (mélange DoS / scan / probe / normal) en colonnes."""
+    rng = np.random.default_rng(seed)
+    # Features de trafic réelles (TrafficFeatureEngine) pour un flux sur deux, NaN sinon
+    traffic = np.concatenate([rng.integers(1, 512, (n, 2)), rng.random((n, 7)), rng.integers(1, 101, (n, 2)),
+                              rng.random((n, 8))], axis=1)
+    traffic[rng.random(n) < 0.5] = np.nan
+    return {
+        'connections_count': rng.integers(0, 400, n),
+        'dest_port': rng.choice([22, 53, 80, 443, 3389, 8080, 31337], n),
+        'port_count': rng.integers(1, 30, n),
+        'protocol': rng.choice(np.array(['tcp', 'udp', 'icmp'], dtype=object), n),
+        'flag': rng.choice(np.array(['SF', 'S0', 'REJ', 'RSTO', 'S'], dtype=object), n),
+        'duration': rng.integers(0, 120, n),
+        'bytes_sent': rng.integers(0, 100000, n),
+        'bytes_received': rng.integers(0, 100000, n),
+        'wrong_fragment': rng.choice([0, 0, 0, 1, 3], n),
+        'urgent': rng.choice([0, 0, 0, 0, 2], n),
+        'source_ip': rng.choice(np.array(['10.0.0.1', '10.0.0.2'], dtype=object), n),
+        'destination_ip': np.full(n, '10.0.0.2', dtype=object),
+        'traffic_features': traffic,
+    }
+
+
+def columns_to_flows(columns):
+    names = list(columns)
+    flows = [dict(zip(names, values)) for values in zip(*(columns[name].tolist() for name in names))]
+    for flow in flows:
+        if np.isnan(flow['traffic_features'][0]):
+            flow['traffic_features'] = None
+    return flows
+
+
+def legacy_matrix(flows):
+    # Les fonctions d'origine affichent des traces à chaque appel
+    with contextlib.redirect_stdout(io.StringIO()):
+        return np.array([normalize_features(extract_features(f)) for f in flows], dtype=np.float32)
+
+
+def bench(n):
+    columns = generate_columns(n)
+    flows = columns_to_flows(columns)
+
+    start = time.perf_counter()
+    from_dicts = build_feature_matrix(flows)
+    engine_dicts = time.perf_counter() - start
+
+    start = time.perf_counter()
+    from_columns = build_feature_matrix(columns)
+    engine_columns = time.perf_counter() - start
+
+    sample = flows[:min(n, LEGACY_SAMPLE)]
+    start = time.perf_counter()
+    reference = legacy_matrix(sample)
+    legacy = (time.perf_counter() - start) * n / len(sample)
+
+    identical = (np.array_equal(reference.view(np.uint32), from_dicts[:len(sample)].view(np.uint32)) and
+                 np.array_equal(from_dicts.view(np.uint32), from_columns.view(np.uint32)))
+    extrapolated = '*' if len(sample) < n else ' '
+
+    print(f"{n:>9} | {legacy:>10.3f}s{extrapolated} | {engine_dicts:>9.3f}s | {engine_columns:>9.3f}s | "
+          f"x{legacy / engine_dicts:>7.1f} | x{legacy / engine_columns:>7.1f} | {'✅' if identical else '❌'}")
+    return identical
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', default='1000,100000,1000000',
+                        help='Tailles de lot séparées par des virgules')
+    args = parser.parse_args()
+
+    print("📊 Benchmark extraction de features (N, 145) float32")
+    print("=" * 88)
+    print(f"{'flux':>9} | {'flux/flux':>11} | {'dicts':>10} | {'colonnes':>10} | {'gain':>8} | {'gain col':>8} | identique")
+    print("-" * 88)
+    ok = all(bench(int(size)) for size in args.sizes.split(','))
+    print("-" * 88)
+    print(f"* extrapolé depuis un échantillon de {LEGACY_SAMPLE} flux")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
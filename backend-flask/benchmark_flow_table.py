@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la table de flux (app/utils/flow_table.py), sans capture réseau.
+
+1. États TCP : des échanges types (poignée de main + FIN, SYN sans réponse,
+   SYN rejeté, RST de chaque côté, FIN sans réponse, UDP) doivent produire les
+   flags NSL-KDD attendus, avec durée, octets et urgent corrects.
+2. Débit : --flows connexions complètes (SYN, SYN-ACK, ACK + données, FIN des
+   deux côtés) mélangées par lots de --batch paquets.
+3. Mémoire : --concurrent SYN usurpés restent ouverts simultanément (flood
+   SYN), la mémoire de la table est mesurée par tracemalloc et par la RSS.
+
+    python benchmark_flow_table.py
+    python benchmark_flow_table.py --flows 500000 --concurrent 1000000
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import psutil
+
+sys.path.append(os.path.dirname(__file__))
+
+from app.utils.flow_table import FlowTable
+from app.utils.packet_decoder import (IPPROTO_TCP, IPPROTO_UDP, IPV4_MAPPED, PACKET_DTYPE, TCP_ACK, TCP_FIN,
+                                      TCP_RST, TCP_SYN, TCP_URG)
+
+CLIENT = (10 << 24) | 1
+SERVER = (192 << 24) | (168 << 16) | 1
+SYNACK = TCP_SYN | TCP_ACK
+FINACK = TCP_FIN | TCP_ACK
+
+
+def packets(rows):
+    """rows : (client, serveur, sport, dport, proto, flags, données, depuis le client)"""
+    records = np.zeros(len(rows), dtype=PACKET_DTYPE)
+    for i, (client, server, sport, dport, proto, flags, payload, outbound) in enumerate(rows):
+        src, dst = (client, server) if outbound else (server, client)
+        records[i]['version'] = 4
+        records[i]['proto'] = proto
+        records[i]['src_lo'] = IPV4_MAPPED | src
+        records[i]['dst_lo'] = IPV4_MAPPED | dst
+        records[i]['sport'], records[i]['dport'] = (sport, dport) if outbound else (dport, sport)
+        records[i]['tcp_flags'] = flags
+        records[i]['payload'] = payload
+    return records
+
+
+def check_states():
+    """Chaque scénario : paquets (flags, données, sens) -> flag, octets envoyés/reçus attendus"""
+    scenarios = {
+        'SF': ([(TCP_SYN, 0, True), (SYNACK, 0, False), (TCP_ACK, 120, True), (TCP_ACK | TCP_URG, 900, False),
+                (FINACK, 0, True), (FINACK, 0, False)], 'SF', 120, 900, 1),
+        'S0': ([(TCP_SYN, 0, True), (TCP_SYN, 0, True)], 'S0', 0, 0, 0),
+        'REJ': ([(TCP_SYN, 0, True), (TCP_RST | TCP_ACK, 0, False)], 'REJ', 0, 0, 0),
+        'RSTO': ([(TCP_SYN, 0, True), (SYNACK, 0, False), (TCP_ACK, 40, True), (TCP_RST, 0, True)], 'RSTO', 40, 0, 0),
+        'RSTR': ([(TCP_SYN, 0, True), (SYNACK, 0, False), (TCP_ACK, 0, True), (TCP_RST, 0, False)], 'RSTR', 0, 0, 0),
+        'SH': ([(TCP_SYN, 0, True), (TCP_FIN, 0, True)], 'SH', 0, 0, 0),
+        'UDP': ([(0, 60, True), (0, 200, False)], 'SF', 60, 200, 0),
+    }
+    table = FlowTable(clock=lambda: 0.0)
+    ok = True
+    for port, (name, (steps, flag, sent, received, urgent)) in enumerate(scenarios.items(), start=1000):
+        proto = IPPROTO_UDP if name == 'UDP' else IPPROTO_TCP
+        done = []
+        for step, (flags, payload, outbound) in enumerate(steps):
+            records = packets([(CLIENT, SERVER, port, 80, proto, flags, payload, outbound)])
+            done += [flow.to_features() for flow in table.update(records, now=step * 0.5)]
+        done += [flow.to_features() for flow in table.flush()]
+        flow = done[0] if len(done) == 1 else {}
+        got = (flow.get('flag'), flow.get('bytes_sent'), flow.get('bytes_received'), flow.get('urgent'))
+        passed = got == (flag, sent, received, urgent) and flow['duration'] == (len(steps) - 1) * 0.5
+        ok &= passed
+        print(f"   {'✅' if passed else '❌'} {name:<5} -> flag={got[0]}, src_bytes={got[1]}, dst_bytes={got[2]}, "
+              f"urgent={got[3]}, durée={flow.get('duration')}s")
+    return ok
+
+
+def connection_stream(flows: int, seed: int):
+    """Connexions complètes (7 paquets) entrelacées : chaque étape d'un lot de connexions à la suite"""
+    rng = np.random.default_rng(seed)
+    clients = (np.uint64(IPV4_MAPPED) | (np.uint64(10 << 24) + rng.integers(1, 1 << 16, flows, dtype=np.uint64)))
+    sports = rng.integers(1024, 65535, flows).astype(np.uint16)
+    steps = [(TCP_SYN, 0, True), (SYNACK, 0, False), (TCP_ACK, 0, True), (TCP_ACK, 300, True),
+             (TCP_ACK, 1500, False), (FINACK, 0, True), (FINACK, 0, False)]
+    records = np.zeros(flows * len(steps), dtype=PACKET_DTYPE)
+    records['version'] = 4
+    records['proto'] = IPPROTO_TCP
+    for i, (flags, payload, outbound) in enumerate(steps):
+        rows = records[i * flows:(i + 1) * flows]
+        client, server = ('src', 'dst') if outbound else ('dst', 'src')
+        rows[client + '_lo'] = clients
+        rows[server + '_lo'] = IPV4_MAPPED | SERVER
+        rows['sport' if outbound else 'dport'] = sports
+        rows['dport' if outbound else 'sport'] = 443
+        rows['tcp_flags'] = flags
+        rows['payload'] = payload
+    # Connexions entrelacées par groupes de 1024 (le serveur répond dans le lot suivant)
+    order = np.arange(len(records)).reshape(len(steps), -1)
+    group = 1024
+    chunks = [order[:, start:start + group].ravel() for start in range(0, flows, group)]
+    return records[np.concatenate(chunks)]
+
+
+def run_throughput(flows: int, batch: int, seed: int):
+    records = connection_stream(flows, seed)
+    table = FlowTable(capacity=flows, clock=lambda: 0.0)
+    emitted = 0
+    flags = {}
+    start = time.perf_counter()
+    for offset in range(0, len(records), batch):
+        for flow in table.update(records[offset:offset + batch], now=offset / len(records)):
+            emitted += 1
+            flags[flow.flag] = flags.get(flow.flag, 0) + 1
+    elapsed = time.perf_counter() - start
+    return len(records), emitted, flags, elapsed
+
+
+def run_concurrent(concurrent: int, batch: int, seed: int):
+    """SYN de sources usurpées jamais terminés : la table reste pleine"""
+    rng = np.random.default_rng(seed)
+    process = psutil.Process()
+    rss_before = process.memory_info().rss
+    tracemalloc.start()
+    table = FlowTable(capacity=concurrent, embryonic_timeout=3600, clock=lambda: 0.0)
+    start = time.perf_counter()
+    for offset in range(0, concurrent + concurrent // 10, batch):
+        n = batch
+        records = np.zeros(n, dtype=PACKET_DTYPE)
+        records['version'] = 4
+        records['proto'] = IPPROTO_TCP
+        records['src_lo'] = IPV4_MAPPED | rng.integers(1, 1 << 32, n, dtype=np.uint64)
+        records['dst_lo'] = IPV4_MAPPED | SERVER
+        records['sport'] = rng.integers(1024, 65535, n)
+        records['dport'] = 80
+        records['tcp_flags'] = TCP_SYN
+        table.update(records, now=0.0)
+    elapsed = time.perf_counter() - start
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    rss = process.memory_info().rss - rss_before
+    return table.metrics(), memory, rss, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="États, débit et mémoire de la table de flux")
+    parser.add_argument('--flows', type=int, default=200_000, help='connexions complètes pour le débit')
+    parser.add_argument('--concurrent', type=int, default=1_000_000, help='flux simultanés pour la mémoire')
+    parser.add_argument('--batch', type=int, default=4096)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    print("🧪 Machine à états TCP")
+    states_ok = check_states()
+
+    print(f"\n⚡ Débit : {args.flows:,} connexions complètes, lots de {args.batch} paquets")
+    total, emitted, flags, elapsed = run_throughput(args.flows, args.batch, args.seed)
+    print(f"   {total:,} paquets en {elapsed:.2f}s -> {total / elapsed:,.0f} paquets/s, "
+          f"{emitted / elapsed:,.0f} flux/s émis, flags {flags}")
+
+    print(f"\n💾 Mémoire : {args.concurrent:,} SYN usurpés ouverts simultanément (+10% d'évictions)")
+    metrics, memory, rss, elapsed = run_concurrent(args.concurrent, args.batch, args.seed)
+    print(f"   flux={metrics['flows']:,} (pic {metrics['peak']:,}), évincés={metrics['evicted']:,}, "
+          f"{metrics['opened'] / elapsed:,.0f} ouvertures/s")
+    print(f"   tracemalloc {memory / 2 ** 20:.0f} Mo ({memory / max(metrics['flows'], 1):.0f} octets/flux), "
+          f"RSS +{rss / 2 ** 20:.0f} Mo")
+
+    print(f"\n{'✅' if states_ok and metrics['flows'] <= args.concurrent else '❌'} "
+          f"Flags corrects et table bornée à {args.concurrent:,} flux")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark des moteurs d'inférence (keras, tflite, onnx) sur le dernier modèle
+data/models/ids_model_* : latence par appel et débit aux tailles de lot 1, 32
+et 1024, et parité des sorties par rapport à Keras.
+'keras-predict' force Keras predict() pour comparer au chemin rapide tf.function
+qu'IDSModel.predict utilise pour les petits lots.
+Les fichiers TFLite/ONNX sont produits par : python -m app.model.export_model --format ...
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(__file__))
+
+from app.model.ai_model import MODEL_DIR, latest_model_dir
+from app.model.inference_backend import InferenceBackend, check_parity, load_backend, parity_inputs
+from app.utils.feature_engine import NUM_FEATURES
+
+BACKENDS = ['keras', 'keras-predict', 'tflite', 'onnx']
+
+
+class KerasPredictBackend(InferenceBackend):
+    """Keras predict() systématique (comportement d'IDSModel.predict avant le chemin rapide)."""
+
+    name = 'keras-predict'
+
+    def __init__(self, model):
+        self.model = model
+
+    def predict(self, X):
+        return self.model.model.predict(X, verbose=0)
+
+
+def bench_backend(backend, X, repeats):
+    """Latences (s) de `repeats` appels predict(X), après un appel de chauffe."""
+    backend.predict(X)
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        backend.predict(X)
+        timings.append(time.perf_counter() - start)
+    return np.array(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--model', help='Dossier ids_model_* (par défaut le plus récent)')
+    parser.add_argument('--backends', default=','.join(BACKENDS))
+    parser.add_argument('--batch-sizes', default='1,32,1024')
+    parser.add_argument('--repeats', type=int, default=200, help='Appels mesurés par taille de lot')
+    args = parser.parse_args()
+
+    model_dir = os.path.join(MODEL_DIR, args.model or latest_model_dir())
+    rng = np.random.default_rng(0)
+    batch_sizes = [int(size) for size in args.batch_sizes.split(',')]
+
+    print(f"📊 Benchmark inférence : {os.path.basename(model_dir)}")
+    loaded = {}
+    for name in args.backends.split(','):
+        try:
+            if name == 'keras-predict':
+                keras = loaded.get('keras') or load_backend('keras', model_dir)
+                loaded[name] = KerasPredictBackend(keras.model)
+            else:
+                loaded[name] = load_backend(name, model_dir)
+        except Exception as e:
+            print(f"⚠️ {name}: indisponible ({e})")
+
+    if 'keras' in loaded:
+        for name, backend in loaded.items():
+            if name != 'keras':
+                parity = check_parity(loaded['keras'], backend, parity_inputs())
+                print(f"{'✅' if parity['ok'] else '❌'} Parité keras/{name}: écart max {parity['max_abs_diff']:.2e}, "
+                      f"classes identiques {parity['argmax_agreement'] * 100:.1f}%")
+
+    print("=" * 91)
+    print(f"{'moteur':<13} | {'lot':>5} | {'moyenne':>10} | {'p50':>10} | {'p99':>10} | {'débit':>16}")
+    print("-" * 91)
+    for name, backend in loaded.items():
+        for size in batch_sizes:
+            X = rng.random((size, NUM_FEATURES, 1), dtype=np.float32)
+            repeats = max(5, args.repeats // max(1, size // 32))
+            timings = bench_backend(backend, X, repeats)
+            p50, p99 = np.percentile(timings, [50, 99])
+            print(f"{name:<13} | {size:>5} | {timings.mean() * 1000:>8.3f}ms | {p50 * 1000:>8.3f}ms | "
+                  f"{p99 * 1000:>8.3f}ms | {size / timings.mean():>10.0f} flux/s")
+    print("-" * 91)
+    return 0 if loaded else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Benchmark de l'instantané des sockets (app/utils/sock_diag.py) face à psutil.
+
+Pour chaque taille, des processus fils ouvrent des sockets sur la boucle locale
+(moitié connexions TCP établies, moitié sockets UDP liées, plus 5 % de
+TIME_WAIT), au plus --per-process descripteurs chacun. On mesure ensuite
+psutil.net_connections(), l'instantané NETLINK_SOCK_DIAG complet et un
+instantané filtré côté noyau (SYN_RECV + TIME_WAIT), et on vérifie que les deux
+backends voient le même nombre de sockets.
+
+    python benchmark_sock_diag.py
+    python benchmark_sock_diag.py --sizes 1000,10000,100000 --repeat 5
+"""
+
+import argparse
+import multiprocessing
+import os
+import resource
+import socket
+import struct
+import sys
+import time
+
+sys.path.append(os.path.dirname(__file__))
+
+import psutil
+
+from app.utils.sock_diag import SockDiag, psutil_snapshot, sock_diag_supported
+
+
+def hold_sockets(index: int, count: int, ready, stop):
+    """Processus fils : count sockets (paires TCP établies et UDP) gardées ouvertes jusqu'à stop."""
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    sockets = []
+    listener = socket.socket()
+    listener.bind(('127.0.0.1', 0))
+    listener.listen(4096)
+    for _ in range(count // 4):
+        client = socket.create_connection(listener.getsockname())
+        # Fermeture par RST : pas de TIME_WAIT laissé pour la taille suivante
+        client.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0))
+        server, _ = listener.accept()
+        sockets += [client, server]
+    for i in range(count - len(sockets)):
+        datagram = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        # Une adresse 127.x.y.z par socket : les ~28k ports éphémères d'une seule adresse ne suffiraient pas
+        datagram.bind((f'127.{index + 1}.{i // 250 % 250}.{i % 250 + 1}', 0))
+        sockets.append(datagram)
+    ready.set()
+    stop.wait()
+
+
+def time_wait(count: int):
+    """count connexions fermées côté client : elles restent en TIME_WAIT sans descripteur"""
+    listener = socket.socket()
+    listener.bind(('127.0.0.1', 0))
+    listener.listen(4096)
+    for _ in range(count):
+        client = socket.create_connection(listener.getsockname())
+        server, _ = listener.accept()
+        client.close()
+        server.close()
+    listener.close()
+
+
+def best(function, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="NETLINK_SOCK_DIAG contre psutil.net_connections()")
+    parser.add_argument('--sizes', default='1000,10000,100000')
+    parser.add_argument('--per-process', type=int, default=15000, help='sockets ouvertes par processus fils')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    if not sock_diag_supported():
+        print("❌ NETLINK_SOCK_DIAG indisponible (Linux requis)")
+        return
+
+    diag = SockDiag()
+    context = multiprocessing.get_context('fork')
+    print(f"{'sockets':>9} {'vues':>9} {'psutil':>10} {'netlink':>10} {'filtré':>10} {'gain':>7}  mémoire/socket")
+    for size in [int(value) for value in args.sizes.split(',')]:
+        time_wait(size // 20)
+        held = size - size // 20
+        stop = context.Event()
+        children = []
+        for index, start in enumerate(range(0, held, args.per_process)):
+            ready = context.Event()
+            child = context.Process(target=hold_sockets,
+                                    args=(index, min(args.per_process, held - start), ready, stop), daemon=True)
+            child.start()
+            children.append((child, ready))
+        for child, ready in children:
+            while not ready.wait(1):
+                if not child.is_alive():
+                    stop.set()
+                    raise SystemExit(f"❌ Processus fils arrêté (code {child.exitcode}) avant d'ouvrir ses sockets")
+
+        try:
+            records = diag.snapshot()
+            connections = psutil.net_connections(kind='inet')
+            same = abs(len(records) - len(connections)) <= max(10, len(records) // 100)
+            repeat = max(1, args.repeat if size <= 10000 else args.repeat // 2)
+            psutil_time = best(lambda: psutil.net_connections(kind='inet'), repeat)
+            netlink_time = best(diag.snapshot, args.repeat)
+            filtered_time = best(lambda: diag.snapshot(('tcp',), ['SYN_RECV', 'TIME_WAIT']), args.repeat)
+            sample = connections[:1000]
+            namedtuple_bytes = sum(sys.getsizeof(c) + sys.getsizeof(c.laddr) + sys.getsizeof(c.raddr)
+                                   + sys.getsizeof(c.laddr.ip if c.laddr else '') for c in sample) / len(sample)
+            print(f"{size:>9,} {len(records):>9,} {psutil_time * 1e3:>8.1f}ms {netlink_time * 1e3:>8.1f}ms "
+                  f"{filtered_time * 1e3:>8.1f}ms {psutil_time / netlink_time:>6.0f}x  "
+                  f"{records.itemsize} o (psutil ~{namedtuple_bytes:.0f} o) "
+                  f"{'✅' if same else '❌'} {len(connections):,} sockets psutil")
+        finally:
+            stop.set()
+            for child, _ in children:
+                child.join()
+
+    # Repli psutil converti au même format (autres OS)
+    start = time.perf_counter()
+    records = psutil_snapshot()
+    print(f"ℹ️  Repli psutil_snapshot : {len(records):,} sockets en {(time.perf_counter() - start) * 1e3:.1f}ms")
+    diag.close()
+
+
+if __name__ == '__main__':
+    main()
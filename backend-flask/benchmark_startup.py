@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark du démarrage Flask : temps de create_app() et latence de la première
+requête /api/detect, avec l'import de TensorFlow au démarrage (comportement
+d'origine), différé (chargement à la première requête) ou préchauffé en arrière-plan.
+Chaque scénario est mesuré dans un processus Python neuf.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Flux ambigu : ni DoS ni scan pour les règles, il passe donc par le modèle
+FLOW = {
+    'source_ip': '192.168.1.50', 'destination_ip': '192.168.1.10', 'protocol': 'tcp',
+    'source_port': 40000, 'dest_port': 8080, 'connections_count': 3, 'flag': 'SF'
+}
+
+SCENARIO = """
+import json, sys, time
+start = time.perf_counter()
+if {eager}:
+    import app.model.tf_model  # import de TensorFlow au démarrage, comme avant
+from app import create_app
+app = create_app(warmup={warmup})
+startup = time.perf_counter() - start
+client = app.test_client()
+ready = None
+if {warmup}:
+    while True:
+        response = client.get('/health/ready')
+        if response.status_code == 200 or response.get_json()['status'] == 'failed':
+            break
+        if time.perf_counter() - start > {timeout}:
+            break
+        time.sleep(0.05)
+    ready = time.perf_counter() - start
+t = time.perf_counter()
+status = client.post('/api/detect', json={flow}).status_code
+first_request = time.perf_counter() - t
+print(json.dumps({{'startup': startup, 'ready': ready, 'first_request': first_request,
+                  'status': status, 'tensorflow_loaded': 'tensorflow' in sys.modules}}))
+"""
+
+SCENARIOS = [
+    ('TF importé au démarrage', True, False),
+    ('TF différé', False, False),
+    ('TF différé + préchauffage', False, True),
+]
+
+
+def run(eager, warmup, timeout):
+    code = SCENARIO.format(eager=eager, warmup=warmup, timeout=timeout, flow=repr(FLOW))
+    result = subprocess.run([sys.executable, '-c', code], cwd=BACKEND_DIR,
+                            capture_output=True, text=True, timeout=timeout + 60)
+    lines = [line for line in result.stdout.splitlines() if line.startswith('{')]
+    if result.returncode != 0 or not lines:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'échec')
+    return json.loads(lines[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=3, help='Répétitions par scénario (médiane)')
+    parser.add_argument('--timeout', type=float, default=120, help='Attente max du préchauffage (s)')
+    args = parser.parse_args()
+
+    print("📊 Benchmark démarrage du backend Flask")
+    print("=" * 84)
+    print(f"{'scénario':<28} | {'create_app':>10} | {'prêt':>8} | {'1re requête':>11} | TF chargé")
+    print("-" * 84)
+    for name, eager, warmup in SCENARIOS:
+        try:
+            results = [run(eager, warmup, args.timeout) for _ in range(args.runs)]
+        except Exception as e:
+            print(f"{name:<28} | ❌ {e}")
+            continue
+        median = lambda key: sorted(r[key] for r in results)[len(results) // 2]
+        ready = f"{median('ready'):>7.3f}s" if warmup else f"{'-':>8}"
+        print(f"{name:<28} | {median('startup'):>9.3f}s | {ready} | {median('first_request'):>10.3f}s | "
+              f"{'oui' if results[-1]['tensorflow_loaded'] else 'non'}")
+    print("-" * 84)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Benchmark des features de trafic incrémentales (app/utils/traffic_features.py).
+
+Connexions synthétiques à --rate connexions/s (trafic web normal, flood SYN vers
+un hôte, scan de ports rejeté) : les 19 features de chaque connexion sont
+comparées à un recalcul complet des fenêtres sur un échantillon, puis le débit
+de TrafficFeatureEngine.update est mesuré (objectif : au moins --rate
+connexions/s sur un cœur).
+
+    python benchmark_traffic_features.py
+    python benchmark_traffic_features.py --connections 2000000 --rate 100000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(__file__))
+
+from app.config import TRAFFIC_HOST_WINDOW, TRAFFIC_TIME_WINDOW
+from app.utils.traffic_features import RERROR_FLAGS, SERROR_FLAGS, TRAFFIC_FEATURES, TrafficFeatureEngine
+
+
+def build_connections(n: int, rate: float, seed: int):
+    """(instant, hôte, service, port source, flag) ; 60% web, 25% flood SYN, 15% scan"""
+    rng = np.random.default_rng(seed)
+    kind = rng.choice(3, n, p=[0.60, 0.25, 0.15])
+    hosts = np.where(kind == 1, 'victim', np.where(kind == 2, 'scanned',
+                     rng.choice(np.array([f'10.0.0.{i}' for i in range(1, 51)], dtype=object), n)))
+    ports = np.where(kind == 0, rng.choice([80, 443, 53], n), np.where(kind == 1, 80, rng.integers(1, 1025, n)))
+    flags = np.where(kind == 0, 'SF', np.where(kind == 1, 'S0', rng.choice(np.array(['REJ', 'S0']), n)))
+    src_ports = rng.integers(1024, 65535, n)
+    now = np.arange(n) / rate
+    return list(zip(now.tolist(), hosts.tolist(), [('tcp', int(p)) for p in ports], src_ports.tolist(),
+                    flags.tolist()))
+
+
+def brute_force(connections, index, time_window, host_window):
+    """Recalcul complet des features de la connexion index (référence)"""
+    now, host, service, src_port, _ = connections[index]
+    recent = [c for c in connections[:index + 1] if c[0] > now - time_window]
+    last = connections[max(0, index + 1 - host_window):index + 1]
+
+    def rates(window):
+        same_host = [c for c in window if c[1] == host]
+        same_srv = [c for c in window if c[2] == service]
+        pairs = sum(c[1] == host for c in same_srv)
+        return same_host, same_srv, pairs
+
+    def share(rows, flags):
+        return sum(c[4] in flags for c in rows) / len(rows)
+
+    same_host, same_srv, pairs = rates(recent)
+    host_host, host_srv, host_pairs = rates(last)
+    return [
+        len(same_host), len(same_srv),
+        share(same_host, SERROR_FLAGS), share(same_srv, SERROR_FLAGS),
+        share(same_host, RERROR_FLAGS), share(same_srv, RERROR_FLAGS),
+        pairs / len(same_host), 1 - pairs / len(same_host), (len(same_srv) - pairs) / len(same_srv),
+        len(host_host), len(host_srv),
+        host_pairs / len(host_host), 1 - host_pairs / len(host_host),
+        sum(c[3] == src_port for c in host_host) / len(host_host),
+        (len(host_srv) - host_pairs) / len(host_srv),
+        share(host_host, SERROR_FLAGS), share(host_srv, SERROR_FLAGS),
+        share(host_host, RERROR_FLAGS), share(host_srv, RERROR_FLAGS),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exactitude et débit des features de trafic incrémentales")
+    parser.add_argument('--connections', type=int, default=1_000_000)
+    parser.add_argument('--rate', type=float, default=100_000, help='connexions/s simulées et débit visé')
+    parser.add_argument('--check', type=int, default=300, help='connexions vérifiées par recalcul complet')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    connections = build_connections(args.connections, args.rate, args.seed)
+    print(f"🧪 {args.connections:,} connexions à {args.rate:,.0f}/s, fenêtres {TRAFFIC_TIME_WINDOW}s / "
+          f"{TRAFFIC_HOST_WINDOW} connexions")
+
+    # Exactitude : recalcul complet sur des connexions tirées après le remplissage des fenêtres
+    check_rate = 2000.0
+    sample = build_connections(20_000, check_rate, args.seed)
+    engine = TrafficFeatureEngine(clock=lambda: 0.0)
+    checked = set(np.random.default_rng(args.seed).choice(np.arange(10_000, len(sample)), args.check,
+                                                          replace=False).tolist())
+    worst = np.zeros(len(TRAFFIC_FEATURES))
+    for i, (now, host, service, src_port, flag) in enumerate(sample):
+        values = engine.update(host, service, src_port, flag, now=now)
+        if i in checked:
+            expected = brute_force(sample, i, TRAFFIC_TIME_WINDOW, TRAFFIC_HOST_WINDOW)
+            worst = np.maximum(worst, np.abs(np.array(values) - np.array(expected)))
+    exact = bool(np.all(worst < 1e-9))
+    print(f"   {'✅' if exact else '❌'} {args.check} connexions identiques au recalcul complet"
+          + ('' if exact else f" (écart max {dict(zip(TRAFFIC_FEATURES, worst.round(4).tolist()))})"))
+
+    # Débit
+    engine = TrafficFeatureEngine(clock=lambda: 0.0)
+    update = engine.update
+    start = time.perf_counter()
+    for now, host, service, src_port, flag in connections:
+        update(host, service, src_port, flag, now)
+    elapsed = time.perf_counter() - start
+    throughput = args.connections / elapsed
+    metrics = engine.metrics()
+    print(f"   ⚡ {throughput:,.0f} connexions/s ({elapsed / args.connections * 1e6:.2f} µs/connexion), "
+          f"{metrics['time_window']:,} connexions dans la fenêtre de {TRAFFIC_TIME_WINDOW}s, "
+          f"{metrics['counters']:,} compteurs")
+    print(f"{'✅' if throughput >= args.rate else '❌'} Objectif {args.rate:,.0f} connexions/s "
+          f"{'atteint' if throughput >= args.rate else 'non atteint'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -5,56 +5,89 @@ Script pour vérifier les alertes en temps réel
 
 import json
 import time
-from pathlib import Path
-from datetime import datetime
+import sys
+import os
+import urllib.request
+
+sys.path.append(os.path.dirname(__file__))
+
+from app.utils.alert_store import get_alert_store
+
+STREAM_URL = os.environ.get('IDS_STREAM_URL', 'http://localhost:5000/api/alerts/stream')
+
+def print_alert(alert):
+    print(f"   📡 {alert['attackType']} depuis {alert['sourceIp']}")
+    print(f"      ⏰ {alert['timestamp']}")
+    print(f"      🔴 Sévérité: {alert['severity']}")
+    if 'confidence' in alert:
+        print(f"      📊 Confiance: {alert['confidence']:.2f}")
+    print()
+
+def print_stats(stats):
+    print(f"\r📊 Connexions: {stats['total_connections']} | Alertes: {stats['total_alerts']} | Menaces actives: {stats['active_threats']}", end='')
+
+def stream_alerts(last_alert_id):
+    """Reçoit les alertes poussées par le serveur (SSE) ; retourne le dernier id reçu."""
+    request = urllib.request.Request(STREAM_URL, headers={'Last-Event-ID': str(last_alert_id)})
+    with urllib.request.urlopen(request) as response:
+        print("📡 Connecté au flux temps réel du serveur")
+        event, data = None, []
+        for raw in response:
+            line = raw.decode('utf-8').rstrip('\n')
+            if line.startswith('event:'):
+                event = line[6:].strip()
+            elif line.startswith('data:'):
+                data.append(line[5:].strip())
+            elif not line and data:
+                payload = json.loads('\n'.join(data))
+                if event == 'alert':
+                    print("\n🚨 Nouvelle alerte détectée!")
+                    print_alert(payload)
+                    last_alert_id = payload['id']
+                elif event == 'stats':
+                    print_stats(payload['stats'])
+                event, data = None, []
+    return last_alert_id
+
+def poll_alerts(store, last_alert_id):
+    """Lecture directe de la base (serveur arrêté) ; retourne le dernier id lu."""
+    new_alerts = store.get_alerts(since_id=last_alert_id)
+    stats = store.get_stats()
+
+    # Afficher les nouvelles alertes
+    if new_alerts:
+        print(f"\n🚨 {len(new_alerts)} nouvelles alertes détectées!")
+        for alert in new_alerts:
+            print_alert(alert)
+        last_alert_id = new_alerts[-1]['id']
+
+    # Afficher les statistiques
+    print_stats(stats)
+    return last_alert_id
 
 def check_alerts():
-    """Vérifie les alertes en temps réel"""
-    data_file = Path(__file__).parent / 'app' / 'data' / 'network_data.json'
-    
+    """Vérifie les alertes en temps réel (flux SSE du serveur, sinon lecture de la base)"""
+    store = get_alert_store()
+
     print("🔍 Surveillance des alertes en temps réel")
     print("=" * 50)
-    
-    last_alert_count = 0
-    
+
+    # Ne lire que les alertes plus récentes que la dernière affichée
+    last_alert_id = store.last_alert_id()
+
     while True:
         try:
-            if data_file.exists():
-                with open(data_file, 'r') as f:
-                    data = json.load(f)
-                
-                current_alerts = len(data['alerts'])
-                current_connections = len(data['connections'])
-                
-                # Afficher les nouvelles alertes
-                if current_alerts > last_alert_count:
-                    new_alerts = data['alerts'][last_alert_count:]
-                    print(f"\n🚨 {len(new_alerts)} nouvelles alertes détectées!")
-                    
-                    for alert in new_alerts:
-                        print(f"   📡 {alert['attackType']} depuis {alert['sourceIp']}")
-                        print(f"      ⏰ {alert['timestamp']}")
-                        print(f"      🔴 Sévérité: {alert['severity']}")
-                        if 'confidence' in alert:
-                            print(f"      📊 Confiance: {alert['confidence']:.2f}")
-                        print()
-                    
-                    last_alert_count = current_alerts
-                
-                # Afficher les statistiques
-                print(f"\r📊 Connexions: {current_connections} | Alertes: {current_alerts} | Menaces actives: {data['stats']['active_threats']}", end='')
-                
-            else:
-                print("❌ Fichier network_data.json non trouvé")
-                break
-                
+            try:
+                last_alert_id = stream_alerts(last_alert_id)
+            except OSError:
+                last_alert_id = poll_alerts(store, last_alert_id)
+                time.sleep(1)  # Serveur indisponible : vérifier toutes les secondes
         except KeyboardInterrupt:
             print("\n\n⏹️ Surveillance arrêtée")
             break
         except Exception as e:
             print(f"\n❌ Erreur: {e}")
-        
-        time.sleep(1)  # Vérifier toutes les secondes
+            time.sleep(1)
 
 if __name__ == "__main__":
-    check_alerts() 
\ No newline at end of file
+    check_alerts()
@@ -3,11 +3,14 @@
 Script pour nettoyer les anciennes alertes et redémarrer proprement
 """
 
-import json
 import os
+import sys
 import time
 import logging
-from datetime import datetime
+
+sys.path.append(os.path.dirname(__file__))
+
+from app.utils.alert_store import get_alert_store
 
 # Configuration du logging
 logging.basicConfig(level=logging.INFO)
@@ -15,63 +18,36 @@ logger = logging.getLogger(__name__)
 
 def clean_old_alerts():
     """Nettoie les anciennes alertes de faux positifs"""
-    data_file = "app/data/network_data.json"
-    
     try:
-        # Charger les données actuelles
-        with open(data_file, 'r') as f:
-            data = json.load(f)
-        
-        # Filtrer les alertes pour garder seulement les vraies attaques
-        old_alerts = data.get('alerts', [])
-        new_alerts = []
+        store = get_alert_store()
+        old_alerts = store.get_alerts()
         
+        # Supprimer les alertes des IPs locales (garder seulement les vraies attaques)
+        false_positives = []
         for alert in old_alerts:
             source_ip = alert.get('sourceIp', '')
             
-            # Garder seulement les vraies attaques (pas les IPs locales)
-            if (source_ip not in ['127.0.0.1', '0.0.0.0', '::1'] and
-                not source_ip.startswith('192.168.') and
-                not source_ip.startswith('10.') and
-                not source_ip.startswith('172.') and
-                source_ip != 'N/A'):
-                new_alerts.append(alert)
+            if (source_ip in ['127.0.0.1', '0.0.0.0', '::1'] or
+                source_ip.startswith('192.168.') or
+                source_ip.startswith('10.') or
+                source_ip.startswith('172.') or
+                source_ip == 'N/A'):
+                false_positives.append(alert['id'])
         
-        # Mettre à jour les données
-        data['alerts'] = new_alerts
-        data['stats']['total_alerts'] = len(new_alerts)
-        data['stats']['active_threats'] = len([a for a in new_alerts if a.get('severity') == 'high'])
+        store.delete_alerts(false_positives)
         
-        # Sauvegarder
-        with open(data_file, 'w') as f:
-            json.dump(data, f, indent=2)
-        
-        logger.info(f"🧹 Nettoyage terminé: {len(old_alerts)} -> {len(new_alerts)} alertes")
+        logger.info(f"🧹 Nettoyage terminé: {len(old_alerts)} -> {len(old_alerts) - len(false_positives)} alertes")
         logger.info("✅ Supprimé tous les faux positifs (127.0.0.1, 0.0.0.0, 192.168.x.x)")
         
     except Exception as e:
         logger.error(f"Erreur lors du nettoyage: {e}")
 
 def create_clean_data():
-    """Crée un fichier de données propre"""
-    clean_data = {
-        "connections": [],
-        "alerts": [],
-        "stats": {
-            "total_connections": 0,
-            "total_alerts": 0,
-            "active_threats": 0,
-            "last_update": datetime.now().isoformat()
-        }
-    }
-    
-    data_file = "app/data/network_data.json"
-    
+    """Remet le stockage des données à zéro"""
     try:
-        with open(data_file, 'w') as f:
-            json.dump(clean_data, f, indent=2)
+        get_alert_store().reset()
         
-        logger.info("✨ Fichier de données propre créé")
+        logger.info("✨ Stockage de données propre créé")
         
     except Exception as e:
         logger.error(f"Erreur lors de la création: {e}")
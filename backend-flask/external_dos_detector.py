@@ -3,50 +3,178 @@
 Détecteur d'attaques DoS externes utilisant la capture de paquets réseau
 """
 
-import json
+import logging
 import time
 import socket
-import struct
 import threading
-from datetime import datetime
-from pathlib import Path
 import sys
 import os
-from collections import defaultdict, deque
 
 # Ajouter le chemin du module app
 sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
 
+from functools import partial
+
+from app.config import (CAPTURE_BACKEND, CAPTURE_FILTER, CAPTURE_INTERFACE, CAPTURE_RING_BLOCK_SIZE,
+                        CAPTURE_RING_BLOCKS, CAPTURE_RING_BLOCK_TIMEOUT_MS, CAPTURE_WORKERS, DETECTOR_PLUGINS)
+from app.utils.alert_sink import get_alert_sink
+from app.utils.bpf_filter import CaptureFilter
+from app.utils.capture_workers import CaptureWorkerPool
+from app.utils.detector_pipeline import build_pipeline
+from app.utils.packet_ring import FrameBatch, PacketRing, recv_batch, ring_supported
+
+logger = logging.getLogger(__name__)
+
 class ExternalDOSDetector:
-    def __init__(self):
-        self.data_file = Path(__file__).parent / 'app' / 'data' / 'network_data.json'
-        self.dos_threshold = 20  # Nombre de paquets pour déclencher une alerte
-        self.packet_history = defaultdict(lambda: deque(maxlen=100))  # Historique des paquets par IP
-        self.alert_cooldown = {}  # Éviter les alertes répétitives
+    """Source de capture (anneau AF_PACKET ou socket raw) du pipeline de détection"""
+
+    def __init__(self, capture_backend=CAPTURE_BACKEND, interface=CAPTURE_INTERFACE, workers=CAPTURE_WORKERS, sink=None,
+                 plugins=DETECTOR_PLUGINS):
+        # sink : puits fourni par un worker de capture (file vers le processus parent)
+        self.sink = sink or get_alert_sink()
+        self.capture_backend = capture_backend
+        self.interface = interface
+        self.workers = workers
+        self.plugins = plugins
+        self.pool = None
+        self.ring = None
+        # Chaque lot est décodé une fois puis remis à tous les détecteurs (plugins)
+        self.pipeline = build_pipeline(plugins, sink=self.sink)
+        # Filtre BPF : seuls les paquets utiles aux modules activés (et aux plugins) remontent du noyau
+        self.capture_filter = self.build_filter()
         self.running = False
         
     def capture_packets(self):
-        """Capture les paquets réseau bruts"""
+        """Capture les paquets réseau bruts (anneau AF_PACKET si disponible, sinon recvfrom)"""
+        if self.capture_backend in ('auto', 'ring') and ring_supported():
+            try:
+                if self.workers > 1:
+                    return self.capture_sharded()
+                return self.capture_ring()
+            except PermissionError as e:
+                if self.capture_backend == 'ring':
+                    print("❌ ERREUR: Besoin de privilèges administrateur!")
+                    return False
+                self.ring_fallback(e)
+            except OSError as e:
+                self.ring_fallback(e)
+        return self.capture_recvfrom()
+
+    def ring_fallback(self, error):
+        """Anneau impossible à ouvrir : repli visible sur recvfrom"""
+        logger.warning(f"⚠️ Anneau AF_PACKET indisponible ({error}), repli sur recvfrom")
+        print(f"⚠️ Anneau AF_PACKET indisponible ({error}), repli sur recvfrom")
+
+    def capture_ring(self):
+        """Capture par lots via l'anneau mmap TPACKET_V3 (Linux)"""
+        self.ring = PacketRing(self.interface, block_size=CAPTURE_RING_BLOCK_SIZE, block_count=CAPTURE_RING_BLOCKS,
+                               block_timeout_ms=CAPTURE_RING_BLOCK_TIMEOUT_MS)
+        self.attach_filter(self.ring.sock)
+        print("🔍 Capture de paquets réseau démarrée (anneau AF_PACKET)...")
+        print("Lancez votre attaque DoS maintenant!")
+        try:
+            while self.running:
+                try:
+                    self.ring.process(self.analyze_batch)
+                    self.tick()
+                    self.refresh_filter()
+                except Exception as e:
+                    print(f"Erreur lors de la capture: {e}")
+        finally:
+            if self.capture_filter:
+                self.capture_filter.release(self.ring.sock)
+            self.ring.close()
+            self.ring = None
+        return True
+
+    def capture_sharded(self):
+        """Capture répartie sur self.workers processus (PACKET_FANOUT par paire d'adresses IP)"""
+        factory = partial(ExternalDOSDetector, capture_backend='ring', interface=self.interface, workers=1,
+                          plugins=self.plugins)
+        # Flux terminés des workers classés ici : le modèle n'est chargé que dans le parent
+        flow_scoring = self.pipeline.plugin('flow_scoring')
+        self.pool = CaptureWorkerPool(factory, self.workers, self.interface, sink=self.sink,
+                                      flow_scorer=flow_scoring.scorer if flow_scoring else None)
+        self.pool.start()
+        print(f"🔍 Capture de paquets réseau démarrée ({self.workers} workers AF_PACKET en fanout)...")
+        print("Lancez votre attaque DoS maintenant!")
+        dead = set()
+        try:
+            while self.running:
+                time.sleep(1)
+                for index in set(self.pool.metrics()['dead']) - dead:
+                    dead.add(index)
+                    print(f"⚠️ Worker de capture {index} arrêté: sa part du trafic n'est plus analysée")
+                if not self.pool.alive():
+                    break
+        finally:
+            self.pool.stop()
+            self.pool = None
+        if not self.running:
+            return True
+        # Aucun worker en vie (démarrage impossible ou arrêts successifs) : capture dans ce processus
+        logger.warning("⚠️ Tous les workers de capture se sont arrêtés, repli sur la capture mono-processus")
+        print("⚠️ Tous les workers de capture se sont arrêtés, repli sur la capture mono-processus")
+        self.workers = 1
+        return self.capture_packets()
+
+    def build_filter(self):
+        if not CAPTURE_FILTER:
+            return None
+        # flow_scoring reconstruit les connexions : tous les segments TCP, pas seulement SYN/RST
+        return CaptureFilter(all_tcp=self.pipeline.needs_all_tcp)
+
+    def attach_filter(self, sock):
+        if self.capture_filter:
+            self.capture_filter.attach(sock)
+            print(f"🧰 Filtre noyau: {self.capture_filter.expression()}")
+
+    def refresh_filter(self):
+        """Recompile le filtre si les modules de settings.json ont changé"""
+        if self.capture_filter and self.capture_filter.refresh():
+            print(f"🔄 Filtre noyau mis à jour: {self.capture_filter.expression()}")
+
+    def analyze_batch(self, batch):
+        """Décode un lot de paquets (FrameBatch) et le distribue aux plugins du pipeline"""
+        self.pipeline.process_batch(batch)
+
+    def tick(self):
+        """Traitements des plugins quand aucun paquet n'arrive (flux inactifs...)"""
+        self.pipeline.tick()
+
+    def capture_recvfrom(self):
+        """Capture par petits lots sur un socket raw IPv4/TCP"""
+        # Le socket raw IPPROTO_TCP ne reçoit que le trafic entrant : flux reconstruits faux
+        for plugin in [plugin for plugin in self.pipeline.plugins if plugin.needs_both_directions]:
+            self.pipeline.unregister(plugin.name)
+            print(f"⚠️ Plugin {plugin.name} désactivé: le socket raw ne voit que les paquets entrants")
+            self.capture_filter = self.build_filter()
         try:
             # Créer un socket raw pour capturer tous les paquets
             sock = socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_TCP)
             sock.setsockopt(socket.IPPROTO_IP, socket.IP_HDRINCL, 1)
             sock.bind(('', 0))
+            sock.setblocking(False)
+            self.attach_filter(sock)
             
             print("🔍 Capture de paquets réseau démarrée...")
             print("Lancez votre attaque DoS maintenant!")
             
             while self.running:
                 try:
-                    # Recevoir un paquet
-                    packet, addr = sock.recvfrom(65535)
+                    # Recevoir les paquets en attente (au plus 1 s d'attente)
+                    packets = recv_batch(sock)
                     
-                    # Analyser le paquet
-                    self.analyze_packet(packet, addr)
+                    # Analyser le lot
+                    if packets:
+                        self.analyze_batch(FrameBatch.from_frames(packets))
                     
                 except Exception as e:
                     print(f"Erreur lors de la capture: {e}")
                     continue
+                finally:
+                    self.tick()
+                    self.refresh_filter()
                     
         except PermissionError:
             print("❌ ERREUR: Besoin de privilèges administrateur!")
@@ -56,141 +184,9 @@ class ExternalDOSDetector:
             print(f"Erreur lors de la création du socket: {e}")
             return False
     
-    def analyze_packet(self, packet, addr):
-        """Analyse un paquet réseau"""
-        try:
-            # Extraire l'en-tête IP
-            ip_header = packet[0:20]
-            iph = struct.unpack('!BBHHHBBH4s4s', ip_header)
-            
-            source_ip = socket.inet_ntoa(iph[8])
-            dest_ip = socket.inet_ntoa(iph[9])
-            
-            # Extraire l'en-tête TCP
-            tcp_header = packet[20:40]
-            tcph = struct.unpack('!HHLLBBHHH', tcp_header)
-            
-            source_port = tcph[0]
-            dest_port = tcph[1]
-            tcp_flags = tcph[5]
-            
-            # Détecter les paquets SYN (attaque DoS)
-            if tcp_flags & 0x02:  # SYN flag
-                self.detect_syn_flood(source_ip, dest_ip, source_port, dest_port)
-            
-            # Détecter les paquets avec le même port de destination (DoS)
-            if dest_port == 80:  # HTTP
-                self.detect_port_flood(source_ip, dest_ip, dest_port)
-                
-        except Exception as e:
-            pass  # Ignorer les paquets malformés
-    
-    def detect_syn_flood(self, source_ip, dest_ip, source_port, dest_port):
-        """Détecte les attaques SYN flood"""
-        key = f"{source_ip}:{dest_ip}:{dest_port}"
-        
-        # Ajouter le paquet à l'historique
-        self.packet_history[key].append({
-            'timestamp': time.time(),
-            'source_ip': source_ip,
-            'dest_ip': dest_ip,
-            'source_port': source_port,
-            'dest_port': dest_port,
-            'type': 'SYN'
-        })
-        
-        # Vérifier le nombre de paquets SYN récents
-        recent_packets = [p for p in self.packet_history[key] 
-                         if time.time() - p['timestamp'] < 10]  # 10 secondes
-        
-        if len(recent_packets) > self.dos_threshold:
-            self.create_dos_alert(source_ip, dest_ip, 'SYN Flood', len(recent_packets))
-    
-    def detect_port_flood(self, source_ip, dest_ip, dest_port):
-        """Détecte les attaques de flood sur un port spécifique"""
-        key = f"{source_ip}:{dest_port}"
-        
-        # Ajouter le paquet à l'historique
-        self.packet_history[key].append({
-            'timestamp': time.time(),
-            'source_ip': source_ip,
-            'dest_ip': dest_ip,
-            'dest_port': dest_port,
-            'type': 'PORT_FLOOD'
-        })
-        
-        # Vérifier le nombre de paquets récents
-        recent_packets = [p for p in self.packet_history[key] 
-                         if time.time() - p['timestamp'] < 10]  # 10 secondes
-        
-        if len(recent_packets) > self.dos_threshold:
-            self.create_dos_alert(source_ip, dest_ip, 'Port Flood', len(recent_packets))
-    
-    def create_dos_alert(self, source_ip, dest_ip, attack_type, packet_count):
-        """Crée une alerte DoS"""
-        # Éviter les alertes répétitives
-        alert_key = f"{source_ip}:{attack_type}"
-        if alert_key in self.alert_cooldown:
-            if time.time() - self.alert_cooldown[alert_key] < 30:  # 30 secondes de cooldown
-                return
-        
-        self.alert_cooldown[alert_key] = time.time()
-        
-        # Créer l'alerte
-        alert = {
-            'id': int(time.time()),  # ID unique basé sur le timestamp
-            'sourceIp': source_ip,
-            'destinationIp': dest_ip,
-            'protocol': 'tcp',
-            'timestamp': datetime.now().isoformat(),
-            'attackType': attack_type,
-            'severity': 'high',
-            'confidence': min(packet_count / 100.0, 0.95),
-            'packetCount': packet_count
-        }
-        
-        # Sauvegarder l'alerte
-        self.save_alert(alert)
-        
-        print(f"🚨 ALERTE {attack_type}: {source_ip} -> {dest_ip} ({packet_count} paquets)")
-    
-    def save_alert(self, alert):
-        """Sauvegarde une alerte dans le fichier de données"""
-        try:
-            # Lire les données existantes
-            if self.data_file.exists():
-                with open(self.data_file, 'r') as f:
-                    data = json.load(f)
-            else:
-                data = {
-                    'connections': [],
-                    'alerts': [],
-                    'stats': {
-                        'total_connections': 0,
-                        'total_packets': 0,
-                        'total_alerts': 0,
-                        'active_threats': 0,
-                        'blocked_attempts': 0,
-                        'system_health': 100
-                    }
-                }
-            
-            # Ajouter l'alerte
-            data['alerts'].append(alert)
-            
-            # Garder seulement les 50 dernières alertes
-            data['alerts'] = data['alerts'][-50:]
-            
-            # Mettre à jour les statistiques
-            data['stats']['total_alerts'] = len(data['alerts'])
-            data['stats']['active_threats'] = len([a for a in data['alerts'] if a['severity'] == 'high'])
-            
-            # Sauvegarder
-            with open(self.data_file, 'w') as f:
-                json.dump(data, f, indent=2)
-                
-        except Exception as e:
-            print(f"Erreur lors de la sauvegarde de l'alerte: {e}")
+    def analyze_packet(self, packet, addr=None):
+        """Analyse un paquet réseau isolé (lot d'un paquet)"""
+        self.analyze_batch(FrameBatch.from_frames([packet]))
     
     def start_monitoring(self, duration=300):
         """Démarre la surveillance des attaques externes"""
@@ -198,7 +194,7 @@ class ExternalDOSDetector:
         print("=" * 50)
         print(f"⏱️  Surveillance pendant {duration} secondes")
         print("📡 Capture des paquets réseau bruts")
-        print("🎯 Détection: SYN Flood, Port Flood")
+        print(f"🎯 Détecteurs: {', '.join(plugin.name for plugin in self.pipeline.plugins)}")
         print()
         
         self.running = True
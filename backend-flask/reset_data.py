@@ -3,37 +3,25 @@
 Script pour complètement réinitialiser le fichier de données
 """
 
-import json
 import os
+import sys
 import logging
-from datetime import datetime
+
+sys.path.append(os.path.dirname(__file__))
+
+from app.utils.alert_store import get_alert_store
 
 # Configuration du logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 def reset_data_file():
-    """Réinitialise complètement le fichier de données"""
-    data_file = "app/data/network_data.json"
-    
-    # Créer un fichier de données complètement propre
-    clean_data = {
-        "connections": [],
-        "alerts": [],
-        "stats": {
-            "total_connections": 0,
-            "total_alerts": 0,
-            "active_threats": 0,
-            "last_update": datetime.now().isoformat()
-        }
-    }
-    
+    """Réinitialise complètement le stockage des alertes"""
     try:
-        # Sauvegarder le nouveau fichier
-        with open(data_file, 'w') as f:
-            json.dump(clean_data, f, indent=2)
+        # Vider alertes, connexions et statistiques
+        get_alert_store().reset()
         
-        logger.info("🧹 Fichier de données complètement réinitialisé!")
+        logger.info("🧹 Stockage des données complètement réinitialisé!")
         logger.info("✅ Toutes les anciennes données supprimées")
         logger.info("✨ Système prêt pour de nouvelles détections")
         
@@ -1,47 +1,31 @@
 #!/usr/bin/env python3
 """
-Script pour réinitialiser complètement le fichier network_data.json
+Script pour réinitialiser complètement le stockage des alertes
 avec toutes les clés nécessaires pour éviter les KeyError
 """
 
-import json
-from pathlib import Path
+import os
 import sys
 
+sys.path.append(os.path.dirname(__file__))
+
+from app.utils.alert_store import get_alert_store
+
 def reset_data_file():
-    """Réinitialise le fichier network_data.json avec une structure complète"""
-    
-    # Chemin vers le fichier de données
-    DATA_FILE = Path(__file__).parent / 'app' / 'data' / 'network_data.json'
-    
-    # Structure complète avec toutes les clés nécessaires
-    clean_data = {
-        "connections": [],
-        "alerts": [],
-        "stats": {
-            "total_connections": 0,
-            "total_alerts": 0,
-            "active_threats": 0,
-            "system_health": 100
-        }
-    }
-    
+    """Réinitialise le stockage SQLite (alertes, connexions, statistiques)"""
     try:
-        # Créer le dossier parent s'il n'existe pas
-        DATA_FILE.parent.mkdir(parents=True, exist_ok=True)
-        
-        # Écrire le fichier avec la structure complète
-        with open(DATA_FILE, "w", encoding='utf-8') as f:
-            json.dump(clean_data, f, indent=2, ensure_ascii=False)
+        store = get_alert_store()
+        store.reset()
+        stats = store.get_stats()
         
-        print(f"✅ Fichier {DATA_FILE} réinitialisé avec succès !")
+        print(f"✅ Stockage {store.db_path} réinitialisé avec succès !")
         print("📊 Structure créée :")
         print("   - connections: []")
         print("   - alerts: []")
-        print("   - stats.total_connections: 0")
-        print("   - stats.total_alerts: 0")
-        print("   - stats.active_threats: 0")
-        print("   - stats.system_health: 100")
+        print(f"   - stats.total_connections: {stats['total_connections']}")
+        print(f"   - stats.total_alerts: {stats['total_alerts']}")
+        print(f"   - stats.active_threats: {stats['active_threats']}")
+        print(f"   - stats.system_health: {stats['system_health']}")
         
         return True
         
@@ -50,7 +34,7 @@ def reset_data_file():
         return False
 
 if __name__ == "__main__":
-    print("🔄 Réinitialisation du fichier network_data.json...")
+    print("🔄 Réinitialisation du stockage des alertes...")
     success = reset_data_file()
     
     if success:
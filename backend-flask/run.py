@@ -21,6 +21,7 @@ class IDSSystem:
     def __init__(self):
         self.running = False
         self.threads = []
+        self.pipeline = None
         
     def start_network_scanner(self):
         """Démarre le scanner réseau original"""
@@ -42,74 +43,37 @@ class IDSSystem:
         except Exception as e:
             logger.error(f"Erreur scanner réseau: {e}")
     
-    def start_external_dos_detector(self):
-        """Démarre le détecteur d'attaques externes (Linux/WSL)"""
+    def start_detector_pipeline(self, os_name):
+        """Démarre une capture unique dont les lots décodés alimentent tous les détecteurs (plugins)"""
         try:
-            from external_dos_detector import ExternalDOSDetector
-            detector = ExternalDOSDetector()
-            detector.running = True
+            if os_name == 'windows':
+                # Windows : capture scapy
+                from windows_dos_detector import WindowsDOSDetector
+                source = WindowsDOSDetector()
+                run_capture = lambda: source.start_monitoring(duration=3600)  # 1 heure
+            else:
+                # Linux/Mac : anneau AF_PACKET ou socket raw
+                from external_dos_detector import ExternalDOSDetector
+                source = ExternalDOSDetector()
+                run_capture = source.capture_packets
+            source.running = True
+            self.pipeline = source.pipeline
             
             # Démarrer la capture dans un thread séparé
             def capture_loop():
                 try:
-                    detector.capture_packets()
+                    run_capture()
                 except Exception as e:
-                    logger.error(f"Erreur capture externe: {e}")
+                    logger.error(f"Erreur capture: {e}")
             
             capture_thread = threading.Thread(target=capture_loop, daemon=True)
             capture_thread.start()
             self.threads.append(capture_thread)
-            logger.info("🚀 Démarrage du détecteur d'attaques externes (Linux)...")
+            plugins = ', '.join(plugin.name for plugin in source.pipeline.plugins)
+            logger.info(f"🚀 Pipeline de détection démarré ({type(source).__name__}) : {plugins}")
             
         except Exception as e:
-            logger.warning(f"Détecteur externe non disponible (Windows?): {e}")
-    
-    def start_windows_dos_detector(self):
-        """Démarre le détecteur d'attaques Windows"""
-        try:
-            from windows_dos_detector import WindowsDOSDetector
-            detector = WindowsDOSDetector()
-            detector.running = True
-            
-            # Démarrer la capture dans un thread séparé
-            def capture_loop():
-                try:
-                    detector.start_monitoring(duration=3600)  # 1 heure
-                except Exception as e:
-                    logger.error(f"Erreur capture Windows: {e}")
-            
-            capture_thread = threading.Thread(target=capture_loop, daemon=True)
-            capture_thread.start()
-            self.threads.append(capture_thread)
-            logger.info("🚀 Démarrage du détecteur d'attaques Windows...")
-            
-        except Exception as e:
-            logger.warning(f"Détecteur Windows non disponible: {e}")
-    
-    def start_enhanced_detector(self):
-        """Démarre le détecteur amélioré avec simulation"""
-        try:
-            from simulate_dos_detection import DOSDetector
-            detector = DOSDetector()
-            
-            # Démarrer la surveillance dans un thread séparé
-            def monitor_loop():
-                try:
-                    # Version non-bloquante
-                    start_time = time.time()
-                    while time.time() - start_time < 3600 and self.running:  # 1 heure
-                        detector.monitor_network(duration=60)  # 1 minute à la fois
-                        time.sleep(1)
-                except Exception as e:
-                    logger.error(f"Erreur surveillance améliorée: {e}")
-            
-            monitor_thread = threading.Thread(target=monitor_loop, daemon=True)
-            monitor_thread.start()
-            self.threads.append(monitor_thread)
-            logger.info("🚀 Démarrage du détecteur amélioré...")
-            
-        except Exception as e:
-            logger.warning(f"Détecteur amélioré non disponible: {e}")
+            logger.warning(f"Capture de paquets non disponible: {e}")
     
     def start_alert_monitor(self):
         """Démarre le moniteur d'alertes en temps réel"""
@@ -140,16 +104,11 @@ class IDSSystem:
         
         # Services communs
         self.start_network_scanner()
-        self.start_enhanced_detector()
         self.start_alert_monitor()
         
-        # Services spécifiques à l'OS
-        if os_name in ['linux', 'darwin']:
-            # Linux/Mac - Démarrer le détecteur externe
-            self.start_external_dos_detector()
-        elif os_name == 'windows':
-            # Windows - Démarrer le détecteur Windows
-            self.start_windows_dos_detector()
+        # Une seule capture pour tous les détecteurs de paquets
+        if os_name in ['linux', 'darwin', 'windows']:
+            self.start_detector_pipeline(os_name)
         else:
             logger.warning(f"OS non reconnu: {os_name}, services de base seulement")
     
@@ -176,6 +135,11 @@ class IDSSystem:
         """Arrête tous les services"""
         logger.info("🛑 Arrêt du système IDS...")
         self.running = False
+        try:
+            from app.utils import network_scanner
+            network_scanner.scanner.stop()
+        except Exception as e:
+            logger.error(f"Erreur arrêt scanner: {e}")
         
         # Attendre que tous les threads se terminent
         for thread in self.threads:
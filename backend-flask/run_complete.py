@@ -26,6 +26,7 @@ class CompleteIDSSystem:
     def __init__(self):
         self.running = False
         self.threads = []
+        self.pipeline = None
         
     def start_network_scanner(self):
         """Démarre le scanner réseau (connexions établies)"""
@@ -34,13 +35,9 @@ class CompleteIDSSystem:
             
             def scanner_loop():
                 try:
-                    while self.running:
-                        try:
-                            network_scanner.scanner._run_scanner()
-                            time.sleep(5)
-                        except Exception as e:
-                            logger.error(f"Erreur scan réseau: {e}")
-                            time.sleep(5)
+                    # Intervalle adaptatif : plus court sous attaque, allongé au repos, plafonné en CPU
+                    scanner = network_scanner.scanner
+                    scanner.scheduler.run(scanner.scan_cycle)
                 except Exception as e:
                     logger.error(f"Erreur scanner réseau: {e}")
             
@@ -52,51 +49,37 @@ class CompleteIDSSystem:
         except Exception as e:
             logger.error(f"Erreur démarrage scanner: {e}")
     
-    def start_external_detector(self):
-        """Démarre le détecteur d'attaques externes (paquets bruts)"""
+    def start_detector_pipeline(self, os_name):
+        """Démarre une capture unique dont les lots décodés alimentent tous les détecteurs (plugins)"""
         try:
-            from external_dos_detector import ExternalDOSDetector
-            
-            detector = ExternalDOSDetector()
-            detector.running = True
+            if os_name == 'windows':
+                # Windows : capture scapy
+                from windows_dos_detector import WindowsDOSDetector
+                source = WindowsDOSDetector()
+                run_capture = lambda: source.start_monitoring(duration=3600)  # 1 heure
+            else:
+                # Linux/Mac : anneau AF_PACKET ou socket raw
+                from external_dos_detector import ExternalDOSDetector
+                source = ExternalDOSDetector()
+                run_capture = source.capture_packets
+            source.running = True
+            self.pipeline = source.pipeline
             
+            # Démarrer la capture dans un thread séparé
             def capture_loop():
                 try:
-                    logger.info("🚀 Détecteur d'attaques externes démarré")
-                    detector.capture_packets()
+                    run_capture()
                 except Exception as e:
-                    logger.error(f"Erreur capture externe: {e}")
+                    logger.error(f"Erreur capture: {e}")
             
             capture_thread = threading.Thread(target=capture_loop, daemon=True)
             capture_thread.start()
             self.threads.append(capture_thread)
-            logger.info("🚀 Détecteur d'attaques externes (paquets bruts) démarré")
+            plugins = ', '.join(plugin.name for plugin in source.pipeline.plugins)
+            logger.info(f"🚀 Pipeline de détection démarré ({type(source).__name__}) : {plugins}")
             
         except Exception as e:
-            logger.warning(f"Détecteur externe non disponible: {e}")
-    
-    def start_windows_detector(self):
-        """Démarre le détecteur Windows (avec scapy)"""
-        try:
-            from windows_dos_detector import WindowsDOSDetector
-            
-            detector = WindowsDOSDetector()
-            detector.running = True
-            
-            def capture_loop():
-                try:
-                    logger.info("🚀 Détecteur Windows démarré")
-                    detector.start_monitoring(duration=3600)
-                except Exception as e:
-                    logger.error(f"Erreur capture Windows: {e}")
-            
-            capture_thread = threading.Thread(target=capture_loop, daemon=True)
-            capture_thread.start()
-            self.threads.append(capture_thread)
-            logger.info("🚀 Détecteur Windows (scapy) démarré")
-            
-        except Exception as e:
-            logger.warning(f"Détecteur Windows non disponible: {e}")
+            logger.warning(f"Capture de paquets non disponible: {e}")
     
     def start_alert_monitor(self):
         """Démarre le moniteur d'alertes"""
@@ -129,13 +112,9 @@ class CompleteIDSSystem:
         self.start_network_scanner()
         self.start_alert_monitor()
         
-        # Services spécifiques à l'OS
-        if os_name in ['linux', 'darwin']:
-            # Linux/Mac - Démarrer le détecteur externe
-            self.start_external_detector()
-        elif os_name == 'windows':
-            # Windows - Démarrer le détecteur Windows
-            self.start_windows_detector()
+        # Une seule capture pour tous les détecteurs de paquets
+        if os_name in ['linux', 'darwin', 'windows']:
+            self.start_detector_pipeline(os_name)
         else:
             logger.warning(f"OS non reconnu: {os_name}, services de base seulement")
     
@@ -167,6 +146,11 @@ class CompleteIDSSystem:
         """Arrête tous les services"""
         logger.info("🛑 Arrêt du système IDS...")
         self.running = False
+        try:
+            from app.utils import network_scanner
+            network_scanner.scanner.stop()
+        except Exception as e:
+            logger.error(f"Erreur arrêt scanner: {e}")
         
         for thread in self.threads:
             if thread.is_alive():
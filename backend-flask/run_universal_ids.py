@@ -16,39 +16,36 @@ from app.routes.settings import settings_bp
 from app.routes.rules import rules_bp
 import threading
 from app.utils.network_scanner import NetworkScanner
+from app.utils.alert_sink import get_alert_sink
 
 # Logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Détection universelle
-DATA_FILE = Path(__file__).parent / 'app' / 'data' / 'network_data.json'
+def store_alert(alert, connections_count=0):
+    """Dépose une alerte dans le puits asynchrone et retourne ses métriques (file, pertes)."""
+    sink = get_alert_sink()
+    sink.submit(alert, connections_count=connections_count)
+    return sink.metrics()
 
 # --- Détecteur universel Scapy (tous OS) ---
 def universal_scapy_detector():
     try:
-        from scapy.all import sniff, IP, TCP
-        from collections import defaultdict, deque
+        from scapy.all import AsyncSniffer, IP, TCP
+        from app.utils.bpf_filter import CaptureFilter
+        from app.utils.sliding_window import SlidingWindowCounter
         from datetime import datetime
-        import json
         SYN_THRESHOLD = 15  # Seuil plus bas pour détecter plus tôt
         WINDOW = 5
-        syn_counts = defaultdict(lambda: deque())
+        syn_counts = SlidingWindowCounter(window=WINDOW, name='universal_scapy.syn_counts')  # SYN par IP source sur WINDOW secondes
         
         def save_alert(source_ip, count, attack_type="DoS (SYN flood)"):
             # Filtrer uniquement les IPs loopback/écoute
             if source_ip in ['127.0.0.1', '0.0.0.0', '::1']:
                 return  # Ne pas générer d'alerte pour IP loopback/écoute
             try:
-                if DATA_FILE.exists():
-                    with open(DATA_FILE, 'r') as f:
-                        data = json.load(f)
-                else:
-                    data = {"alerts": [], "connections": [], "stats": {}}
-                
                 # Créer l'alerte
                 alert = {
-                    "id": int(datetime.now().timestamp()),
                     "sourceIp": source_ip,  # IP source de l'attaque
                     "destinationIp": "Votre machine",
                     "protocol": "tcp",
@@ -58,26 +55,11 @@ def universal_scapy_detector():
                     "confidence": min(count / 100.0, 0.99)
                 }
                 
-                # Ajouter l'alerte
-                data["alerts"].append(alert)
-                data["alerts"] = data["alerts"][-20:]  # Garder seulement les 20 dernières
-                
-                # Initialiser et mettre à jour les statistiques
-                if "stats" not in data:
-                    data["stats"] = {}
-                
-                # Incrémenter les compteurs
-                data["stats"]["total_alerts"] = data["stats"].get("total_alerts", 0) + 1
-                data["stats"]["active_threats"] = data["stats"].get("active_threats", 0) + 1
-                data["stats"]["total_connections"] = data["stats"].get("total_connections", 0) + count
-                data["stats"]["system_health"] = data["stats"].get("system_health", 100)
-                
-                # Sauvegarder
-                with open(DATA_FILE, "w") as f:
-                    json.dump(data, f, indent=2)
+                # Déposer l'alerte dans le puits (écriture groupée en arrière-plan)
+                stats = store_alert(alert, connections_count=count)
                 
                 logger.info(f"🚨 ALERTE {attack_type}: {source_ip} ({count} paquets en {WINDOW}s)")
-                logger.info(f"📊 Stats mises à jour: {data['stats']['total_alerts']} alertes, {data['stats']['active_threats']} menaces actives")
+                logger.info(f"📥 File d'alertes: {stats['queue_depth']} en attente, {stats['dropped']} écartées")
                 
             except Exception as e:
                 logger.error(f"Erreur sauvegarde alerte: {e}")
@@ -87,19 +69,14 @@ def universal_scapy_detector():
                 src = pkt[IP].src
                 dst = pkt[IP].dst
                 tcp_flags = pkt[TCP].flags
-                now = datetime.now().timestamp()
                 
                 # Détecter les SYN (SYN flood)
                 if tcp_flags & 0x02:  # SYN flag
-                    syn_counts[src].append(now)
-                    
-                    # Nettoyer les anciens timestamps
-                    while syn_counts[src] and now - syn_counts[src][0] > WINDOW:
-                        syn_counts[src].popleft()
+                    count = syn_counts.add(src)
                     
                     # Détecter si seuil dépassé
-                    if len(syn_counts[src]) > SYN_THRESHOLD:
-                        save_alert(src, len(syn_counts[src]), "DoS (SYN flood)")
+                    if count > SYN_THRESHOLD:
+                        save_alert(src, count, "DoS (SYN flood)")
                 
                 # Détecter les RST (port scan)
                 elif tcp_flags & 0x04:  # RST flag
@@ -108,7 +85,18 @@ def universal_scapy_detector():
         
         logger.info("[UNIVERSEL] Détection Scapy sur toutes les interfaces...")
         logger.info(f"🔍 Seuil SYN flood: {SYN_THRESHOLD} paquets en {WINDOW} secondes")
-        sniff(filter="tcp", prn=packet_callback, store=0)
+        # Filtre noyau dérivé des modules activés (SYN, ports surveillés) au lieu de tout le TCP.
+        # Le filtre d'un sniffer est figé : on en relance un quand settings.json change.
+        capture_filter = CaptureFilter()
+        while True:
+            logger.info(f"🧰 Filtre de capture: {capture_filter.expression(tcp_only=True)}")
+            sniffer = AsyncSniffer(filter=capture_filter.expression(tcp_only=True), prn=packet_callback, store=0)
+            sniffer.start()
+            while sniffer.running and not capture_filter.refresh():
+                time.sleep(capture_filter.refresh_interval)
+            if not sniffer.running:
+                raise RuntimeError("capture Scapy interrompue")
+            sniffer.stop()
         
     except ImportError:
         logger.error("Scapy non installé, fallback sur psutil")
@@ -128,228 +116,140 @@ def windows_packet_detector():
 
 # --- Fallback psutil amélioré (tous OS) ---
 def fallback_psutil_detector():
-    import psutil
     from datetime import datetime
-    import json
     import time
-    import socket
+    from app.utils.scan_tracker import ScanTracker
+    import numpy as np
+    from app.utils.packet_decoder import IPPROTO_TCP, format_ip
+    from app.utils.sock_diag import STATE_CODES, connected, group_pairs, socket_snapshot, without_addresses
     logger.info("[FALLBACK] Détection psutil améliorée")
+    # Ports distincts par source (seuil historique : plus de 2), hôtes distincts et sources
+    # distinctes par destination, estimés par HyperLogLog sur CARDINALITY_WINDOW secondes
+    scan_tracker = ScanTracker('universal_psutil', port_threshold=2)
     
     def detect_dos_attack():
         try:
-            connections = psutil.net_connections()
-            ip_pair_counts = {}
-            port_scan_attempts = {}
+            # Sockets connectées lues par NETLINK_SOCK_DIAG (repli psutil hors Linux), en colonnes
+            connections = without_addresses(connected(socket_snapshot()))
             
-            for conn in connections:
-                if conn.raddr and hasattr(conn.raddr, 'ip') and conn.laddr and hasattr(conn.laddr, 'ip'):
-                    remote_ip = conn.raddr.ip  # L'attaquant
-                    local_ip = conn.laddr.ip   # La cible (ta machine)
-                    local_port = conn.laddr.port if conn.laddr else 0
-                    
-                    # IGNORER LES CONNEXIONS NORMALES ET LOCALES
-                    if (remote_ip in ['127.0.0.1', '0.0.0.0', '::1', local_ip] or
-                        local_ip in ['127.0.0.1', '0.0.0.0', '::1']):
-                        continue
-                    
-                    # PERMETTRE LES TESTS DEPUIS LA MACHINE VIRTUELLE
-                    # Ne pas ignorer les IPs du réseau local pour les tests
-                    # if (remote_ip.startswith('192.168.') or
-                    #     remote_ip.startswith('10.') or
-                    #     remote_ip.startswith('172.') or
-                    #     local_ip.startswith('192.168.') or
-                    #     local_ip.startswith('10.') or
-                    #     local_ip.startswith('172.')):
-                    #     continue
-                    
-                    # IGNORER LES CONNEXIONS ÉTABLIES NORMALES
-                    if hasattr(conn, 'status') and conn.status == 'ESTABLISHED':
-                        continue
-                    
-                    # IGNORER LES PORTS DE SERVICE NORMAUX (mais permettre les tests)
-                    # if local_port in [22, 80, 443, 53, 25, 110, 143, 993, 995]:
-                    #     continue
-                    
-                    # SEULEMENT COMPTER LES CONNEXIONS SUSPECTES
-                    key = (remote_ip, local_ip)
-                    if key not in ip_pair_counts:
-                        ip_pair_counts[key] = 0
-                    ip_pair_counts[key] += 1
-                    
-                    # Détecter les tentatives de port scan
-                    if local_port > 0:
-                        port_key = f"{remote_ip}_{local_ip}"
-                        if port_key not in port_scan_attempts:
-                            port_scan_attempts[port_key] = set()
-                        port_scan_attempts[port_key].add(local_port)
+            # IGNORER LES CONNEXIONS D'UNE IP VERS ELLE-MÊME ET LES CONNEXIONS TCP ÉTABLIES NORMALES
+            suspect = (((connections['raddr_hi'] != connections['laddr_hi'])
+                        | (connections['raddr_lo'] != connections['laddr_lo']))
+                       & ~((connections['proto'] == IPPROTO_TCP)
+                           & (connections['state'] == STATE_CODES['ESTABLISHED'])))
+            
+            # Connexions et ports distincts par paire (distante, locale) en un seul tri
+            pairs, port_pairs, ports = group_pairs(connections[suspect])
+            sources = [format_ip(hi, lo) for hi, lo in zip(pairs['raddr_hi'].tolist(), pairs['raddr_lo'].tolist())]
+            targets = [format_ip(hi, lo) for hi, lo in zip(pairs['laddr_hi'].tolist(), pairs['laddr_lo'].tolist())]
+            counts = pairs['connections'].tolist()
+            port_counts = pairs['ports'].tolist()
+            
+            # Ports, hôtes et sources distincts (scans, DDoS) : un triplet par (paire, port) distinct
+            findings = scan_tracker.observe(zip([sources[k] for k in port_pairs.tolist()],
+                                                [targets[k] for k in port_pairs.tolist()], ports.tolist()))
             
             # DÉTECTER D'ABORD LES DoS, PUIS LES PORT SCANS
-            dos_sources = set()
-            port_scan_sources = set()
+            # ÉTAPE 1: DoS (priorité haute) : beaucoup de connexions vers peu de ports
+            dos = (pairs['connections'] > 50) & (pairs['ports'] <= 5)
+            for k in np.flatnonzero(dos).tolist():
+                src_ip, dst_ip, count = sources[k], targets[k], counts[k]
+                logger.info(f"🚨 DoS détecté: {src_ip} -> {dst_ip} ({count} connexions, {port_counts[k]} ports)")
+                
+                # Créer alerte DoS
+                alert = {
+                    "sourceIp": src_ip,
+                    "destinationIp": dst_ip,
+                    "protocol": "tcp",
+                    "timestamp": datetime.now().isoformat(),
+                    "attackType": "DoS",
+                    "severity": "high",
+                    "confidence": min(count / 1000.0, 0.95)
+                }
+                store_alert(alert, connections_count=count)
+                logger.info(f"🚨 ALERTE DoS: {src_ip} -> {dst_ip} ({count} connexions)")
+            dos_sources = {(sources[k], targets[k]) for k in np.flatnonzero(dos).tolist()}
             
-            # ÉTAPE 1: Détecter les DoS (priorité haute)
-            for (src_ip, dst_ip), count in ip_pair_counts.items():
-                if count > 50:  # Seuil pour DoS
-                    # Vérifier si c'est vers peu de ports (DoS) ou beaucoup de ports (Port Scan)
-                    ports_for_pair = set()
-                    for conn in connections:
-                        # Corriger l'accès aux propriétés des connexions psutil
-                        try:
-                            remote_ip = conn.raddr.ip if hasattr(conn, 'raddr') and conn.raddr else None
-                            local_ip = conn.laddr.ip if hasattr(conn, 'laddr') and conn.laddr else None
-                            local_port = conn.laddr.port if hasattr(conn, 'laddr') and conn.laddr else None
-                            
-                            if remote_ip == src_ip and local_ip == dst_ip and local_port:
-                                ports_for_pair.add(local_port)
-                        except AttributeError:
-                            # Ignorer les connexions sans propriétés valides
-                            continue
-                    
-                    if len(ports_for_pair) <= 5:  # DoS: peu de ports, beaucoup de connexions
-                        dos_sources.add((src_ip, dst_ip))
-                        logger.info(f"🚨 DoS détecté: {src_ip} -> {dst_ip} ({count} connexions, {len(ports_for_pair)} ports)")
-                        
-                        # Créer alerte DoS
-                        if DATA_FILE.exists():
-                            with open(DATA_FILE, 'r') as f:
-                                data = json.load(f)
-                        else:
-                            data = {"alerts": [], "connections": [], "stats": {}}
-                        
-                        alert = {
-                            "id": int(time.time()),
-                            "sourceIp": src_ip,
-                            "destinationIp": dst_ip,
-                            "protocol": "tcp",
-                            "timestamp": datetime.now().isoformat(),
-                            "attackType": "DoS",
-                            "severity": "high",
-                            "confidence": min(count / 1000.0, 0.95)
-                        }
-                        data["alerts"].append(alert)
-                        data["alerts"] = data["alerts"][-20:]
-                        if "stats" not in data:
-                            data["stats"] = {}
-                        data["stats"]["total_alerts"] = data["stats"].get("total_alerts", 0) + 1
-                        data["stats"]["active_threats"] = data["stats"].get("active_threats", 0) + 1
-                        data["stats"]["total_connections"] = data["stats"].get("total_connections", 0) + count
-                        with open(DATA_FILE, "w") as f:
-                            json.dump(data, f, indent=2)
-                        logger.info(f"🚨 ALERTE DoS: {src_ip} -> {dst_ip} ({count} connexions)")
+            # ÉTAPE 2: Port Scans (ports ou hôtes distincts) et DDoS (sources distinctes), une alerte par fenêtre
+            scan = ~dos & (pairs['ports'] > scan_tracker.port_threshold)
+            port_scan_sources = {(sources[k], targets[k]) for k in np.flatnonzero(scan).tolist()}
             
-            # ÉTAPE 2: Détecter les Port Scans (seulement si pas déjà détecté comme DoS)
-            for key, ports in port_scan_attempts.items():
-                if len(ports) > 2:  # Seuil pour port scan
-                    remote_ip, local_ip = key.split('_')
-                    
-                    # Ne pas détecter comme port scan si déjà détecté comme DoS
-                    if (remote_ip, local_ip) in dos_sources:
-                        logger.info(f"⚠️ Ignorer Port Scan pour {remote_ip} -> {local_ip} (déjà détecté comme DoS)")
-                        continue
-                    
-                    # Vraie détection de port scan
-                    port_scan_sources.add((remote_ip, local_ip))
-                    logger.info(f"🔍 Port scan détecté: {remote_ip} -> {local_ip} ({len(ports)} ports)")
-                    
-                    if DATA_FILE.exists():
-                        with open(DATA_FILE, 'r') as f:
-                            data = json.load(f)
-                    else:
-                        data = {"alerts": [], "connections": [], "stats": {}}
-                    
+            for finding in findings:
+                remote_ip, local_ip = finding['sourceIp'], finding['destinationIp']
+                distinct = finding['distinct']
+                unit = 'ports' if finding['kind'] == 'ports' else 'hôtes'
+                
+                # Ne pas détecter comme port scan si déjà détecté comme DoS
+                if finding['kind'] == 'ports' and (remote_ip, local_ip) in dos_sources:
+                    logger.info(f"⚠️ Ignorer Port Scan pour {remote_ip} -> {local_ip} (déjà détecté comme DoS)")
+                    continue
+                
+                if finding['attackType'] == 'DDoS':
+                    logger.info(f"🌊 DDoS détecté: {distinct} sources -> {local_ip}")
                     alert = {
-                        "id": int(time.time()),
                         "sourceIp": remote_ip,
                         "destinationIp": local_ip,
                         "protocol": "tcp",
                         "timestamp": datetime.now().isoformat(),
-                        "attackType": "Port Scan",
-                        "severity": "medium",
-                        "confidence": min(len(ports) / 100.0, 0.9)
+                        "attackType": "DDoS",
+                        "severity": "high",
+                        "confidence": min(distinct / 1000.0, 0.95)
                     }
-                    data["alerts"].append(alert)
-                    data["alerts"] = data["alerts"][-20:]
-                    if "stats" not in data:
-                        data["stats"] = {}
-                    data["stats"]["total_alerts"] = data["stats"].get("total_alerts", 0) + 1
-                    data["stats"]["active_threats"] = data["stats"].get("active_threats", 0) + 1
-                    with open(DATA_FILE, "w") as f:
-                        json.dump(data, f, indent=2)
-                    logger.info(f"🔍 ALERTE Port Scan: {remote_ip} -> {local_ip} ({len(ports)} ports)")
-            
-            # ÉTAPE 3: Classification IA pour les cas ambigus
-            for (src_ip, dst_ip), count in ip_pair_counts.items():
-                # Ignorer si déjà détecté comme DoS ou Port Scan
-                if (src_ip, dst_ip) in dos_sources or (src_ip, dst_ip) in port_scan_sources:
+                    store_alert(alert, connections_count=distinct)
+                    logger.info(f"🚨 ALERTE DDoS: {distinct} sources distinctes -> {local_ip}")
                     continue
                 
-                # Utiliser l'IA pour classifier les cas ambigus
-                try:
-                    from app.model.ai_model import predict_intrusion
-                    from app.utils.preprocessing import preprocess_data
-                    
-                    # Préparer les données pour l'IA
-                    attack_data = {
-                        'source_ip': src_ip,
-                        'destination_ip': dst_ip,
-                        'connections_count': count,
-                        'bytes_sent': count * 100,  # Estimation
-                        'bytes_received': 0,
-                        'flag': 'S',  # SYN flag
-                        'duration': 0,
-                        'serror_rate': 0.3 if count > 10 else 0.1,
-                        'srv_serror_rate': 0.3 if count > 10 else 0.1,
-                        'rerror_rate': 0.1,
-                        'srv_rerror_rate': 0.1
-                    }
-                    
-                    # Analyser avec l'IA
-                    processed_data = preprocess_data(attack_data)
-                    is_intrusion, attack_type, confidence = predict_intrusion(processed_data)
-                    
-                    # Créer l'alerte basée sur la classification de l'IA
-                    if is_intrusion:
-                        if DATA_FILE.exists():
-                            with open(DATA_FILE, 'r') as f:
-                                data = json.load(f)
-                        else:
-                            data = {"alerts": [], "connections": [], "stats": {}}
-                        
-                        alert = {
-                            "id": int(time.time()),
-                            "sourceIp": src_ip,
-                            "destinationIp": dst_ip,
-                            "protocol": "tcp",
-                            "timestamp": datetime.now().isoformat(),
-                            "attackType": attack_type,  # Utiliser la classification de l'IA
-                            "severity": "high" if attack_type == "DoS" else "medium",
-                            "confidence": confidence
-                        }
-                        data["alerts"].append(alert)
-                        data["alerts"] = data["alerts"][-20:]
-                        if "stats" not in data:
-                            data["stats"] = {}
-                        data["stats"]["total_alerts"] = data["stats"].get("total_alerts", 0) + 1
-                        data["stats"]["active_threats"] = data["stats"].get("active_threats", 0) + 1
-                        data["stats"]["total_connections"] = data["stats"].get("total_connections", 0) + count
-                        data["stats"]["system_health"] = data["stats"].get("system_health", 100)
-                        with open(DATA_FILE, "w") as f:
-                            json.dump(data, f, indent=2)
-                        
-                        logger.info(f"🤖 ALERTE {attack_type} (IA): {src_ip} -> {dst_ip} ({count} connexions, confiance: {confidence:.2f})")
-                        logger.info(f"📊 Stats mises à jour: {data['stats']['total_alerts']} alertes, {data['stats']['active_threats']} menaces actives")
-                    
-                except Exception as e:
-                    logger.error(f"Erreur classification IA: {e}")
+                # Vraie détection de port scan
+                port_scan_sources.add((remote_ip, local_ip))
+                logger.info(f"🔍 Port scan détecté: {remote_ip} -> {local_ip} ({distinct} {unit})")
+                
+                alert = {
+                    "sourceIp": remote_ip,
+                    "destinationIp": local_ip,
+                    "protocol": "tcp",
+                    "timestamp": datetime.now().isoformat(),
+                    "attackType": "Port Scan",
+                    "severity": "medium",
+                    "confidence": min(distinct / 100.0, 0.9)
+                }
+                store_alert(alert)
+                logger.info(f"🔍 ALERTE Port Scan: {remote_ip} -> {local_ip} ({distinct} {unit})")
+            
+            # ÉTAPE 3: Classification IA des cas ambigus, toutes les paires en un seul lot
+            ambiguous = [k for k in np.flatnonzero(~dos & ~scan).tolist()
+                         if (sources[k], targets[k]) not in port_scan_sources]
+            if not ambiguous:
+                return
+            
+            flows = []
+            for k in ambiguous:
+                count = counts[k]
+                flows.append({
+                    'source_ip': sources[k],
+                    'destination_ip': targets[k],
+                    'connections_count': count,
+                    'bytes_sent': count * 100,  # Estimation
+                    'bytes_received': 0,
+                    'flag': 'S',  # SYN flag
+                    'duration': 0,
+                    'serror_rate': 0.3 if count > 10 else 0.1,
+                    'srv_serror_rate': 0.3 if count > 10 else 0.1,
+                    'rerror_rate': 0.1,
+                    'srv_rerror_rate': 0.1
+                })
+            try:
+                from app.model.ai_model import predict_intrusion_batch
+                results = predict_intrusion_batch(flows)
+            except Exception as e:
+                logger.error(f"Erreur classification IA du lot: {e}")
+                results = [None] * len(flows)
+            
+            for k, result in zip(ambiguous, results):
+                src_ip, dst_ip, count = sources[k], targets[k], counts[k]
+                if result is None:
                     # Fallback sur la détection simple pour les cas non classifiés
                     if count > 20:
-                        if DATA_FILE.exists():
-                            with open(DATA_FILE, 'r') as f:
-                                data = json.load(f)
-                        else:
-                            data = {"alerts": [], "connections": [], "stats": {}}
                         alert = {
-                            "id": int(time.time()),
                             "sourceIp": src_ip,
                             "destinationIp": dst_ip,
                             "protocol": "tcp",
@@ -358,18 +258,27 @@ def fallback_psutil_detector():
                             "severity": "high",
                             "confidence": min(count / 1000.0, 0.95)
                         }
-                        data["alerts"].append(alert)
-                        data["alerts"] = data["alerts"][-20:]
-                        if "stats" not in data:
-                            data["stats"] = {}
-                        data["stats"]["total_alerts"] = data["stats"].get("total_alerts", 0) + 1
-                        data["stats"]["active_threats"] = data["stats"].get("active_threats", 0) + 1
-                        data["stats"]["total_connections"] = data["stats"].get("total_connections", 0) + count
-                        data["stats"]["system_health"] = data["stats"].get("system_health", 100)
-                        with open(DATA_FILE, "w") as f:
-                            json.dump(data, f, indent=2)
+                        stats = store_alert(alert, connections_count=count)
                         logger.info(f"🚨 ALERTE DoS (fallback): {src_ip} -> {dst_ip} ({count} connexions)")
-                        logger.info(f"📊 Stats mises à jour: {data['stats']['total_alerts']} alertes, {data['stats']['active_threats']} menaces actives")
+                        logger.info(f"📥 File d'alertes: {stats['queue_depth']} en attente, {stats['dropped']} écartées")
+                    continue
+                
+                # Créer l'alerte basée sur la classification de l'IA
+                is_intrusion, attack_type, confidence = result
+                if is_intrusion:
+                    alert = {
+                        "sourceIp": src_ip,
+                        "destinationIp": dst_ip,
+                        "protocol": "tcp",
+                        "timestamp": datetime.now().isoformat(),
+                        "attackType": attack_type,  # Utiliser la classification de l'IA
+                        "severity": "high" if attack_type == "DoS" else "medium",
+                        "confidence": confidence
+                    }
+                    stats = store_alert(alert, connections_count=count)
+                    
+                    logger.info(f"🤖 ALERTE {attack_type} (IA): {src_ip} -> {dst_ip} ({count} connexions, confiance: {confidence:.2f})")
+                    logger.info(f"📥 File d'alertes: {stats['queue_depth']} en attente, {stats['dropped']} écartées")
         except Exception as e:
             logger.error(f"Erreur détection DoS: {e}")
     while True:
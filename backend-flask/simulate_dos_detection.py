@@ -3,12 +3,10 @@
 Script pour simuler et détecter une attaque DoS en temps réel
 """
 
-import json
 import time
 import psutil
 import socket
 from datetime import datetime
-from pathlib import Path
 import sys
 import os
 
@@ -17,10 +15,11 @@ sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
 
 from app.model.ai_model import predict_intrusion
 from app.utils.preprocessing import extract_features, normalize_features
+from app.utils.alert_store import get_alert_store
 
 class DOSDetector:
     def __init__(self):
-        self.data_file = Path(__file__).parent / 'app' / 'data' / 'network_data.json'
+        self.store = get_alert_store()
         self.dos_threshold = 20  # Nombre de connexions pour déclencher une alerte DoS
         self.connection_history = {}  # Historique des connexions par IP
         
@@ -98,36 +97,15 @@ class DOSDetector:
             return None
     
     def update_network_data(self, new_connections, dos_ips):
-        """Met à jour le fichier de données réseau"""
+        """Enregistre les connexions analysées et les alertes DoS dans le stockage SQLite"""
         try:
-            # Lire les données existantes
-            if self.data_file.exists():
-                with open(self.data_file, 'r') as f:
-                    data = json.load(f)
-            else:
-                data = {
-                    'connections': [],
-                    'alerts': [],
-                    'stats': {
-                        'total_connections': 0,
-                        'total_packets': 0,
-                        'total_alerts': 0,
-                        'active_threats': 0,
-                        'blocked_attempts': 0,
-                        'system_health': 100
-                    }
-                }
-            
             # Ajouter les nouvelles connexions
-            data['connections'].extend(new_connections)
-            
-            # Garder seulement les 100 dernières connexions
-            data['connections'] = data['connections'][-100:]
+            self.store.add_connections(new_connections)
             
             # Créer des alertes pour les attaques DoS détectées
+            alerts = []
             for ip, count in dos_ips:
-                alert = {
-                    'id': len(data['alerts']) + 1,
+                alerts.append({
                     'sourceIp': ip,
                     'destinationIp': 'Multiple',
                     'protocol': 'tcp',
@@ -135,21 +113,12 @@ class DOSDetector:
                     'attackType': 'DoS',
                     'severity': 'high',
                     'confidence': min(count / 100.0, 0.95)  # Confiance basée sur le nombre de connexions
-                }
-                data['alerts'].append(alert)
+                })
                 print(f"🚨 ALERTE DoS créée pour {ip} avec {count} connexions")
             
-            # Garder seulement les 50 dernières alertes
-            data['alerts'] = data['alerts'][-50:]
-            
-            # Mettre à jour les statistiques
-            data['stats']['total_connections'] = len(data['connections'])
-            data['stats']['total_alerts'] = len(data['alerts'])
-            data['stats']['active_threats'] = len([a for a in data['alerts'] if a['severity'] == 'high'])
-            
-            # Sauvegarder les données
-            with open(self.data_file, 'w') as f:
-                json.dump(data, f, indent=2)
+            # Une seule transaction pour le lot, total_connections incrémenté
+            self.store.add_alerts(alerts)
+            self.store.increment_stats(total_connections=len(new_connections))
             
             print(f"✅ Données mises à jour: {len(new_connections)} connexions, {len(dos_ips)} attaques DoS détectées")
             
@@ -208,7 +177,7 @@ def main():
     detector.monitor_network(duration=120)  # 2 minutes
     
     print("\n📊 Résumé:")
-    print("Vérifiez le fichier network_data.json pour voir les alertes générées")
+    print("Vérifiez le stockage des alertes (app/data/ids.db) ou /api/stats/alerts")
     print("Le frontend devrait maintenant afficher les alertes DoS")
 
 if __name__ == "__main__":
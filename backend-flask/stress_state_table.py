@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Test de charge de l'état des détecteurs : un flood SYN à sources usurpées
+(10 millions d'adresses IPv4 aléatoires par défaut) traverse
+ExternalDOSDetector.analyze_batch par lots NumPy, sans capture réseau. La RSS
+du processus est relevée tous les --sample paquets : elle doit rester plate
+une fois les tables d'état pleines (DETECTOR_STATE_MAX_KEYS clés par table).
+
+Un attaquant fixe envoie en plus --attacker SYN par lot : son alerte doit
+toujours être levée malgré les évictions.
+
+    python stress_state_table.py
+    python stress_state_table.py --packets 2000000 --max-keys 20000
+    python stress_state_table.py --max-keys 0   # sans borne, pour comparaison
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import psutil
+
+sys.path.append(os.path.dirname(__file__))
+
+from app.config import DETECTOR_STATE_MAX_KEYS
+from app.utils.packet_ring import FrameBatch
+from app.utils.sliding_window import SlidingWindowCounter
+from app.utils.state_table import state_tables_metrics
+
+PACKET_LEN = 40
+ATTACKER = (10 << 24) | 66  # 10.0.0.66
+TARGET = (192 << 24) | (168 << 16) | 1  # 192.168.0.1
+
+
+class CountingSink:
+    policy = 'count'
+
+    def __init__(self):
+        self.alerts = []
+
+    def submit(self, alert, connections_count=0):
+        self.alerts.append(alert)
+        return True
+
+
+def build_batch(rng: np.random.Generator, size: int, attacker: int) -> FrameBatch:
+    """Lot de size paquets IPv4+TCP SYN (40 octets) ; les attacker derniers viennent de ATTACKER."""
+    packets = np.zeros((size, PACKET_LEN), dtype=np.uint8)
+    packets[:, 0] = 0x45
+    packets[:, 3] = PACKET_LEN
+    packets[:, 8] = 64
+    packets[:, 9] = 6
+    sources = rng.integers(1, 1 << 32, size, dtype=np.uint32)
+    sources[size - attacker:] = ATTACKER
+    packets[:, 12:16] = sources.astype('>u4').view(np.uint8).reshape(size, 4)
+    packets[:, 16:20] = np.array([TARGET], dtype='>u4').view(np.uint8)
+    packets[:, 20:22] = rng.integers(1024, 65535, size, dtype=np.uint16).astype('>u2').view(np.uint8).reshape(size, 2)
+    packets[:, 22:24] = np.array([443], dtype='>u2').view(np.uint8)
+    packets[:, 32] = 5 << 4
+    packets[:, 33] = 0x02
+    offsets = np.arange(size, dtype=np.int64) * PACKET_LEN
+    lengths = np.full(size, PACKET_LEN, dtype=np.int64)
+    return FrameBatch(memoryview(packets.reshape(-1)), offsets, lengths)
+
+
+def rss_mb() -> float:
+    return psutil.Process().memory_info().rss / 2 ** 20
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mémoire de l'état des détecteurs sous flood à sources usurpées")
+    parser.add_argument('--packets', type=int, default=10_000_000)
+    parser.add_argument('--batch', type=int, default=4096)
+    parser.add_argument('--sample', type=int, default=1_000_000, help='paquets entre deux relevés de RSS')
+    parser.add_argument('--max-keys', type=int, default=DETECTOR_STATE_MAX_KEYS, help='0 : sans borne')
+    parser.add_argument('--attacker', type=int, default=8, help="SYN de l'attaquant fixe par lot")
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    from external_dos_detector import ExternalDOSDetector
+
+    sink = CountingSink()
+    detector = ExternalDOSDetector(capture_backend='recvfrom', workers=1, sink=sink)
+    detector.capture_filter = None
+    max_keys = args.max_keys or sys.maxsize
+    syn_flood = detector.pipeline.plugin('syn_flood')
+    syn_flood.flood_windows = SlidingWindowCounter(window=10, max_keys=max_keys, name='stress.flood_windows')
+
+    rng = np.random.default_rng(args.seed)
+    print(f"🧪 {args.packets:,} SYN à sources aléatoires, lots de {args.batch}, "
+          f"max_keys={'∞' if not args.max_keys else f'{max_keys:,}'}")
+    print(f"{'paquets':>12} {'RSS (Mo)':>9} {'clés':>9} {'évictions':>11} {'estimé (Mo)':>12} {'paquets/s':>10}")
+
+    baseline = rss_mb()
+    samples = []
+    sent, next_sample = 0, args.sample
+    start = time.perf_counter()
+    while sent < args.packets:
+        size = min(args.batch, args.packets - sent)
+        detector.analyze_batch(build_batch(rng, size, min(args.attacker, size)))
+        sent += size
+        if sent >= next_sample or sent == args.packets:
+            next_sample += args.sample
+            metrics = syn_flood.flood_windows.metrics()
+            rss = rss_mb()
+            samples.append(rss)
+            print(f"{sent:>12,} {rss:>9.1f} {metrics['keys']:>9,} {metrics['evictions']:>11,} "
+                  f"{metrics['approx_bytes'] / 2 ** 20:>12.1f} {sent / (time.perf_counter() - start):>10,.0f}")
+
+    # Croissance sur la seconde moitié du test : ~0 si l'état est borné
+    half = samples[len(samples) // 2:]
+    print()
+    print(f"RSS initiale {baseline:.1f} Mo, finale {samples[-1]:.1f} Mo, "
+          f"croissance sur la seconde moitié {half[-1] - half[0]:+.1f} Mo")
+    print(f"Alertes de l'attaquant fixe : {sum(a['sourceIp'] == '10.0.0.66' for a in sink.alerts)}")
+    state = state_tables_metrics()
+    print(f"Tables d'état : {state['keys']:,} clés, ~{state['approx_bytes'] / 2 ** 20:.1f} Mo estimés")
+
+
+if __name__ == '__main__':
+    main()
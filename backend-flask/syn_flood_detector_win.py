@@ -1,24 +1,17 @@
 from scapy.all import sniff, IP, TCP
-from collections import defaultdict, deque
 from datetime import datetime
-import json
-import os
 
-DATA_FILE = os.path.join(os.path.dirname(__file__), "app", "data", "network_data.json")
+from app.utils.alert_sink import emit_alert
+from app.utils.sliding_window import SlidingWindowCounter
+
 SYN_THRESHOLD = 20  # nombre de SYN en 5s pour alerte
 WINDOW = 5  # secondes
 
-syn_counts = defaultdict(lambda: deque())
+syn_counts = SlidingWindowCounter(window=WINDOW, name='syn_flood_win.syn_counts')  # SYN par IP source sur WINDOW secondes
 
 def save_alert(source_ip, count):
     try:
-        if os.path.exists(DATA_FILE):
-            with open(DATA_FILE, "r") as f:
-                data = json.load(f)
-        else:
-            data = {"alerts": [], "connections": [], "stats": {}}
         alert = {
-            "id": int(datetime.now().timestamp()),
             "sourceIp": source_ip,
             "destinationIp": "Votre machine",
             "protocol": "tcp",
@@ -27,10 +20,7 @@ def save_alert(source_ip, count):
             "severity": "high",
             "confidence": min(count / 100.0, 0.99)
         }
-        data["alerts"].append(alert)
-        data["alerts"] = data["alerts"][-20:]
-        with open(DATA_FILE, "w") as f:
-            json.dump(data, f, indent=2)
+        emit_alert(alert, connections_count=count)
         print(f"🚨 ALERTE SYN FLOOD: {source_ip} ({count} SYN en {WINDOW}s)")
     except Exception as e:
         print(f"Erreur sauvegarde alerte: {e}")
@@ -38,13 +28,9 @@ def save_alert(source_ip, count):
 def syn_callback(pkt):
     if IP in pkt and TCP in pkt and pkt[TCP].flags & 0x02:
         src = pkt[IP].src
-        now = datetime.now().timestamp()
-        syn_counts[src].append(now)
-        # Nettoyer la fenêtre
-        while syn_counts[src] and now - syn_counts[src][0] > WINDOW:
-            syn_counts[src].popleft()
-        if len(syn_counts[src]) > SYN_THRESHOLD:
-            save_alert(src, len(syn_counts[src]))
+        count = syn_counts.add(src)
+        if count > SYN_THRESHOLD:
+            save_alert(src, count)
 
 if __name__ == "__main__":
     print("Sniffing sur toutes les interfaces... (Ctrl+C pour arrêter)")
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Tests de l'ordonnanceur adaptatif des scans (adaptive_scheduler) : intervalle
+selon l'activité, plafond CPU, boucle run() et registre des métriques.
+
+    python test_adaptive_scheduler.py
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.dirname(__file__))
+
+from app.utils.adaptive_scheduler import AdaptiveScheduler, schedulers_metrics
+
+
+def check(label, passed):
+    print(f"   {'✅' if passed else '❌'} {label}")
+    return passed
+
+
+def scheduler(name, **options):
+    settings = dict(min_interval=0.5, max_interval=15, base_interval=3, busy_churn=100, backoff=1.5,
+                    cpu_budget=0.05)
+    settings.update(options)
+    return AdaptiveScheduler(name, **settings)
+
+
+def test_activity():
+    """Intervalle divisé par 2 sous activité, allongé au repos, borné des deux côtés"""
+    print("\n=== Intervalle selon l'activité ===")
+    s = scheduler('test.activity')
+    attack = [s.record(0.01, 0.001, alerts=1) for _ in range(5)]
+    churn = s.record(0.01, 0.001, churn=150)
+    quiet = [s.record(0.01, 0.001) for _ in range(12)]
+    s.record(0.01, 0.001, churn=10)
+    steady = s.interval
+    return all([
+        check(f"Alertes : {attack}", attack[:3] == [1.5, 0.75, 0.5] and attack[-1] == 0.5),
+        check("Churn au-delà du seuil : plancher conservé", churn == 0.5),
+        check(f"Repos : ×1.5 par cycle jusqu'à 15 s ({quiet[0]}, ..., {quiet[-1]})",
+              quiet[0] == 0.75 and quiet[-1] == 15 and quiet == sorted(quiet)),
+        check("Faible churn : intervalle inchangé", steady == 15),
+    ])
+
+
+def test_cpu_budget():
+    """Un cycle coûteux espace les suivants pour rester sous le budget CPU"""
+    print("\n=== Plafond CPU ===")
+    s = scheduler('test.budget')
+    interval = s.record(0.2, 0.2, alerts=1)
+    metrics = s.metrics()
+    return all([
+        check(f"0,2 s CPU à 5 % : {interval} s entre deux débuts", abs(interval - 4.0) < 1e-9),
+        check("Intervalle voulu par l'activité conservé à part", metrics['activity_interval'] == 1.5),
+        check(f"Part CPU {metrics['cpu_fraction']} dans le budget",
+              metrics['budget_limited'] == 1 and metrics['cpu_fraction'] <= 0.05 + 1e-9),
+    ])
+
+
+def test_run():
+    """Boucle run() : activité rapportée par le cycle, erreurs comptées, arrêt"""
+    print("\n=== Boucle run() ===")
+    s = scheduler('test.run', min_interval=0.001, base_interval=0.004, max_interval=0.05, cpu_budget=1.0)
+    outcomes = iter([(0, 1), (200, 0), None, ValueError('boom'), (0, 0)])
+
+    def cycle():
+        outcome = next(outcomes, None)
+        if isinstance(outcome, Exception):
+            raise outcome
+        if s.cycles >= 6:
+            s.stop()
+        return outcome
+
+    s.run(cycle)
+    metrics = s.metrics()
+    return all([
+        check(f"{metrics['cycles']} cycles puis arrêt", metrics['cycles'] == 7),
+        check("Exception d'un cycle comptée sans arrêter la boucle", metrics['errors'] == 1),
+        check(f"Intervalle revenu au repos : {metrics['activity_interval']}",
+              metrics['activity_interval'] > 0.001 and metrics['max_lag'] < 1.0),
+    ])
+
+
+def test_registry():
+    """Noms uniques dans le registre exposé par /api/stats/schedulers"""
+    print("\n=== Registre ===")
+    first = scheduler('test.registry')
+    second = scheduler('test.registry')
+    names = [m['name'] for m in schedulers_metrics()['schedulers']]
+    return all([
+        check("Second ordonnanceur suffixé #2", second.name == 'test.registry#2'),
+        check("Les deux exposés", first.name in names and second.name in names),
+    ])
+
+
+def main():
+    """Fonction principale de test"""
+    print("🔍 Test de l'ordonnanceur adaptatif des scans")
+    print("=" * 50)
+
+    tests = [
+        test_activity,
+        test_cpu_budget,
+        test_run,
+        test_registry,
+    ]
+    passed = sum(1 for test in tests if test())
+
+    print("\n" + "=" * 50)
+    print(f"📊 Résultats: {passed}/{len(tests)} tests réussis")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
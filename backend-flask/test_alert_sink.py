@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Tests du puits d'alertes asynchrone (alert_sink) sur une base temporaire :
+écriture par lots, abonnés et politiques de contre-pression quand le thread
+d'écriture est bloqué.
+
+    python test_alert_sink.py
+"""
+
+import os
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+sys.path.append(os.path.dirname(__file__))
+
+from app.utils.alert_sink import BLOCK, DROP_OLDEST, AlertSink
+from app.utils.alert_store import AlertStore
+
+
+class GatedStore(AlertStore):
+    """Stockage dont l'écriture attend gate : simule un disque lent pour remplir la file."""
+
+    def __init__(self, db_path):
+        super().__init__(db_path, legacy_file=None)
+        self.gate = threading.Event()
+        self.writing = threading.Event()
+
+    def add_alerts(self, alerts, connections_count=0):
+        self.writing.set()
+        self.gate.wait(10)
+        return super().add_alerts(alerts, connections_count=connections_count)
+
+
+def check(label, passed):
+    print(f"   {'✅' if passed else '❌'} {label}")
+    return passed
+
+
+def alert(number):
+    return {'sourceIp': f'10.0.0.{number % 250}', 'attackType': 'DoS', 'severity': 'high', 'number': number}
+
+
+def test_group_commit():
+    """Alertes écrites par lots, abonnés notifiés avec les ids SQLite"""
+    print("\n=== Écriture par lots ===")
+    with tempfile.TemporaryDirectory() as folder:
+        store = AlertStore(Path(folder) / 'alerts.db', legacy_file=None)
+        sink = AlertSink(store, max_batch=50, flush_interval_ms=20)
+        notified = []
+        sink.add_listener(lambda stored, count: notified.extend(a['id'] for a in stored))
+        accepted = all(sink.submit(alert(i), connections_count=1) for i in range(120))
+        flushed = sink.flush()
+        sink.stop()
+        metrics = sink.metrics()
+        results = [
+            check("120 alertes acceptées et écrites", accepted and flushed and metrics['written'] == 120),
+            check(f"{metrics['batches']} transactions pour 120 alertes", 3 <= metrics['batches'] < 120),
+            check("Ordre de dépôt conservé", [a['number'] for a in store.get_alerts()] == list(range(120))),
+            check("Abonné notifié de chaque id", sorted(notified) == [a['id'] for a in store.get_alerts()]),
+            check("Connexions comptées", store.get_stats()['total_connections'] == 120),
+            check("Thread d'écriture arrêté", not metrics['writer_running']),
+        ]
+        store.close()
+    return all(results)
+
+
+def test_drop_oldest():
+    """File pleine pendant une écriture lente : les plus anciennes sont écartées"""
+    print("\n=== Politique drop_oldest ===")
+    with tempfile.TemporaryDirectory() as folder:
+        store = GatedStore(Path(folder) / 'alerts.db')
+        sink = AlertSink(store, max_queue=5, max_batch=1, flush_interval_ms=10, policy=DROP_OLDEST)
+        sink.submit(alert(0))
+        store.writing.wait(5)
+        for i in range(1, 11):
+            sink.submit(alert(i))
+        depth = sink.metrics()['queue_depth']
+        store.gate.set()
+        sink.stop()
+        metrics = sink.metrics()
+        numbers = [a['number'] for a in store.get_alerts()]
+        results = [
+            check("File plafonnée à 5", depth == 5),
+            check("5 alertes écartées", metrics['dropped_oldest'] == 5 and metrics['dropped'] == 5),
+            check("Alerte en cours d'écriture et 5 plus récentes conservées", numbers == [0, 6, 7, 8, 9, 10]),
+        ]
+        store.close()
+    return all(results)
+
+
+def test_block():
+    """Politique block : le détecteur attend, puis abandonne après block_timeout"""
+    print("\n=== Politique block ===")
+    with tempfile.TemporaryDirectory() as folder:
+        store = GatedStore(Path(folder) / 'alerts.db')
+        sink = AlertSink(store, max_queue=2, max_batch=1, flush_interval_ms=10, policy=BLOCK,
+                         block_timeout=0.05)
+        sink.submit(alert(0))
+        store.writing.wait(5)
+        queued = [sink.submit(alert(i)) for i in (1, 2)]
+        refused = sink.submit(alert(3))
+        store.gate.set()
+        sink.stop()
+        metrics = sink.metrics()
+        results = [
+            check("File non pleine : alertes acceptées", queued == [True, True]),
+            check("File pleine au-delà du délai : alerte refusée", not refused and metrics['dropped_full'] == 1),
+            check("Alertes acceptées toutes écrites", [a['number'] for a in store.get_alerts()] == [0, 1, 2]),
+        ]
+        store.close()
+    return all(results)
+
+
+def main():
+    """Fonction principale de test"""
+    print("🔍 Test du puits d'alertes asynchrone")
+    print("=" * 50)
+
+    tests = [
+        test_group_commit,
+        test_drop_oldest,
+        test_block,
+    ]
+    passed = sum(1 for test in tests if test())
+
+    print("\n" + "=" * 50)
+    print(f"📊 Résultats: {passed}/{len(tests)} tests réussis")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
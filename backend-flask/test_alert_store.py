@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Tests du stockage SQLite des alertes (alert_store) sur une base temporaire :
+insertion par lot, compteurs, filtres, suppression et import unique de
+l'ancien network_data.json.
+
+    python test_alert_store.py
+"""
+
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.append(os.path.dirname(__file__))
+
+from app.utils.alert_store import AlertStore
+
+
+def check(label, passed):
+    print(f"   {'✅' if passed else '❌'} {label}")
+    return passed
+
+
+def alert(source_ip, attack_type, severity):
+    return {'sourceIp': source_ip, 'destinationIp': '192.168.1.10', 'attackType': attack_type,
+            'severity': severity, 'confidence': 0.9}
+
+
+def test_alerts():
+    """Lot d'alertes : ids croissants, compteurs, filtres, limite et suppression"""
+    print("\n=== Alertes ===")
+    with tempfile.TemporaryDirectory() as folder:
+        store = AlertStore(Path(folder) / 'alerts.db', legacy_file=None)
+        stored = store.add_alerts([alert('10.0.0.1', 'DoS', 'high'), alert('10.0.0.2', 'Probe', 'medium'),
+                                   alert('10.0.0.1', 'DoS', 'high')], connections_count=30)
+        ids = [a['id'] for a in stored]
+        stats = store.get_stats()
+        results = [
+            check("Ids croissants", ids == sorted(ids) and len(set(ids)) == 3),
+            check("Compteurs : 3 alertes, 2 menaces, 30 connexions, taux 10 %",
+                  (stats['total_alerts'], stats['active_threats'], stats['total_connections'],
+                   stats['detection_rate']) == (3, 2, 30, 10.0)),
+            check("Filtre par type", [a['id'] for a in store.get_alerts(attack_type='DoS')] == [ids[0], ids[2]]),
+            check("Les 2 plus récentes, dans l'ordre", [a['id'] for a in store.get_alerts(limit=2)] == ids[1:]),
+            check("Depuis un id", [a['id'] for a in store.get_alerts(since_id=ids[0])] == ids[1:]),
+            check("Regroupement par source", store.count_alerts_by('source_ip') == {'10.0.0.1': 2, '10.0.0.2': 1}),
+        ]
+        deleted = store.delete_alerts([ids[0], ids[1]])
+        stats = store.get_stats()
+        results.append(check("Suppression : compteurs décrémentés",
+                             deleted == 2 and (stats['total_alerts'], stats['active_threats']) == (1, 1)))
+        store.close()
+    return all(results)
+
+
+def test_legacy_import():
+    """Import de network_data.json une seule fois, valeurs non scalaires conservées en JSON"""
+    print("\n=== Import de network_data.json ===")
+    with tempfile.TemporaryDirectory() as folder:
+        legacy = Path(folder) / 'network_data.json'
+        legacy.write_text(json.dumps({
+            'connections': [{'source_ip': '10.0.0.1', 'dest_ip': '192.168.1.10'}],
+            'alerts': [alert('10.0.0.1', 'DoS', 'high')],
+            'stats': {'system_health': 90, 'total_alerts': 99, 'top_sources': ['10.0.0.1'],
+                      'by_type': {'DoS': 1}},
+        }))
+        store = AlertStore(Path(folder) / 'alerts.db', legacy_file=legacy)
+        stats = store.get_stats()
+        again = AlertStore(Path(folder) / 'alerts.db', legacy_file=legacy)
+        results = [
+            check("Alertes et connexions importées", store.count_alerts() == 1 and store.count_connections() == 1),
+            check("Compteurs recalculés, total_alerts du fichier ignoré",
+                  stats['total_alerts'] == 1 and stats['system_health'] == 90),
+            check("Liste et dictionnaire importés en JSON",
+                  json.loads(stats['top_sources']) == ['10.0.0.1'] and json.loads(stats['by_type']) == {'DoS': 1}),
+            check("Second démarrage : pas de réimport", again.count_alerts() == 1),
+        ]
+        store.close()
+        again.close()
+    return all(results)
+
+
+def main():
+    """Fonction principale de test"""
+    print("🔍 Test du stockage SQLite des alertes")
+    print("=" * 50)
+
+    tests = [
+        test_alerts,
+        test_legacy_import,
+    ]
+    passed = sum(1 for test in tests if test())
+
+    print("\n" + "=" * 50)
+    print(f"📊 Résultats: {passed}/{len(tests)} tests réussis")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Tests des programmes BPF classiques (bpf_filter) sans réseau : filtre de
+capture et répartition PACKET_FANOUT, exécutés par un petit interpréteur sur
+des paquets construits.
+
+    python test_bpf_filter.py
+"""
+
+import os
+import socket
+import struct
+import sys
+
+sys.path.append(os.path.dirname(__file__))
+
+from app.utils.bpf_filter import (BPF_AND_K, BPF_JEQ_K, BPF_JSET_K, BPF_LD_ABS, BPF_LDB_ABS, BPF_LDB_IND,
+                                  BPF_LDH_ABS, BPF_LDH_IND, BPF_LDXB_MSH, BPF_MOD_K, BPF_RET_A, BPF_RET_K,
+                                  BPF_TAX, BPF_XOR_X, SKF_NET_OFF, TCP_RST, TCP_SYN, FilterSpec, compile_filter,
+                                  fanout_program)
+from app.utils.packet_decoder import IPPROTO_ICMP, IPPROTO_TCP, IPPROTO_UDP, TCP_ACK
+
+CLIENT, SERVER = '10.0.0.1', '192.168.1.10'
+CLIENT6, SERVER6 = '2001:db8::1', '2001:db8::10'
+
+
+def tcp(sport, dport, flags, payload=b''):
+    return struct.pack('!HHIIBBHHH', sport, dport, 0, 0, 5 << 4, flags, 8192, 0, 0) + payload
+
+
+def udp(sport, dport, payload=b''):
+    return struct.pack('!HHHH', sport, dport, 8 + len(payload), 0) + payload
+
+
+def ipv4(src, dst, proto, l4, options=b'', fragment=0):
+    ihl = 5 + len(options) // 4
+    header = struct.pack('!BBHHHBBH4s4s', 0x40 | ihl, 0, ihl * 4 + len(l4), 1, fragment, 64, proto, 0,
+                         socket.inet_aton(src), socket.inet_aton(dst))
+    return header + options + l4
+
+
+def ipv6(src, dst, proto, l4):
+    return struct.pack('!IHBB16s16s', 6 << 28, len(l4), proto, 64, socket.inet_pton(socket.AF_INET6, src),
+                       socket.inet_pton(socket.AF_INET6, dst)) + l4
+
+
+def check(label, passed):
+    print(f"   {'✅' if passed else '❌'} {label}")
+    return passed
+
+
+def run_bpf(program, packet):
+    """Interprète les instructions utilisées par bpf_filter (offsets SKF_NET_OFF) ; 0 si lecture hors paquet."""
+    a = x = pc = 0
+
+    def load(k, size):
+        k -= SKF_NET_OFF
+        if k < 0 or k + size > len(packet):
+            raise IndexError
+        return int.from_bytes(packet[k:k + size], 'big')
+
+    try:
+        while True:
+            code, jt, jf, k = program[pc]
+            pc += 1
+            if code == BPF_LD_ABS:
+                a = load(k, 4)
+            elif code == BPF_LDH_ABS:
+                a = load(k, 2)
+            elif code == BPF_LDB_ABS:
+                a = load(k, 1)
+            elif code == BPF_LDH_IND:
+                a = load(x + k, 2)
+            elif code == BPF_LDB_IND:
+                a = load(x + k, 1)
+            elif code == BPF_LDXB_MSH:
+                x = 4 * (load(k, 1) & 0xf)
+            elif code == BPF_AND_K:
+                a &= k
+            elif code == BPF_XOR_X:
+                a ^= x
+            elif code == BPF_MOD_K:
+                a %= k
+            elif code == BPF_TAX:
+                x = a
+            elif code == BPF_JEQ_K:
+                pc += jt if a == k else jf
+            elif code == BPF_JSET_K:
+                pc += jt if a & k else jf
+            elif code == BPF_RET_K:
+                return k
+            elif code == BPF_RET_A:
+                return a
+            else:
+                raise ValueError(f"instruction inconnue {code:#x}")
+    except IndexError:
+        return 0
+
+
+def test_compile_filter():
+    """Paquets acceptés ou rejetés par le filtre noyau compilé"""
+    print("\n=== Filtre BPF ===")
+    spec = FilterSpec(TCP_SYN | TCP_RST, (22,), ('udp',))
+    program = compile_filter(spec)
+    wide = compile_filter(FilterSpec(TCP_SYN, (), (), all_tcp=True))
+    cases = [
+        ("SYN IPv4 accepté", program, ipv4(CLIENT, SERVER, IPPROTO_TCP, tcp(1, 80, TCP_SYN)), True),
+        ("SYN IPv4 avec options IP accepté", program,
+         ipv4(CLIENT, SERVER, IPPROTO_TCP, tcp(1, 80, TCP_SYN), options=b'\x01' * 12), True),
+        ("ACK vers un port non surveillé rejeté", program, ipv4(CLIENT, SERVER, IPPROTO_TCP, tcp(1, 80, TCP_ACK)),
+         False),
+        ("ACK vers le port 22 accepté", program, ipv4(CLIENT, SERVER, IPPROTO_TCP, tcp(1, 22, TCP_ACK)), True),
+        ("UDP accepté", program, ipv4(CLIENT, SERVER, IPPROTO_UDP, udp(1, 53)), True),
+        ("ICMP rejeté", program, ipv4(CLIENT, SERVER, IPPROTO_ICMP, b'\x08' + b'\0' * 7), False),
+        ("Fragment TCP rejeté", program, ipv4(CLIENT, SERVER, IPPROTO_TCP, tcp(1, 80, TCP_SYN), fragment=10),
+         False),
+        ("RST IPv6 accepté", program, ipv6(CLIENT6, SERVER6, IPPROTO_TCP, tcp(1, 80, TCP_RST)), True),
+        ("ACK IPv6 rejeté", program, ipv6(CLIENT6, SERVER6, IPPROTO_TCP, tcp(1, 80, TCP_ACK)), False),
+        ("all_tcp : ACK avec données accepté", wide,
+         ipv4(CLIENT, SERVER, IPPROTO_TCP, tcp(1, 80, TCP_ACK, b'data')), True),
+        ("all_tcp : ACK IPv6 accepté", wide, ipv6(CLIENT6, SERVER6, IPPROTO_TCP, tcp(1, 80, TCP_ACK)), True),
+        ("all_tcp : UDP rejeté", wide, ipv4(CLIENT, SERVER, IPPROTO_UDP, udp(1, 53)), False),
+    ]
+    results = [check(label, bool(run_bpf(prog, packet)) == accepted) for label, prog, packet, accepted in cases]
+    empty = compile_filter(FilterSpec())
+    results.append(check("Spécification vide : tout rejeté",
+                         not run_bpf(empty, ipv4(CLIENT, SERVER, IPPROTO_TCP, tcp(1, 80, TCP_SYN)))))
+    return all(results)
+
+
+def test_fanout_program():
+    """Même worker dans les deux sens d'une paire, en IPv4 comme en IPv6"""
+    print("\n=== Répartition PACKET_FANOUT ===")
+    program = fanout_program(4)
+    results = []
+    for name, build, client, server in (('IPv4', ipv4, CLIENT, SERVER), ('IPv6', ipv6, CLIENT6, SERVER6)):
+        prefix = '10.0.0.' if name == 'IPv4' else '2001:db8::'
+        workers = set()
+        symmetric = True
+        for host in range(2, 66):
+            other = f"{prefix}{host if name == 'IPv4' else format(host, 'x')}"
+            there = run_bpf(program, build(client, other, IPPROTO_TCP, tcp(1, 80, TCP_SYN)))
+            back = run_bpf(program, build(other, client, IPPROTO_TCP, tcp(80, 1, TCP_SYN | TCP_ACK)))
+            symmetric &= there == back
+            workers.add(there)
+        results.append(check(f"{name} : symétrique, {len(workers)} workers utilisés sur 4",
+                             symmetric and workers == {0, 1, 2, 3}))
+    return all(results)
+
+
+def main():
+    """Fonction principale de test"""
+    print("🔍 Test des programmes BPF (filtre noyau, fanout)")
+    print("=" * 50)
+
+    tests = [
+        test_compile_filter,
+        test_fanout_program,
+    ]
+    passed = sum(1 for test in tests if test())
+
+    print("\n" + "=" * 50)
+    print(f"📊 Résultats: {passed}/{len(tests)} tests réussis")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
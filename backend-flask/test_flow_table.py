@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Tests de la table de flux bidirectionnelle (flow_table) sans réseau : flags
+NSL-KDD de connexions complètes décodées depuis des paquets bruts et agrégats
+par paire lus par NetworkScanner.
+
+    python test_flow_table.py
+"""
+
+import os
+import socket
+import struct
+import sys
+
+sys.path.append(os.path.dirname(__file__))
+
+from app.utils.flow_table import FlowTable, PairFlows
+from app.utils.packet_decoder import IPPROTO_TCP, TCP_ACK, TCP_FIN, TCP_RST, TCP_SYN, PacketDecoder
+from app.utils.packet_ring import FrameBatch
+
+CLIENT, SERVER = '10.0.0.1', '192.168.1.10'
+
+
+def tcp(sport, dport, flags, payload=b''):
+    return struct.pack('!HHIIBBHHH', sport, dport, 0, 0, 5 << 4, flags, 8192, 0, 0) + payload
+
+
+def ipv4(src, dst, proto, l4, options=b'', fragment=0):
+    ihl = 5 + len(options) // 4
+    header = struct.pack('!BBHHHBBH4s4s', 0x40 | ihl, 0, ihl * 4 + len(l4), 1, fragment, 64, proto, 0,
+                         socket.inet_aton(src), socket.inet_aton(dst))
+    return header + options + l4
+
+
+def decode(frames):
+    return PacketDecoder().decode(FrameBatch.from_frames(frames))
+
+
+def check(label, passed):
+    print(f"   {'✅' if passed else '❌'} {label}")
+    return passed
+
+
+def test_flow_flags():
+    """Flags NSL-KDD de connexions complètes décodées depuis des paquets bruts"""
+    print("\n=== Flags de la table de flux ===")
+    scenarios = {
+        'SF': [(True, TCP_SYN, b''), (False, TCP_SYN | TCP_ACK, b''), (True, TCP_ACK, b'a' * 100),
+               (False, TCP_ACK, b'b' * 300), (True, TCP_FIN | TCP_ACK, b''), (False, TCP_FIN | TCP_ACK, b'')],
+        'S0': [(True, TCP_SYN, b''), (True, TCP_SYN, b'')],
+        'REJ': [(True, TCP_SYN, b''), (False, TCP_RST | TCP_ACK, b'')],
+        'RSTO': [(True, TCP_SYN, b''), (False, TCP_SYN | TCP_ACK, b''), (True, TCP_ACK, b'c' * 40),
+                 (True, TCP_RST, b'')],
+    }
+    expected_bytes = {'SF': (100, 300), 'S0': (0, 0), 'REJ': (0, 0), 'RSTO': (40, 0)}
+    results = []
+    for port, (flag, steps) in enumerate(scenarios.items(), start=41000):
+        table = FlowTable(clock=lambda: 0.0)
+        done = []
+        for step, (outbound, flags, payload) in enumerate(steps):
+            if outbound:
+                frame = ipv4(CLIENT, SERVER, IPPROTO_TCP, tcp(port, 80, flags, payload))
+            else:
+                frame = ipv4(SERVER, CLIENT, IPPROTO_TCP, tcp(80, port, flags, payload))
+            done += table.update(decode([frame]), now=float(step))
+        done += table.flush()
+        features = done[0].to_features() if len(done) == 1 else {}
+        got = (features.get('flag'), features.get('bytes_sent'), features.get('bytes_received'))
+        results.append(check(f"{flag}: flag={got[0]}, src_bytes={got[1]}, dst_bytes={got[2]}",
+                             got == (flag,) + expected_bytes[flag] and features.get('source_ip') == CLIENT))
+    return all(results)
+
+
+def test_pair_flows():
+    """Flux terminés agrégés par paire pour NetworkScanner, oubliés après la fenêtre"""
+    print("\n=== Agrégats par paire ===")
+    clock = [0.0]
+    pairs = PairFlows(window=60, clock=lambda: clock[0])
+    table = FlowTable(clock=lambda: 0.0)
+    done = []
+    for port in (42000, 42001, 42002):
+        done += table.update(decode([ipv4(CLIENT, SERVER, IPPROTO_TCP, tcp(port, 80, TCP_SYN))]), now=0.0)
+    done += table.update(decode([ipv4(SERVER, CLIENT, IPPROTO_TCP, tcp(80, 42002, TCP_RST | TCP_ACK))]), now=1.0)
+    done += table.flush()
+    pairs.record(flow.to_features() for flow in done)
+    summary = pairs.lookup(CLIENT, SERVER) or {}
+    clock[0] = 61.0
+    return all([
+        check(f"3 flux, flags {summary.get('flags')}", summary.get('flows') == 3
+              and summary.get('flags') == {'S0': 2, 'REJ': 1} and summary.get('flag') == 'S0'),
+        check("Paquets et octets cumulés", (summary.get('packets'), summary.get('bytes_sent')) == (4, 0)),
+        check("Sens inverse inconnu", pairs.lookup(SERVER, CLIENT) is None),
+        check("Paire oubliée après la fenêtre", pairs.lookup(CLIENT, SERVER) is None),
+    ])
+
+
+def main():
+    """Fonction principale de test"""
+    print("🔍 Test de la table de flux")
+    print("=" * 50)
+
+    tests = [
+        test_flow_flags,
+        test_pair_flows,
+    ]
+    passed = sum(1 for test in tests if test())
+
+    print("\n" + "=" * 50)
+    print(f"📊 Résultats: {passed}/{len(tests)} tests réussis")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Tests des structures probabilistes (sketches) à horloge simulée : Count-Min
+sur fenêtre glissante, top-k Space-Saving, détection de flood SYN à sources
+usurpées, HyperLogLog et suivi des scans par cardinalité (scan_tracker).
+
+    python test_sketches.py
+"""
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.dirname(__file__))
+
+from app.utils.packet_decoder import parse_ip
+from app.utils.scan_tracker import ScanTracker
+from app.utils.sketches import CardinalityTable, CountMinSketch, HyperLogLog, SketchFloodDetector, SpaceSaving
+
+
+def check(label, passed):
+    print(f"   {'✅' if passed else '❌'} {label}")
+    return passed
+
+
+def test_count_min():
+    """Estimations majorées, doublons d'un lot comptés, seaux expirés hors fenêtre"""
+    print("\n=== Count-Min Sketch ===")
+    sketch = CountMinSketch(width=1 << 10, depth=4, window=5, clock=lambda: 0.0)
+    rng = np.random.default_rng(1)
+    keys = rng.integers(0, 1 << 62, 2000, dtype=np.uint64)
+    heavy = np.uint64(12345)
+    sketch.add(np.concatenate([keys, np.full(500, heavy, dtype=np.uint64)]), now=0.0)
+    sketch.add(np.array([heavy], dtype=np.uint64), counts=np.array([100]), now=2.0)
+    estimates = sketch.estimate(keys)
+    heavy_now = int(sketch.estimate(np.array([heavy], dtype=np.uint64))[0])
+    bound = sketch.error_bound()
+    sketch.advance(now=5.5)
+    heavy_later = int(sketch.estimate(np.array([heavy], dtype=np.uint64))[0])
+    return all([
+        check("Jamais sous-estimé", bool((estimates >= 1).all()) and heavy_now >= 600),
+        check(f"Surestimation de la clé lourde ({heavy_now - 600}) dans 2·e·N/width ({2 * bound:.1f})",
+              heavy_now - 600 <= 2 * bound),
+        check("Seau de t=0 sorti de la fenêtre, seau de t=2 conservé",
+              100 <= heavy_later < 200 and sketch.count == 100),
+    ])
+
+
+def test_space_saving():
+    """Top-k : les clés fréquentes restent, une nouvelle clé hérite du minimum"""
+    print("\n=== Top-k Space-Saving ===")
+    top = SpaceSaving(k=3)
+    for key, count in (('a', 50), ('b', 30), ('c', 5)):
+        top.offer(key, count)
+    top.offer('d', 1)
+    ranked = top.top()
+    return all([
+        check("a et b gardent leur rang", [key for key, _, _ in ranked[:2]] == ['a', 'b']),
+        check("d remplace c et hérite de son compte (erreur 5)", ('d', 6, 5) in ranked and 'c' not in top.counters),
+        check("Minimum à dépasser", top.min_count() == 6),
+    ])
+
+
+def test_flood_detector():
+    """Flood SYN : deux vraies sources parmi 20 000 sources usurpées"""
+    print("\n=== Détection de flood par sketch ===")
+    detector = SketchFloodDetector(threshold=300, window=10, width=1 << 14, clock=lambda: 0.0)
+    rng = np.random.default_rng(2)
+    attackers = [parse_ip('203.0.113.7'), parse_ip('2001:db8::66')]
+    reported = []
+    for second in range(5):
+        spoofed = rng.integers(1, 1 << 32, 4000, dtype=np.uint64)
+        hi = np.concatenate([np.full(4000, 0xffff, dtype=np.uint64),
+                             np.array([attackers[0][0]] * 100 + [attackers[1][0]] * 100, dtype=np.uint64)])
+        lo = np.concatenate([spoofed, np.array([attackers[0][1]] * 100 + [attackers[1][1]] * 100, dtype=np.uint64)])
+        reported = detector.update(hi, lo, now=float(second))
+    keys = {key for key, _ in reported}
+    counts = [count for _, count in reported]
+    metrics = detector.metrics()
+    return all([
+        check("Les deux sources réelles signalées, aucune source usurpée", keys == set(attackers)),
+        check(f"Comptes estimés proches de 500 : {counts}", all(450 <= count <= 600 for count in counts)),
+        check(f"Mémoire fixe : {metrics['bytes'] // 1024} Ko pour {metrics['events']} événements",
+              metrics['bytes'] < 4 * 1024 * 1024 and metrics['top_k'] <= 64),
+    ])
+
+
+def test_hyperloglog():
+    """Cardinalités estimées à quelques pourcents, fusion, fenêtre glissante"""
+    print("\n=== HyperLogLog ===")
+    results = []
+    for distinct in (10, 1000, 100000):
+        hll = HyperLogLog(p=12)
+        # Chaque valeur vue trois fois : seules les distinctes comptent
+        hll.add(np.tile(np.arange(distinct, dtype=np.uint64), 3))
+        error = abs(hll.count() - distinct) / distinct
+        results.append(check(f"{distinct} valeurs distinctes : {hll.count()} estimées", error < 0.05))
+    left, right = HyperLogLog(p=12), HyperLogLog(p=12)
+    left.add(np.arange(0, 3000, dtype=np.uint64))
+    right.add(np.arange(2000, 5000, dtype=np.uint64))
+    results.append(check("Union de deux estimateurs (5000)", abs(left.merge(right).count() - 5000) < 250))
+
+    table = CardinalityTable('test.ports', window=60, p=10, clock=lambda: 0.0)
+    table.add('10.0.0.1', np.arange(1, 501, dtype=np.uint64), now=0.0)
+    table.add('10.0.0.1', np.arange(400, 601, dtype=np.uint64), now=40.0)
+    overlap = table.count('10.0.0.1', now=40.0)
+    table.add('10.0.0.2', np.array([80], dtype=np.uint64), now=40.0)
+    results += [
+        check(f"Demi-fenêtres courante et précédente réunies : {overlap} ports (600)", abs(overlap - 600) < 30),
+        check("Demi-fenêtre de t=0 expirée : seuls les ports de t=40 restent",
+              abs(table.count('10.0.0.1', now=70.0) - 201) < 10),
+        check("Plus d'une fenêtre sans trafic : tout est oublié", table.count('10.0.0.1', now=95.0) == 0),
+        check("Clé inconnue : 0", table.count('10.0.0.9', now=40.0) == 0),
+    ]
+    return all(results)
+
+
+def test_scan_tracker():
+    """Scan de ports, balayage d'hôtes et DDoS détectés une seule fois par fenêtre"""
+    print("\n=== Suivi des scans par cardinalité ===")
+    tracker = ScanTracker('test.scans', window=60, port_threshold=100, host_threshold=50, ddos_threshold=200,
+                          clock=lambda: 0.0)
+    port_scan = [('203.0.113.7', '192.168.1.10', port) for port in range(1, 301)]
+    sweep = [('203.0.113.8', f'192.168.1.{host}', 22) for host in range(1, 121)]
+    legit = [('198.51.100.1', '192.168.1.10', 443)] * 500
+    findings = tracker.observe(port_scan + sweep + legit, now=1.0)
+    kinds = {(f['attackType'], f['kind'], f['sourceIp']) for f in findings}
+    repeat = tracker.observe(port_scan, now=2.0)
+    ddos = tracker.observe_sources('192.168.1.20', np.arange(1, 1001, dtype=np.uint64), now=3.0)
+    return all([
+        check("Scan de ports et balayage d'hôtes signalés",
+              kinds == {('Port Scan', 'ports', '203.0.113.7'), ('Port Scan', 'hosts', '203.0.113.8')}),
+        check("Trafic légitime vers un seul port ignoré", tracker.port_count('198.51.100.1', now=1.0) == 1),
+        check("Pas de nouvelle alerte dans la fenêtre", repeat == []),
+        check(f"DDoS : {ddos and ddos['distinct']} sources distinctes",
+              ddos is not None and ddos['attackType'] == 'DDoS' and abs(ddos['distinct'] - 1000) < 50),
+    ])
+
+
+def main():
+    """Fonction principale de test"""
+    print("🔍 Test des structures probabilistes (sketches)")
+    print("=" * 50)
+
+    tests = [
+        test_count_min,
+        test_space_saving,
+        test_flood_detector,
+        test_hyperloglog,
+        test_scan_tracker,
+    ]
+    passed = sum(1 for test in tests if test())
+
+    print("\n" + "=" * 50)
+    print(f"📊 Résultats: {passed}/{len(tests)} tests réussis")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Tests de l'instantané des sockets sans netlink : analyse de réponses
+NETLINK_SOCK_DIAG synthétiques (_offsets, _records) et différence entre deux
+instantanés (SnapshotDiff).
+
+    python test_sock_diag.py
+"""
+
+import os
+import socket
+import struct
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.dirname(__file__))
+
+from app.utils.packet_decoder import IPPROTO_TCP, format_ip, parse_ip
+from app.utils.sock_diag import (DIAG_DTYPE, NLMSG_DONE, NLMSG_HEADER, SOCK_DIAG_BY_FAMILY, SOCKET_DTYPE,
+                                 STATE_CODES, SnapshotDiff, _offsets, _records, iter_connections)
+
+
+def diag_message(family, state, sport, dport, src, dst, inode, sequence=1):
+    """Message inet_diag_msg tel que rendu par le noyau (adresses IPv4 dans le premier mot de 32 bits)"""
+    message = np.zeros(1, dtype=DIAG_DTYPE)
+    message['nlmsg_len'] = DIAG_DTYPE.itemsize
+    message['nlmsg_type'] = SOCK_DIAG_BY_FAMILY
+    message['nlmsg_seq'] = sequence
+    message['family'] = family
+    message['state'] = STATE_CODES[state]
+    message['sport'] = sport
+    message['dport'] = dport
+    for column, address in (('src', src), ('dst', dst)):
+        raw = socket.inet_pton(family, address).ljust(16, b'\0')
+        message[column] = struct.unpack('>QQ', raw)
+    message['inode'] = inode
+    return message.tobytes()
+
+
+def done_message(sequence=1):
+    return NLMSG_HEADER.pack(NLMSG_HEADER.size + 4, NLMSG_DONE, 0, sequence, 0) + b'\0' * 4
+
+
+def sockets(rows):
+    """rows : (ip locale, port local, ip distante, port distant, état)"""
+    records = np.zeros(len(rows), dtype=SOCKET_DTYPE)
+    for i, (local, lport, remote, rport, state) in enumerate(rows):
+        records[i]['family'] = 6 if ':' in local else 4
+        records[i]['proto'] = IPPROTO_TCP
+        records[i]['state'] = STATE_CODES[state]
+        records[i]['lport'], records[i]['rport'] = lport, rport
+        records[i]['laddr_hi'], records[i]['laddr_lo'] = parse_ip(local)
+        records[i]['raddr_hi'], records[i]['raddr_lo'] = parse_ip(remote)
+    return records
+
+
+def check(label, passed):
+    print(f"   {'✅' if passed else '❌'} {label}")
+    return passed
+
+
+def test_offsets():
+    """Découpage d'un bloc netlink : pas constant, puis message de fin de taille différente"""
+    print("\n=== Découpage des messages netlink ===")
+    messages = [diag_message(socket.AF_INET, 'ESTABLISHED', 22, 50000 + i, '10.0.0.1', '10.0.0.2', i)
+                for i in range(3)]
+    size = DIAG_DTYPE.itemsize
+    uniform = _offsets(b''.join(messages))
+    mixed = _offsets(b''.join(messages) + done_message())
+    return all([
+        check(f"3 messages de {size} octets", uniform.tolist() == [0, size, 2 * size]),
+        check("NLMSG_DONE en fin de bloc repéré", mixed.tolist() == [0, size, 2 * size, 3 * size]),
+    ])
+
+
+def test_records():
+    """Messages inet_diag_msg -> SOCKET_DTYPE, IPv4 mappées et IPv6"""
+    print("\n=== Conversion des messages inet_diag ===")
+    chunk = (diag_message(socket.AF_INET, 'SYN_RECV', 80, 40000, '192.168.1.10', '203.0.113.7', 11)
+             + diag_message(socket.AF_INET6, 'ESTABLISHED', 443, 40001, '2001:db8::10', '2001:db8::7', 12))
+    raw = np.frombuffer(chunk, dtype=np.uint8)
+    offsets = _offsets(chunk)
+    messages = raw[offsets[:, None] + np.arange(DIAG_DTYPE.itemsize)].view(DIAG_DTYPE).ravel()
+    records = _records(messages)
+    connections = list(iter_connections(records))
+    return all([
+        check("IPv4 : adresses, ports, état SYN_RECV",
+              connections[0] == ('203.0.113.7', '192.168.1.10', 80, 40000, 'SYN_RECV') and records[0]['family'] == 4),
+        check("IPv6 : adresses 128 bits, ports, état ESTABLISHED",
+              connections[1] == ('2001:db8::7', '2001:db8::10', 443, 40001, 'ESTABLISHED')
+              and records[1]['family'] == 6),
+        check("inode conservé", records['inode'].tolist() == [11, 12]),
+        check("Adresse locale IPv4 relue", format_ip(records[0]['laddr_hi'], records[0]['laddr_lo']) == '192.168.1.10'),
+    ])
+
+
+def test_snapshot_diff():
+    """Sockets ajoutées, retirées et changées d'état entre deux instantanés"""
+    print("\n=== Différence d'instantanés ===")
+    diff = SnapshotDiff()
+    first = sockets([
+        ('192.168.1.10', 80, '203.0.113.7', 40000, 'SYN_RECV'),
+        ('192.168.1.10', 80, '203.0.113.8', 40001, 'ESTABLISHED'),
+        ('2001:db8::10', 443, '2001:db8::7', 40002, 'ESTABLISHED'),
+    ])
+    initial = diff.update(first)
+    second = sockets([
+        ('192.168.1.10', 80, '203.0.113.7', 40000, 'ESTABLISHED'),   # SYN_RECV -> ESTABLISHED
+        ('2001:db8::10', 443, '2001:db8::7', 40002, 'ESTABLISHED'),  # inchangée
+        ('192.168.1.10', 22, '203.0.113.9', 40003, 'SYN_RECV'),      # nouvelle
+    ])
+    changes = diff.update(second)
+    quiet = diff.update(second[::-1].copy())
+    return all([
+        check("Premier instantané : tout est ajouté", len(initial.added) == 3 and initial.churn == 3),
+        check("Nouvelle socket", changes.added['rport'].tolist() == [40003]),
+        check("Socket disparue", changes.removed['rport'].tolist() == [40001]),
+        check("Changement d'état avec l'état précédent",
+              changes.changed['rport'].tolist() == [40000]
+              and changes.changed['state'].tolist() == [STATE_CODES['ESTABLISHED']]
+              and changes.previous_state.tolist() == [STATE_CODES['SYN_RECV']]),
+        check("Même instantané dans un autre ordre : aucun changement", quiet.churn == 0 and len(diff) == 3),
+    ])
+
+
+def main():
+    """Fonction principale de test"""
+    print("🔍 Test de l'instantané des sockets (NETLINK_SOCK_DIAG)")
+    print("=" * 50)
+
+    tests = [
+        test_offsets,
+        test_records,
+        test_snapshot_diff,
+    ]
+    passed = sum(1 for test in tests if test())
+
+    print("\n" + "=" * 50)
+    print(f"📊 Résultats: {passed}/{len(tests)} tests réussis")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Tests des features de trafic NSL-KDD incrémentales (traffic_features) :
+fenêtre temporelle et fenêtre d'hôte comparées à un recalcul complet sur
+l'historique des connexions.
+
+    python test_traffic_features.py
+"""
+
+import os
+import random
+import sys
+
+sys.path.append(os.path.dirname(__file__))
+
+from app.utils.traffic_features import RERROR_FLAGS, SERROR_FLAGS, TRAFFIC_FEATURES, TrafficFeatureEngine
+
+
+def check(label, passed):
+    print(f"   {'✅' if passed else '❌'} {label}")
+    return passed
+
+
+def reference(history, time_window, host_window):
+    """Recalcul complet des 19 features de la dernière connexion de history (définitions NSL-KDD)"""
+    now, host, service, src_port, _ = history[-1]
+    recent = [c for c in history if c[0] > now - time_window]
+    last = history[-host_window:]
+
+    def rates(connections):
+        total = len(connections) or 1
+        return (sum(c[4] in SERROR_FLAGS for c in connections) / total,
+                sum(c[4] in RERROR_FLAGS for c in connections) / total)
+
+    same_host = [c for c in recent if c[1] == host]
+    same_srv = [c for c in recent if c[2] == service]
+    both = [c for c in same_host if c[2] == service]
+    h_host = [c for c in last if c[1] == host]
+    h_srv = [c for c in last if c[2] == service]
+    h_both = [c for c in h_host if c[2] == service]
+    return [
+        len(same_host), len(same_srv), rates(same_host)[0], rates(same_srv)[0], rates(same_host)[1],
+        rates(same_srv)[1], len(both) / len(same_host), 1 - len(both) / len(same_host),
+        (len(same_srv) - len(both)) / len(same_srv),
+        len(h_host), len(h_srv), len(h_both) / len(h_host), 1 - len(h_both) / len(h_host),
+        sum(c[3] == src_port for c in h_host) / len(h_host), (len(h_srv) - len(h_both)) / len(h_srv),
+        rates(h_host)[0], rates(h_srv)[0], rates(h_host)[1], rates(h_srv)[1],
+    ]
+
+
+def test_against_reference():
+    """3000 connexions aléatoires : mêmes valeurs que le recalcul complet"""
+    print("\n=== Fenêtres incrémentales vs recalcul ===")
+    rng = random.Random(7)
+    engine = TrafficFeatureEngine(time_window=2.0, host_window=100, clock=lambda: 0.0)
+    history = []
+    now = 0.0
+    mismatches = []
+    for i in range(3000):
+        now += rng.expovariate(40)
+        # Peu d'hôtes, de services et de ports source : les compteurs se partagent et se vident souvent
+        connection = (now, f'192.168.1.{rng.randint(1, 6)}', ('tcp', rng.choice((22, 80, 443, 8080))),
+                      rng.choice((40000, 40001, rng.randint(1024, 65535))),
+                      rng.choice(('SF', 'SF', 'S0', 'REJ', 'RSTO')))
+        history.append(connection)
+        values = engine.update(connection[1], connection[2], connection[3], connection[4], now=now)
+        expected = reference(history, 2.0, 100)
+        for name, got, want in zip(TRAFFIC_FEATURES, values, expected):
+            if abs(got - want) > 1e-9:
+                mismatches.append((i, name, got, want))
+    metrics = engine.metrics()
+    return all([
+        check(f"{len(TRAFFIC_FEATURES)} features identiques sur 3000 connexions ({len(mismatches)} écarts)",
+              not mismatches),
+        check(f"Fenêtre d'hôte bornée à 100 connexions, {metrics['time_window']} dans les 2 dernières secondes",
+              metrics['host_window'] == 100 and metrics['time_window'] < 3000),
+    ])
+
+
+def test_syn_flood():
+    """SYN flood vers un service : count, serror_rate et same_srv_rate saturent"""
+    print("\n=== SYN flood ===")
+    engine = TrafficFeatureEngine(time_window=2.0, host_window=100, clock=lambda: 0.0)
+    for i in range(300):
+        flow = engine.annotate({'destination_ip': '192.168.1.10', 'protocol': 'tcp', 'dest_port': 80,
+                                'source_port': 1024 + i, 'flag': 'S0'}, now=i * 0.005)
+    features = dict(zip(TRAFFIC_FEATURES, flow['traffic_features']))
+    later = engine.update('192.168.1.10', ('tcp', 80), 50000, 'SF', now=10.0)
+    return all([
+        check(f"count={features['count']}, serror_rate={features['serror_rate']}",
+              features['count'] == 300 and features['serror_rate'] == 1.0 and features['same_srv_rate'] == 1.0),
+        check("Fenêtre d'hôte : 100 connexions, toutes en erreur SYN",
+              features['dst_host_count'] == 100 and features['dst_host_serror_rate'] == 1.0),
+        check("connections_count renseigné pour extract_features", flow['connections_count'] == 300),
+        check("Après 10 s : fenêtre temporelle vidée, fenêtre d'hôte conservée",
+              later[0] == 1 and later[9] == 100 and abs(later[15] - 0.99) < 1e-9),
+    ])
+
+
+def main():
+    """Fonction principale de test"""
+    print("🔍 Test des features de trafic NSL-KDD")
+    print("=" * 50)
+
+    tests = [
+        test_against_reference,
+        test_syn_flood,
+    ]
+    passed = sum(1 for test in tests if test())
+
+    print("\n" + "=" * 50)
+    print(f"📊 Résultats: {passed}/{len(tests)} tests réussis")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -4,6 +4,7 @@ Script de test pour vérifier le système complet
 """
 
 import requests
+import sys
 import time
 import json
 from pathlib import Path
@@ -49,29 +50,24 @@ def test_api_endpoints():
             print(f"❌ {endpoint} - Erreur: {e}")
 
 def test_network_data():
-    """Teste le fichier de données réseau"""
-    print("\n📊 Test du fichier de données...")
+    """Teste le stockage des données réseau"""
+    print("\n📊 Test du stockage des données...")
     
-    data_file = Path('backend-flask/app/data/network_data.json')
-    
-    if data_file.exists():
-        try:
-            with open(data_file, 'r') as f:
-                data = json.load(f)
-            
-            alerts_count = len(data.get('alerts', []))
-            connections_count = len(data.get('connections', []))
-            
-            print(f"✅ Fichier de données accessible")
-            print(f"   📡 Alertes: {alerts_count}")
-            print(f"   🔗 Connexions: {connections_count}")
-            
-            return True
-        except Exception as e:
-            print(f"❌ Erreur lecture données: {e}")
-            return False
-    else:
-        print("❌ Fichier de données non trouvé")
+    try:
+        sys.path.append(str(Path('backend-flask').resolve()))
+        from app.utils.alert_store import get_alert_store
+        
+        store = get_alert_store()
+        alerts_count = store.count_alerts()
+        connections_count = store.count_connections()
+        
+        print(f"✅ Stockage de données accessible ({store.db_path})")
+        print(f"   📡 Alertes: {alerts_count}")
+        print(f"   🔗 Connexions: {connections_count}")
+        
+        return True
+    except Exception as e:
+        print(f"❌ Erreur lecture données: {e}")
         return False
 
 def test_detection_system():